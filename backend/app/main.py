@@ -1,24 +1,37 @@
-from flask import Flask, request, jsonify
+from flask import Flask, Blueprint, request, jsonify, current_app
 from flask_cors import CORS
 import os
 import sys
 from pathlib import Path
-from datetime import datetime
+from datetime import datetime, timedelta, time as dt_time
 import uuid
 import random
 import json
 import re
-from typing import List, Dict, Optional
+import hashlib
+from itertools import islice
+from typing import Any, List, Dict, Iterable, Iterator, Optional
 
 backend_dir = str(Path(__file__).resolve().parent.parent)
 sys.path.append(backend_dir)
 
 from werkzeug.utils import secure_filename
-from app.utils.file_utils import handle_file_upload, extract_tables_from_pdf
-from dateutil.parser import parse as date_parse
-from app.services.read_timetable import extract_timetable_courses, generate_tasks_for_courses
-from app.services.read_syllabi import extract_tasks_assignments_from_pdf, generate_assignment_microtasks
-
+from app.utils.file_utils import (
+    read_pdf_upload, read_pdf_batch_upload, extract_tables_from_pdf,
+    SpooledUploadRequest, DEFAULT_MAX_UPLOAD_BYTES, DEFAULT_UPLOAD_SPOOL_BYTES, DEFAULT_MAX_BATCH_FILES,
+)
+from app.utils.pdf_pool import DEFAULT_MAX_WORKERS as DEFAULT_PDF_WORKERS, PDFExtractionTimeout
+from app.utils.response_utils import parse_task_format, normalize_task_rows, wants_ndjson, ndjson_response
+from app.services.read_timetable import extract_timetable_courses, generate_tasks_for_courses, get_table_cache
+from app.services.batch import BatchValidationError, validate_batch, run_batch
+from app.services.timetable_batch import DEFAULT_PERSIST_BATCH_SIZE, iter_batch_results
+from app.services.term_registry import get_term_registry
+from app.resources import AppResources, EXTENSION_KEY
+from app.services.busy_index import BusyIndex, parse_datetime, format_datetime
+from app.services.microtask_scheduler import DEFAULT_DAY_START, DEFAULT_DAY_END, MICROTASK_MODES, MICROTASK_SCHEDULERS
+
+from database.pagination import DEFAULT_PAGE_SIZE
+from database.projection import InvalidFieldsError
 from database.users_repository import UsersRepository
 from database.tasks_repository import TasksRepository
 from database.assignments_repository import AssignmentsRepository
@@ -42,6 +55,54 @@ TASK_TYPES = [
 
 # ---------------- Gamification / Progress Helper Functions -----------------
 
+def _add_points(users_repo, user_id: str, changes: List[tuple]):
+    """Apply points changes, each (delta, reason, source_id, course_id).
+
+    With the points ledger enabled each non-zero change becomes a ledger entry,
+    and database triggers carry it onto the global, weekly and course
+    leaderboards. Otherwise their sum is added to users.total_points directly,
+    which only moves the global board (the weekly and course boards are then
+    refused by GET /db/leaderboard).
+    """
+    ledger = _resources().points_ledger
+    if ledger is None:
+        users_repo.update_points(user_id, sum(delta for delta, *_ in changes))
+    else:
+        for delta, reason, source_id, course_id in changes:
+            if delta:
+                ledger.record(user_id, delta, reason, source_id, course_id)
+
+
+def _current_points(user: Dict) -> int:
+    """A user's points, including ledger entries not yet compacted into total_points."""
+    ledger = _resources().points_ledger
+    if ledger is not None:
+        return ledger.balance(user["user_id"])
+    return user.get("total_points", 0) or 0
+
+
+def _with_current_points(users: Iterable[Dict], page_size: int = DEFAULT_PAGE_SIZE) -> Iterator[Dict]:
+    """Yield user rows with total_points replaced by _current_points, a page of balances at a time.
+
+    Rows without total_points or user_id (a fields= projection) pass through unchanged.
+    """
+    ledger = _resources().points_ledger
+    users = iter(users)
+    if ledger is None:
+        yield from users
+        return
+    while True:
+        page = list(islice(users, page_size))
+        if not page:
+            return
+        user_ids = [u["user_id"] for u in page if "total_points" in u and u.get("user_id")]
+        balances = ledger.balances(user_ids) if user_ids else {}
+        for user in page:
+            if user.get("user_id") in balances and "total_points" in user:
+                user["total_points"] = balances[user["user_id"]]
+            yield user
+
+
 def _calculate_assignment_progress_for_user(user_id: str, assignments: List[Dict]) -> List[Dict]:
     """Augment assignment rows with task_count and completed_task_count for a given user.
 
@@ -150,8 +211,7 @@ def _compute_level_progress(total_points: int, current_level: int) -> Dict:
         "points_required_for_next": max(next_min - total_points, 0),
     }
 
-app = Flask(__name__)
-CORS(app)
+api = Blueprint("api", __name__)
 
 # Fix: Use absolute path for upload folder
 def get_upload_folder():
@@ -161,10 +221,93 @@ def get_upload_folder():
     os.makedirs(upload_dir, exist_ok=True)
     return upload_dir
 
-UPLOAD_FOLDER = get_upload_folder()
+DEFAULT_CONFIG = {
+    "UPLOAD_FOLDER": None,          # resolved by get_upload_folder() when unset
+    "MAX_CONTENT_LENGTH": DEFAULT_MAX_UPLOAD_BYTES,     # larger request bodies are rejected with 413 while streaming
+    "UPLOAD_SPOOL_BYTES": DEFAULT_UPLOAD_SPOOL_BYTES,   # uploads above this spill from memory to a temp file
+    "TIMETABLE_BATCH_MAX_CONTENT_LENGTH": 200 * 1024 * 1024,  # whole /api/timetable/process-batch body
+    "TIMETABLE_BATCH_MAX_FILES": DEFAULT_MAX_BATCH_FILES,
+    "TIMETABLE_BATCH_CONCURRENCY": None,  # files in flight (and in memory) per batch; None = 2 per PDF pool worker
+    "TIMETABLE_BATCH_PERSIST_SIZE": DEFAULT_PERSIST_BATCH_SIZE,  # imports per import_timetables RPC
+    "BATCH_MAX_WORKERS": 8,         # parallel reads inside /db/batch (DB clients are pooled in DBClient)
+    "JOB_MAX_WORKERS": 2,           # background PDF/LLM jobs (see /api/jobs/<job_id>)
+    "JOB_TTL_SECONDS": 60 * 60,
+    # Where job status lives: "memory" (this worker only; run a single worker)
+    # or "database" (processing_jobs, required with several workers)
+    "JOB_STORE": os.getenv("JOB_STORE", "memory"),
+    "PDF_POOL_WORKERS": DEFAULT_PDF_WORKERS,  # processes for pdfplumber table extraction; 0 = inline
+    "PDF_POOL_MAX_TASKS_PER_CHILD": 50,       # recycle children to contain pdfplumber memory growth
+    "PDF_TIMEOUT_SECONDS": 60,
+    "PDF_MEMORY_LIMIT_MB": 1024,              # RLIMIT_AS per child process
+    # Record points changes in points_ledger (batched, write-behind) instead of
+    # updating users.total_points on every completion/purchase
+    "POINTS_LEDGER_ENABLED": os.getenv("POINTS_LEDGER_ENABLED", "false").lower() in ("1", "true", "yes"),
+    "POINTS_LEDGER_BATCH_SIZE": 500,
+    "POINTS_LEDGER_FLUSH_SECONDS": 1.0,
+    "POINTS_LEDGER_COMPACT_SECONDS": 60.0,    # fold ledger entries into users.total_points
+}
+
+
+def create_app(config: Optional[Dict[str, Any]] = None) -> Flask:
+    """
+    Build the Flask app and its shared per-worker resources.
+
+    config overrides DEFAULT_CONFIG and may inject resources (see app/resources.py),
+    e.g. create_app({"TESTING": True, "JOB_MANAGER": fake_manager}).
+    """
+    flask_app = Flask(__name__)
+    flask_app.config.update(DEFAULT_CONFIG)
+    flask_app.config.update(config or {})
+    if not flask_app.config["UPLOAD_FOLDER"]:
+        flask_app.config["UPLOAD_FOLDER"] = get_upload_folder()
+    # Uploaded PDFs stay in memory (see read_pdf_upload) instead of storage/uploads
+    flask_app.request_class = SpooledUploadRequest
+    CORS(flask_app)
+    flask_app.register_blueprint(api)
+
+    resources = AppResources(flask_app.config)
+    flask_app.extensions[EXTENSION_KEY] = resources
+    return flask_app
+
+
+def _resources() -> AppResources:
+    return current_app.extensions[EXTENSION_KEY]
+
+
+@api.app_errorhandler(413)
+def request_too_large(e):
+    limit_mb = (current_app.config.get("MAX_CONTENT_LENGTH") or 0) // (1024 * 1024)
+    return jsonify({"error": f"Request exceeds the {limit_mb} MB upload limit"}), 413
+
+
+def _fields_kwargs() -> Dict:
+    """Forward the optional `fields=` query parameter to repository reads."""
+    fields = request.args.get("fields")
+    return {"fields": fields} if fields else {}
+
+
+def _fields_with(required: List[str]):
+    """fields= for a route that itself reads the `required` columns.
+
+    Returns (repository kwargs, requested names): the kwargs select the
+    requested fields plus the required ones, and the route trims its response
+    rows back to the requested names with _project(). Both are empty/None when
+    fields= was not given.
+    """
+    fields = request.args.get("fields")
+    requested = [f.strip() for f in (fields or "").split(",") if f.strip()]
+    if not requested:
+        return {}, None
+    return {"fields": ",".join(dict.fromkeys(requested + required))}, requested
+
+
+def _project(rows: List[Dict], names: Optional[List[str]]) -> List[Dict]:
+    if names is None:
+        return rows
+    return [{k: row[k] for k in names if k in row} for row in rows]
 
 # ---------- AUTH ROUTES ----------
-@app.route("/auth/signup", methods=["POST"])
+@api.route("/auth/signup", methods=["POST"])
 def signup():
     """Create a new user account."""
     payload = request.get_json() or {}
@@ -225,7 +368,7 @@ def signup():
         return jsonify({"error": str(e)}), 500
 
 
-@app.route("/auth/login", methods=["POST"])
+@api.route("/auth/login", methods=["POST"])
 def login():
     """Authenticate user and return user info."""
     payload = request.get_json() or {}
@@ -256,7 +399,7 @@ def login():
             "canvas_username": user.get("canvas_username"),
             "canvas_domain": user.get("canvas_domain"),
             "profile_picture": user.get("profile_picture"),
-            "total_points": user.get("total_points"),
+            "total_points": _current_points(user),
             "current_level": user.get("current_level"),
             "last_activity_at": user.get("last_activity_at")
         }
@@ -271,24 +414,29 @@ def login():
 
 
 # ---------- DB ROUTES ----------
-@app.route("/db/users", methods=["GET"])
+@api.route("/db/users", methods=["GET"])
 def get_db_users():
     try:
         user_id = request.args.get("user_id")
+        fields = _fields_kwargs()
         repo = UsersRepository()
         if user_id:
-            user = repo.fetch_by_id(user_id)
+            user = repo.fetch_by_id(user_id, **fields)
             if user is None:
                 return jsonify({"error": "user not found"}), 404
-            return jsonify(user), 200
+            return jsonify(next(_with_current_points([user]))), 200
+        elif wants_ndjson(request):
+            return ndjson_response(_with_current_points(repo.iter_all(**fields)))
         else:
-            users = repo.fetch_all()
+            users = list(_with_current_points(repo.fetch_all(**fields)))
             return jsonify(users), 200
+    except InvalidFieldsError as e:
+        return jsonify({"error": str(e)}), 400
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
 
-@app.route("/db/users", methods=["POST"])
+@api.route("/db/users", methods=["POST"])
 def post_db_user():
     payload = request.get_json() or {}
     user_id = payload.get("user_id")
@@ -327,7 +475,7 @@ def post_db_user():
         return jsonify({"error": str(e)}), 500
 
 
-@app.route("/db/users/<user_id>", methods=["PUT"])
+@api.route("/db/users/<user_id>", methods=["PUT"])
 def put_db_user(user_id):
     """Update user information."""
     try:
@@ -363,7 +511,7 @@ def put_db_user(user_id):
         return jsonify({"error": str(e)}), 500
 
 
-@app.route("/db/users/<user_id>", methods=["DELETE"])
+@api.route("/db/users/<user_id>", methods=["DELETE"])
 def delete_db_user(user_id):
     try:
         repo = UsersRepository()
@@ -376,7 +524,7 @@ def delete_db_user(user_id):
         return jsonify({"error": str(e)}), 500
 
 
-@app.route("/db/users/<user_id>/figures", methods=["GET"])
+@api.route("/db/users/<user_id>/figures", methods=["GET"])
 def get_user_figures(user_id):
     """Get user's blind box figures with optional filtering and pagination."""
     limit = request.args.get("limit", type=int) or 50
@@ -403,24 +551,25 @@ def get_user_figures(user_id):
         return jsonify({"error": str(e)}), 500
 
 
-@app.route("/db/users/<user_id>/progress", methods=["GET"])
+@api.route("/db/users/<user_id>/progress", methods=["GET"])
 def get_user_progress(user_id):
     try:
         users_repo = UsersRepository()
         user = users_repo.fetch_by_id(user_id)
         if not user:
             return jsonify({"error": "User not found"}), 404
-        info = _compute_level_progress(user.get("total_points", 0), user.get("current_level", 0))
+        total_points = _current_points(user)
+        info = _compute_level_progress(total_points, user.get("current_level", 0))
         return jsonify({
             "user_id": user_id,
-            "total_points": user.get("total_points", 0),
+            "total_points": total_points,
             **info
         }), 200
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
 # ---------- TASKS ROUTES ----------
-@app.route("/db/tasks", methods=["GET"])
+@api.route("/db/tasks", methods=["GET"])
 def get_db_tasks():
     try:
         user_id = request.args.get("user_id")
@@ -431,25 +580,47 @@ def get_db_tasks():
         
         if not user_id:
             return jsonify({"error": "user_id is required"}), 400
+
+        try:
+            output = parse_task_format(request.args)
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
         
         is_completed = None
         if is_completed_str is not None:
             is_completed = is_completed_str.lower()
         
+        fields = _fields_kwargs()
         repo = TasksRepository()
+        if wants_ndjson(request):
+            return ndjson_response(repo.iter_by_user(
+                user_id=user_id,
+                scheduled_start_at=scheduled_start_at,
+                scheduled_end_at=scheduled_end_at,
+                assignment_id=assignment_id,
+                is_completed=is_completed,
+                **fields
+            ))
         tasks = repo.fetch_by_user(
             user_id=user_id,
             scheduled_start_at=scheduled_start_at,
             scheduled_end_at=scheduled_end_at,
             assignment_id=assignment_id,
-            is_completed=is_completed
+            is_completed=is_completed,
+            **fields
         )
+        if output["normalized"]:
+            courses: Dict[str, Dict] = {}
+            compact = normalize_task_rows(tasks, courses, columnar=output["columnar"])
+            return jsonify({"courses": courses, "tasks": compact}), 200
         return jsonify(tasks), 200
+    except InvalidFieldsError as e:
+        return jsonify({"error": str(e)}), 400
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
 
-@app.route("/db/tasks/combined", methods=["GET"])
+@api.route("/db/tasks/combined", methods=["GET"])
 def get_combined_tasks():
     """Optimized endpoint that returns both incomplete and completed tasks with processed metadata."""
     try:
@@ -457,10 +628,17 @@ def get_combined_tasks():
         if not user_id:
             return jsonify({"error": "user_id is required"}), 400
 
+        try:
+            output = parse_task_format(request.args)
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+
         repo = TasksRepository()
+        # The course and type filter options are built from these columns
+        fields, requested = _fields_with(["course_id", "course_name", "type"])
 
-        incomplete_tasks = repo.fetch_by_user(user_id=user_id, is_completed=False)
-        completed_tasks = repo.fetch_by_user(user_id=user_id, is_completed=True)
+        incomplete_tasks = repo.fetch_by_user(user_id=user_id, is_completed=False, **fields)
+        completed_tasks = repo.fetch_by_user(user_id=user_id, is_completed=True, **fields)
 
         all_tasks = incomplete_tasks + completed_tasks
 
@@ -497,17 +675,31 @@ def get_combined_tasks():
                     "label": task_type_info["label"] if task_type_info else task_type
                 })
 
+        incomplete_tasks = _project(incomplete_tasks, requested)
+        completed_tasks = _project(completed_tasks, requested)
+        if output["normalized"]:
+            courses: Dict[str, Dict] = {}
+            return jsonify({
+                "courses": courses,
+                "incomplete_tasks": normalize_task_rows(incomplete_tasks, courses, columnar=output["columnar"]),
+                "completed_tasks": normalize_task_rows(completed_tasks, courses, columnar=output["columnar"]),
+                "available_courses": course_options,
+                "available_task_types": task_type_options
+            }), 200
+
         return jsonify({
             "incomplete_tasks": incomplete_tasks,
             "completed_tasks": completed_tasks,
             "available_courses": course_options,
             "available_task_types": task_type_options
         }), 200
+    except InvalidFieldsError as e:
+        return jsonify({"error": str(e)}), 400
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
 
-@app.route("/db/tasks", methods=["POST"])
+@api.route("/db/tasks", methods=["POST"])
 def post_db_task():
     payload = request.get_json() or {}
     task_id = payload.get("task_id")
@@ -525,7 +717,30 @@ def post_db_task():
     if not task_id or not user_id or not description or not task_type:
         return jsonify({"error": "task_id, user_id, description, and type are required"}), 400
 
+    check_conflicts = payload.get("check_conflicts") and scheduled_start_at and scheduled_end_at
+    if check_conflicts:
+        try:
+            start, end = parse_datetime(scheduled_start_at), parse_datetime(scheduled_end_at)
+        except (TypeError, ValueError) as e:
+            return jsonify({"error": f"Invalid scheduled_start_at/scheduled_end_at: {e}"}), 400
+
     try:
+        if check_conflicts:
+            conflicts = _load_busy_index(user_id, start, end).overlapping(start, end)
+            if conflicts:
+                return jsonify({
+                    "error": "Task overlaps existing scheduled tasks",
+                    "conflicts": [
+                        {
+                            "task_id": task.get("task_id"),
+                            "description": task.get("description"),
+                            "scheduled_start_at": format_datetime(s),
+                            "scheduled_end_at": format_datetime(e)
+                        }
+                        for s, e, task in conflicts
+                    ]
+                }), 409
+
         TasksRepository().create(
             task_id=task_id,
             user_id=user_id,
@@ -544,7 +759,7 @@ def post_db_task():
         return jsonify({"error": str(e)}), 500
 
 
-@app.route("/db/tasks/<task_id>", methods=["PUT"])
+@api.route("/db/tasks/<task_id>", methods=["PUT"])
 def put_db_task(task_id):
     payload = request.get_json() or {}
     description = payload.get("description")
@@ -570,7 +785,7 @@ def put_db_task(task_id):
         return jsonify({"error": str(e)}), 500
 
 
-@app.route("/db/tasks/<task_id>/complete", methods=["POST"])
+@api.route("/db/tasks/<task_id>/complete", methods=["POST"])
 def complete_db_task(task_id):
     try:
         task_repo = TasksRepository()
@@ -588,7 +803,7 @@ def complete_db_task(task_id):
         reward_points = task.get("reward_points", 0)
         user_id = task.get("user_id")
 
-        total_points = reward_points
+        points = [(reward_points, "task_completed", task_id, task.get("course_id"))]
         
         # Check if there's an assignment and if all tasks are completed
         if assignment_id:
@@ -598,10 +813,10 @@ def complete_db_task(task_id):
                 assignment_repo.complete_assignment(assignment_id)
                 assignment = assignment_repo.fetch_by_id(assignment_id)
                 completion_points = assignment.get("completion_points", 0) if assignment else 0
-                total_points += completion_points
+                points.append((completion_points, "assignment_completed", assignment_id, (assignment or {}).get("course_id")))
 
                 if user_id:
-                    users_repo.update_points(user_id, total_points)
+                    _add_points(users_repo, user_id, points)
                 
                 if description == "Submit Assignment" and len(uncompleted_tasks) > 0:
                     # set all other tasks for this assignment to completed, but don't award points
@@ -617,7 +832,7 @@ def complete_db_task(task_id):
                 }), 200
         
         if user_id:
-            users_repo.update_points(user_id, total_points)
+            _add_points(users_repo, user_id, points)
         
         return jsonify({
             "status": "completed",
@@ -629,7 +844,7 @@ def complete_db_task(task_id):
         return jsonify({"error": str(e)}), 500
 
 
-@app.route("/db/tasks/<task_id>", methods=["DELETE"])
+@api.route("/db/tasks/<task_id>", methods=["DELETE"])
 def delete_db_task(task_id):
     try:
         repo = TasksRepository()
@@ -642,44 +857,58 @@ def delete_db_task(task_id):
         return jsonify({"error": str(e)}), 500
 
 # ---------- ASSIGNMENTS ROUTES ----------
-@app.route("/db/assignments", methods=["GET"])
+@api.route("/db/assignments", methods=["GET"])
 def get_db_assignments():
     try:
         due_date = request.args.get("due_date")
         title = request.args.get("title")
         course_id = request.args.get("course_id")
         
+        fields = _fields_kwargs()
         repo = AssignmentsRepository()
+
+        if wants_ndjson(request):
+            return ndjson_response(repo.iter_with_filters(
+                due_date=due_date,
+                title=title,
+                course_id=course_id,
+                **fields
+            ))
         
         if due_date or title or course_id:
             assignments = repo.fetch_with_filters(
                 due_date=due_date,
                 title=title,
-                course_id=course_id
+                course_id=course_id,
+                **fields
             )
         else:
-            assignments = repo.fetch_all()
+            assignments = repo.fetch_all(**fields)
         
         return jsonify(assignments), 200
+    except InvalidFieldsError as e:
+        return jsonify({"error": str(e)}), 400
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
 
-@app.route("/db/assignments/<assignment_id>", methods=["GET"])
+@api.route("/db/assignments/<assignment_id>", methods=["GET"])
 def get_db_assignment_by_id(assignment_id):
     try:
         repo = AssignmentsRepository()
-        assignment = repo.fetch_by_id(assignment_id)
+        assignment = repo.fetch_by_id(assignment_id, **_fields_kwargs())
         
         if not assignment:
             return jsonify({"error": "Assignment not found"}), 404
         
         return jsonify(assignment), 200
+    except InvalidFieldsError as e:
+        return jsonify({"error": str(e)}), 400
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
 
-@app.route("/db/assignments", methods=["POST"])
+@api.route("/db/assignments", methods=["POST"])
 def post_db_assignment():
     payload = request.get_json() or {}
     assignment_id = payload.get("assignment_id")
@@ -708,7 +937,7 @@ def post_db_assignment():
         return jsonify({"error": str(e)}), 500
 
 
-@app.route("/db/assignments/<assignment_id>", methods=["PUT"])
+@api.route("/db/assignments/<assignment_id>", methods=["PUT"])
 def put_db_assignment(assignment_id):
     payload = request.get_json() or {}
     title = payload.get("title")
@@ -732,7 +961,7 @@ def put_db_assignment(assignment_id):
         return jsonify({"error": str(e)}), 500
 
 
-@app.route("/db/assignments/<assignment_id>", methods=["DELETE"])
+@api.route("/db/assignments/<assignment_id>", methods=["DELETE"])
 def delete_db_assignment(assignment_id):
     try:
         repo = AssignmentsRepository()
@@ -745,7 +974,7 @@ def delete_db_assignment(assignment_id):
         return jsonify({"error": str(e)}), 500
 
 
-@app.route("/db/assignments/progress", methods=["GET"])
+@api.route("/db/assignments/progress", methods=["GET"])
 def get_assignment_progress():
     user_id = request.args.get("user_id")
     course_id = request.args.get("course_id")
@@ -763,25 +992,28 @@ def get_assignment_progress():
         return jsonify({"error": str(e)}), 500
 
 # ---------- COURSES ROUTES ----------
-@app.route("/db/courses", methods=["GET"])
+@api.route("/db/courses", methods=["GET"])
 def get_db_courses():
     try:
         course_id = request.args.get("course_id")
+        fields = _fields_kwargs()
         repo = CoursesRepository()
         
         if course_id:
-            course = repo.fetch_by_id(course_id)
+            course = repo.fetch_by_id(course_id, **fields)
             if course is None:
                 return jsonify({"error": "Course not found"}), 404
             return jsonify(course), 200
         else:
-            courses = repo.fetch_all()
+            courses = repo.fetch_all(**fields)
             return jsonify(courses), 200
+    except InvalidFieldsError as e:
+        return jsonify({"error": str(e)}), 400
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
 
-@app.route("/db/courses", methods=["POST"])
+@api.route("/db/courses", methods=["POST"])
 def post_db_course():
     payload = request.get_json() or {}
     course_id = payload.get("course_id")
@@ -811,7 +1043,7 @@ def post_db_course():
         return jsonify({"error": str(e)}), 500
 
 
-@app.route("/db/courses/progress", methods=["GET"])
+@api.route("/db/courses/progress", methods=["GET"])
 def get_courses_progress():
     user_id = request.args.get("user_id")
     if not user_id:
@@ -826,26 +1058,29 @@ def get_courses_progress():
         return jsonify({"error": str(e)}), 500
 
 # ---------- BLIND BOX ROUTES ----------
-@app.route("/db/blind-box-series", methods=["GET"])
+@api.route("/db/blind-box-series", methods=["GET"])
 def get_blind_box_series():
     """List all blind box series or get a specific one."""
     try:
         series_id = request.args.get("series_id")
+        fields = _fields_kwargs()
         repo = BlindBoxSeriesRepository()
         
         if series_id:
-            series = repo.fetch_by_id(series_id)
+            series = repo.fetch_by_id(series_id, **fields)
             if series is None:
                 return jsonify({"error": "Series not found"}), 404
             return jsonify(series), 200
         else:
-            series_list = repo.fetch_all()
+            series_list = repo.fetch_all(**fields)
             return jsonify(series_list), 200
+    except InvalidFieldsError as e:
+        return jsonify({"error": str(e)}), 400
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
 
-@app.route("/db/blind-box-series", methods=["POST"])
+@api.route("/db/blind-box-series", methods=["POST"])
 def post_blind_box_series():
     payload = request.get_json() or {}
     series_id = payload.get("series_id")
@@ -870,7 +1105,7 @@ def post_blind_box_series():
         return jsonify({"error": str(e)}), 500
 
 
-@app.route("/db/blind-box-series/<series_id>", methods=["DELETE"])
+@api.route("/db/blind-box-series/<series_id>", methods=["DELETE"])
 def delete_blind_box_series(series_id):
     try:
         repo = BlindBoxSeriesRepository()
@@ -883,7 +1118,7 @@ def delete_blind_box_series(series_id):
         return jsonify({"error": str(e)}), 500
 
 
-@app.route("/db/blind-box-series/affordable", methods=["GET"])
+@api.route("/db/blind-box-series/affordable", methods=["GET"])
 def get_affordable_blind_box_series():
     """Return blind box series affordable for a given user."""
     user_id = request.args.get("user_id")
@@ -895,7 +1130,7 @@ def get_affordable_blind_box_series():
         user = users_repo.fetch_by_id(user_id)
         if not user:
             return jsonify({"error": "User not found"}), 404
-        user_points = user.get("total_points", 0)
+        user_points = _current_points(user)
         affordable = series_repo.fetch_affordable_series(user_points)
         return jsonify({
             "user_id": user_id,
@@ -906,30 +1141,35 @@ def get_affordable_blind_box_series():
         return jsonify({"error": str(e)}), 500
 
 
-@app.route("/db/blind-box-figures", methods=["GET"])
+@api.route("/db/blind-box-figures", methods=["GET"])
 def get_blind_box_figures():
     """List all figures or filter by series/figure_id."""
     try:
         series_id = request.args.get("series_id")
         figure_id = request.args.get("figure_id")
+        fields = _fields_kwargs()
         repo = BlindBoxFiguresRepository()
         
         if figure_id:
-            figure = repo.fetch_by_id(figure_id)
+            figure = repo.fetch_by_id(figure_id, **fields)
             if figure is None:
                 return jsonify({"error": "Figure not found"}), 404
             return jsonify(figure), 200
+        elif wants_ndjson(request):
+            return ndjson_response(repo.iter_all(series_id=series_id, **fields))
         elif series_id:
-            figures = repo.fetch_by_series(series_id)
+            figures = repo.fetch_by_series(series_id, **fields)
             return jsonify(figures), 200
         else:
-            figures = repo.fetch_all()
+            figures = repo.fetch_all(**fields)
             return jsonify(figures), 200
+    except InvalidFieldsError as e:
+        return jsonify({"error": str(e)}), 400
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
 
-@app.route("/db/blind-box-figures", methods=["POST"])
+@api.route("/db/blind-box-figures", methods=["POST"])
 def post_blind_box_figure():
     payload = request.get_json() or {}
     figure_id = payload.get("figure_id")
@@ -954,7 +1194,7 @@ def post_blind_box_figure():
         return jsonify({"error": str(e)}), 500
 
 
-@app.route("/db/blind-box-figures/<figure_id>", methods=["DELETE"])
+@api.route("/db/blind-box-figures/<figure_id>", methods=["DELETE"])
 def delete_blind_box_figure(figure_id):
     try:
         repo = BlindBoxFiguresRepository()
@@ -967,7 +1207,7 @@ def delete_blind_box_figure(figure_id):
         return jsonify({"error": str(e)}), 500
 
 
-@app.route("/db/blind-boxes/purchase", methods=["POST"])
+@api.route("/db/blind-boxes/purchase", methods=["POST"])
 def purchase_blind_box():
     payload = request.get_json() or {}
     user_id = payload.get("user_id")
@@ -986,7 +1226,7 @@ def purchase_blind_box():
         if not user:
             return jsonify({"error": "User not found"}), 404
         
-        user_points = user.get("total_points", 0)
+        user_points = _current_points(user)
         
         if series_id:
             series = series_repo.fetch_by_id(series_id)
@@ -1011,10 +1251,9 @@ def purchase_blind_box():
         if not selected_figure:
             return jsonify({"error": "No figures available in this series"}), 404
         
-        users_repo.update_points(user_id, -series_cost)
-        
         purchase_id = str(uuid.uuid4())
         purchased_at = datetime.now().isoformat()
+        _add_points(users_repo, user_id, [(-series_cost, "blind_box_purchase", purchase_id, None)])
         
         user_boxes_repo.create(
             purchase_id=purchase_id,
@@ -1026,7 +1265,7 @@ def purchase_blind_box():
         )
         
         updated_user = users_repo.fetch_by_id(user_id)
-        new_points = updated_user.get("total_points", 0)
+        new_points = _current_points(updated_user)
         
         return jsonify({
             "status": "purchased",
@@ -1047,7 +1286,7 @@ def purchase_blind_box():
         return jsonify({"error": str(e)}), 500
 
 
-@app.route("/db/user-blind-boxes/<purchase_id>", methods=["DELETE"])
+@api.route("/db/user-blind-boxes/<purchase_id>", methods=["DELETE"])
 def delete_user_blind_box(purchase_id):
     try:
         repo = UserBlindBoxesRepository()
@@ -1060,7 +1299,7 @@ def delete_user_blind_box(purchase_id):
         return jsonify({"error": str(e)}), 500
 
 
-@app.route("/db/blind-boxes/preview", methods=["GET"])
+@api.route("/db/blind-boxes/preview", methods=["GET"])
 def preview_blind_boxes():
     """Preview blind box purchase options."""
     user_id = request.args.get("user_id")
@@ -1072,7 +1311,7 @@ def preview_blind_boxes():
         user = users_repo.fetch_by_id(user_id)
         if not user:
             return jsonify({"error": "User not found"}), 404
-        user_points = user.get("total_points", 0)
+        user_points = _current_points(user)
         affordable = series_repo.fetch_affordable_series(user_points)
         return jsonify({
             "user_id": user_id,
@@ -1082,10 +1321,43 @@ def preview_blind_boxes():
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
+# ---------- LEADERBOARD ROUTE ----------
+MAX_LEADERBOARD_LIMIT = 100
+
+
+@api.route("/db/leaderboard", methods=["GET"])
+def get_leaderboard():
+    """
+    Ranked users by points. Query params: scope (global (default), weekly or
+    course:<course_code>), limit (top N, default 10, max 100), around_user
+    (also return that user's rank and neighbours), radius (neighbours on each
+    side, default 2). Read from the trigger-maintained leaderboard_scores
+    table, not a scan of users. weekly and course scopes return 400 unless
+    POINTS_LEDGER_ENABLED, since only ledger entries feed those boards.
+    """
+    scope = request.args.get("scope", "global")
+    around_user = request.args.get("around_user")
+    try:
+        limit = int(request.args.get("limit", 10))
+        radius = int(request.args.get("radius", 2))
+    except ValueError:
+        return jsonify({"error": "limit and radius must be integers"}), 400
+    if not 1 <= limit <= MAX_LEADERBOARD_LIMIT or radius < 0:
+        return jsonify({"error": f"limit must be 1-{MAX_LEADERBOARD_LIMIT} and radius non-negative"}), 400
+    try:
+        return jsonify(_resources().leaderboard.query(scope, limit, around_user, radius)), 200
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
 # ---------- DASHBOARD ROUTE ----------
-@app.route("/db/dashboard", methods=["GET"])
+@api.route("/db/dashboard", methods=["GET"])
 def get_dashboard():
-    """Batch endpoint aggregating user, tasks, course progress."""
+    """Batch endpoint aggregating user, tasks, course progress.
+
+    fields= selects the columns of the today/upcoming task rows.
+    """
     user_id = request.args.get("user_id")
     if not user_id:
         return jsonify({"error": "user_id is required"}), 400
@@ -1097,7 +1369,8 @@ def get_dashboard():
         if not user:
             return jsonify({"error": "User not found"}), 404
         
-        tasks = tasks_repo.fetch_by_user(user_id=user_id, is_completed=False)
+        fields, requested = _fields_with(["scheduled_end_at"])   # tasks are bucketed by end time
+        tasks = tasks_repo.fetch_by_user(user_id=user_id, is_completed=False, **fields)
         today = datetime.utcnow().date()
         today_tasks = []
         upcoming_tasks = []
@@ -1117,95 +1390,297 @@ def get_dashboard():
         courses = courses_repo.fetch_all()
         user_courses = [c for c in courses if c.get("user_id") == user_id]
         course_progress = _calculate_course_progress(user_id, user_courses)
-        progress_info = _compute_level_progress(user.get("total_points", 0), user.get("current_level", 0))
+        user["total_points"] = _current_points(user)
+        progress_info = _compute_level_progress(user["total_points"], user.get("current_level", 0))
         
         notifications_unread_count = 0
         return jsonify({
             "user": user,
             "tasks": {
-                "today": today_tasks,
-                "upcoming": upcoming_tasks
+                "today": _project(today_tasks, requested),
+                "upcoming": _project(upcoming_tasks, requested)
             },
             "courses": course_progress,
             "level_progress": progress_info,
             "notifications_unread_count": notifications_unread_count
         }), 200
+    except InvalidFieldsError as e:
+        return jsonify({"error": str(e)}), 400
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+# ---------- BATCH ROUTE ----------
+@api.route("/db/batch", methods=["POST"])
+def post_db_batch():
+    """Run several /db/* sub-requests in one round trip.
+
+    Body is either an array of {"method", "path", "body"} objects or
+    {"requests": [...], "stop_on_error": true}. Results come back in the same order.
+
+    Batches are not atomic. The requested all-or-nothing option was dropped:
+    each sub-request runs its route handler, which makes its own PostgREST
+    calls (and side effects such as points ledger entries), and PostgREST
+    cannot hold a transaction across calls. Making it atomic would mean
+    re-implementing every /db/* route as one plpgsql function. stop_on_error
+    only stops after the first failing write; writes before it are kept.
+    Operations that must commit together get their own SQL function, as the
+    timetable import does with import_timetable().
+    """
+    payload = request.get_json(silent=True)
+    stop_on_error = False
+    if isinstance(payload, dict):
+        if "transaction" in payload:
+            # Renamed: earlier writes were never rolled back, so it was not a transaction
+            return jsonify({"error": "transaction is not supported; use stop_on_error (successful writes are not rolled back)"}), 400
+        stop_on_error = bool(payload.get("stop_on_error", False))
+        payload = payload.get("requests")
+    try:
+        items = validate_batch(payload)
+    except BatchValidationError as e:
+        return jsonify({"error": str(e)}), 400
+
+    flask_app = current_app._get_current_object()
+
+    def dispatch(method, path, body):
+        with flask_app.test_request_context(path, method=method, json=body):
+            response = flask_app.full_dispatch_request()
+            return {"status": response.status_code, "body": response.get_json(silent=True)}
+
+    try:
+        results = run_batch(items, dispatch, _resources().batch_executor, stop_on_error=stop_on_error)
+        return jsonify({"results": results}), 200
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
 # ---------- TIMETABLE ROUTES ----------
-@app.route("/api/timetable/process", methods=["POST"])
+@api.route("/api/terms", methods=["GET"])
+def get_terms():
+    """List the academic terms the timetable importer knows about."""
+    try:
+        return jsonify({"terms": get_term_registry().list_terms()}), 200
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+
+def _flag_param(name: str, default: bool = False) -> bool:
+    """A boolean option given in the query string or form data."""
+    value = request.args.get(name) or request.form.get(name)
+    if not value:
+        return default
+    return value.lower() in ("1", "true", "yes")
+
+
+def _wants_async() -> bool:
+    """True when the client asked for the upload to be processed as a background job."""
+    return _flag_param("async")
+
+
+def _pdf_digest(pdf_bytes: bytes) -> str:
+    return hashlib.sha256(pdf_bytes).hexdigest()
+
+
+def _dedupe_key(kind: str, *parts) -> str:
+    """Job dedupe key of a fixed length (processing_jobs.dedupe_key is VARCHAR(200)).
+
+    The request parts (which may be long, e.g. a busy_intervals list) are hashed.
+    """
+    return f"{kind}:{hashlib.sha256('|'.join(str(p) for p in parts).encode()).hexdigest()}"
+
+
+def _job_accepted(job: Dict):
+    return jsonify({
+        "deduplicated": job["deduplicated"],
+        "status": job["status"],
+        "job_id": job["job_id"],
+        "status_url": f"/api/jobs/{job['job_id']}"
+    }), 202
+
+
+def _process_timetable_file(report_progress, pdf_bytes: bytes, user_id: str, term: str, persist: bool = False, pdf_pool=None) -> Dict:
+    """Extract courses from an uploaded timetable PDF and generate class tasks.
+
+    With persist, courses and tasks are written in one transaction (replacing
+    the previous import for the user and term) and only counts and ids are
+    returned. Shared by the synchronous route and the background job (which
+    runs outside the app context, hence the explicit pdf_pool).
+    """
+    assignment_id = None
+
+    # Get schedule config for the selected term
+    from app.services.read_timetable import get_term_schedule
+    schedule_config = get_term_schedule(term)
+    original_start_date = schedule_config["original_start_date"]
+    current_date = datetime.now().date()
+    start_date = max(original_start_date.date(), current_date)
+    start_date = datetime.combine(start_date, datetime.min.time())
+    end_date = schedule_config["end_date"]
+    breaks = schedule_config["breaks"]
+    holidays = schedule_config["holidays"]
+
+    print(f"Using schedule: {start_date} to {end_date} for term {term}")  # Debug
+    report_progress(0.1)
+
+    courses = extract_timetable_courses(pdf_bytes, user_id, term, pool=pdf_pool)
+    print(f"Extracted {len(courses)} courses")  # Debug
+    report_progress(0.7)
+
+    tasks = generate_tasks_for_courses(
+        courses, user_id, assignment_id, start_date, end_date, breaks, holidays
+    )
+    print(f"Generated {len(tasks)} tasks")  # Debug
+
+    config = {
+        "user_id": user_id,
+        "term": term,
+        "assignment_id": assignment_id,
+        "start_date": start_date.isoformat(),
+        "end_date": end_date.isoformat(),
+        "breaks": [f"{b[0].isoformat()} to {b[1].isoformat()}" for b in breaks],
+        "holidays": [h.isoformat() for h in sorted(holidays)]
+    }
+
+    if persist:
+        report_progress(0.8)
+        summary = CoursesRepository().import_timetable(user_id, term, courses, tasks)
+        return _persisted_timetable(courses, tasks, config, summary)
+
+    return {
+        "status": "success",
+        "courses_found": len(courses),
+        "tasks_generated": len(tasks),
+        "courses": courses,
+        "tasks": tasks,
+        "config": config
+    }
+
+
+def _persisted_timetable(courses: List[Dict], tasks: List[Dict], config: Dict, summary: Dict) -> Dict:
+    """Response for a persisted import: counts and ids from the import_timetable summary."""
+    course_ids = summary.get("course_ids") or {}
+    return {
+        "status": "success",
+        "persisted": True,
+        "courses_found": len(courses),
+        "tasks_generated": len(tasks),
+        "courses_removed": summary.get("courses_removed", 0),
+        "courses_kept": summary.get("courses_kept", []),
+        "tasks_imported": summary.get("tasks_imported", 0),
+        "courses": [
+            {"course_id": course_ids.get(c["course_id"], c["course_id"]), "course_code": c["course_code"]}
+            for c in courses
+        ],
+        "task_ids": summary.get("task_ids", []),
+        "config": config
+    }
+
+
+def _persist_timetables(term: str, results: List[Dict]) -> List:
+    """Persist extracted batch results ({user_id, courses, tasks, config}) with one import RPC."""
+    outcomes = CoursesRepository().import_timetables(term, [
+        {"user_id": r["user_id"], "courses": r["courses"], "tasks": r["tasks"]} for r in results
+    ])
+    persisted = []
+    for result, outcome in zip(results, outcomes):
+        if outcome.get("error"):
+            persisted.append(RuntimeError(outcome["error"]))
+        else:
+            persisted.append(_persisted_timetable(result["courses"], result["tasks"], result["config"], outcome["summary"]))
+    return persisted
+
+
+def _process_syllabus_file(report_progress, resources: AppResources, pdf_bytes: bytes, course_id: Optional[str], user_id: str, busy_intervals: List[Dict], microtask_mode: str = "per_assignment", scheduler: str = "llm") -> Dict:
+    """Extract assignments/tests from an uploaded syllabus PDF and plan micro-tasks.
+
+    Shared by the synchronous route and the background job (which runs outside
+    the app context, hence the explicit resources).
+    """
+    syllabi = resources.syllabi
+    llm_client = resources.llm_client
+    extracted_data = syllabi.extract_tasks_assignments_from_pdf(
+        pdf_bytes, cache=resources.extraction_cache, llm_client=llm_client
+    )
+    report_progress(0.4)
+
+    data_with_ids = syllabi.add_ids_to_extracted_data(extracted_data, user_id=user_id, course_id=course_id)
+
+    existing_tasks = _upcoming_tasks(user_id) if scheduler != "llm" else None
+
+    assignments_with_micro = syllabi.generate_assignment_microtasks_with_ids(
+        data_with_ids["assignments"],
+        busy_intervals,
+        default_micro_task_count=3,
+        user_id=user_id,
+        mode=microtask_mode,
+        scheduler=scheduler,
+        existing_tasks=existing_tasks,
+        llm_client=llm_client
+    )
+
+    return {
+        "status": "success",
+        "course_id": course_id,
+        "assignments_found": len(assignments_with_micro["assignments"]),
+        "tasks_found": len(data_with_ids["tasks"]),
+        "total_micro_tasks": sum(len(a["micro_tasks"]) for a in assignments_with_micro["assignments"]),
+        "assignments": assignments_with_micro["assignments"],
+        "tasks": data_with_ids["tasks"]
+    }
+
+
+def _upcoming_tasks(user_id: str) -> List[Dict]:
+    """The user's incomplete tasks from now on (class sessions included), as busy time."""
+    try:
+        return TasksRepository().fetch_by_user(
+            user_id=user_id,
+            scheduled_start_at=datetime.now().isoformat(),
+            is_completed=False,
+            fields="scheduled_start_at,scheduled_end_at"
+        )
+    except Exception as e:
+        print(f"Warning: could not load existing tasks for {user_id}: {e}")
+        return []
+
+
+def _no_progress(fraction):
+    pass
+
+
+@api.route("/api/timetable/process", methods=["POST"])
 def process_timetable():
-    """Process uploaded timetable PDF and return courses and tasks."""
+    """Process uploaded timetable PDF and return courses and tasks.
+
+    With async=true the work runs as a background job and the response is
+    202 with a job_id to poll at /api/jobs/<job_id>. With persist=true the
+    courses and class tasks are saved server-side and only ids are returned.
+    """
     try:
-        filepath, error_response = handle_file_upload(request, UPLOAD_FOLDER)
+        upload, error_response = read_pdf_upload(request, current_app.config.get("MAX_CONTENT_LENGTH"))
         if error_response:
             return error_response
+        filename, pdf_bytes = upload
         
         # Get user_id and term from form data
         user_id = request.form.get("user_id", "paul_paw_test")
         term = request.form.get("term", "2025 Fall")
-        assignment_id = None
         
         print(f"Processing timetable for user: {user_id}, term: {term}")
-        print(f"Upload folder: {UPLOAD_FOLDER}")
-        print(f"File path: {filepath}")
-        
-        # Ensure we have absolute path
-        if not os.path.isabs(filepath):
-            filepath = os.path.abspath(filepath)
-        
-        # Verify file exists before processing
-        if not os.path.exists(filepath):
-            print(f"File not found at: {filepath}")
-            print(f"Directory contents: {os.listdir(os.path.dirname(filepath)) if os.path.exists(os.path.dirname(filepath)) else 'Directory does not exist'}")
-            return jsonify({"error": f"Uploaded file not found at: {filepath}"}), 404
-        
-        # Get schedule config for the selected term
-        from app.services.read_timetable import get_term_schedule
-        schedule_config = get_term_schedule(term)
-        original_start_date = schedule_config["original_start_date"]
-        current_date = datetime.now().date()
-        start_date = max(original_start_date.date(), current_date)
-        start_date = datetime.combine(start_date, datetime.min.time())
-        end_date = schedule_config["end_date"]
-        breaks = schedule_config["breaks"]
-        holidays = schedule_config["holidays"]
-        
-        print(f"Using schedule: {start_date} to {end_date} for term {term}")  # Debug
-        
-        courses = extract_timetable_courses(filepath, user_id, term)
-        print(f"Extracted {len(courses)} courses")  # Debug
-        
-        tasks = generate_tasks_for_courses(
-            courses, user_id, assignment_id, start_date, end_date, breaks, holidays
-        )
-        print(f"Generated {len(tasks)} tasks")  # Debug
-        
-        # Clean up uploaded file
-        try:
-            os.remove(filepath)
-            print(f"Cleaned up file: {filepath}")
-        except Exception as cleanup_error:
-            print(f"Warning: Could not clean up file {filepath}: {cleanup_error}")
-        
-        return jsonify({
-            "status": "success",
-            "courses_found": len(courses),
-            "tasks_generated": len(tasks),
-            "courses": courses,
-            "tasks": tasks,
-            "config": {
-                "user_id": user_id,
-                "term": term,
-                "assignment_id": assignment_id,
-                "start_date": start_date.isoformat(),
-                "end_date": end_date.isoformat(),
-                "breaks": [f"{b[0].isoformat()} to {b[1].isoformat()}" for b in breaks],
-                "holidays": [h.isoformat() for h in holidays]
-            }
-        }), 200
+        print(f"Upload: {filename} ({len(pdf_bytes)} bytes)")
+        persist = _flag_param("persist")
+        resources = _resources()
+
+        if _wants_async():
+            # The job keeps its own reference to the bytes; there is no file to clean up
+            dedupe_key = _dedupe_key("timetable", _pdf_digest(pdf_bytes), user_id, term, persist)
+            job = resources.job_manager.submit(
+                "timetable", _process_timetable_file, pdf_bytes, user_id, term, persist, resources.pdf_pool,
+                dedupe_key=dedupe_key
+            )
+            return _job_accepted(job)
+
+        return jsonify(_process_timetable_file(_no_progress, pdf_bytes, user_id, term, persist, resources.pdf_pool)), 200
         
+    except PDFExtractionTimeout as e:
+        return jsonify({"error": str(e)}), 504
     except FileNotFoundError as e:
         print(f"File not found error: {str(e)}")
         return jsonify({"error": f"File not found: {str(e)}"}), 404
@@ -1213,70 +1688,121 @@ def process_timetable():
         print(f"Error processing timetable: {str(e)}")
         return jsonify({"error": str(e)}), 500
 
+@api.route("/api/timetable/process-batch", methods=["POST"])
+def process_timetable_batch():
+    """Import many students' timetables in one request, streaming NDJSON results.
+
+    Accepts several PDFs in "files" (or one zip of PDFs) plus user ids (see
+    read_pdf_batch_upload), "term", and "persist" (default true). Files are
+    read and processed a few at a time and persisted in groups of
+    TIMETABLE_BATCH_PERSIST_SIZE; one line is written per file as it
+    finishes, then a {"summary": ...} line with throughput.
+
+    testing:
+    curl -N -X POST http://127.0.0.1:5000/api/timetable/process-batch \
+        -F "files=@cohort.zip" -F 'user_ids={"fallTimetable.pdf": "student_1"}' -F "term=2025 Fall"
+    """
+    try:
+        # A cohort's PDFs together exceed the single-upload limit
+        request.max_content_length = current_app.config["TIMETABLE_BATCH_MAX_CONTENT_LENGTH"]
+        items, error_response = read_pdf_batch_upload(
+            request, current_app.config.get("MAX_CONTENT_LENGTH"), current_app.config["TIMETABLE_BATCH_MAX_FILES"]
+        )
+        if error_response:
+            return error_response
+
+        term = request.form.get("term", "2025 Fall")
+        persist = _flag_param("persist", default=True)
+        pool = _resources().pdf_pool
+        cores = pool.max_workers if pool is not None else 1
+        concurrency = current_app.config["TIMETABLE_BATCH_CONCURRENCY"] or 2 * cores
+        print(f"Processing timetable batch: {len(items)} files, term {term}, persist={persist}")
+
+        def process(user_id, pdf_bytes):
+            return _process_timetable_file(_no_progress, pdf_bytes, user_id, term, False, pool)
+
+        def persist_group(results):
+            return _persist_timetables(term, results)
+
+        persist_batch_size = current_app.config["TIMETABLE_BATCH_PERSIST_SIZE"]
+        # The PDFs are read while the response streams, after this view returns
+        close_uploads = request.keep_files_open()
+
+        def rows():
+            try:
+                yield from iter_batch_results(
+                    items, process, concurrency, cores,
+                    persist=persist_group if persist else None, persist_batch_size=persist_batch_size,
+                )
+            finally:
+                close_uploads()
+
+        return ndjson_response(rows())
+    except Exception as e:
+        print(f"Error processing timetable batch: {str(e)}")
+        return jsonify({"error": str(e)}), 500
+
+@api.route("/api/timetable/cache", methods=["GET"])
+def get_timetable_cache_stats():
+    """Hit/miss counts of the in-memory cache of parsed timetable grids."""
+    try:
+        cache = get_table_cache()
+        if cache is None:
+            return jsonify({"enabled": False}), 200
+        return jsonify({"enabled": True, **cache.stats()}), 200
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
 # ---------- SYLLABI ROUTES ----------
-@app.route("/api/syllabi/process", methods=["POST"])
+@api.route("/api/syllabi/process", methods=["POST"])
 def process_syllabi():
     """
     Process uploaded syllabi PDF and return assignments with micro-tasks and exam/quiz tasks.
     Requires PDF file upload and optional course_id and user_id parameters.
+    With async=true the work runs as a background job (202 + job_id).
 
     testing:
     curl -X POST http://127.0.0.1:5000/api/syllabi/process \
         -F "file=@backend/app/storage/uploads/dummy.pdf" \
         -F "course_id=course_123" \
         -F "user_id=paul_paw_test" \
-        -F 'busy_intervals=[{"start": "2025-11-13T09:00:00", "end": "2025-11-13T14:00:00"}]'
+        -F 'busy_intervals=[{"start": "2025-11-13T09:00:00", "end": "2025-11-13T14:00:00"}]' \
+        -F "microtask_mode=batched"
     """
     try:
-        filepath, error_response = handle_file_upload(request, UPLOAD_FOLDER)
+        upload, error_response = read_pdf_upload(request, current_app.config.get("MAX_CONTENT_LENGTH"))
         if error_response:
             return error_response
-        
-        # Convert relative path to absolute path if needed
-        if not os.path.isabs(filepath):
-            filepath = os.path.abspath(filepath)
-        
-        # Verify file exists before processing
-        if not os.path.exists(filepath):
-            return jsonify({"error": f"Uploaded file not found at: {filepath}"}), 404
+        _, pdf_bytes = upload
         
         course_id = request.form.get("course_id")
         user_id = request.form.get("user_id", "paul_paw_test")
         
-        extracted_data = extract_tasks_assignments_from_pdf(filepath)
-        
-        from app.services.read_syllabi import add_ids_to_extracted_data, generate_assignment_microtasks_with_ids
-        data_with_ids = add_ids_to_extracted_data(extracted_data, user_id=user_id, course_id=course_id)
-        
         busy_intervals_json = request.form.get("busy_intervals", "[]")
         try:
             busy_intervals = json.loads(busy_intervals_json)
         except json.JSONDecodeError:
             busy_intervals = []
-        
-        assignments_with_micro = generate_assignment_microtasks_with_ids(
-            data_with_ids["assignments"], 
-            busy_intervals,
-            default_micro_task_count=3,
-            user_id=user_id
-        )
-        
-        # Clean up uploaded file
-        try:
-            os.remove(filepath)
-            print(f"Cleaned up file: {filepath}")
-        except Exception as cleanup_error:
-            print(f"Warning: Could not clean up file {filepath}: {cleanup_error}")
-        
-        return jsonify({
-            "status": "success",
-            "course_id": course_id,
-            "assignments_found": len(assignments_with_micro["assignments"]),
-            "tasks_found": len(data_with_ids["tasks"]),
-            "total_micro_tasks": sum(len(a["micro_tasks"]) for a in assignments_with_micro["assignments"]),
-            "assignments": assignments_with_micro["assignments"],
-            "tasks": data_with_ids["tasks"]
-        }), 200
+
+        microtask_mode = request.form.get("microtask_mode", "per_assignment")
+        if microtask_mode not in MICROTASK_MODES:
+            return jsonify({"error": f"microtask_mode must be one of: {', '.join(MICROTASK_MODES)}"}), 400
+        scheduler = request.form.get("scheduler", "llm")
+        if scheduler not in MICROTASK_SCHEDULERS:
+            return jsonify({"error": f"scheduler must be one of: {', '.join(MICROTASK_SCHEDULERS)}"}), 400
+
+        if _wants_async():
+            dedupe_key = _dedupe_key(
+                "syllabus", _pdf_digest(pdf_bytes), user_id, course_id, microtask_mode, scheduler,
+                json.dumps(busy_intervals, sort_keys=True),
+            )
+            job = _resources().job_manager.submit(
+                "syllabus", _process_syllabus_file, _resources(), pdf_bytes, course_id, user_id, busy_intervals, microtask_mode, scheduler,
+                dedupe_key=dedupe_key
+            )
+            return _job_accepted(job)
+
+        return jsonify(_process_syllabus_file(_no_progress, _resources(), pdf_bytes, course_id, user_id, busy_intervals, microtask_mode, scheduler)), 200
         
     except FileNotFoundError as e:
         print(f"File not found error: {str(e)}")
@@ -1285,7 +1811,130 @@ def process_syllabi():
         print(f"Error processing syllabi: {str(e)}")
         return jsonify({"error": str(e)}), 500
 
+@api.route("/api/syllabi/cache", methods=["GET"])
+def get_syllabus_cache_stats():
+    """Hit/miss counts and size of the syllabus extraction cache."""
+    try:
+        cache = _resources().extraction_cache
+        if cache is None:
+            return jsonify({"enabled": False}), 200
+        return jsonify({"enabled": True, **cache.stats()}), 200
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+# ---------- CANVAS ROUTES ----------
+def _sync_canvas_user(report_progress, engine, user_id: str) -> Dict:
+    return engine.sync_user(user_id)
+
+
+@api.route("/api/canvas/sync", methods=["POST"])
+def sync_canvas():
+    """
+    Pull a user's Canvas courses and assignments into courses/assignments.
+    Body: {"user_id": "..."}. Incremental: lists unchanged since the last sync
+    cost one conditional request each and write nothing. Returns sync stats;
+    with async=true the sync runs as a background job (202 + job_id).
+
+    testing:
+    curl -X POST http://127.0.0.1:5000/api/canvas/sync \
+        -H "Content-Type: application/json" -d '{"user_id": "paul_paw_test"}'
+    """
+    from app.services.canvas import CanvasError
+    from app.services.canvas_sync import CanvasSyncError
+
+    data = request.get_json(silent=True) or {}
+    user_id = data.get("user_id")
+    if not user_id:
+        return jsonify({"error": "user_id is required"}), 400
+    try:
+        engine = _resources().canvas_sync
+        if _wants_async():
+            job = _resources().job_manager.submit(
+                "canvas_sync", _sync_canvas_user, engine, user_id, dedupe_key=f"canvas_sync:{user_id}"
+            )
+            return _job_accepted(job)
+        return jsonify(_sync_canvas_user(_no_progress, engine, user_id)), 200
+    except CanvasSyncError as e:
+        return jsonify({"error": str(e)}), 400
+    except CanvasError as e:
+        return jsonify({"error": str(e), "canvas_status": e.status_code}), 502
+    except Exception as e:
+        print(f"Error syncing Canvas for {user_id}: {str(e)}")
+        return jsonify({"error": str(e)}), 500
+
+# ---------- SCHEDULE ROUTES ----------
+def _load_busy_index(user_id: str, window_start: datetime, window_end: datetime, busy_intervals: Optional[List[Dict]] = None) -> BusyIndex:
+    """Busy-time index of the user's incomplete tasks overlapping the window plus ad-hoc intervals."""
+    tasks = TasksRepository().fetch_overlapping(
+        user_id=user_id,
+        window_start=window_start.isoformat(),
+        window_end=window_end.isoformat(),
+        is_completed=False,
+        fields="task_id,description,scheduled_start_at,scheduled_end_at"
+    )
+    return BusyIndex.from_sources(busy_intervals or [], tasks)
+
+
+@api.route("/api/schedule/free-slots", methods=["GET"])
+def get_free_slots():
+    """
+    Free time for a user between start and end (default: now to 7 days later).
+    Query params: user_id (required), start, end, duration (minutes, default 60),
+    day_start/day_end (HH:MM working hours, default 09:00-21:00), limit (default 50),
+    busy_intervals (JSON array of {"start","end"} to treat as busy as well).
+    """
+    user_id = request.args.get("user_id")
+    if not user_id:
+        return jsonify({"error": "user_id is required"}), 400
+    try:
+        start = parse_datetime(request.args.get("start")) or datetime.now().replace(microsecond=0)
+        end = parse_datetime(request.args.get("end")) or start + timedelta(days=7)
+        duration = timedelta(minutes=int(request.args.get("duration", 60)))
+        limit = int(request.args.get("limit", 50))
+        day_start = dt_time.fromisoformat(request.args.get("day_start", DEFAULT_DAY_START.strftime("%H:%M")))
+        day_end = dt_time.fromisoformat(request.args.get("day_end", DEFAULT_DAY_END.strftime("%H:%M")))
+        busy_intervals = json.loads(request.args.get("busy_intervals", "[]"))
+        if not isinstance(busy_intervals, list):
+            raise ValueError("busy_intervals must be a JSON array")
+    except ValueError as e:
+        return jsonify({"error": f"Invalid parameter: {e}"}), 400
+    if end <= start or duration <= timedelta(0) or limit <= 0:
+        return jsonify({"error": "end must be after start, and duration and limit must be positive"}), 400
+
+    try:
+        index = _load_busy_index(user_id, start, end, busy_intervals)
+        slots = []
+        for slot_start, slot_end in index.free_slots(start, end, duration, day_start, day_end):
+            slots.append({
+                "start": format_datetime(slot_start),
+                "end": format_datetime(slot_end),
+                "minutes": int((slot_end - slot_start).total_seconds() // 60)
+            })
+            if len(slots) >= limit:
+                break
+        return jsonify({
+            "user_id": user_id,
+            "start": format_datetime(start),
+            "end": format_datetime(end),
+            "duration_minutes": int(duration.total_seconds() // 60),
+            "count": len(slots),
+            "slots": slots
+        }), 200
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+# ---------- JOB ROUTES ----------
+@api.route("/api/jobs/<job_id>", methods=["GET"])
+def get_job(job_id):
+    """Return status, progress and (when finished) the result of a background job."""
+    job = _resources().job_manager.get(job_id)
+    if job is None:
+        return jsonify({"error": "Job not found or expired"}), 404
+    return jsonify(job), 200
+
+app = create_app()
+
 if __name__ == "__main__":
     # Ensure upload folder exists
-    print(f"Upload folder: {UPLOAD_FOLDER}")
+    print(f"Upload folder: {app.config['UPLOAD_FOLDER']}")
     app.run(debug=True, port=5000)
\ No newline at end of file
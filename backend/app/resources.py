@@ -0,0 +1,150 @@
+"""
+Shared resources owned by one Flask app (one per worker process).
+
+create_app() builds an AppResources and stores it in
+app.extensions["achievo"]. Executors are created on first use and shut down
+by close(). One interpreter-exit hook closes every AppResources still alive
+(tracked weakly, so a discarded app can be garbage collected) and then
+releases the process-wide pooled DB clients, which no single app owns; close
+an app yourself if you discard it earlier. Any
+resource can be injected through the app config instead (JOB_MANAGER,
+BATCH_EXECUTOR, LLM_CLIENT, SYLLABUS_CACHE, SERVICES, PDF_POOL, POINTS_LEDGER,
+LEADERBOARD), which is how tests and benchmarks run fakes or several
+configurations side by side.
+Injected resources are never shut down by close(); their owner does that.
+"""
+import atexit
+import threading
+import weakref
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Optional
+
+from app.services.jobs import JobManager, build_job_store
+from app.services.leaderboard import Leaderboard
+from app.services.points_ledger import PointsLedgerWriter
+from app.services.registry import ServiceRegistry, build_service_registry
+from app.utils.pdf_pool import PDFProcessPool
+from database.db_client import DBClient
+
+EXTENSION_KEY = "achievo"
+
+_open_resources: "weakref.WeakSet[AppResources]" = weakref.WeakSet()
+
+
+def _close_at_exit():
+    for resources in list(_open_resources):
+        resources.close()
+    DBClient.reset()
+
+
+atexit.register(_close_at_exit)
+
+
+class AppResources:
+    def __init__(self, config: Dict[str, Any]):
+        self.config = config
+        self._owned = []
+        self._lock = threading.Lock()
+        self._closed = False
+        self.services: ServiceRegistry = config.get("SERVICES") or build_service_registry()
+        self._batch_executor: Optional[ThreadPoolExecutor] = config.get("BATCH_EXECUTOR")
+        self._job_manager: Optional[JobManager] = config.get("JOB_MANAGER")
+        self._llm_client = config.get("LLM_CLIENT")
+        self._extraction_cache = config.get("SYLLABUS_CACHE")
+        self._points_ledger: Optional[PointsLedgerWriter] = config.get("POINTS_LEDGER")
+        self._leaderboard: Optional[Leaderboard] = config.get("LEADERBOARD")
+        self.pdf_pool: Optional[PDFProcessPool] = config.get("PDF_POOL")
+        if self.pdf_pool is None and config.get("PDF_POOL_WORKERS"):
+            # No processes start until the first PDF is submitted
+            self.pdf_pool = PDFProcessPool(
+                max_workers=config["PDF_POOL_WORKERS"],
+                max_tasks_per_child=config["PDF_POOL_MAX_TASKS_PER_CHILD"],
+                timeout_seconds=config["PDF_TIMEOUT_SECONDS"],
+                memory_limit_mb=config["PDF_MEMORY_LIMIT_MB"],
+            )
+            self._owned.append(lambda: self.pdf_pool.shutdown(wait=False))
+        _open_resources.add(self)
+
+    @property
+    def batch_executor(self) -> ThreadPoolExecutor:
+        """Thread pool for parallel reads inside /db/batch."""
+        if self._batch_executor is None:
+            with self._lock:
+                if self._batch_executor is None:
+                    self._batch_executor = ThreadPoolExecutor(
+                        max_workers=self.config["BATCH_MAX_WORKERS"], thread_name_prefix="db-batch"
+                    )
+                    self._owned.append(lambda: self._batch_executor.shutdown(wait=True))
+        return self._batch_executor
+
+    @property
+    def job_manager(self) -> JobManager:
+        """Background job queue for slow PDF/LLM processing."""
+        if self._job_manager is None:
+            with self._lock:
+                if self._job_manager is None:
+                    self._job_manager = JobManager(
+                        max_workers=self.config["JOB_MAX_WORKERS"],
+                        store=build_job_store(self.config["JOB_STORE"], self.config["JOB_TTL_SECONDS"]),
+                    )
+                    self._owned.append(lambda: self._job_manager.shutdown(wait=False))
+        return self._job_manager
+
+    @property
+    def points_ledger(self) -> Optional[PointsLedgerWriter]:
+        """Write-behind points ledger, or None when POINTS_LEDGER_ENABLED is off."""
+        if self._points_ledger is None and self.config.get("POINTS_LEDGER_ENABLED"):
+            with self._lock:
+                if self._points_ledger is None:
+                    self._points_ledger = PointsLedgerWriter(
+                        max_batch=self.config["POINTS_LEDGER_BATCH_SIZE"],
+                        flush_interval=self.config["POINTS_LEDGER_FLUSH_SECONDS"],
+                        compact_interval=self.config["POINTS_LEDGER_COMPACT_SECONDS"],
+                    )
+                    # _close_at_exit() closes this before DBClient.reset(), so buffered entries are written
+                    self._owned.append(self._points_ledger.close)
+        return self._points_ledger
+
+    @property
+    def leaderboard(self) -> Leaderboard:
+        """Global/weekly/course rankings read from leaderboard_scores (weekly/course need the ledger)."""
+        if self._leaderboard is None:
+            ledger_enabled = self.points_ledger is not None
+            with self._lock:
+                if self._leaderboard is None:
+                    self._leaderboard = Leaderboard(ledger_enabled=ledger_enabled)
+        return self._leaderboard
+
+    @property
+    def syllabi(self):
+        """The syllabus (PDF + Gemini) service module, imported on first use."""
+        return self.services.get("syllabi")
+
+    @property
+    def canvas_sync(self):
+        """The Canvas sync engine (app.services.canvas_sync), built on first use."""
+        return self.services.get("canvas_sync")
+
+    @property
+    def llm_client(self):
+        """The Gemini client: injected, or the worker-wide client created on first use."""
+        return self._llm_client or self.syllabi.get_llm_client()
+
+    @property
+    def extraction_cache(self):
+        """Syllabus extraction cache: injected, or the worker-wide disk cache (None if disabled)."""
+        return self._extraction_cache or self.syllabi.get_extraction_cache()
+
+    def close(self):
+        """Shut down executors this object created (pooled DB clients are shared; see _close_at_exit)."""
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            owned, self._owned = self._owned, []
+        for shutdown in owned:
+            try:
+                shutdown()
+            except Exception as e:
+                print(f"Warning: error during resource shutdown: {e}")
+        _open_resources.discard(self)
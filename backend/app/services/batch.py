@@ -0,0 +1,99 @@
+"""Execution engine for POST /db/batch.
+
+A batch is a list of sub-requests ({"method", "path", "body"}) that are
+dispatched in-process against the Flask app, so a page that needs several
+resources costs the client a single HTTP round trip. Consecutive reads run in
+parallel on a shared thread pool; every write is a barrier that runs on its
+own, in order, so reads that follow a write observe it.
+
+A batch is not a transaction: each sub-request's handler makes its own
+PostgREST calls, which cannot share one. stop_on_error stops the batch after a
+failed write but keeps the writes that succeeded before it.
+"""
+from concurrent.futures import Executor
+from typing import Callable, Dict, List, Optional
+
+ALLOWED_METHODS = {"GET", "POST", "PUT", "DELETE"}
+MAX_BATCH_SIZE = 25
+
+# Status reported for sub-requests skipped after a failed write with stop_on_error
+SKIPPED_STATUS = 424
+
+
+class BatchValidationError(ValueError):
+    """Raised when the batch payload itself is malformed."""
+
+
+def validate_batch(items) -> List[Dict]:
+    """Check the batch payload and return normalized sub-requests."""
+    if not isinstance(items, list) or not items:
+        raise BatchValidationError("requests must be a non-empty array")
+    if len(items) > MAX_BATCH_SIZE:
+        raise BatchValidationError(f"a batch may contain at most {MAX_BATCH_SIZE} requests")
+    normalized = []
+    for idx, item in enumerate(items):
+        if not isinstance(item, dict):
+            raise BatchValidationError(f"requests[{idx}] must be an object")
+        method = str(item.get("method", "GET")).upper()
+        path = item.get("path")
+        if method not in ALLOWED_METHODS:
+            raise BatchValidationError(f"requests[{idx}].method must be one of: {', '.join(sorted(ALLOWED_METHODS))}")
+        if not isinstance(path, str) or not path.startswith("/db/"):
+            raise BatchValidationError(f"requests[{idx}].path must start with /db/")
+        if path.split("?", 1)[0].rstrip("/") == "/db/batch":
+            raise BatchValidationError(f"requests[{idx}] cannot be a nested batch")
+        normalized.append({"id": item.get("id", idx), "method": method, "path": path, "body": item.get("body")})
+    return normalized
+
+
+def run_batch(
+    items: List[Dict],
+    dispatch: Callable[[str, str, Optional[Dict]], Dict],
+    executor: Executor,
+    stop_on_error: bool = False,
+) -> List[Dict]:
+    """Run validated sub-requests and return one result per item, in input order.
+
+    dispatch(method, path, body) must return {"status": int, "body": ...}.
+    With stop_on_error=True the first failing write stops the batch and
+    everything after it is reported as skipped. Writes that already succeeded
+    are kept: sub-requests are separate REST calls, so nothing is rolled back.
+    """
+    results: List[Optional[Dict]] = [None] * len(items)
+    pending_reads: List[int] = []
+    aborted = False
+
+    def flush_reads():
+        futures = [
+            (i, executor.submit(dispatch, items[i]["method"], items[i]["path"], items[i]["body"]))
+            for i in pending_reads
+        ]
+        for i, future in futures:
+            results[i] = _result(items[i], _safe(future.result))
+        pending_reads.clear()
+
+    for idx, item in enumerate(items):
+        if aborted:
+            results[idx] = _result(item, {"status": SKIPPED_STATUS, "body": {"error": "skipped after failed write"}})
+            continue
+        if item["method"] == "GET":
+            pending_reads.append(idx)
+            continue
+        flush_reads()
+        outcome = _safe(lambda: dispatch(item["method"], item["path"], item["body"]))
+        results[idx] = _result(item, outcome)
+        if stop_on_error and outcome["status"] >= 400:
+            aborted = True
+    flush_reads()
+    return results
+
+
+def _safe(call: Callable[[], Dict]) -> Dict:
+    try:
+        return call()
+    except Exception as e:
+        return {"status": 500, "body": {"error": str(e)}}
+
+
+def _result(item: Dict, outcome: Dict) -> Dict:
+    return {"id": item["id"], "status": outcome["status"], "body": outcome["body"]}
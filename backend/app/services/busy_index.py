@@ -0,0 +1,228 @@
+"""
+Per-user index of busy time.
+
+Built from a user's scheduled tasks (which include generated class sessions)
+plus ad-hoc busy intervals. It answers the questions the scheduling code asks
+repeatedly:
+
+- which intervals overlap [start, end)?       overlapping()   O((k + 1) log n)
+- is [start, end) free?                         is_free()       O(log n)
+- earliest start >= t where d fits free time?  next_free()     O(log n) per busy block skipped
+- free gaps of at least d in a window          free_slots()    O(log n) plus the gaps returned
+
+Intervals are kept sorted by start in an implicit binary tree whose nodes hold
+the maximum end time below them (an augmented interval tree), so an overlap
+query only descends into subtrees that contain a hit. A separate merged view
+(disjoint busy blocks) serves the free-time queries.
+
+add() inserts into the sorted items (a list insert: O(n), but only a memmove)
+and updates the merged view in place; the max-end tree is rebuilt in O(n) on the next
+overlapping() call, so a run of adds followed by free-time queries (what the
+local scheduler does) never rebuilds it.
+"""
+from bisect import bisect_left, bisect_right, insort
+from datetime import datetime, time, timedelta
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+_TIME_FORMAT = "%Y-%m-%dT%H:%M:%S"
+
+
+def parse_datetime(value) -> Optional[datetime]:
+    """Parse an ISO timestamp (as stored in tasks or sent by clients) to a naive datetime."""
+    if value is None or value == "":
+        return None
+    if isinstance(value, datetime):
+        return value.replace(tzinfo=None)
+    text = str(value).replace("Z", "+00:00")
+    return datetime.fromisoformat(text).replace(tzinfo=None)
+
+
+def format_datetime(value: datetime) -> str:
+    return value.strftime(_TIME_FORMAT)
+
+
+class BusyIndex:
+    """Sorted busy intervals with overlap and free-slot queries."""
+
+    def __init__(self, intervals: Sequence[Tuple[datetime, datetime, Any]] = ()):
+        # (start, end, seq, payload); seq keeps sorting stable and payloads uncompared
+        self._items: List[Tuple[datetime, datetime, int, Any]] = sorted(
+            (start, end, seq, payload)
+            for seq, (start, end, payload) in enumerate(i for i in intervals if i[1] > i[0])
+        )
+        self._seq = len(self._items)
+        self._rebuild()
+
+    @classmethod
+    def from_sources(cls, busy_intervals: Sequence[Dict] = (), tasks: Sequence[Dict] = ()) -> "BusyIndex":
+        """Build from {"start","end"} busy intervals and task rows; task rows become payloads."""
+        intervals = []
+        for interval in busy_intervals or []:
+            start, end = parse_datetime(interval.get("start")), parse_datetime(interval.get("end"))
+            if start and end:
+                intervals.append((start, end, None))
+        for task in tasks or []:
+            start = parse_datetime(task.get("scheduled_start_at"))
+            end = parse_datetime(task.get("scheduled_end_at"))
+            if start and end:
+                intervals.append((start, end, task))
+        return cls(intervals)
+
+    def _rebuild(self):
+        merged: List[List[datetime]] = []
+        for start, end, _, _ in self._items:
+            if merged and start <= merged[-1][1]:
+                merged[-1][1] = max(merged[-1][1], end)
+            else:
+                merged.append([start, end])
+        self._block_starts = [m[0] for m in merged]
+        self._block_ends = [m[1] for m in merged]
+        self._tree: Optional[List[datetime]] = None
+
+    def _max_end_tree(self) -> List[datetime]:
+        """Implicit binary tree over _items: leaf i holds item i's end, inner nodes the max below."""
+        if self._tree is None:
+            size = 1
+            while size < len(self._items):
+                size *= 2
+            tree = [datetime.min] * (2 * size)
+            for i, item in enumerate(self._items):
+                tree[size + i] = item[1]
+            for node in range(size - 1, 0, -1):
+                tree[node] = max(tree[2 * node], tree[2 * node + 1])
+            self._tree = tree
+        return self._tree
+
+    def __len__(self):
+        return len(self._items)
+
+    def add(self, start: datetime, end: datetime, payload: Any = None):
+        """Mark [start, end) busy."""
+        if end <= start:
+            return
+        insort(self._items, (start, end, self._seq, payload))
+        self._seq += 1
+        self._tree = None
+        # Merge with every block it overlaps or touches (blocks are disjoint, so ends are sorted too)
+        first = bisect_left(self._block_ends, start)
+        last = bisect_right(self._block_starts, end)
+        if first < last:
+            start = min(start, self._block_starts[first])
+            end = max(end, self._block_ends[last - 1])
+        self._block_starts[first:last] = [start]
+        self._block_ends[first:last] = [end]
+
+    def overlapping(self, start: datetime, end: datetime) -> List[Tuple[datetime, datetime, Any]]:
+        """All intervals that overlap [start, end), ordered by start."""
+        if not self._items:
+            return []
+        tree = self._max_end_tree()
+        size = len(tree) // 2
+        # Only items before `last` start before `end`
+        last = bisect_left(self._items, (end,))
+        hits = []
+        # Depth-first, left child first, so hits come out in start order
+        stack = [(1, 0, size)]
+        while stack:
+            node, lo, hi = stack.pop()
+            if lo >= last or tree[node] <= start:
+                continue
+            if node >= size:
+                s, e, _, payload = self._items[lo]
+                hits.append((s, e, payload))
+                continue
+            mid = (lo + hi) // 2
+            stack.append((2 * node + 1, mid, hi))
+            stack.append((2 * node, lo, mid))
+        return hits
+
+    def busy_until(self, start: datetime, end: datetime) -> Optional[datetime]:
+        """If [start, end) overlaps busy time, return when the first overlapping block ends."""
+        i = bisect_right(self._block_starts, start) - 1
+        if i >= 0 and self._block_ends[i] > start:
+            return self._block_ends[i]
+        if i + 1 < len(self._block_starts) and self._block_starts[i + 1] < end:
+            return self._block_ends[i + 1]
+        return None
+
+    def is_free(self, start: datetime, end: datetime) -> bool:
+        return self.busy_until(start, end) is None
+
+    def next_free(
+        self,
+        earliest: datetime,
+        duration: timedelta,
+        latest_end: Optional[datetime] = None,
+        day_start: Optional[time] = None,
+        day_end: Optional[time] = None,
+    ) -> Optional[datetime]:
+        """
+        Earliest start >= earliest where duration fits in free time, optionally
+        within daily working hours [day_start, day_end) and ending by latest_end.
+        """
+        moment = earliest
+        while True:
+            if day_start is not None and day_end is not None:
+                opening = datetime.combine(moment.date(), day_start)
+                closing = datetime.combine(moment.date(), day_end)
+                if moment < opening:
+                    moment = opening
+                if moment + duration > closing:
+                    if opening + duration > closing:
+                        return None
+                    moment = datetime.combine(moment.date() + timedelta(days=1), day_start)
+                    if latest_end is not None and moment + duration > latest_end:
+                        return None
+                    continue
+            if latest_end is not None and moment + duration > latest_end:
+                return None
+            blocked_until = self.busy_until(moment, moment + duration)
+            if blocked_until is None:
+                return moment
+            moment = blocked_until
+
+    def free_slots(
+        self,
+        window_start: datetime,
+        window_end: datetime,
+        min_duration: timedelta = timedelta(0),
+        day_start: Optional[time] = None,
+        day_end: Optional[time] = None,
+    ) -> Iterator[Tuple[datetime, datetime]]:
+        """Yield maximal free (start, end) gaps of at least min_duration inside the window."""
+        for open_start, open_end in _open_periods(window_start, window_end, day_start, day_end):
+            cursor = open_start
+            i = bisect_right(self._block_starts, cursor) - 1
+            if i >= 0 and self._block_ends[i] > cursor:
+                cursor = self._block_ends[i]
+            i += 1
+            while cursor < open_end:
+                gap_end = open_end
+                if i < len(self._block_starts) and self._block_starts[i] < open_end:
+                    gap_end = self._block_starts[i]
+                if gap_end - cursor >= min_duration and gap_end > cursor:
+                    yield cursor, gap_end
+                if gap_end >= open_end:
+                    break
+                cursor = max(cursor, self._block_ends[i])
+                i += 1
+
+
+def _open_periods(
+    window_start: datetime,
+    window_end: datetime,
+    day_start: Optional[time],
+    day_end: Optional[time],
+) -> Iterator[Tuple[datetime, datetime]]:
+    """The window itself, or its intersection with each day's working hours."""
+    if day_start is None or day_end is None:
+        if window_end > window_start:
+            yield window_start, window_end
+        return
+    day = window_start.date()
+    while day <= window_end.date():
+        start = max(window_start, datetime.combine(day, day_start))
+        end = min(window_end, datetime.combine(day, day_end))
+        if end > start:
+            yield start, end
+        day += timedelta(days=1)
@@ -1,63 +1,256 @@
+"""
+Canvas LMS REST client.
 
-import requests
+CanvasClient keeps one pooled requests.Session per client, so requests to a
+Canvas domain reuse connections. It follows every `Link: rel="next"` page and
+fetches assignments for many courses concurrently, under a concurrency limit.
+
+Canvas rate-limits each token with a leaky bucket and reports what is left in
+X-Rate-Limit-Remaining. Once that drops below a low-water mark, the client
+slows itself down, more so the closer the bucket is to empty. A request
+rejected for rate limiting (403 "Rate Limit Exceeded" or 429) is retried with
+exponential backoff.
+"""
 import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Iterable, Iterator, List, Optional
+
+import requests
+from requests.adapters import HTTPAdapter
 from dotenv import load_dotenv
 
 load_dotenv()
 canvas_token = os.getenv("CANVAS_TOKEN")
-canvas_domain = "q.utoronto.ca"
+canvas_domain = os.getenv("CANVAS_DOMAIN", "q.utoronto.ca")
+
+DEFAULT_MAX_CONCURRENCY = int(os.getenv("CANVAS_MAX_CONCURRENCY", "4"))
+DEFAULT_PER_PAGE = 100
+DEFAULT_TIMEOUT_SECONDS = 30
+
+# Canvas buckets start at 700; below the low-water mark requests are spaced
+# out, up to RATE_LIMIT_MAX_DELAY seconds apart when the bucket is empty
+RATE_LIMIT_LOW_WATER = 200.0
+RATE_LIMIT_MAX_DELAY = 2.0
+RATE_LIMIT_MAX_RETRIES = 5
+RATE_LIMIT_BACKOFF_BASE = 1.0
+
+ASSIGNMENT_INCLUDES = ("all_dates", "submission")
+
+
+class CanvasError(Exception):
+    """A Canvas API request failed with a non-success status."""
+
+    def __init__(self, status_code: int, message: str, url: str = ""):
+        super().__init__(f"Canvas API {status_code} for {url}: {message}")
+        self.status_code = status_code
+        self.url = url
+
+
+def _is_rate_limited(response) -> bool:
+    if response.status_code == 429:
+        return True
+    return response.status_code == 403 and "rate limit exceeded" in response.text.lower()
+
+
+class AdaptiveThrottle:
+    """
+    Spaces requests out based on the last X-Rate-Limit-Remaining seen.
+
+    Shared by all threads of one client, since they draw from the same bucket.
+    """
+
+    def __init__(
+        self,
+        low_water: float = RATE_LIMIT_LOW_WATER,
+        max_delay: float = RATE_LIMIT_MAX_DELAY,
+        sleep: Callable[[float], None] = time.sleep,
+    ):
+        self.low_water = low_water
+        self.max_delay = max_delay
+        self.sleep = sleep
+        self.remaining: Optional[float] = None
+        self.throttled_seconds = 0.0
+        self._lock = threading.Lock()
+
+    def delay(self) -> float:
+        remaining = self.remaining
+        if remaining is None or remaining >= self.low_water or self.low_water <= 0:
+            return 0.0
+        return self.max_delay * (self.low_water - max(remaining, 0.0)) / self.low_water
+
+    def wait(self):
+        delay = self.delay()
+        if delay > 0:
+            with self._lock:
+                self.throttled_seconds += delay
+            self.sleep(delay)
+
+    def update(self, headers):
+        value = headers.get("X-Rate-Limit-Remaining")
+        if value is None:
+            return
+        try:
+            self.remaining = float(value)
+        except ValueError:
+            pass
+
+
+class CanvasClient:
+    """Client for one Canvas domain and access token."""
+
+    def __init__(
+        self,
+        domain: str,
+        token: str,
+        max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+        per_page: int = DEFAULT_PER_PAGE,
+        timeout: float = DEFAULT_TIMEOUT_SECONDS,
+        throttle: Optional[AdaptiveThrottle] = None,
+        max_retries: int = RATE_LIMIT_MAX_RETRIES,
+        backoff_base: float = RATE_LIMIT_BACKOFF_BASE,
+        sleep: Callable[[float], None] = time.sleep,
+    ):
+        # A bare domain means https; a full URL (e.g. a local fake server) is used as is
+        self.base_url = (domain if "://" in domain else f"https://{domain}").rstrip("/")
+        self.max_concurrency = max(1, max_concurrency)
+        self.per_page = per_page
+        self.timeout = timeout
+        self.throttle = throttle or AdaptiveThrottle(sleep=sleep)
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.sleep = sleep
+        self.request_count = 0
+        self._count_lock = threading.Lock()
+
+        self.session = requests.Session()
+        self.session.headers.update({"Authorization": f"Bearer {token}", "Accept": "application/json"})
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.max_concurrency)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        self.session.close()
+
+    def request(self, method: str, url: str, params=None, headers: Optional[Dict] = None) -> requests.Response:
+        """Send one request, throttled and retried on rate limiting. 304 is returned, not raised."""
+        if not url.startswith("http"):
+            url = f"{self.base_url}/api/v1/{url.lstrip('/')}"
+        attempt = 0
+        while True:
+            self.throttle.wait()
+            response = self.session.request(method, url, params=params, headers=headers, timeout=self.timeout)
+            with self._count_lock:
+                self.request_count += 1
+            self.throttle.update(response.headers)
+            if _is_rate_limited(response) and attempt < self.max_retries:
+                self.sleep(self.backoff_base * (2 ** attempt))
+                attempt += 1
+                continue
+            if response.status_code >= 400:
+                raise CanvasError(response.status_code, response.text[:200], url)
+            return response
+
+    def paginate(self, path: str, params=None) -> Iterator[Dict]:
+        """Yield every item of a list endpoint, following Link rel="next"."""
+        params = list(params.items()) if isinstance(params, dict) else list(params or [])
+        params.append(("per_page", self.per_page))
+        url = path
+        while url:
+            response = self.request("GET", url, params=params)
+            yield from response.json()
+            url = response.links.get("next", {}).get("url")
+            params = None  # the next link already carries the query string
+
+    def list_if_changed(self, path: str, params=None, etag: Optional[str] = None) -> Dict:
+        """
+        Fetch a whole list unless its first page still matches etag.
+
+        Returns {"items": [...] or None if unchanged (304), "etag": first page
+        ETag, "pages": pages fetched}. An unchanged first page only proves the
+        list unchanged when it is the only page, so callers pass etag only for
+        lists that fit on one page.
+        """
+        params = list(params.items()) if isinstance(params, dict) else list(params or [])
+        params.append(("per_page", self.per_page))
+        response = self.request("GET", path, params=params, headers={"If-None-Match": etag} if etag else None)
+        if response.status_code == 304:
+            return {"items": None, "etag": etag, "pages": 1}
+        items = list(response.json())
+        pages = 1
+        url = response.links.get("next", {}).get("url")
+        while url:
+            page = self.request("GET", url)
+            items.extend(page.json())
+            pages += 1
+            url = page.links.get("next", {}).get("url")
+        return {"items": items, "etag": response.headers.get("ETag"), "pages": pages}
+
+    def get_courses(self, **params) -> List[Dict]:
+        """All courses for the token's user."""
+        return list(self.paginate("courses", params))
+
+    def get_assignments(self, course_id) -> List[Dict]:
+        """All assignments of a course, with override dates and the user's submission."""
+        params = [("include[]", include) for include in ASSIGNMENT_INCLUDES]
+        return list(self.paginate(f"courses/{course_id}/assignments", params))
+
+    def get_assignments_for_courses(self, course_ids: Iterable) -> Dict:
+        """{course_id: assignments} for many courses, fetched max_concurrency at a time."""
+        course_ids = list(course_ids)
+        if not course_ids:
+            return {}
+        workers = min(self.max_concurrency, len(course_ids))
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="canvas") as executor:
+            results = executor.map(self.get_assignments, course_ids)
+            return dict(zip(course_ids, results))
+
+    def assignments_if_changed(self, etags: Dict) -> Dict:
+        """{course_id: list_if_changed result} for {course_id: etag or None}, fetched concurrently."""
+        if not etags:
+            return {}
+        params = [("include[]", include) for include in ASSIGNMENT_INCLUDES]
+
+        def fetch(course_id):
+            return self.list_if_changed(f"courses/{course_id}/assignments", params, etags[course_id])
+
+        course_ids = list(etags)
+        with ThreadPoolExecutor(max_workers=min(self.max_concurrency, len(course_ids)), thread_name_prefix="canvas") as executor:
+            return dict(zip(course_ids, executor.map(fetch, course_ids)))
+
+
+def _default_client() -> CanvasClient:
+    return CanvasClient(canvas_domain, canvas_token)
+
 
 def get_courses():
     """Fetch all courses for the user associated with the token."""
-    url = f"https://{canvas_domain}/api/v1/courses"
-    headers = {"Authorization": f"Bearer {canvas_token}"}
-    params = {"per_page": 100}
-    all_courses = []
-    while url:
-        response = requests.get(url, headers=headers, params=params)
-        if response.status_code != 200:
-            print("Error:", response.text)
-            break
-        all_courses.extend(response.json())
-        # Look for next page in "Link" header
-        links = response.headers.get("Link", "")
-        next_url = None
-        for link in links.split(","):
-            if 'rel="next"' in link:
-                next_url = link[link.find("<")+1:link.find(">")]
-                break
-        url = next_url  # None if no "next" found
-        params = None  # Only needed for first request
-    return all_courses
+    with _default_client() as client:
+        return client.get_courses()
 
 def get_assignments(course_id):
     """Fetch all assignments for a given course."""
-    url = f"https://{canvas_domain}/api/v1/courses/{course_id}/assignments"
-    headers = {"Authorization": f"Bearer {canvas_token}"}
-    params = [
-        ("include[]", "all_dates"),
-        ("include[]", "submission")
-    ]
-    response = requests.get(url, headers=headers, params=params)
-    if response.status_code == 200:
-        return response.json()
-    else:
-        print("Error:", response.text)
-        return None
+    with _default_client() as client:
+        return client.get_assignments(course_id)
 
 # Example usage:
 if __name__ == "__main__":
-    courses = get_courses()
-    print(f"Total courses found: {len(courses)}")
-    for course in courses:
-        print(course.get("name"), course.get("id"))
-
-    # Get assignments for a specific course (replace with a real course_id)
-    if courses:
-        first_course_id = courses[0].get("id")
-        assignments = get_assignments(first_course_id)
-        if assignments:
-            for assignment in assignments:
+    with _default_client() as client:
+        courses = client.get_courses()
+        print(f"Total courses found: {len(courses)}")
+        for course in courses:
+            print(course.get("name"), course.get("id"))
+
+        assignments_by_course = client.get_assignments_for_courses(c["id"] for c in courses)
+        for course in courses:
+            for assignment in assignments_by_course[course["id"]]:
                 print(f"Assignment: {assignment['name']}")
                 print(f"  Due at: {assignment.get('due_at')}")
                 # Print any per-group or override due dates
@@ -70,4 +263,5 @@ if __name__ == "__main__":
                     print(f"  Submission status: {submission.get('workflow_state')}")
                     print(f"  Submitted at: {submission.get('submitted_at')}")
                 else:
-                    print("  Submission status: No submission information")
\ No newline at end of file
+                    print("  Submission status: No submission information")
+        print(f"{client.request_count} requests, throttled {client.throttle.throttled_seconds:.1f}s")
@@ -0,0 +1,223 @@
+"""
+Incremental Canvas -> DB sync for one user.
+
+Uses the user's stored canvas_domain / canvas_api_key. Every Canvas list the
+sync reads (the course list, and each course's assignments) has a cursor row
+in canvas_sync_cursors holding the ETag of its first page. The next sync sends
+it as If-None-Match, so an unchanged list costs one conditional request and
+no DB writes. Changed lists are diffed against courses.canvas_course_id /
+assignments.canvas_assignment_id, and only new or modified rows are upserted,
+in batches.
+
+The sync route and the sync worker may run for the same user at once. Rows
+are upserted on their Canvas ids (unique in the schema), and a new row's id is
+derived from its Canvas id, so two syncs that both see a course as new write
+the same row with the same course_id instead of two rows.
+"""
+import time
+import uuid
+from datetime import datetime, timezone
+from typing import Callable, Dict, List, Optional
+
+from app.services.canvas import CanvasClient
+from database.assignments_repository import AssignmentsRepository
+from database.canvas_sync_cursors_repository import CanvasSyncCursorsRepository
+from database.courses_repository import CoursesRepository
+from database.users_repository import UsersRepository
+
+COURSES_RESOURCE = "courses"
+COURSE_PARAMS = [("enrollment_state", "active"), ("include[]", "term")]
+
+
+class CanvasSyncError(Exception):
+    """The user cannot be synced (unknown user or no Canvas credentials)."""
+
+
+def assignments_resource(canvas_course_id) -> str:
+    return f"course:{canvas_course_id}:assignments"
+
+
+def _parse_timestamp(value) -> Optional[datetime]:
+    if not value:
+        return None
+    parsed = datetime.fromisoformat(str(value).replace("Z", "+00:00"))
+    return parsed if parsed.tzinfo else parsed.replace(tzinfo=timezone.utc)
+
+
+def _newest_updated_at(items: List[Dict]) -> Optional[str]:
+    stamps = [_parse_timestamp(item.get("updated_at")) for item in items]
+    stamps = [s for s in stamps if s is not None]
+    return max(stamps).isoformat() if stamps else None
+
+
+def canvas_course_row_id(user_id: str, canvas_course_id: str) -> str:
+    """course_id for a Canvas course stored for the first time."""
+    return str(uuid.uuid5(uuid.NAMESPACE_URL, f"canvas-course:{user_id}:{canvas_course_id}"))
+
+
+def canvas_assignment_row_id(course_id: str, canvas_assignment_id: str) -> str:
+    """assignment_id for a Canvas assignment stored for the first time."""
+    return str(uuid.uuid5(uuid.NAMESPACE_URL, f"canvas-assignment:{course_id}:{canvas_assignment_id}"))
+
+
+def _usable_etag(cursor: Optional[Dict]) -> Optional[str]:
+    """A stored ETag proves a list unchanged only if the list fit on one page."""
+    if cursor and cursor.get("etag") and (cursor.get("page_count") or 1) == 1:
+        return cursor["etag"]
+    return None
+
+
+def diff_courses(user_id: str, canvas_courses: List[Dict], existing: List[Dict]) -> List[Dict]:
+    """Course rows to upsert: Canvas courses that are new or whose name/code/term changed."""
+    by_canvas_id = {str(row["canvas_course_id"]): row for row in existing}
+    rows = []
+    for course in canvas_courses:
+        canvas_id = str(course["id"])
+        term = (course.get("term") or {}).get("name")
+        row = {
+            "course_id": (by_canvas_id[canvas_id]["course_id"] if canvas_id in by_canvas_id
+                          else canvas_course_row_id(user_id, canvas_id)),
+            "user_id": user_id,
+            "course_name": (course.get("name") or course.get("course_code") or canvas_id)[:255],
+            "course_code": (course.get("course_code") or "")[:50] or None,
+            "canvas_course_id": canvas_id,
+            "term": term[:50] if term else None,
+        }
+        current = by_canvas_id.get(canvas_id)
+        if current is None or any(current.get(k) != row[k] for k in ("course_name", "course_code", "term")):
+            rows.append(row)
+    return rows
+
+
+def diff_assignments(course_id: str, canvas_assignments: List[Dict], existing: List[Dict]) -> List[Dict]:
+    """
+    Assignment rows to upsert for one course: new or changed title/due date.
+    Assignments without a due date are skipped (assignments.due_date is required).
+    """
+    by_canvas_id = {str(row["canvas_assignment_id"]): row for row in existing}
+    rows = []
+    for assignment in canvas_assignments:
+        due = _parse_timestamp(assignment.get("due_at"))
+        if due is None:
+            continue
+        canvas_id = str(assignment["id"])
+        current = by_canvas_id.get(canvas_id)
+        row = {
+            "assignment_id": current["assignment_id"] if current else canvas_assignment_row_id(course_id, canvas_id),
+            "course_id": course_id,
+            "canvas_assignment_id": canvas_id,
+            "title": (assignment.get("name") or canvas_id)[:255],
+            "due_date": due.isoformat(),
+        }
+        if current is None or current.get("title") != row["title"] or _parse_timestamp(current.get("due_date")) != due:
+            rows.append(row)
+    return rows
+
+
+class CanvasSyncEngine:
+    def __init__(
+        self,
+        users: Optional[UsersRepository] = None,
+        courses: Optional[CoursesRepository] = None,
+        assignments: Optional[AssignmentsRepository] = None,
+        cursors: Optional[CanvasSyncCursorsRepository] = None,
+        client_factory: Callable[..., CanvasClient] = CanvasClient,
+        clock: Callable[[], float] = time.perf_counter,
+    ):
+        self.users = users or UsersRepository()
+        self.courses = courses or CoursesRepository()
+        self.assignments = assignments or AssignmentsRepository()
+        self.cursors = cursors or CanvasSyncCursorsRepository()
+        self.client_factory = client_factory
+        self.clock = clock
+
+    def sync_user(self, user_id: str, client: Optional[CanvasClient] = None) -> Dict:
+        """
+        Bring one user's Canvas courses and assignments up to date.
+
+        Returns stats: requests, not_modified (lists answered 304),
+        courses_upserted, assignments_upserted, assignments_skipped (no due
+        date) and duration_seconds. A client may be passed in (e.g. with a
+        shared throttle); otherwise one is built from the stored credentials.
+        """
+        start = self.clock()
+        credentials = self.users.fetch_canvas_credentials(user_id)
+        if not credentials:
+            raise CanvasSyncError(f"User not found: {user_id}")
+        if not credentials.get("canvas_domain") or not credentials.get("canvas_api_key"):
+            raise CanvasSyncError(f"User {user_id} has no Canvas domain/API key")
+
+        owns_client = client is None
+        if owns_client:
+            client = self.client_factory(credentials["canvas_domain"], credentials["canvas_api_key"])
+        try:
+            stats = self._sync(user_id, client)
+        finally:
+            if owns_client:
+                client.close()
+        stats["duration_seconds"] = round(self.clock() - start, 3)
+        return stats
+
+    def _sync(self, user_id: str, client: CanvasClient) -> Dict:
+        requests_before = client.request_count
+        cursors = self.cursors.fetch_by_user(user_id)
+        synced_at = datetime.now(timezone.utc).isoformat()
+        new_cursors = []
+        not_modified = 0
+
+        def record(resource, result, items):
+            new_cursors.append({
+                "user_id": user_id,
+                "resource": resource,
+                "etag": result["etag"],
+                "page_count": result["pages"],
+                "last_updated_at": _newest_updated_at(items),
+                "synced_at": synced_at,
+            })
+
+        existing_courses = self.courses.fetch_canvas_courses(user_id)
+        listing = client.list_if_changed("courses", COURSE_PARAMS, _usable_etag(cursors.get(COURSES_RESOURCE)))
+        course_rows = []
+        if listing["items"] is None:
+            not_modified += 1
+            canvas_course_ids = [str(row["canvas_course_id"]) for row in existing_courses]
+        else:
+            record(COURSES_RESOURCE, listing, listing["items"])
+            canvas_course_ids = [str(course["id"]) for course in listing["items"]]
+            course_rows = diff_courses(user_id, listing["items"], existing_courses)
+            self.courses.upsert_many(course_rows)
+
+        # DB course id for every Canvas course, including ones just inserted
+        course_ids = {str(row["canvas_course_id"]): row["course_id"] for row in existing_courses}
+        course_ids.update({row["canvas_course_id"]: row["course_id"] for row in course_rows})
+
+        results = client.assignments_if_changed({
+            canvas_id: _usable_etag(cursors.get(assignments_resource(canvas_id)))
+            for canvas_id in canvas_course_ids
+        })
+        changed = {canvas_id: r for canvas_id, r in results.items() if r["items"] is not None}
+        not_modified += len(results) - len(changed)
+
+        existing_assignments: Dict[str, List[Dict]] = {}
+        for row in self.assignments.fetch_canvas_assignments([course_ids[c] for c in changed]):
+            existing_assignments.setdefault(row["course_id"], []).append(row)
+        assignment_rows = []
+        skipped = 0
+        for canvas_id, result in changed.items():
+            course_id = course_ids[canvas_id]
+            rows = diff_assignments(course_id, result["items"], existing_assignments.get(course_id, []))
+            skipped += sum(1 for a in result["items"] if not a.get("due_at"))
+            assignment_rows.extend(rows)
+            record(assignments_resource(canvas_id), result, result["items"])
+        self.assignments.upsert_many(assignment_rows)
+
+        # Cursors last: a failed run leaves the old ETags, so it is retried in full
+        self.cursors.upsert_many(new_cursors)
+        return {
+            "user_id": user_id,
+            "requests": client.request_count - requests_before,
+            "not_modified": not_modified,
+            "courses_upserted": len(course_rows),
+            "assignments_upserted": len(assignment_rows),
+            "assignments_skipped": skipped,
+        }
@@ -0,0 +1,214 @@
+"""Background job queue for slow upload processing.
+
+Routes hand a job function to JobManager.submit() and immediately return the
+job id; a bounded worker pool runs the function and clients poll
+GET /api/jobs/<job_id> for status, progress and the result. Finished jobs are
+kept for a TTL, and jobs submitted with the same dedupe key within that window
+return the existing job instead of running the work again.
+
+Job state lives in a store. MemoryJobStore keeps it in this process, which is
+only correct with a single app worker: under several gunicorn workers a poll
+lands on whichever worker accepts it. DatabaseJobStore keeps it in the
+processing_jobs table, so any worker can answer the poll; the job itself still
+runs on the worker that accepted the upload.
+
+The pool runs threads. Gemini calls wait on the network, and pdfplumber table
+extraction is CPU-bound but runs in the PDF process pool (app/utils/pdf_pool.py),
+so a job thread mostly waits on other processes and does not hold the GIL.
+"""
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+from typing import Callable, Dict, Optional
+
+from database.jobs_repository import JobsRepository
+
+QUEUED = "queued"
+RUNNING = "running"
+SUCCEEDED = "succeeded"
+FAILED = "failed"
+
+DEFAULT_MAX_WORKERS = 2
+DEFAULT_TTL_SECONDS = 60 * 60
+
+JOB_STORES = ("memory", "database")
+
+
+def _now_iso() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+
+class MemoryJobStore:
+    """Job state in a dict of this process (single app worker only)."""
+
+    def __init__(self, ttl_seconds: float = DEFAULT_TTL_SECONDS, clock: Callable[[], float] = time.monotonic):
+        self._ttl = ttl_seconds
+        self._clock = clock
+        self._jobs: Dict[str, Dict] = {}
+        self._finished_at: Dict[str, float] = {}
+        self._by_key: Dict[str, str] = {}
+        self._lock = threading.Lock()
+
+    def create(self, job: Dict, dedupe_key: Optional[str] = None) -> Optional[Dict]:
+        """Store a new job, or return the live job holding dedupe_key (and store nothing)."""
+        with self._lock:
+            self._purge_expired()
+            if dedupe_key is not None:
+                existing_id = self._by_key.get(dedupe_key)
+                existing = self._jobs.get(existing_id) if existing_id else None
+                if existing is not None and existing["status"] != FAILED:
+                    return dict(existing)
+            self._jobs[job["job_id"]] = dict(job)
+            if dedupe_key is not None:
+                self._by_key[dedupe_key] = job["job_id"]
+            return None
+
+    def get(self, job_id: str) -> Optional[Dict]:
+        with self._lock:
+            self._purge_expired()
+            job = self._jobs.get(job_id)
+            return dict(job) if job is not None else None
+
+    def update(self, job_id: str, **fields):
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is not None:
+                job.update(fields)
+
+    def finish(self, job_id: str, **fields):
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is not None:
+                job.update(fields, finished_at=_now_iso())
+                self._finished_at[job_id] = self._clock()
+
+    def _purge_expired(self):
+        """Drop finished jobs older than the TTL. Caller holds the lock."""
+        cutoff = self._clock() - self._ttl
+        expired = [job_id for job_id, done in self._finished_at.items() if done < cutoff]
+        for job_id in expired:
+            self._finished_at.pop(job_id, None)
+            self._jobs.pop(job_id, None)
+        if expired:
+            expired_ids = set(expired)
+            self._by_key = {k: v for k, v in self._by_key.items() if v not in expired_ids}
+
+
+class DatabaseJobStore:
+    """Job state in the processing_jobs table, shared by every app worker.
+
+    Two workers deduplicating the same upload at the same instant can both
+    start a job; that only repeats work, each poll still sees its own job.
+    """
+
+    def __init__(self, repo: Optional[JobsRepository] = None, ttl_seconds: float = DEFAULT_TTL_SECONDS):
+        self.repo = repo or JobsRepository()
+        self._ttl = ttl_seconds
+
+    def create(self, job: Dict, dedupe_key: Optional[str] = None) -> Optional[Dict]:
+        now = datetime.now(timezone.utc)
+        self.repo.delete_expired(now.isoformat())
+        if dedupe_key is not None:
+            existing = self.repo.fetch_live_by_dedupe_key(dedupe_key, now.isoformat())
+            if existing is not None:
+                return existing
+        # Expires even if the worker running it dies; finish() extends it
+        expires_at = (now + timedelta(seconds=self._ttl)).isoformat()
+        self.repo.insert({**job, "dedupe_key": dedupe_key, "expires_at": expires_at})
+        return None
+
+    def get(self, job_id: str) -> Optional[Dict]:
+        job = self.repo.fetch_by_id(job_id)
+        if job is None:
+            return None
+        expires_at = job.get("expires_at")
+        if expires_at and datetime.fromisoformat(expires_at) <= datetime.now(timezone.utc):
+            return None
+        return job
+
+    def update(self, job_id: str, **fields):
+        self.repo.update(job_id, fields)
+
+    def finish(self, job_id: str, **fields):
+        now = datetime.now(timezone.utc)
+        expires_at = (now + timedelta(seconds=self._ttl)).isoformat()
+        self.repo.update(job_id, {**fields, "finished_at": now.isoformat(), "expires_at": expires_at})
+
+
+def build_job_store(kind: str, ttl_seconds: float = DEFAULT_TTL_SECONDS):
+    """The JOB_STORE config value as a store: "memory" or "database"."""
+    if kind == "database":
+        return DatabaseJobStore(ttl_seconds=ttl_seconds)
+    if kind == "memory":
+        return MemoryJobStore(ttl_seconds=ttl_seconds)
+    raise ValueError(f"JOB_STORE must be one of: {', '.join(JOB_STORES)}")
+
+
+class JobManager:
+    """Runs job functions on a worker pool and tracks their state in a store.
+
+    A job function is called as fn(report_progress, *args, **kwargs), where
+    report_progress(fraction) records progress in [0, 1]. Its return value
+    becomes the job result; an exception marks the job failed.
+    """
+
+    def __init__(
+        self,
+        max_workers: int = DEFAULT_MAX_WORKERS,
+        ttl_seconds: float = DEFAULT_TTL_SECONDS,
+        clock: Callable[[], float] = time.monotonic,
+        store=None,
+    ):
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="jobs")
+        self.store = store or MemoryJobStore(ttl_seconds=ttl_seconds, clock=clock)
+
+    def submit(self, kind: str, fn: Callable, *args, dedupe_key: Optional[str] = None, **kwargs) -> Dict:
+        """Queue fn and return a snapshot of the job.
+
+        If a live job with the same dedupe_key exists, fn is not queued and that
+        job's snapshot is returned with "deduplicated": True.
+        """
+        job_id = str(uuid.uuid4())
+        job = {
+            "job_id": job_id,
+            "kind": kind,
+            "status": QUEUED,
+            "progress": 0.0,
+            "result": None,
+            "error": None,
+            "created_at": _now_iso(),
+            "started_at": None,
+            "finished_at": None,
+        }
+        existing = self.store.create(job, dedupe_key)
+        if existing is not None:
+            return dict(self._public(existing), deduplicated=True)
+        self._executor.submit(self._run, job_id, fn, args, kwargs)
+        return dict(job, deduplicated=False)
+
+    def get(self, job_id: str) -> Optional[Dict]:
+        """Return a snapshot of the job, or None if unknown or expired."""
+        job = self.store.get(job_id)
+        return self._public(job) if job is not None else None
+
+    def shutdown(self, wait: bool = True):
+        self._executor.shutdown(wait=wait, cancel_futures=not wait)
+
+    @staticmethod
+    def _public(job: Dict) -> Dict:
+        return {k: v for k, v in job.items() if k not in ("dedupe_key", "expires_at")}
+
+    def _run(self, job_id: str, fn: Callable, args, kwargs):
+        self.store.update(job_id, status=RUNNING, started_at=_now_iso())
+
+        def report_progress(fraction: float):
+            self.store.update(job_id, progress=round(max(0.0, min(float(fraction), 1.0)), 3))
+
+        try:
+            result = fn(report_progress, *args, **kwargs)
+        except Exception as e:
+            self.store.finish(job_id, status=FAILED, error=str(e))
+        else:
+            self.store.finish(job_id, status=SUCCEEDED, result=result, progress=1.0)
@@ -0,0 +1,89 @@
+"""
+Leaderboards: global, weekly and per-course.
+
+Scores live in the leaderboard_scores table, one row per (board, user). Triggers
+on points_ledger and users.total_points update the rows a points change counts
+toward as it is written, so boards are never rebuilt and every worker sees the
+same ranking. With the index on (scope, points DESC, user_id), top N is an
+index range read and a rank counts the entries above it; one request is one
+leaderboard_page() call. Ranks are competition-style: users with equal points
+share a rank, and the next rank skips accordingly (1, 2, 2, 4).
+
+Course boards are keyed by course_code, since every student has their own
+courses row for a shared course. Each week (from Monday 00:00 UTC) has its own
+board. Course and weekly boards are fed by points_ledger only (a direct
+users.total_points change carries no course or time), so without
+POINTS_LEDGER_ENABLED they would stay empty and are refused instead; points
+still buffered in a worker appear once flushed.
+"""
+from datetime import datetime, timedelta, timezone
+from typing import Callable, Dict, List, Optional
+
+from database.leaderboard_repository import LeaderboardRepository
+
+GLOBAL = "global"
+WEEKLY = "weekly"
+COURSE_PREFIX = "course:"
+
+
+def week_start(at: datetime) -> datetime:
+    """Monday 00:00 UTC of the week containing `at`."""
+    at = at.astimezone(timezone.utc)
+    return datetime(at.year, at.month, at.day, tzinfo=timezone.utc) - timedelta(days=at.weekday())
+
+
+def rank_entries(entries: List[Dict], first_rank: int = 1) -> List[Dict]:
+    """Competition ranks for consecutive entries sorted by points, the first having first_rank."""
+    ranked = []
+    for i, entry in enumerate(entries):
+        if ranked and entry["points"] == ranked[-1]["points"]:
+            rank = ranked[-1]["rank"]
+        else:
+            rank = first_rank + i
+        ranked.append({"rank": rank, "user_id": entry["user_id"], "points": entry["points"]})
+    return ranked
+
+
+class Leaderboard:
+    def __init__(
+        self,
+        repo: Optional[LeaderboardRepository] = None,
+        now: Callable[[], datetime] = lambda: datetime.now(timezone.utc),
+        ledger_enabled: bool = True,
+    ):
+        self.repo = repo or LeaderboardRepository()
+        self.now = now
+        self.ledger_enabled = ledger_enabled
+
+    def board_scope(self, scope: str) -> str:
+        """The leaderboard_scores scope a query scope reads, e.g. 'weekly' -> 'weekly:2025-11-10'."""
+        if scope == GLOBAL:
+            return scope
+        if scope != WEEKLY and not (scope.startswith(COURSE_PREFIX) and len(scope) > len(COURSE_PREFIX)):
+            raise ValueError(f"scope must be '{GLOBAL}', '{WEEKLY}' or '{COURSE_PREFIX}<course_code>'")
+        if not self.ledger_enabled:
+            raise ValueError(f"the '{scope}' leaderboard needs POINTS_LEDGER_ENABLED; only '{GLOBAL}' is kept without it")
+        if scope == WEEKLY:
+            return f"{WEEKLY}:{week_start(self.now()).date().isoformat()}"
+        return scope
+
+    def query(self, scope: str = GLOBAL, limit: int = 10, around_user: Optional[str] = None, radius: int = 2) -> Dict:
+        """Top `limit` of a board, and optionally a user's rank with neighbours."""
+        board = self.board_scope(scope)
+        page = self.repo.page(board, limit, around_user, radius)
+        result = {"scope": scope, "top": rank_entries(page.get("top") or [])}
+        if scope == WEEKLY:
+            result["week_start"] = week_start(self.now()).isoformat()
+        if around_user:
+            neighbors = [
+                {"rank": e["rank"], "user_id": e["user_id"], "points": e["points"]}
+                for e in page.get("around") or []
+            ]
+            me = next((e for e in neighbors if e["user_id"] == around_user), None)
+            result["around_user"] = {
+                "user_id": around_user,
+                "rank": me["rank"] if me else None,
+                "points": me["points"] if me else None,
+                "neighbors": neighbors,
+            }
+        return result
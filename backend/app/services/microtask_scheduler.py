@@ -0,0 +1,118 @@
+"""
+Deterministic placement of assignment micro-tasks into a user's free time.
+
+Busy time comes from ad-hoc busy intervals plus the user's existing tasks
+(which include generated class sessions). Micro-tasks are spread across each
+assignment's window, kept inside working hours, spaced apart, and never
+overlap busy time or each other. No LLM is involved; titles are either
+supplied by the caller or generated from the assignment title.
+"""
+from datetime import datetime, time, timedelta
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from app.services.busy_index import BusyIndex, format_datetime, parse_datetime
+
+SUBMISSION_TITLE = "Submit Assignment"  # complete_db_task completes the assignment on this title
+
+DEFAULT_DAY_START = time(9, 0)
+DEFAULT_DAY_END = time(21, 0)
+DEFAULT_DURATION = timedelta(minutes=60)
+DEFAULT_MIN_GAP = timedelta(minutes=30)
+
+# How read_syllabi asks the LLM for micro-tasks: one call per assignment or batched
+MICROTASK_MODES = ("per_assignment", "batched")
+
+# "llm" lets the model place micro-tasks; "local" places them here with
+# generic titles; "hybrid" uses LLM titles + local placement
+MICROTASK_SCHEDULERS = ("llm", "local", "hybrid")
+
+
+def build_busy_times(busy_intervals: Sequence[Dict], existing_tasks: Sequence[Dict] = ()) -> BusyIndex:
+    """Combine {"start","end"} busy intervals and scheduled tasks into one index."""
+    return BusyIndex.from_sources(busy_intervals, existing_tasks)
+
+
+def local_micro_task_titles(assignment_title: str, count: int) -> List[str]:
+    """Generic step titles; the last step is always the submission."""
+    if count <= 1:
+        return [SUBMISSION_TITLE]
+    work_steps = count - 2
+    titles = [f"Review requirements: {assignment_title}"]
+    for part in range(1, work_steps + 1):
+        suffix = f" (part {part}/{work_steps})" if work_steps > 1 else ""
+        titles.append(f"Work on {assignment_title}{suffix}")
+    titles.append(SUBMISSION_TITLE)
+    return titles
+
+
+def place_micro_tasks(
+    busy: BusyIndex,
+    window_start: datetime,
+    due: datetime,
+    titles: Sequence[str],
+    duration: timedelta = DEFAULT_DURATION,
+    min_gap: timedelta = DEFAULT_MIN_GAP,
+    day_start: time = DEFAULT_DAY_START,
+    day_end: time = DEFAULT_DAY_END,
+) -> List[Dict]:
+    """
+    Spread one micro-task per title evenly across [window_start, due].
+
+    Each placed task is added to busy so later placements avoid it. A task that
+    cannot fit before the due date is returned with null times.
+    """
+    micro_tasks = []
+    span = max(due - window_start, timedelta(0))
+    previous_end = None
+    count = len(titles)
+    for i, title in enumerate(titles):
+        target = window_start + span * i / count
+        earliest = target if previous_end is None else max(target, previous_end + min_gap)
+        start = busy.next_free(earliest, duration, due, day_start, day_end)
+        if start is None:
+            micro_tasks.append(_micro_task(title, None, None))
+            continue
+        end = start + duration
+        busy.add(start, end)
+        previous_end = end
+        micro_tasks.append(_micro_task(title, format_datetime(start), format_datetime(end)))
+    return micro_tasks
+
+
+def schedule_assignments(
+    windows: Sequence[Tuple[Dict, str]],
+    busy: BusyIndex,
+    micro_task_count: int,
+    titles: Optional[Sequence[Optional[Sequence[str]]]] = None,
+    now: Optional[datetime] = None,
+    **rules,
+) -> List[List[Dict]]:
+    """
+    Place micro-tasks for each (assignment, prev_due_date) window, in order.
+
+    titles optionally gives per-assignment titles (e.g. from an LLM); missing
+    entries fall back to local_micro_task_titles.
+    """
+    now = now or datetime.now()
+    results = []
+    for idx, (assignment, prev_due_date) in enumerate(windows):
+        due = parse_datetime(assignment.get("due_date"))
+        assignment_titles = titles[idx] if titles and idx < len(titles) and titles[idx] else None
+        if not assignment_titles:
+            assignment_titles = local_micro_task_titles(assignment.get("title", ""), micro_task_count)
+        if due is None:
+            results.append([_micro_task(t, None, None) for t in assignment_titles])
+            continue
+        window_start = max(parse_datetime(prev_due_date) or now, now)
+        results.append(place_micro_tasks(busy, window_start, due, assignment_titles, **rules))
+    return results
+
+
+def _micro_task(title: str, start: Optional[str], end: Optional[str]) -> Dict:
+    return {
+        "title": title,
+        "scheduled_start_at": start,
+        "scheduled_end_at": end,
+        "completion_date_at": None,
+        "weight": None,
+    }
@@ -0,0 +1,163 @@
+"""
+Write-behind buffer for the points ledger.
+
+Routes record points changes here instead of updating users.total_points.
+Entries are buffered in memory and appended to points_ledger in batches by a
+background thread: every flush_interval seconds, or sooner once max_batch
+entries are waiting. The same thread periodically runs compact_points_ledger()
+to fold flushed entries into users.total_points, so the hot users row is
+written once per compaction instead of once per task completion.
+
+balance() adds entries that are still buffered to the stored balance, so a
+user sees points they were just awarded. It only waits for a batch being
+written when that batch holds one of the user's entries. Entries buffered when the process
+dies without close() are lost, so a short flush interval is the trade-off
+between write batching and that exposure.
+"""
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Callable, Dict, Iterable, List, Optional
+
+from database.points_ledger_repository import PointsLedgerRepository
+
+DEFAULT_MAX_BATCH = 500
+DEFAULT_FLUSH_INTERVAL_SECONDS = 1.0
+DEFAULT_COMPACT_INTERVAL_SECONDS = 60.0
+
+
+class PointsLedgerWriter:
+    def __init__(
+        self,
+        repo: Optional[PointsLedgerRepository] = None,
+        max_batch: int = DEFAULT_MAX_BATCH,
+        flush_interval: float = DEFAULT_FLUSH_INTERVAL_SECONDS,
+        compact_interval: float = DEFAULT_COMPACT_INTERVAL_SECONDS,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.repo = repo or PointsLedgerRepository()
+        self.max_batch = max(1, max_batch)
+        self.flush_interval = flush_interval
+        self.compact_interval = compact_interval
+        self.clock = clock
+        self.flushed = 0
+        self.compacted = 0
+        self._buffer: List[Dict] = []
+        self._inflight: List[Dict] = []   # the batch being written
+        self._swaps = 0                   # bumped whenever entries move between _buffer and _inflight
+        self._lock = threading.Lock()
+        # Held while a batch is being written; flushes run one at a time
+        self._flush_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._last_compact = clock()
+
+    def record(self, user_id: str, delta: int, reason: str, source_id: Optional[str] = None, course_id: Optional[str] = None):
+        """Queue one points change; it is written with the next batch."""
+        entry = {
+            "user_id": user_id,
+            "delta": int(delta),
+            "reason": reason,
+            "source_id": source_id,
+            "course_id": course_id,
+            "created_at": datetime.now(timezone.utc).isoformat(),
+        }
+        with self._lock:
+            self._buffer.append(entry)
+            full = len(self._buffer) >= self.max_batch
+            if self._thread is None and not self._stop.is_set():
+                self._thread = threading.Thread(target=self._run, name="points-ledger", daemon=True)
+                self._thread.start()
+        if full:
+            self._wake.set()
+
+    def pending(self) -> int:
+        with self._lock:
+            return len(self._buffer)
+
+    def pending_delta(self, user_id: str) -> int:
+        with self._lock:
+            return sum(e["delta"] for e in self._buffer if e["user_id"] == user_id)
+
+    def balance(self, user_id: str) -> int:
+        """Stored balance (compacted total + uncompacted entries) plus buffered entries."""
+        return self.balances([user_id])[user_id]
+
+    def balances(self, user_ids: Iterable[str]) -> Dict[str, int]:
+        """balance() for several users with one database read."""
+        user_ids = list(dict.fromkeys(user_ids))
+        wanted = set(user_ids)
+        while True:
+            with self._lock:
+                swaps = self._swaps
+                writing = any(e["user_id"] in wanted for e in self._inflight)
+                pending = {user_id: 0 for user_id in user_ids}
+                for e in self._buffer:
+                    if e["user_id"] in wanted:
+                        pending[e["user_id"]] += e["delta"]
+            if writing:
+                # The database may or may not have these entries yet: wait for the write
+                with self._flush_lock:
+                    pass
+                continue
+            stored = self.repo.balances(user_ids) if user_ids else {}
+            with self._lock:
+                if self._swaps == swaps:
+                    # No entry left the buffer while reading, so none is counted twice or missed
+                    return {user_id: stored.get(user_id, 0) + pending[user_id] for user_id in user_ids}
+
+    def flush(self) -> int:
+        """Write every buffered entry now; returns how many were written.
+
+        On failure the entries go back to the front of the buffer and are
+        retried with the next flush.
+        """
+        with self._flush_lock:
+            with self._lock:
+                batch, self._buffer = self._buffer, []
+                self._inflight = batch
+                self._swaps += 1
+            if not batch:
+                return 0
+            try:
+                self.repo.append_many(batch)
+            except Exception:
+                with self._lock:
+                    self._buffer[:0] = batch
+                    self._inflight = []
+                    self._swaps += 1
+                raise
+            with self._lock:
+                self._inflight = []
+            self.flushed += len(batch)
+            return len(batch)
+
+    def compact(self) -> int:
+        """Fold flushed entries into users.total_points (see compact_points_ledger())."""
+        self._last_compact = self.clock()
+        count = self.repo.compact()
+        self.compacted += count
+        return count
+
+    def _run(self):
+        while not self._stop.is_set():
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            try:
+                self.flush()
+                if self.compact_interval and self.clock() - self._last_compact >= self.compact_interval:
+                    self.compact()
+            except Exception as e:
+                print(f"Warning: points ledger flush failed: {e}")
+
+    def stats(self) -> Dict:
+        return {"pending": self.pending(), "flushed": self.flushed, "compacted": self.compacted}
+
+    def close(self):
+        """Stop the background thread and write whatever is still buffered."""
+        self._stop.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+        self.flush()
@@ -1,20 +1,55 @@
 import pathlib
 import os
+import hashlib
+import random
+import threading
+import time
+from typing import Optional
+from concurrent.futures import ThreadPoolExecutor
 from dotenv import load_dotenv
 from google import genai
 from google.genai import types
+from google.genai import errors as genai_errors
+import httpx
 import json
 import uuid
 from datetime import datetime
 
+from app.utils.cache_utils import DiskLRUCache, content_key
+from app.services import microtask_scheduler
+from app.services.microtask_scheduler import MICROTASK_MODES, MICROTASK_SCHEDULERS
+
 load_dotenv()
 
 API_KEY = os.getenv("GEMINI_API_KEY")
 
-if not API_KEY or API_KEY == "GEMINI_API_KEY":
-    raise ValueError("GEMINI_API_KEY not provided. Please set it in your .env file.")
+_client = None
+_client_lock = threading.Lock()
+
+
+def get_llm_client():
+    """The shared Gemini client, created on first use (so importing this module needs no API key)."""
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                if not API_KEY or API_KEY == "GEMINI_API_KEY":
+                    raise ValueError("GEMINI_API_KEY not provided. Please set it in your .env file.")
+                _client = genai.Client(api_key=API_KEY)
+    return _client
+
+MODEL_NAME = "gemini-2.5-flash"
+
+# Micro-task generation makes one LLM call per assignment; these run on a
+# bounded pool so a long syllabus costs roughly one call's latency, not N.
+MICROTASK_MAX_CONCURRENCY = int(os.getenv("MICROTASK_MAX_CONCURRENCY", "4"))
+LLM_TIMEOUT_SECONDS = float(os.getenv("LLM_TIMEOUT_SECONDS", "60"))
+LLM_MAX_RETRIES = 3
+LLM_BACKOFF_BASE_SECONDS = 1.0
+LLM_BACKOFF_MAX_SECONDS = 20.0
 
-client = genai.Client(api_key=API_KEY)
+# Batched mode packs several assignments into one call, up to this estimated size
+MICROTASK_BATCH_TOKEN_BUDGET = int(os.getenv("MICROTASK_BATCH_TOKEN_BUDGET", "8000"))
 
 pdf_path = "backend/app/storage/uploads/dummy.pdf"
 busy = [
@@ -57,10 +92,7 @@ output_schema = {
 }
 
 
-def extract_tasks_assignments_from_pdf(pdf_path: str) -> dict:
-    filepath = pathlib.Path(pdf_path)
-
-    prompt = """
+EXTRACTION_PROMPT = """
 You are given a course syllabus in PDF text.
 
 Classify all deadline-related items into two categories:
@@ -110,14 +142,58 @@ Output Format:
 }
 """
 
-    response = client.models.generate_content(
-        model="gemini-2.5-flash",
+# Cache key namespace: changing the prompt, schema or model invalidates old entries
+EXTRACTION_CACHE_VERSION = hashlib.sha256(
+    (MODEL_NAME + EXTRACTION_PROMPT + json.dumps(output_schema, sort_keys=True)).encode("utf-8")
+).hexdigest()[:16]
+
+SYLLABUS_CACHE_DIR = os.getenv(
+    "SYLLABUS_CACHE_DIR",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "storage", "cache", "syllabi")
+)
+SYLLABUS_CACHE_MAX_MB = float(os.getenv("SYLLABUS_CACHE_MAX_MB", "50"))
+
+_extraction_cache: Optional[DiskLRUCache] = None
+_extraction_cache_lock = threading.Lock()
+
+
+def get_extraction_cache() -> Optional[DiskLRUCache]:
+    """Process-wide cache of syllabus extraction results, or None when disabled."""
+    global _extraction_cache
+    if SYLLABUS_CACHE_MAX_MB <= 0:
+        return None
+    if _extraction_cache is None:
+        with _extraction_cache_lock:
+            if _extraction_cache is None:
+                _extraction_cache = DiskLRUCache(SYLLABUS_CACHE_DIR, int(SYLLABUS_CACHE_MAX_MB * 1024 * 1024))
+    return _extraction_cache
+
+
+def extract_tasks_assignments_from_pdf(pdf_path, cache: Optional[DiskLRUCache] = None, llm_client=None) -> dict:
+    """
+    Extract tasks and assignments from a syllabus PDF (a path or the raw bytes) with Gemini.
+
+    Results are cached by SHA-256 of the PDF bytes (plus EXTRACTION_CACHE_VERSION),
+    so the same syllabus uploaded again skips the LLM call entirely.
+    """
+    pdf_bytes = bytes(pdf_path) if isinstance(pdf_path, (bytes, bytearray)) else pathlib.Path(pdf_path).read_bytes()
+    cache = cache or get_extraction_cache()
+    cache_key = content_key(pdf_bytes, EXTRACTION_CACHE_VERSION)
+    if cache is not None:
+        cached = cache.get(cache_key)
+        if cached is not None:
+            return cached
+
+    llm_client = llm_client or get_llm_client()
+
+    response = llm_client.models.generate_content(
+        model=MODEL_NAME,
         contents=[
             types.Part.from_bytes(
-                data=filepath.read_bytes(),
+                data=pdf_bytes,
                 mime_type="application/pdf",
             ),
-            prompt
+            EXTRACTION_PROMPT
         ],
         config=types.GenerateContentConfig(
             response_mime_type="application/json",
@@ -126,9 +202,13 @@ Output Format:
     )
 
     if isinstance(response.text, str):
-        return json.loads(response.text)
+        extracted = json.loads(response.text)
     else:
-        return response.text
+        extracted = response.text
+
+    if cache is not None:
+        cache.set(cache_key, extracted)
+    return extracted
 
 def add_ids_to_extracted_data(extracted_data: dict, user_id: str = "paul_paw_test", course_id: str = None) -> dict:
     """Add unique IDs to assignments and tasks extracted from PDF."""
@@ -169,23 +249,59 @@ def add_ids_to_extracted_data(extracted_data: dict, user_id: str = "paul_paw_tes
         "tasks": tasks_with_ids
     }
 
-def generate_assignment_microtasks(
-    assignments: list,
-    busy_intervals: list,
-    default_micro_task_count: int = 3
-) -> dict:
+def _is_retryable(error: Exception) -> bool:
+    """Rate limits (429), server errors (5xx) and timeouts are worth retrying."""
+    if isinstance(error, genai_errors.APIError):
+        return error.code == 429 or (error.code or 0) >= 500
+    return isinstance(error, (httpx.TimeoutException, TimeoutError))
+
+
+def _is_rate_limited(error: Exception) -> bool:
+    """A 429 / RESOURCE_EXHAUSTED error: the quota is spent, more calls only fail too."""
+    return isinstance(error, genai_errors.APIError) and (
+        error.code == 429 or error.status == "RESOURCE_EXHAUSTED"
+    )
+
+
+def generate_content_with_retry(
+    llm_client,
+    contents: list,
+    config: types.GenerateContentConfig,
+    max_retries: int = LLM_MAX_RETRIES,
+    backoff_base: float = LLM_BACKOFF_BASE_SECONDS,
+    sleep=time.sleep
+):
     """
-    assignments: list of {"title": ..., "due_date": ..., "weight": ...}
-    busy_intervals: list of {"start": ..., "end": ...}
-    Returns: dict with "assignments" array, each with nested "micro_tasks"
+    Call llm_client.models.generate_content, retrying retryable failures with
+    full-jitter exponential backoff. Non-retryable errors are raised immediately.
     """
-    assignments_with_micro = []
+    attempt = 0
+    while True:
+        try:
+            return llm_client.models.generate_content(
+                model=MODEL_NAME,
+                contents=contents,
+                config=config
+            )
+        except Exception as e:
+            if attempt >= max_retries or not _is_retryable(e):
+                raise
+            delay = min(LLM_BACKOFF_MAX_SECONDS, backoff_base * (2 ** attempt))
+            attempt += 1
+            print(f"LLM call failed ({e}); retry {attempt}/{max_retries} in <= {delay:.1f}s")
+            sleep(random.uniform(0, delay))
+
+
+def _microtask_config(timeout_seconds: float) -> types.GenerateContentConfig:
+    return types.GenerateContentConfig(
+        response_mime_type="application/json",
+        http_options=types.HttpOptions(timeout=int(timeout_seconds * 1000))
+    )
 
-    for idx, assignment in enumerate(assignments):
-        prev_due_date = assignments[idx-1]['due_date'] if idx > 0 else datetime.now().strftime('%Y-%m-%dT%H:%M:%S')
-        curr_due_date = assignment['due_date']
 
-        prompt = f"""
+def _microtask_prompt(assignment: dict, prev_due_date: str, busy_intervals: list, micro_task_count: int) -> str:
+    curr_due_date = assignment['due_date']
+    return f"""
 You are a productivity assistant. For this assignment:
 
 - Title: {assignment['title']}
@@ -193,7 +309,7 @@ You are a productivity assistant. For this assignment:
 - Assignment window: from "{prev_due_date}" to "{curr_due_date}"
 - The user is unavailable at: {json.dumps(busy_intervals, indent=2)}
 
-Propose {default_micro_task_count} micro-tasks to help complete this assignment, following this format:
+Propose {micro_task_count} micro-tasks to help complete this assignment, following this format:
 [
   {{
     "title": "",
@@ -208,72 +324,367 @@ Each assignment must have at least one task for submission before the due.
 All micro-tasks must fit between "{prev_due_date}" and "{curr_due_date}", never overlap any busy interval, and time fields must be provided as 'YYYY-MM-DDTHH:MM:SS'. If a task lands in a busy interval, move it to the closest available slot. Return only the JSON array, no extra text.
 """
 
-        response = client.models.generate_content(
-            model="gemini-2.5-flash",
-            contents=[prompt],
-            config=types.GenerateContentConfig(response_mime_type="application/json")
+
+def _assignment_windows(assignments: list) -> list:
+    """(assignment, prev_due_date) pairs; each window starts at the previous due date."""
+    now = datetime.now().strftime('%Y-%m-%dT%H:%M:%S')
+    return [
+        (assignment, assignments[idx-1]['due_date'] if idx > 0 else now)
+        for idx, assignment in enumerate(assignments)
+    ]
+
+
+def _run_ordered(fn, items: list, max_concurrency: int) -> list:
+    """Apply fn to items on a bounded pool and return results in input order."""
+    if not items:
+        return []
+    workers = max(1, min(max_concurrency, len(items)))
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="microtasks") as executor:
+        # map() yields results in submission order regardless of completion order
+        return list(executor.map(fn, items))
+
+
+def _generate_per_assignment(
+    windows: list,
+    busy_intervals: list,
+    micro_task_count: int,
+    llm_client,
+    max_concurrency: int,
+    timeout_seconds: float
+) -> list:
+    """One LLM call per (assignment, prev_due_date) window; raw micro-task lists in order."""
+    config = _microtask_config(timeout_seconds)
+
+    def generate(window):
+        assignment, prev_due_date = window
+        prompt = _microtask_prompt(assignment, prev_due_date, busy_intervals, micro_task_count)
+        response = generate_content_with_retry(llm_client, [prompt], config)
+        return json.loads(response.text)
+
+    return _run_ordered(generate, windows, max_concurrency)
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count (~4 characters per token) used to size batched prompts."""
+    return len(text) // 4 + 1
+
+
+def _batched_microtask_prompt(entries: list, busy_intervals: list, micro_task_count: int) -> str:
+    """Prompt for several assignments at once; entries are (index, assignment, prev_due_date)."""
+    assignment_lines = "\n".join(
+        f'- index {index}: "{assignment["title"]}", window from "{prev_due_date}" to "{assignment["due_date"]}"'
+        for index, assignment, prev_due_date in entries
+    )
+    return f"""
+You are a productivity assistant. The user is unavailable at: {json.dumps(busy_intervals)}
+
+For EACH assignment below, propose {micro_task_count} micro-tasks to help complete it:
+{assignment_lines}
+
+Return one entry per assignment with its "index" and its "micro_tasks".
+Each assignment must have at least one task for submission before its due date.
+Every micro-task must fit inside its assignment's window, never overlap any busy interval, and time fields must be provided as 'YYYY-MM-DDTHH:MM:SS'. If a task lands in a busy interval, move it to the closest available slot. "completion_date_at" and "weight" are null.
+"""
+
+
+# Fixed instruction text of the batched prompt, counted once per chunk
+_BATCH_PROMPT_OVERHEAD_TOKENS = estimate_tokens(_batched_microtask_prompt([], [], 3))
+
+micro_task_schema = {
+    "type": "object",
+    "properties": {
+        "title": {"type": "string"},
+        "scheduled_start_at": {"type": "string"},
+        "scheduled_end_at": {"type": "string"},
+        "completion_date_at": {"type": "string", "nullable": True},
+        "weight": {"type": "integer", "nullable": True}
+    },
+    "required": ["title", "scheduled_start_at", "scheduled_end_at", "completion_date_at", "weight"]
+}
+
+batched_micro_tasks_schema = {
+    "type": "object",
+    "properties": {
+        "results": {
+            "type": "array",
+            "items": {
+                "type": "object",
+                "properties": {
+                    "index": {"type": "integer"},
+                    "micro_tasks": {"type": "array", "items": micro_task_schema}
+                },
+                "required": ["index", "micro_tasks"]
+            }
+        }
+    },
+    "required": ["results"]
+}
+
+
+def _chunk_for_token_budget(
+    entries: list,
+    busy_intervals: list,
+    micro_task_count: int,
+    token_budget: int
+) -> list:
+    """
+    Greedily pack (index, assignment, prev_due_date) entries into chunks whose
+    estimated prompt + response size stays under token_budget. A single entry
+    that exceeds the budget on its own still gets a chunk.
+    """
+    fixed = _BATCH_PROMPT_OVERHEAD_TOKENS + estimate_tokens(json.dumps(busy_intervals))
+    # Response side: each micro-task is roughly 60 tokens of JSON
+    per_output = micro_task_count * 60
+    chunks, current, used = [], [], fixed
+    for entry in entries:
+        cost = estimate_tokens(_batched_microtask_prompt([entry], [], micro_task_count)) \
+            - _BATCH_PROMPT_OVERHEAD_TOKENS + per_output
+        if current and used + cost > token_budget:
+            chunks.append(current)
+            current, used = [], fixed
+        current.append(entry)
+        used += cost
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+def _generate_batched(
+    windows: list,
+    busy_intervals: list,
+    micro_task_count: int,
+    llm_client,
+    max_concurrency: int,
+    timeout_seconds: float,
+    token_budget: int
+) -> list:
+    """
+    Generate micro-tasks for many assignments per LLM call.
+
+    The busy intervals and instructions are sent once per chunk instead of once
+    per assignment. Any assignment the model leaves out of its response (or
+    every assignment of a chunk whose response cannot be parsed) is retried
+    with a per-assignment call. A chunk that is still rate limited after its
+    retries raises instead: fanning out to one call per assignment would only
+    spend more of the exhausted quota.
+    """
+    config = types.GenerateContentConfig(
+        response_mime_type="application/json",
+        response_schema=batched_micro_tasks_schema,
+        http_options=types.HttpOptions(timeout=int(timeout_seconds * 1000))
+    )
+    entries = [(index, assignment, prev) for index, (assignment, prev) in enumerate(windows)]
+    chunks = _chunk_for_token_budget(entries, busy_intervals, micro_task_count, token_budget)
+
+    def generate(chunk):
+        prompt = _batched_microtask_prompt(chunk, busy_intervals, micro_task_count)
+        try:
+            response = generate_content_with_retry(llm_client, [prompt], config)
+            payload = json.loads(response.text)
+        except (ValueError, genai_errors.APIError, httpx.HTTPError) as e:
+            if _is_rate_limited(e):
+                raise
+            print(f"Batched micro-task call failed for {len(chunk)} assignments: {e}")
+            return {}
+        items = payload.get("results") if isinstance(payload, dict) else None
+        if not isinstance(items, list):
+            print(f"Batched micro-task response for {len(chunk)} assignments has no results list")
+            return {}
+        wanted = {index for index, _, _ in chunk}
+        found = {}
+        for item in items:
+            if not isinstance(item, dict):
+                continue
+            index = item.get("index")
+            if index in wanted and isinstance(item.get("micro_tasks"), list) and item["micro_tasks"]:
+                found[index] = item["micro_tasks"]
+        return found
+
+    results = {}
+    for found in _run_ordered(generate, chunks, max_concurrency):
+        results.update(found)
+
+    missing = [index for index in range(len(windows)) if index not in results]
+    if missing:
+        print(f"Falling back to per-assignment calls for {len(missing)} assignment(s)")
+        fallback = _generate_per_assignment(
+            [windows[i] for i in missing], busy_intervals, micro_task_count,
+            llm_client, max_concurrency, timeout_seconds
         )
+        results.update(zip(missing, fallback))
+
+    return [results[index] for index in range(len(windows))]
+
+
+micro_task_titles_schema = {
+    "type": "object",
+    "properties": {
+        "results": {
+            "type": "array",
+            "items": {
+                "type": "object",
+                "properties": {
+                    "index": {"type": "integer"},
+                    "titles": {"type": "array", "items": {"type": "string"}}
+                },
+                "required": ["index", "titles"]
+            }
+        }
+    },
+    "required": ["results"]
+}
 
-        micro_tasks = json.loads(response.text)
-        assignment_with_micro = {**assignment, "micro_tasks": micro_tasks}
-        assignments_with_micro.append(assignment_with_micro)
 
+def generate_micro_task_titles(
+    assignments: list,
+    micro_task_count: int,
+    llm_client=None,
+    timeout_seconds: float = LLM_TIMEOUT_SECONDS
+) -> list:
+    """
+    Ask the LLM for micro-task titles only (no times), one call for all
+    assignments. Returns a list aligned with assignments; an entry is None when
+    the model gave nothing usable, so the caller can fall back to local titles.
+    The last title is always the submission step.
+    """
+    if not assignments:
+        return []
+    llm_client = llm_client or get_llm_client()
+    assignment_lines = "\n".join(
+        f'- index {index}: "{assignment["title"]}" due {assignment.get("due_date")}'
+        for index, assignment in enumerate(assignments)
+    )
+    prompt = f"""
+You are a productivity assistant. For EACH assignment below, propose {micro_task_count} short, concrete micro-task titles that break the work into steps, in the order they should be done:
+{assignment_lines}
+
+Return one entry per assignment with its "index" and its "titles". Do not include times.
+"""
+    config = types.GenerateContentConfig(
+        response_mime_type="application/json",
+        response_schema=micro_task_titles_schema,
+        http_options=types.HttpOptions(timeout=int(timeout_seconds * 1000))
+    )
+    titles = [None] * len(assignments)
+    try:
+        response = generate_content_with_retry(llm_client, [prompt], config)
+        payload = json.loads(response.text)
+    except (ValueError, genai_errors.APIError, httpx.HTTPError) as e:
+        print(f"Micro-task title generation failed, using local titles: {e}")
+        return titles
+    items = payload.get("results") if isinstance(payload, dict) else None
+    if not isinstance(items, list):
+        print("Micro-task title response has no results list, using local titles")
+        return titles
+    for item in items:
+        if not isinstance(item, dict):
+            continue
+        index = item.get("index")
+        names = item.get("titles") if isinstance(item.get("titles"), list) else []
+        names = [t for t in names if isinstance(t, str) and t.strip()]
+        if isinstance(index, int) and 0 <= index < len(assignments) and names:
+            names = names[:max(micro_task_count - 1, 0)] + [microtask_scheduler.SUBMISSION_TITLE]
+            titles[index] = names
+    return titles
+
+
+def _generate_micro_task_lists(
+    assignments: list,
+    busy_intervals: list,
+    micro_task_count: int,
+    llm_client=None,
+    max_concurrency: int = MICROTASK_MAX_CONCURRENCY,
+    timeout_seconds: float = LLM_TIMEOUT_SECONDS,
+    mode: str = "per_assignment",
+    token_budget: int = MICROTASK_BATCH_TOKEN_BUDGET,
+    scheduler: str = "llm",
+    existing_tasks: Optional[list] = None
+) -> list:
+    """Return the raw micro-task list for each assignment, in input order."""
+    if mode not in MICROTASK_MODES:
+        raise ValueError(f"mode must be one of: {', '.join(MICROTASK_MODES)}")
+    if scheduler not in MICROTASK_SCHEDULERS:
+        raise ValueError(f"scheduler must be one of: {', '.join(MICROTASK_SCHEDULERS)}")
+    windows = _assignment_windows(assignments)
+    if scheduler != "llm":
+        titles = None
+        if scheduler == "hybrid":
+            titles = generate_micro_task_titles(assignments, micro_task_count, llm_client, timeout_seconds)
+        busy = microtask_scheduler.build_busy_times(busy_intervals, existing_tasks or [])
+        return microtask_scheduler.schedule_assignments(windows, busy, micro_task_count, titles=titles)
+    llm_client = llm_client or get_llm_client()
+    if mode == "batched":
+        return _generate_batched(
+            windows, busy_intervals, micro_task_count, llm_client,
+            max_concurrency, timeout_seconds, token_budget
+        )
+    return _generate_per_assignment(
+        windows, busy_intervals, micro_task_count, llm_client, max_concurrency, timeout_seconds
+    )
+
+
+def generate_assignment_microtasks(
+    assignments: list,
+    busy_intervals: list,
+    default_micro_task_count: int = 3,
+    llm_client=None,
+    max_concurrency: int = MICROTASK_MAX_CONCURRENCY,
+    mode: str = "per_assignment",
+    scheduler: str = "llm",
+    existing_tasks: Optional[list] = None
+) -> dict:
+    """
+    assignments: list of {"title": ..., "due_date": ..., "weight": ...}
+    busy_intervals: list of {"start": ..., "end": ...}
+    mode: "per_assignment" (one LLM call each) or "batched" (few structured calls)
+    scheduler: "llm", "local" or "hybrid" (see MICROTASK_SCHEDULERS)
+    existing_tasks: the user's scheduled tasks, treated as busy time by local placement
+    Returns: dict with "assignments" array, each with nested "micro_tasks"
+    """
+    micro_task_lists = _generate_micro_task_lists(
+        assignments, busy_intervals, default_micro_task_count,
+        llm_client=llm_client, max_concurrency=max_concurrency, mode=mode,
+        scheduler=scheduler, existing_tasks=existing_tasks
+    )
+    assignments_with_micro = [
+        {**assignment, "micro_tasks": micro_tasks}
+        for assignment, micro_tasks in zip(assignments, micro_task_lists)
+    ]
     return {"assignments": assignments_with_micro}
 
 def generate_assignment_microtasks_with_ids(
     assignments: list,
     busy_intervals: list,
     default_micro_task_count: int = 3,
-    user_id: str = "paul_paw_test"
+    user_id: str = "paul_paw_test",
+    llm_client=None,
+    max_concurrency: int = MICROTASK_MAX_CONCURRENCY,
+    mode: str = "per_assignment",
+    scheduler: str = "llm",
+    existing_tasks: Optional[list] = None
 ) -> dict:
     """
     Enhanced version that generates micro-tasks with proper IDs for database insertion.
     assignments: list of assignment dicts (should have assignment_id)
     busy_intervals: list of {"start": ..., "end": ...}
+    mode: "per_assignment" (one LLM call each) or "batched" (few structured calls)
+    scheduler: "llm", "local" or "hybrid" (see MICROTASK_SCHEDULERS)
+    existing_tasks: the user's scheduled tasks, treated as busy time by local placement
     Returns: dict with "assignments" array, each with nested "micro_tasks" that have proper IDs
     """
-    assignments_with_micro = []
-
-    for idx, assignment in enumerate(assignments):
-        assignment_id = assignment.get("assignment_id")
-        if not assignment_id:
-            assignment_id = str(uuid.uuid4())
-            assignment["assignment_id"] = assignment_id
-        
-        prev_due_date = assignments[idx-1]['due_date'] if idx > 0 else datetime.now().strftime('%Y-%m-%dT%H:%M:%S')
-        curr_due_date = assignment['due_date']
-
-        prompt = f"""
-You are a productivity assistant. For this assignment:
-
-- Title: {assignment['title']}
-- Due date: {curr_due_date}
-- Assignment window: from "{prev_due_date}" to "{curr_due_date}"
-- The user is unavailable at: {json.dumps(busy_intervals, indent=2)}
-
-Propose {default_micro_task_count} micro-tasks to help complete this assignment, following this format:
-[
-  {{
-    "title": "",
-    "scheduled_start_at": "YYYY-MM-DDTHH:MM:SS",
-    "scheduled_end_at": "YYYY-MM-DDTHH:MM:SS",
-    "completion_date_at": null,
-    "weight": null
-  }}
-  // ...repeat for each micro-task
-]
-Each assignment must have at least one task for submission before the due.
-All micro-tasks must fit between "{prev_due_date}" and "{curr_due_date}", never overlap any busy interval, and time fields must be provided as 'YYYY-MM-DDTHH:MM:SS'. If a task lands in a busy interval, move it to the closest available slot. Return only the JSON array, no extra text.
-"""
-
-        response = client.models.generate_content(
-            model="gemini-2.5-flash",
-            contents=[prompt],
-            config=types.GenerateContentConfig(response_mime_type="application/json")
-        )
+    for assignment in assignments:
+        if not assignment.get("assignment_id"):
+            assignment["assignment_id"] = str(uuid.uuid4())
+
+    micro_task_lists = _generate_micro_task_lists(
+        assignments, busy_intervals, default_micro_task_count,
+        llm_client=llm_client, max_concurrency=max_concurrency, mode=mode,
+        scheduler=scheduler, existing_tasks=existing_tasks
+    )
 
-        micro_tasks_raw = json.loads(response.text)
-        
+    assignments_with_micro = []
+    for assignment, micro_tasks_raw in zip(assignments, micro_task_lists):
+        assignment_id = assignment["assignment_id"]
         micro_tasks_with_ids = []
         for micro_task in micro_tasks_raw:
             micro_task_with_id = {
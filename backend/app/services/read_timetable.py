@@ -1,13 +1,19 @@
 from datetime import datetime, timedelta
-from dateutil.parser import parse as date_parse
+from bisect import bisect_right
+from functools import lru_cache
 import uuid
 import sys
 import os
 import random
+import re
+import threading
+from typing import Optional
 
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
 
 from app.utils.file_utils import extract_tables_from_pdf
+from app.utils.cache_utils import MemoryLRUCache, content_key
+from app.services.term_registry import get_term_registry
 
 user_id = "paul_paw_test"
 assignment_id = None
@@ -35,163 +41,162 @@ def detect_term_from_pdf(pdf_path):
 def get_term_schedule(term_str: str):
     """
     Return schedule config (start/end dates, breaks, holidays) for a given term string.
-    Supported: 'Fall 2025' and 'Winter 2026' terms.
+    Terms are defined in terms.json and resolved through the cached term registry;
+    breaks are sorted (start, end) intervals and holidays a frozenset.
     """
-    # Clean the term string and extract meaningful parts
-    clean_term = term_str.strip().lower()
-    
-    # Fall 2025 term: Sep–Dec 2025
-    if 'fall' in clean_term and '2025' in clean_term:
-        original_start_date = date_parse("2025-09-02")
-        end_date = date_parse("2025-12-02")
-        breaks = [
-            # Fall Reading Week
-            (date_parse("2025-10-27"), date_parse("2025-10-31")),
-        ]
-        holidays = [
-            # Thanksgiving (Canada)
-            date_parse("2025-10-13"),
-        ]
-    # Winter 2026 term: Jan–Apr 2026
-    elif 'winter' in clean_term and '2026' in clean_term:
-        original_start_date = date_parse("2026-01-06")
-        end_date = date_parse("2026-04-10")
-        breaks = [
-            # Winter Reading Week (typical mid-Feb)
-            (date_parse("2026-02-16"), date_parse("2026-02-20")),
-        ]
-        holidays = [
-            # Family Day (Canada)
-            date_parse("2026-02-16"),
-            # Good Friday (Canada)
-            date_parse("2026-04-03"),
-        ]
-    # Fallback based on term keyword
-    elif 'fall' in clean_term:
-        original_start_date = date_parse("2025-09-02")
-        end_date = date_parse("2025-12-02")
-        breaks = [
-            (date_parse("2025-10-27"), date_parse("2025-10-31")),
-        ]
-        holidays = [
-            date_parse("2025-10-13"),
-        ]
-    else:
-        # Default to Winter 2026 schedule
-        original_start_date = date_parse("2026-01-05")
-        end_date = date_parse("2026-04-6")
-        breaks = [
-            (date_parse("2026-02-16"), date_parse("2026-02-20")),
-        ]
-        holidays = [
-            date_parse("2026-02-16"),
-            date_parse("2026-04-03"),
-        ]
-
+    schedule = get_term_registry().get_schedule(term_str)
     return {
-        "original_start_date": original_start_date,
-        "end_date": end_date,
-        "breaks": breaks,
-        "holidays": holidays,
+        "term_id": schedule["term_id"],
+        "original_start_date": schedule["original_start_date"],
+        "end_date": schedule["end_date"],
+        "breaks": schedule["breaks"],
+        "holidays": schedule["holidays"],
     }
 
-# Remove automatic term detection at module level
-# term = detect_term_from_pdf(pdf_path)  # Remove this
-# Use default term that will be overridden by API calls
-term = "2025 Fall"  # Default
-
-schedule_config = get_term_schedule(term)
-original_start_date = schedule_config["original_start_date"]
-current_date = datetime.now().date()
-start_date = max(original_start_date.date(), current_date)
-start_date = datetime.combine(start_date, datetime.min.time())
-end_date = schedule_config["end_date"]
-breaks = schedule_config["breaks"]
-holidays = schedule_config["holidays"]
-
-def extract_timetable_courses(pdf_path, user_id, term):
+# Parsed table grids of recently uploaded timetables, keyed by PDF content hash.
+# Bump TABLE_CACHE_VERSION if the extraction settings change.
+TIMETABLE_CACHE_SIZE = int(os.getenv("TIMETABLE_CACHE_SIZE", "64"))
+TABLE_CACHE_VERSION = "pdfplumber-tables-v1"
+
+_table_cache: Optional[MemoryLRUCache] = None
+_table_cache_lock = threading.Lock()
+
+
+def get_table_cache() -> Optional[MemoryLRUCache]:
+    """Process-wide cache of timetable table grids, or None when disabled."""
+    global _table_cache
+    if TIMETABLE_CACHE_SIZE <= 0:
+        return None
+    if _table_cache is None:
+        with _table_cache_lock:
+            if _table_cache is None:
+                _table_cache = MemoryLRUCache(TIMETABLE_CACHE_SIZE)
+    return _table_cache
+
+
+def extract_timetable_tables(pdf_path, cache: Optional[MemoryLRUCache] = None, pool=None):
+    """
+    Table grids of a timetable PDF (a path or the raw bytes).
+
+    Uploads arrive as bytes; their grids are cached by SHA-256 of the content,
+    so re-uploading the same timetable skips pdfplumber. Paths are parsed
+    directly. Cached grids are tuples shared between callers; do not mutate.
+    pool is the app's PDFProcessPool (None extracts inline).
+    """
+    if not isinstance(pdf_path, (bytes, bytearray)):
+        return extract_tables_from_pdf(pdf_path, pool)
+
+    cache = cache or get_table_cache()
+    cache_key = content_key(bytes(pdf_path), TABLE_CACHE_VERSION)
+    if cache is not None:
+        cached = cache.get(cache_key)
+        if cached is not None:
+            return cached
+
+    tables = tuple(
+        tuple(tuple(row) for row in table)
+        for table in extract_tables_from_pdf(pdf_path, pool)
+    )
+    if cache is not None:
+        cache.set(cache_key, tables)
+    return tables
+
+
+def extract_timetable_courses(pdf_path, user_id, term, cache: Optional[MemoryLRUCache] = None, pool=None):
     """
-    Extract course information from timetable PDF.
+    Extract course information from timetable PDF (a path or the raw bytes).
+    Course ids and colors are fresh on every call, even when the grid is cached.
     """
     # Verify file exists before processing
-    if not os.path.exists(pdf_path):
+    if not isinstance(pdf_path, (bytes, bytearray)) and not os.path.exists(pdf_path):
         raise FileNotFoundError(f"PDF file not found: {pdf_path}")
-    
+
+    tables = extract_timetable_tables(pdf_path, cache, pool)
+    return courses_from_tables(tables, user_id, term)
+
+def courses_from_tables(tables, user_id, term):
+    """
+    Build course entries from timetable grids (header row of weekdays, one cell
+    per time slot). Sessions, days and times are deduplicated with sets, so the
+    cost is linear in the number of cells.
+    """
     courses = {}
+    # course_code -> (seen (day, time) sessions, seen days, seen times)
+    seen = {}
     date_imported_at = datetime.now().isoformat()
     
     colors = ['blue', 'red', 'yellow', 'green', 'purple', 'pink', 'indigo', 'orange']
 
-    tables = extract_tables_from_pdf(pdf_path)
-
     for table in tables:
         header = table[0]
         for row in table[1:]:
             for i, cell in enumerate(row[1:], 1):
-                if cell and cell.strip():
-                    code_part, time_label = _parse_course_cell(cell)
-                    if not code_part:
-                        continue
-                    course_code = code_part.split()[0]
-                    meeting_day = header[i]  
-                    
-                    # Initialize course entry if not present
-                    if course_code not in courses:
-                        courses[course_code] = {
-                            "course_id": str(uuid.uuid4()),
-                            "user_id": user_id,
-                            "course_name": course_code,
-                            "course_code": course_code,
-                            "canvas_course_id": "",
-                            "date_imported_at": date_imported_at,
-                            "term": term,
-                            "color": random.choice(colors),
-                            "meeting_days": [],
-                            "meeting_times": [],
-                            "meeting_sessions": []  # Keep for internal use
-                        }
-                    
-                    session = {
-                        "day": meeting_day,
-                        "time": time_label
+                if not cell:
+                    continue
+                course_code, time_label = _parse_course_cell(cell)
+                if not course_code:
+                    continue
+                meeting_day = header[i]
+                
+                # Initialize course entry if not present
+                course = courses.get(course_code)
+                if course is None:
+                    course = courses[course_code] = {
+                        "course_id": str(uuid.uuid4()),
+                        "user_id": user_id,
+                        "course_name": course_code,
+                        "course_code": course_code,
+                        "canvas_course_id": "",
+                        "date_imported_at": date_imported_at,
+                        "term": term,
+                        "color": random.choice(colors),
+                        "meeting_days": [],
+                        "meeting_times": [],
+                        "meeting_sessions": []  # Keep for internal use
                     }
-                    
-                    session_exists = any(
-                        s["day"] == meeting_day and s["time"] == time_label 
-                        for s in courses[course_code]["meeting_sessions"]
-                    )
-                    
-                    if not session_exists:
-                        courses[course_code]["meeting_sessions"].append(session)
-                        # Also add to frontend-expected arrays
-                        if meeting_day not in courses[course_code]["meeting_days"]:
-                            courses[course_code]["meeting_days"].append(meeting_day)
-                        if time_label and time_label not in courses[course_code]["meeting_times"]:
-                            courses[course_code]["meeting_times"].append(time_label)
+                    seen[course_code] = (set(), set(), set())
+                seen_sessions, seen_days, seen_times = seen[course_code]
+                
+                if (meeting_day, time_label) in seen_sessions:
+                    continue
+                seen_sessions.add((meeting_day, time_label))
+                course["meeting_sessions"].append({
+                    "day": meeting_day,
+                    "time": time_label
+                })
+                # Also add to frontend-expected arrays
+                if meeting_day not in seen_days:
+                    seen_days.add(meeting_day)
+                    course["meeting_days"].append(meeting_day)
+                if time_label and time_label not in seen_times:
+                    seen_times.add(time_label)
+                    course["meeting_times"].append(time_label)
     
     return list(courses.values())
 
+# First line of a cell holds the course code; the time label is the first line
+# containing both "-" and ":" (e.g. "9:00 - 10:00")
+_CELL_CODE_RE = re.compile(r"\A[ \t\r\f\v]*(\S+)")
+_CELL_TIME_RE = re.compile(r"^(?=[^\n]*-)(?=[^\n]*:)[^\n]*", re.MULTILINE)
+
+@lru_cache(maxsize=4096)
 def _parse_course_cell(cell):
     """
     Parse a cell to extract course code and time label.
+    Cached per cell text, since a timetable repeats each section's cell.
     """
-    parts = cell.split('\n')
-    code_part = parts[0].strip() if parts else None
-    time_label = None
-    for x in parts:
-        if "-" in x and ":" in x:
-            time_label = x.strip()
-            break
-    return code_part, time_label
+    code = _CELL_CODE_RE.match(cell)
+    time = _CELL_TIME_RE.search(cell)
+    return (code.group(1) if code else None), (time.group(0).strip() if time else None)
 
+@lru_cache(maxsize=1024)
 def parse_time_range(time_str):
     """
     Parse a time range string into start and end time objects.
     Handles 12-hour format without AM/PM like "9:00 - 12:00" or "6:00 - 8:00"
     Determines AM/PM based on logical sequence and typical class hours.
+    Results are cached per label, since a timetable repeats the same few labels.
     """
-    print(f"Parsing time string: '{time_str}'")  
-    
     parts = time_str.split('-')
     if len(parts) != 2:
         raise ValueError(f"Invalid time format: {time_str}")
@@ -199,8 +204,6 @@ def parse_time_range(time_str):
     start_str = parts[0].strip()
     end_str = parts[1].strip()
     
-    print(f"Start: '{start_str}', End: '{end_str}'")  
-    
     try:
         start_dt = datetime.strptime(start_str, "%H:%M")
         end_dt = datetime.strptime(end_str, "%H:%M")
@@ -233,74 +236,103 @@ def parse_time_range(time_str):
         start_time = datetime.strptime(f"{final_start_hour:02d}:{start_dt.minute:02d}", "%H:%M").time()
         end_time = datetime.strptime(f"{final_end_hour:02d}:{end_dt.minute:02d}", "%H:%M").time()
             
-    except ValueError as e:
-        print(f"Error parsing times: {e}")
+    except ValueError:
         raise ValueError(f"Could not parse time range: {time_str}")
     
-    print(f"Parsed times - Start: {start_time}, End: {end_time}")  
-    
     return start_time, end_time
 
-def generate_tasks_for_courses(courses, user_id, assignment_id, start_date, end_date, breaks, holidays):
+WEEKDAYS = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
+_WEEKDAY_INDEX = {name: i for i, name in enumerate(WEEKDAYS)}
+
+def _as_date(value):
+    return value.date() if isinstance(value, datetime) else value
+
+class BreakIndex:
     """
-    Generate scheduled class session tasks for each course.
+    Break intervals merged and sorted by start day, so checking whether a day
+    falls in any break is a single bisect instead of a scan over all breaks.
     """
-    def get_weekday_number(day_name):
-        days = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
-        return days.index(day_name)
+    def __init__(self, breaks):
+        merged = []
+        for start, end in sorted((_as_date(b[0]), _as_date(b[1])) for b in breaks):
+            if merged and start <= merged[-1][1]:
+                merged[-1][1] = max(merged[-1][1], end)
+            else:
+                merged.append([start, end])
+        self._starts = [m[0] for m in merged]
+        self._ends = [m[1] for m in merged]
 
-    def daterange(start_date, end_date):
-        for n in range(int((end_date - start_date).days) + 1):
-            yield start_date + timedelta(n)
+    def __contains__(self, day):
+        i = bisect_right(self._starts, day) - 1
+        return i >= 0 and day <= self._ends[i]
 
-    def is_in_breaks(date, breaks):
-        for start, end in breaks:
-            if start <= date <= end:
-                return True
-        return False
+@lru_cache(maxsize=1024)
+def weekly_occurrences(start_day, end_day, weekday, breaks=(), holidays=frozenset()):
+    """
+    Return every date between start_day and end_day (inclusive) that falls on
+    weekday (0=Monday) and is neither inside a break nor a holiday.
 
-    def is_in_holidays(date, holidays):
-        return date in holidays
+    Jumps straight to the first matching weekday and then strides 7 days at a
+    time. Arguments must be hashable (breaks as a tuple of (start, end) dates,
+    holidays as a frozenset of dates) so results are shared between every
+    course, session and user in the same term.
+    """
+    break_index = BreakIndex(breaks)
+    first = start_day + timedelta(days=(weekday - start_day.weekday()) % 7)
+    occurrences = []
+    day = first
+    week = timedelta(days=7)
+    while day <= end_day:
+        if day not in holidays and day not in break_index:
+            occurrences.append(day)
+        day += week
+    return tuple(occurrences)
+
+def generate_tasks_for_courses(courses, user_id, assignment_id, start_date, end_date, breaks, holidays):
+    """
+    Generate scheduled class session tasks for each course.
+    Occurrence dates come from weekly_occurrences, so each session costs one
+    step per week of term rather than one per day.
+    """
+    start_day = _as_date(start_date)
+    end_day = _as_date(end_date)
+    breaks_key = tuple(sorted((_as_date(b[0]), _as_date(b[1])) for b in breaks))
+    holidays_key = frozenset(_as_date(h) for h in holidays)
 
     tasks = []
     for course in courses:
+        description = f"{course['course_name']} class session"
         for session in course["meeting_sessions"]:
-            day = session["day"]
             time_str = session["time"]
             
             if not time_str:
                 continue 
                 
-            weekday_num = get_weekday_number(day)
+            weekday_num = _WEEKDAY_INDEX.get(session["day"])
+            if weekday_num is None:
+                raise ValueError(f"{session['day']!r} is not a valid weekday")
             try:
                 start_time, end_time = parse_time_range(time_str)
             except Exception:
                 continue  
-                
-            for current_date in daterange(start_date, end_date):
-                if (
-                    current_date.weekday() == weekday_num
-                    and not is_in_breaks(current_date, breaks)
-                    and not is_in_holidays(current_date, holidays)
-                ):
-                    start_dt = datetime.combine(current_date, start_time)
-                    end_dt = datetime.combine(current_date, end_time)
-                    num_hours = (end_dt - start_dt).total_seconds() / 3600
-                    reward_points = int(round(num_hours * 10))
-                    task = {
-                        "task_id": str(uuid.uuid4()),
-                        "user_id": user_id,
-                        "assignment_id": assignment_id,
-                        "course_id": course["course_id"],
-                        "description": f"{course['course_name']} class session",
-                        "type": "class",
-                        "scheduled_start_at": start_dt.isoformat(),
-                        "scheduled_end_at": end_dt.isoformat(),
-                        "is_completed": False,
-                        "completion_date_at": None,
-                        "reward_points": reward_points,
-                    }
-                    tasks.append(task)
+
+            duration = datetime.combine(start_day, end_time) - datetime.combine(start_day, start_time)
+            reward_points = int(round(duration.total_seconds() / 3600 * 10))
+
+            for day in weekly_occurrences(start_day, end_day, weekday_num, breaks_key, holidays_key):
+                tasks.append({
+                    "task_id": str(uuid.uuid4()),
+                    "user_id": user_id,
+                    "assignment_id": assignment_id,
+                    "course_id": course["course_id"],
+                    "description": description,
+                    "type": "class",
+                    "scheduled_start_at": datetime.combine(day, start_time).isoformat(),
+                    "scheduled_end_at": datetime.combine(day, end_time).isoformat(),
+                    "is_completed": False,
+                    "completion_date_at": None,
+                    "reward_points": reward_points,
+                })
     return tasks
 
 # Export functions and variables for use in other modules
@@ -310,13 +342,9 @@ __all__ = [
     'extract_timetable_courses',
     'parse_time_range',
     'generate_tasks_for_courses',
-    'term',
+    'weekly_occurrences',
     'user_id',
     'assignment_id',
-    'start_date',
-    'end_date',
-    'breaks',
-    'holidays'
 ]
 
 # Example usage
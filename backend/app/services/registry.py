@@ -0,0 +1,62 @@
+"""
+Lazily loaded services.
+
+PDF parsing, the Gemini SDK and the Canvas client are expensive to import and
+only needed by a few routes, so app.main looks them up here instead of importing them at
+module level. Each app builds its own registry (AppResources.services). A
+service is loaded on first get() and cached for the life of that registry;
+tests can swap one out with override().
+"""
+import importlib
+import threading
+from typing import Any, Callable, Dict
+
+
+class ServiceRegistry:
+    def __init__(self):
+        self._factories: Dict[str, Callable[[], Any]] = {}
+        self._instances: Dict[str, Any] = {}
+        self._lock = threading.Lock()
+
+    def register(self, name: str, factory: Callable[[], Any]):
+        self._factories[name] = factory
+
+    def register_module(self, name: str, module_path: str):
+        """Register a service that is simply a module, imported on first use."""
+        self.register(name, lambda: importlib.import_module(module_path))
+
+    def get(self, name: str) -> Any:
+        instance = self._instances.get(name)
+        if instance is not None:
+            return instance
+        with self._lock:
+            if name not in self._instances:
+                if name not in self._factories:
+                    raise KeyError(f"Unknown service: {name}")
+                self._instances[name] = self._factories[name]()
+            return self._instances[name]
+
+    def is_loaded(self, name: str) -> bool:
+        return name in self._instances
+
+    def override(self, name: str, instance: Any):
+        """Replace a service instance (e.g. with a fake in tests)."""
+        with self._lock:
+            self._instances[name] = instance
+
+    def reset(self, name: str):
+        with self._lock:
+            self._instances.pop(name, None)
+
+
+def _canvas_sync_engine():
+    from app.services.canvas_sync import CanvasSyncEngine
+    return CanvasSyncEngine()
+
+
+def build_service_registry() -> ServiceRegistry:
+    """A registry with the app's lazily loaded services registered."""
+    registry = ServiceRegistry()
+    registry.register_module("syllabi", "app.services.read_syllabi")
+    registry.register("canvas_sync", _canvas_sync_engine)
+    return registry
@@ -0,0 +1,111 @@
+"""Academic term schedules (start/end dates, breaks, holidays).
+
+Terms are defined in terms.json next to this module. The file is read and its
+dates parsed once per process; resolving a term string is then a dictionary
+lookup, memoized per normalized term string. Adding a term means adding an
+entry to terms.json.
+"""
+import json
+import os
+import threading
+from datetime import datetime
+from functools import lru_cache
+from typing import Dict, List, Optional
+
+TERMS_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "terms.json")
+
+
+def _parse_day(value: str) -> datetime:
+    return datetime.fromisoformat(value)
+
+
+def _parse_term(entry: Dict) -> Dict:
+    """Build the schedule dict used by the timetable services from a terms.json entry.
+
+    Breaks are stored as a tuple of (start, end) intervals sorted by start, and
+    holidays as a frozenset so membership checks are O(1).
+    """
+    breaks = sorted(
+        (_parse_day(b["start"]), _parse_day(b["end"])) for b in entry.get("breaks", [])
+    )
+    return {
+        "term_id": entry["id"],
+        "label": entry.get("label", entry["id"]),
+        "season": entry.get("season"),
+        "year": entry.get("year"),
+        "original_start_date": _parse_day(entry["start_date"]),
+        "end_date": _parse_day(entry["end_date"]),
+        "breaks": tuple(breaks),
+        "holidays": frozenset(_parse_day(h["date"]) for h in entry.get("holidays", [])),
+        "_source": entry,
+    }
+
+
+class TermRegistry:
+    """In-memory index of term schedules loaded from terms.json."""
+
+    def __init__(self, data: Dict):
+        self._terms: List[Dict] = [_parse_term(t) for t in data.get("terms", [])]
+        self._by_id: Dict[str, Dict] = {t["term_id"].lower(): t for t in self._terms}
+        self._season_fallbacks: Dict[str, Dict] = {
+            season.lower(): self._by_id[term_id.lower()]
+            for season, term_id in data.get("season_fallbacks", {}).items()
+        }
+        self._default: Dict = _parse_term(data["default"])
+        self.resolve = lru_cache(maxsize=256)(self._resolve)
+
+    @classmethod
+    def from_file(cls, path: str = TERMS_FILE) -> "TermRegistry":
+        with open(path, "r", encoding="utf-8") as f:
+            return cls(json.load(f))
+
+    def _resolve(self, clean_term: str) -> Dict:
+        """Match a normalized term string to a schedule.
+
+        Order: exact id, then season + year keywords (e.g. "Fall 2025"), then a
+        season-only fallback, then the default schedule.
+        """
+        exact = self._by_id.get(clean_term)
+        if exact is not None:
+            return exact
+        for term in self._terms:
+            if term["season"] and term["season"] in clean_term and str(term["year"]) in clean_term:
+                return term
+        for season, term in self._season_fallbacks.items():
+            if season in clean_term:
+                return term
+        return self._default
+
+    def get_schedule(self, term_str: Optional[str]) -> Dict:
+        """Return the schedule dict for a user-supplied term string."""
+        return self.resolve((term_str or "").strip().lower())
+
+    def list_terms(self) -> List[Dict]:
+        """JSON-serializable description of every configured term."""
+        return [
+            {
+                "id": t["term_id"],
+                "label": t["label"],
+                "season": t["season"],
+                "year": t["year"],
+                "start_date": t["_source"]["start_date"],
+                "end_date": t["_source"]["end_date"],
+                "breaks": t["_source"].get("breaks", []),
+                "holidays": t["_source"].get("holidays", []),
+            }
+            for t in self._terms
+        ]
+
+
+_registry: Optional[TermRegistry] = None
+_registry_lock = threading.Lock()
+
+
+def get_term_registry() -> TermRegistry:
+    """Return the process-wide registry, loading terms.json on first use."""
+    global _registry
+    if _registry is None:
+        with _registry_lock:
+            if _registry is None:
+                _registry = TermRegistry.from_file()
+    return _registry
@@ -0,0 +1,121 @@
+"""Pytest tests for create_app() and per-app resources."""
+import gc
+import io
+import weakref
+from types import SimpleNamespace
+
+import pytest
+
+from app.main import create_app
+from app.resources import EXTENSION_KEY
+from app.services.jobs import JobManager
+from app.services.registry import build_service_registry
+
+
+def test_apps_have_independent_config_and_resources(tmp_path):
+    small = create_app({"TESTING": True, "BATCH_MAX_WORKERS": 1, "UPLOAD_FOLDER": str(tmp_path)})
+    large = create_app({"TESTING": True, "BATCH_MAX_WORKERS": 4})
+
+    small_resources = small.extensions[EXTENSION_KEY]
+    large_resources = large.extensions[EXTENSION_KEY]
+    assert small_resources is not large_resources
+    assert small_resources.batch_executor._max_workers == 1
+    assert large_resources.batch_executor._max_workers == 4
+    assert small.config["UPLOAD_FOLDER"] == str(tmp_path)
+    assert large.config["UPLOAD_FOLDER"]
+    # Created once per app, then reused
+    assert small_resources.batch_executor is small_resources.batch_executor
+
+    small_resources.close()
+    large_resources.close()
+
+
+def test_close_shuts_down_owned_but_not_injected_resources():
+    injected = JobManager(max_workers=1)
+    flask_app = create_app({"TESTING": True, "JOB_MANAGER": injected})
+    resources = flask_app.extensions[EXTENSION_KEY]
+    executor = resources.batch_executor
+    assert resources.job_manager is injected
+
+    resources.close()
+
+    with pytest.raises(RuntimeError):
+        executor.submit(lambda: None)
+    job = injected.submit("still-alive", lambda report_progress: "ok")
+    assert job["status"] == "queued"
+    injected.shutdown()
+    resources.close()  # idempotent
+
+
+def test_each_app_extracts_with_its_own_pdf_pool(monkeypatch):
+    class FakePool:
+        max_workers = 1
+
+        def __init__(self):
+            self.sources = []
+
+        def extract_tables(self, source):
+            self.sources.append(source)
+            return [[["", "Monday"], ["MATH101", "MATH101\n09:00 - 10:00"]]]
+
+    first_pool, second_pool = FakePool(), FakePool()
+    first = create_app({"TESTING": True, "PDF_POOL": first_pool})
+    create_app({"TESTING": True, "PDF_POOL": second_pool})  # created last, must not take over
+    monkeypatch.setattr("app.services.read_timetable.get_table_cache", lambda: None)
+
+    resp = first.test_client().post(
+        "/api/timetable/process",
+        data={"file": (io.BytesIO(b"%PDF-1.4 timetable"), "t.pdf"), "user_id": "u1"},
+        content_type="multipart/form-data",
+    )
+    assert resp.status_code == 200
+    assert first_pool.sources == [b"%PDF-1.4 timetable"]
+    assert second_pool.sources == []
+
+
+def test_close_keeps_shared_db_clients_and_apps_are_collectable(monkeypatch):
+    resets = []
+    monkeypatch.setattr("app.resources.DBClient.reset", lambda: resets.append(1))
+    flask_app = create_app({"TESTING": True})
+    flask_app.extensions[EXTENSION_KEY].close()
+    assert resets == []
+
+    ref = weakref.ref(create_app({"TESTING": True}).extensions[EXTENSION_KEY])
+    gc.collect()
+    assert ref() is None
+
+
+def test_injected_services_are_used_by_routes(tmp_path):
+    calls = {}
+    fake_llm = object()
+
+    def extract(path, cache=None, llm_client=None):
+        calls["extract_llm"] = llm_client
+        return {"assignments": [], "tasks": []}
+
+    def generate(assignments, busy_intervals, **kwargs):
+        calls["generate_llm"] = kwargs.get("llm_client")
+        return {"assignments": []}
+
+    fake_syllabi = SimpleNamespace(
+        extract_tasks_assignments_from_pdf=extract,
+        add_ids_to_extracted_data=lambda data, user_id, course_id: data,
+        generate_assignment_microtasks_with_ids=generate,
+        get_extraction_cache=lambda: None,
+    )
+    registry = build_service_registry()
+    registry.override("syllabi", fake_syllabi)
+    flask_app = create_app({
+        "TESTING": True, "SERVICES": registry, "LLM_CLIENT": fake_llm, "UPLOAD_FOLDER": str(tmp_path)
+    })
+
+    resp = flask_app.test_client().post(
+        "/api/syllabi/process",
+        data={"file": (io.BytesIO(b"%PDF-1.4 test"), "syllabus.pdf"), "user_id": "u1"},
+        content_type="multipart/form-data",
+    )
+    assert resp.status_code == 200
+    assert resp.get_json()["assignments_found"] == 0
+    assert calls == {"extract_llm": fake_llm, "generate_llm": fake_llm}
+    assert list(tmp_path.iterdir()) == []
+    flask_app.extensions[EXTENSION_KEY].close()
@@ -158,3 +158,25 @@ def test_delete_assignment_not_found(client, monkeypatch):
     resp = client.delete("/db/assignments/nonexistent")
     assert resp.status_code == 404
     assert "error" in resp.get_json()
+
+
+def test_stream_assignments_ndjson(client, monkeypatch):
+    """Test GET /db/assignments with Accept: application/x-ndjson - one row per line."""
+    import json
+    seen_filters = {}
+
+    class StubAssignmentsRepo:
+        def iter_with_filters(self, **kwargs):
+            seen_filters.update(kwargs)
+            for i in range(3):
+                yield {"assignment_id": f"a{i}", "course_id": "c1"}
+
+    import app.main as main
+    monkeypatch.setattr(main, "AssignmentsRepository", StubAssignmentsRepo)
+
+    resp = client.get("/db/assignments?course_id=c1", headers={"Accept": "application/x-ndjson"})
+    assert resp.status_code == 200
+    assert resp.mimetype == "application/x-ndjson"
+    lines = resp.get_data(as_text=True).splitlines()
+    assert [json.loads(line)["assignment_id"] for line in lines] == ["a0", "a1", "a2"]
+    assert seen_filters["course_id"] == "c1"
@@ -0,0 +1,143 @@
+"""Pytest tests for the /db/batch endpoint and batch execution engine."""
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from app.services import batch
+
+
+def test_batch_mixed_reads_and_writes(client, monkeypatch):
+    """Test POST /db/batch - results come back in request order."""
+    created = []
+
+    class StubTasksRepo:
+        def fetch_by_user(self, **kwargs):
+            return [{"task_id": "t1", "user_id": kwargs["user_id"]}]
+
+        def create(self, **kwargs):
+            created.append(kwargs)
+            return True
+
+    class StubCoursesRepo:
+        def fetch_all(self):
+            return [{"course_id": "c1"}]
+
+    import app.main as main
+    monkeypatch.setattr(main, "TasksRepository", StubTasksRepo)
+    monkeypatch.setattr(main, "CoursesRepository", StubCoursesRepo)
+
+    resp = client.post("/db/batch", json=[
+        {"method": "GET", "path": "/db/tasks?user_id=u1"},
+        {"method": "GET", "path": "/db/courses"},
+        {"method": "POST", "path": "/db/tasks", "body": {
+            "task_id": "t2", "user_id": "u1", "description": "Read", "type": "reading"
+        }},
+        {"method": "GET", "path": "/db/tasks"},
+    ])
+    assert resp.status_code == 200
+    results = resp.get_json()["results"]
+    assert [r["status"] for r in results] == [200, 200, 201, 400]
+    assert results[0]["body"][0]["task_id"] == "t1"
+    assert results[1]["body"] == [{"course_id": "c1"}]
+    assert results[2]["body"]["task_id"] == "t2"
+    assert [r["id"] for r in results] == [0, 1, 2, 3]
+    assert len(created) == 1
+
+
+def test_batch_stop_on_error_skips_after_failed_write(client, monkeypatch):
+    """Test POST /db/batch with stop_on_error=true - later requests are skipped."""
+    created = []
+
+    class StubTasksRepo:
+        def create(self, **kwargs):
+            created.append(kwargs)
+            return True
+
+    import app.main as main
+    monkeypatch.setattr(main, "TasksRepository", StubTasksRepo)
+
+    resp = client.post("/db/batch", json={
+        "stop_on_error": True,
+        "requests": [
+            {"method": "POST", "path": "/db/tasks", "body": {"task_id": "t1"}},
+            {"method": "POST", "path": "/db/tasks", "body": {
+                "task_id": "t2", "user_id": "u1", "description": "Read", "type": "reading"
+            }},
+        ],
+    })
+    assert resp.status_code == 200
+    results = resp.get_json()["results"]
+    assert results[0]["status"] == 400
+    assert results[1]["status"] == batch.SKIPPED_STATUS
+    assert created == []
+
+
+def test_batch_rejects_transaction_flag(client):
+    """Test POST /db/batch - the old transaction flag is refused rather than ignored."""
+    resp = client.post("/db/batch", json={"transaction": True, "requests": [{"path": "/db/users"}]})
+    assert resp.status_code == 400
+    assert "stop_on_error" in resp.get_json()["error"]
+
+
+@pytest.mark.parametrize("payload", [
+    [],
+    {"requests": "nope"},
+    [{"method": "PATCH", "path": "/db/tasks"}],
+    [{"method": "GET", "path": "/api/timetable/process"}],
+    [{"method": "POST", "path": "/db/batch"}],
+])
+def test_batch_rejects_invalid_payload(client, payload):
+    """Test POST /db/batch - malformed batches are rejected up front."""
+    resp = client.post("/db/batch", json=payload)
+    assert resp.status_code == 400
+    assert "error" in resp.get_json()
+
+
+def test_run_batch_runs_consecutive_reads_in_parallel():
+    """Reads between writes are dispatched together; writes act as barriers."""
+    barrier = threading.Barrier(3, timeout=5)
+    order = []
+
+    def dispatch(method, path, body):
+        if method == "GET" and path.startswith("/db/parallel"):
+            barrier.wait()  # deadlocks unless all three reads run concurrently
+        order.append((method, path))
+        return {"status": 200, "body": None}
+
+    items = batch.validate_batch(
+        [{"method": "GET", "path": f"/db/parallel/{i}"} for i in range(3)]
+        + [{"method": "PUT", "path": "/db/write"}, {"method": "GET", "path": "/db/after"}]
+    )
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        results = batch.run_batch(items, dispatch, executor)
+    assert all(r["status"] == 200 for r in results)
+    assert order[3:] == [("PUT", "/db/write"), ("GET", "/db/after")]
+
+
+def test_run_batch_reports_dispatch_exceptions():
+    def dispatch(method, path, body):
+        raise RuntimeError("boom")
+
+    items = batch.validate_batch([{"method": "GET", "path": "/db/users"}])
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        results = batch.run_batch(items, dispatch, executor)
+    assert results == [{"id": 0, "status": 500, "body": {"error": "boom"}}]
+
+
+def test_db_client_reads_env_file_once(monkeypatch):
+    """Test DBClient.connect - the .env file is read on the first call only."""
+    from database import db_client
+    from database.db_client import DBClient
+
+    loads = []
+    pooled = object()
+    monkeypatch.setattr(db_client, "load_dotenv", lambda **kwargs: loads.append(kwargs))
+    monkeypatch.setattr(DBClient, "_env_loaded", False)
+    monkeypatch.setenv("SUPABASE_URL", "http://db.test")
+    monkeypatch.setenv("SUPABASE_KEY", "key")
+    monkeypatch.setitem(DBClient._clients, ("http://db.test", "key"), pooled)
+
+    assert DBClient.connect() is pooled
+    assert DBClient.connect() is pooled
+    assert len(loads) == 1
@@ -244,3 +244,17 @@ def test_delete_user_blind_box(client, monkeypatch):
     resp = client.delete("/db/user-blind-boxes/p1")
     assert resp.status_code == 200
     assert resp.get_json()["status"] == "deleted"
+
+
+def test_stream_blind_box_figures_ndjson(client, monkeypatch):
+    """Test GET /db/blind-box-figures streaming export."""
+    class StubBlindBoxFiguresRepo:
+        def iter_all(self, series_id=None):
+            return iter([])
+
+    import app.main as main
+    monkeypatch.setattr(main, "BlindBoxFiguresRepository", StubBlindBoxFiguresRepo)
+
+    resp = client.get("/db/blind-box-figures", headers={"Accept": "application/x-ndjson"})
+    assert resp.status_code == 200
+    assert resp.get_data(as_text=True) == ""
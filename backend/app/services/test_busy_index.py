@@ -0,0 +1,122 @@
+import random
+from datetime import datetime, time, timedelta
+
+from app.services.busy_index import BusyIndex, parse_datetime
+
+
+def _dt(text):
+    return datetime.fromisoformat(text)
+
+
+def _index(*pairs):
+    return BusyIndex([(_dt(s), _dt(e), f"{s}/{e}") for s, e in pairs])
+
+
+def test_parse_datetime_drops_timezone():
+    assert parse_datetime("2025-11-10T09:00:00Z") == _dt("2025-11-10T09:00:00")
+    assert parse_datetime("2025-11-10T09:00:00+00:00") == _dt("2025-11-10T09:00:00")
+    assert parse_datetime(None) is None
+
+
+def test_overlapping_returns_payloads():
+    index = _index(
+        ("2025-11-10T08:00:00", "2025-11-10T18:00:00"),  # long interval, starts early
+        ("2025-11-10T10:00:00", "2025-11-10T11:00:00"),
+        ("2025-11-10T12:00:00", "2025-11-10T13:00:00"),
+    )
+    hits = index.overlapping(_dt("2025-11-10T11:00:00"), _dt("2025-11-10T12:30:00"))
+    assert [p for _, _, p in hits] == [
+        "2025-11-10T08:00:00/2025-11-10T18:00:00",
+        "2025-11-10T12:00:00/2025-11-10T13:00:00",
+    ]
+    # Touching end points do not overlap
+    assert index.overlapping(_dt("2025-11-10T18:00:00"), _dt("2025-11-10T19:00:00")) == []
+
+
+def test_overlapping_matches_brute_force():
+    rng = random.Random(7)
+    base = _dt("2025-11-10T00:00:00")
+    intervals = []
+    for i in range(300):
+        start = base + timedelta(minutes=rng.randrange(0, 10_000))
+        intervals.append((start, start + timedelta(minutes=rng.randrange(1, 600)), i))
+    index = BusyIndex(intervals)
+    for _ in range(200):
+        qs = base + timedelta(minutes=rng.randrange(0, 10_000))
+        qe = qs + timedelta(minutes=rng.randrange(1, 300))
+        expected = sorted(p for s, e, p in intervals if s < qe and e > qs)
+        assert sorted(p for _, _, p in index.overlapping(qs, qe)) == expected
+        assert index.is_free(qs, qe) == (not expected)
+
+
+def test_add_keeps_index_sorted():
+    index = _index(("2025-11-10T12:00:00", "2025-11-10T13:00:00"))
+    index.add(_dt("2025-11-10T09:00:00"), _dt("2025-11-10T10:00:00"), "early")
+    assert len(index) == 2
+    assert not index.is_free(_dt("2025-11-10T09:30:00"), _dt("2025-11-10T09:45:00"))
+    assert index.is_free(_dt("2025-11-10T10:00:00"), _dt("2025-11-10T12:00:00"))
+
+
+def test_add_matches_index_built_at_once():
+    rng = random.Random(11)
+    base = _dt("2025-11-10T00:00:00")
+    intervals = []
+    index = BusyIndex()
+    for i in range(200):
+        start = base + timedelta(minutes=rng.randrange(0, 5_000))
+        interval = (start, start + timedelta(minutes=rng.randrange(1, 240)), i)
+        intervals.append(interval)
+        index.add(*interval)
+        if i % 20 == 0:
+            qs = base + timedelta(minutes=rng.randrange(0, 5_000))
+            qe = qs + timedelta(minutes=rng.randrange(1, 300))
+            expected = sorted(p for s, e, p in intervals if s < qe and e > qs)
+            assert sorted(p for _, _, p in index.overlapping(qs, qe)) == expected
+    rebuilt = BusyIndex(intervals)
+    window = (base, base + timedelta(days=5))
+    assert list(index.free_slots(*window)) == list(rebuilt.free_slots(*window))
+
+
+def test_next_free_respects_busy_and_working_hours():
+    index = _index(("2025-11-10T09:00:00", "2025-11-10T20:30:00"))
+    start = index.next_free(
+        _dt("2025-11-10T07:00:00"), timedelta(hours=1), _dt("2025-11-12T00:00:00"),
+        day_start=time(9), day_end=time(21),
+    )
+    # 20:30-21:30 would run past the 21:00 close, so the next morning it is
+    assert start == _dt("2025-11-11T09:00:00")
+
+
+def test_next_free_none_when_no_room_before_deadline():
+    index = _index(("2025-11-10T09:00:00", "2025-11-10T21:00:00"))
+    assert index.next_free(
+        _dt("2025-11-10T09:00:00"), timedelta(hours=1), _dt("2025-11-10T23:59:00"),
+        day_start=time(9), day_end=time(21),
+    ) is None
+
+
+def test_free_slots_within_working_hours():
+    index = _index(
+        ("2025-11-10T10:00:00", "2025-11-10T11:00:00"),
+        ("2025-11-10T10:30:00", "2025-11-10T12:00:00"),
+        ("2025-11-10T16:00:00", "2025-11-10T16:30:00"),
+    )
+    slots = list(index.free_slots(
+        _dt("2025-11-10T00:00:00"), _dt("2025-11-11T12:00:00"), timedelta(hours=1),
+        day_start=time(9), day_end=time(18),
+    ))
+    assert slots == [
+        (_dt("2025-11-10T09:00:00"), _dt("2025-11-10T10:00:00")),
+        (_dt("2025-11-10T12:00:00"), _dt("2025-11-10T16:00:00")),
+        (_dt("2025-11-10T16:30:00"), _dt("2025-11-10T18:00:00")),
+        (_dt("2025-11-11T09:00:00"), _dt("2025-11-11T12:00:00")),
+    ]
+
+
+def test_free_slots_filters_short_gaps():
+    index = _index(
+        ("2025-11-10T09:00:00", "2025-11-10T10:00:00"),
+        ("2025-11-10T10:30:00", "2025-11-10T12:00:00"),
+    )
+    slots = list(index.free_slots(_dt("2025-11-10T09:00:00"), _dt("2025-11-10T14:00:00"), timedelta(hours=1)))
+    assert slots == [(_dt("2025-11-10T12:00:00"), _dt("2025-11-10T14:00:00"))]
@@ -0,0 +1,71 @@
+"""Tests for CanvasClient against the local fake Canvas server (see conftest.py)."""
+import pytest
+
+from app.services.canvas import AdaptiveThrottle, CanvasClient, CanvasError
+
+
+def _courses(n):
+    return [{"id": i, "name": f"Course {i}", "course_code": f"C{i}"} for i in range(1, n + 1)]
+
+
+def _assignments(course_id, n):
+    return [{"id": course_id * 1000 + i, "name": f"A{i}", "due_at": None} for i in range(n)]
+
+
+def test_paginates_courses_and_reuses_connection(fake_canvas):
+    fake_canvas.add_account("tok", _courses(25))
+    with CanvasClient(fake_canvas.url, "tok", per_page=10) as client:
+        courses = client.get_courses()
+
+    assert [c["id"] for c in courses] == list(range(1, 26))
+    assert client.request_count == 3
+    assert fake_canvas.connections == 1
+
+
+def test_fetches_assignments_concurrently_with_full_pagination(fake_canvas):
+    courses = _courses(6)
+    fake_canvas.add_account("tok", courses, {c["id"]: _assignments(c["id"], 12) for c in courses})
+    fake_canvas.latency = 0.05
+
+    with CanvasClient(fake_canvas.url, "tok", max_concurrency=3, per_page=5) as client:
+        by_course = client.get_assignments_for_courses(c["id"] for c in courses)
+
+    assert set(by_course) == {c["id"] for c in courses}
+    assert all(len(items) == 12 for items in by_course.values())
+    assert 1 < fake_canvas.max_in_flight <= 3
+    assert fake_canvas.connections <= 3
+    # include[] survives onto the next pages
+    assert all(("include[]", "all_dates") in query for _, path, query in fake_canvas.requests if "assignments" in path)
+
+
+def test_retries_rate_limited_requests(fake_canvas):
+    fake_canvas.add_account("tok", _courses(2))
+    fake_canvas.rate_limit_failures = 2
+    sleeps = []
+
+    with CanvasClient(fake_canvas.url, "tok", sleep=sleeps.append, backoff_base=0.5) as client:
+        assert len(client.get_courses()) == 2
+
+    assert sleeps == [0.5, 1.0]
+
+
+def test_throttles_as_bucket_drains(fake_canvas):
+    fake_canvas.add_account("tok", _courses(30))
+    fake_canvas.rate_limit_remaining = 105.0
+    fake_canvas.request_cost = 50.0
+    sleeps = []
+    throttle = AdaptiveThrottle(low_water=100.0, max_delay=2.0, sleep=sleeps.append)
+
+    with CanvasClient(fake_canvas.url, "tok", per_page=10, throttle=throttle) as client:
+        client.get_courses()
+
+    # remaining 55 after the first page, then 5: progressively longer waits
+    assert sleeps == [pytest.approx(0.9), pytest.approx(1.9)]
+    assert throttle.throttled_seconds == pytest.approx(2.8)
+
+
+def test_errors_raise_canvas_error(fake_canvas):
+    with CanvasClient(fake_canvas.url, "wrong-token") as client:
+        with pytest.raises(CanvasError) as excinfo:
+            client.get_courses()
+    assert excinfo.value.status_code == 401
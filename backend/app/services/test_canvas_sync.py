@@ -0,0 +1,176 @@
+"""Tests for the incremental Canvas sync, against the fake Canvas server (see conftest.py)."""
+import pytest
+
+from app.services.canvas import CanvasClient
+from app.services.canvas_sync import CanvasSyncEngine, CanvasSyncError
+from app.services.registry import build_service_registry
+
+
+class FakeUsers:
+    def __init__(self, users):
+        self.users = users
+
+    def fetch_canvas_credentials(self, user_id):
+        return self.users.get(user_id)
+
+
+class FakeTable:
+    """Rows keyed like the table's upsert conflict target; counts upserted rows."""
+
+    def __init__(self, key):
+        self.key = key
+        self.rows = {}
+        self.upserted = 0
+
+    def upsert_many(self, rows):
+        for row in rows:
+            self.rows[tuple(row[k] for k in self.key)] = dict(row)
+        self.upserted += len(rows)
+        return len(rows)
+
+
+class FakeCourses(FakeTable):
+    def __init__(self):
+        super().__init__(("user_id", "canvas_course_id"))
+
+    def fetch_canvas_courses(self, user_id):
+        return [r for r in self.rows.values() if r["user_id"] == user_id and r.get("canvas_course_id")]
+
+
+class FakeAssignments(FakeTable):
+    def __init__(self):
+        super().__init__(("course_id", "canvas_assignment_id"))
+
+    def fetch_canvas_assignments(self, course_ids):
+        return [r for r in self.rows.values() if r["course_id"] in course_ids]
+
+
+class FakeCursors(FakeTable):
+    def __init__(self):
+        super().__init__(("user_id", "resource"))
+
+    def fetch_by_user(self, user_id):
+        return {r["resource"]: r for r in self.rows.values() if r["user_id"] == user_id}
+
+
+def _course(i):
+    return {"id": i, "name": f"Course {i}", "course_code": f"C{i}", "term": {"name": "2025 Fall"}}
+
+
+def _assignment(i, due="2025-10-01T23:59:00Z"):
+    return {"id": i, "name": f"Assignment {i}", "due_at": due, "updated_at": "2025-09-01T00:00:00Z"}
+
+
+@pytest.fixture
+def engine(fake_canvas):
+    courses = [_course(1), _course(2), _course(3)]
+    fake_canvas.add_account("tok", courses, {
+        1: [_assignment(11), _assignment(12)],
+        2: [_assignment(21), _assignment(22, due=None)],
+        3: [],
+    })
+    return CanvasSyncEngine(
+        users=FakeUsers({"u1": {"user_id": "u1", "canvas_domain": fake_canvas.url, "canvas_api_key": "tok"}}),
+        courses=FakeCourses(),
+        assignments=FakeAssignments(),
+        cursors=FakeCursors(),
+    )
+
+
+def test_first_sync_inserts_courses_and_assignments(engine):
+    stats = engine.sync_user("u1")
+
+    assert stats["courses_upserted"] == 3
+    assert stats["assignments_upserted"] == 3
+    assert stats["assignments_skipped"] == 1       # no due date
+    assert stats["not_modified"] == 0
+    assert stats["requests"] == 4                   # course list + 3 assignment lists
+    assert {r["canvas_course_id"] for r in engine.courses.rows.values()} == {"1", "2", "3"}
+    assert len(engine.cursors.rows) == 4
+
+
+def test_unchanged_sync_is_conditional_requests_only(engine, fake_canvas):
+    engine.sync_user("u1")
+    fake_canvas.requests.clear()
+    upserted = engine.courses.upserted, engine.assignments.upserted, engine.cursors.upserted
+
+    stats = engine.sync_user("u1")
+
+    assert stats["requests"] == 4
+    assert stats["not_modified"] == 4
+    assert stats["courses_upserted"] == stats["assignments_upserted"] == 0
+    assert (engine.courses.upserted, engine.assignments.upserted, engine.cursors.upserted) == upserted
+
+
+def test_changed_course_resyncs_only_that_course(engine, fake_canvas):
+    engine.sync_user("u1")
+    course_ids = {r["canvas_course_id"]: r["course_id"] for r in engine.courses.rows.values()}
+    assignments = fake_canvas.accounts["tok"]["assignments"]["1"]
+    assignments[0] = _assignment(11, due="2025-10-08T23:59:00Z")
+    assignments.append(_assignment(13))
+
+    stats = engine.sync_user("u1")
+
+    assert stats["not_modified"] == 3
+    assert stats["courses_upserted"] == 0
+    assert stats["assignments_upserted"] == 2
+    moved = next(r for r in engine.assignments.rows.values() if r["canvas_assignment_id"] == "11")
+    assert moved["due_date"].startswith("2025-10-08T23:59")
+    assert moved["course_id"] == course_ids["1"]
+    assert len(engine.assignments.rows) == 4         # updated in place, not duplicated
+
+
+def test_concurrent_first_syncs_write_the_same_rows(engine, fake_canvas):
+    """Two syncs that both read the user before either wrote agree on every row id."""
+    courses, assignments = engine.courses, engine.assignments
+    stale_courses = courses.fetch_canvas_courses("u1")
+    stale_assignments = assignments.fetch_canvas_assignments([])
+    engine.sync_user("u1")
+    stored_courses = dict(courses.rows)
+    stored_assignments = dict(assignments.rows)
+
+    courses.fetch_canvas_courses = lambda user_id: stale_courses
+    assignments.fetch_canvas_assignments = lambda course_ids: stale_assignments
+    engine.cursors.rows.clear()
+    stats = engine.sync_user("u1")
+
+    assert stats["courses_upserted"] == 3              # seen as new again...
+    assert courses.rows == stored_courses              # ...but same course_ids, nothing re-keyed
+    assert assignments.rows == stored_assignments
+
+
+def test_multi_page_lists_are_always_refetched(engine, fake_canvas):
+    fake_canvas.accounts["tok"]["assignments"]["1"] = [_assignment(100 + i) for i in range(5)]
+    factory = lambda domain, token: CanvasClient(domain, token, per_page=2)
+    engine.client_factory = factory
+    engine.sync_user("u1")
+
+    stats = engine.sync_user("u1")
+
+    # the course list (2 pages) and course 1 (3 pages) are refetched; courses 2 and 3 are 304s
+    assert stats["not_modified"] == 2
+    assert stats["requests"] == 2 + 3 + 1 + 1
+    assert stats["assignments_upserted"] == 0
+
+
+def test_missing_credentials_raise(engine):
+    engine.users.users["u2"] = {"user_id": "u2", "canvas_domain": None, "canvas_api_key": None}
+    with pytest.raises(CanvasSyncError):
+        engine.sync_user("u2")
+    with pytest.raises(CanvasSyncError):
+        engine.sync_user("nobody")
+
+
+def test_sync_route(engine):
+    from app.main import create_app
+
+    registry = build_service_registry()
+    registry.override("canvas_sync", engine)
+    client = create_app({"TESTING": True, "SERVICES": registry}).test_client()
+
+    resp = client.post("/api/canvas/sync", json={"user_id": "u1"})
+    assert resp.status_code == 200
+    assert resp.get_json()["courses_upserted"] == 3
+
+    assert client.post("/api/canvas/sync", json={}).status_code == 400
+    assert client.post("/api/canvas/sync", json={"user_id": "nobody"}).status_code == 400
@@ -1,4 +1,6 @@
 """Pytest tests for /db/courses API endpoints."""
+import uuid
+
 import pytest
 
 
@@ -102,3 +104,84 @@ def test_create_course_missing_fields(client):
     resp = client.post("/db/courses", json=payload)
     assert resp.status_code == 400
     assert "course_name" in resp.get_json()["error"]
+
+
+def test_timetable_persist_returns_ids_only(client, monkeypatch):
+    """Test POST /api/timetable/process with persist=true - one import call, counts and ids back."""
+    import io
+    import app.main as main
+
+    courses = [{
+        "course_id": "new-1", "course_name": "MATH101", "course_code": "MATH101", "color": "blue",
+        "meeting_sessions": [{"day": "Monday", "time": "09:00 - 10:00"}],
+    }]
+    imports = []
+
+    class StubCoursesRepo:
+        def import_timetable(self, user_id, term, courses, tasks):
+            imports.append((user_id, term, courses, tasks))
+            return {
+                "course_ids": {"new-1": "existing-1"},
+                "courses_imported": 1,
+                "courses_removed": 2,
+                "tasks_imported": len(tasks),
+                "task_ids": [t["task_id"] for t in tasks],
+            }
+
+    monkeypatch.setattr(main, "extract_timetable_courses", lambda pdf, user_id, term, pool=None: courses)
+    monkeypatch.setattr(main, "CoursesRepository", StubCoursesRepo)
+
+    resp = client.post(
+        "/api/timetable/process",
+        data={"file": (io.BytesIO(b"%PDF-1.4 test"), "timetable.pdf"), "user_id": "u1",
+              "term": "2025 Fall", "persist": "true"},
+        content_type="multipart/form-data",
+    )
+    assert resp.status_code == 200
+    body = resp.get_json()
+    assert len(imports) == 1
+    user_id, term, _, tasks = imports[0]
+    assert (user_id, term) == ("u1", "2025 Fall")
+    assert body["persisted"] is True
+    assert body["courses"] == [{"course_id": "existing-1", "course_code": "MATH101"}]
+    assert body["courses_removed"] == 2
+    assert body["courses_kept"] == []
+    assert body["tasks_imported"] == len(tasks) == len(body["task_ids"])
+    assert "tasks" not in body
+
+
+def test_timetable_reimport_keeps_courses_with_assignments():
+    """import_timetable (live DB): a course left out of a re-import keeps its assignments."""
+    from database.assignments_repository import AssignmentsRepository
+    from database.courses_repository import CoursesRepository
+    from database.db_client import DBClient
+    from database.users_repository import UsersRepository
+
+    try:
+        DBClient.connect()
+    except RuntimeError:
+        pytest.skip("needs SUPABASE_URL and SUPABASE_KEY")
+
+    user_id = f"test_user_{uuid.uuid4().hex[:8]}"
+    users = UsersRepository()
+    users.create(user_id=user_id, email=f"{user_id}@test.com", password="testpassword123")
+    try:
+        repo = CoursesRepository()
+        math = {"course_id": f"math-{user_id}", "course_name": "MATH101", "course_code": "MATH101", "color": "blue"}
+        chem = {"course_id": f"chem-{user_id}", "course_name": "CHEM110", "course_code": "CHEM110", "color": "red"}
+        phys = {"course_id": f"phys-{user_id}", "course_name": "PHYS150", "course_code": "PHYS150", "color": "green"}
+        repo.import_timetable(user_id, "2025 Fall", [math, chem, phys], [])
+        assignment_id = f"lab-{user_id}"
+        AssignmentsRepository().create(
+            assignment_id=assignment_id, course_id=chem["course_id"], title="Lab report",
+            due_date="2025-11-20T23:59:00", completion_points=10,
+        )
+
+        summary = repo.import_timetable(user_id, "2025 Fall", [math], [])
+
+        assert summary["courses_removed"] == 1                  # PHYS150: nothing attached
+        assert summary["courses_kept"] == [chem["course_id"]]
+        assert repo.fetch_by_id(chem["course_id"]) is not None
+        assert AssignmentsRepository().fetch_by_id(assignment_id) is not None
+    finally:
+        users.delete(user_id)
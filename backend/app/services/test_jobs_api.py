@@ -0,0 +1,201 @@
+"""Pytest tests for the background job queue and /api/jobs endpoints."""
+import io
+import threading
+import time
+
+from app.services.jobs import DatabaseJobStore, JobManager, SUCCEEDED, FAILED, build_job_store
+
+
+def _wait_for(manager, job_id, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        job = manager.get(job_id)
+        if job["status"] in (SUCCEEDED, FAILED):
+            return job
+        time.sleep(0.01)
+    raise AssertionError(f"job {job_id} did not finish")
+
+
+def test_job_runs_and_reports_progress():
+    manager = JobManager(max_workers=1)
+
+    def work(report_progress, x):
+        report_progress(0.5)
+        return {"value": x * 2}
+
+    job = manager.submit("double", work, 21)
+    assert job["status"] == "queued"
+    done = _wait_for(manager, job["job_id"])
+    assert done["status"] == SUCCEEDED
+    assert done["progress"] == 1.0
+    assert done["result"] == {"value": 42}
+    assert done["finished_at"] is not None
+    manager.shutdown()
+
+
+def test_job_failure_is_recorded():
+    manager = JobManager(max_workers=1)
+
+    def work(report_progress):
+        raise RuntimeError("boom")
+
+    job = manager.submit("fail", work)
+    done = _wait_for(manager, job["job_id"])
+    assert done["status"] == FAILED
+    assert done["error"] == "boom"
+    manager.shutdown()
+
+
+def test_job_dedupe_key_reuses_live_job():
+    manager = JobManager(max_workers=1)
+    release = threading.Event()
+    calls = []
+
+    def work(report_progress):
+        calls.append(1)
+        release.wait(5)
+        return "ok"
+
+    first = manager.submit("slow", work, dedupe_key="same")
+    second = manager.submit("slow", work, dedupe_key="same")
+    assert second["job_id"] == first["job_id"]
+    assert second["deduplicated"] is True
+    release.set()
+    _wait_for(manager, first["job_id"])
+    assert len(calls) == 1
+    manager.shutdown()
+
+
+def test_finished_jobs_expire_after_ttl():
+    now = [0.0]
+    manager = JobManager(max_workers=1, ttl_seconds=10, clock=lambda: now[0])
+    job = manager.submit("quick", lambda report_progress: "ok", dedupe_key="k")
+    _wait_for(manager, job["job_id"])
+
+    now[0] = 11.0
+    assert manager.get(job["job_id"]) is None
+    again = manager.submit("quick", lambda report_progress: "ok", dedupe_key="k")
+    assert again["job_id"] != job["job_id"]
+    manager.shutdown()
+
+
+def test_timetable_async_returns_job(monkeypatch, tmp_path):
+    """Test POST /api/timetable/process?async=true - 202 then poll /api/jobs/<id>."""
+    import app.main as main
+    manager = JobManager(max_workers=1)
+    client = main.create_app({"TESTING": True, "JOB_MANAGER": manager, "UPLOAD_FOLDER": str(tmp_path)}).test_client()
+    monkeypatch.setattr(main, "extract_timetable_courses", lambda path, user_id, term, pool=None: [])
+
+    resp = client.post(
+        "/api/timetable/process?async=true",
+        data={"file": (io.BytesIO(b"%PDF-1.4 test"), "timetable.pdf"), "user_id": "u1", "term": "2025 Fall"},
+        content_type="multipart/form-data",
+    )
+    assert resp.status_code == 202
+    body = resp.get_json()
+    assert body["status_url"] == f"/api/jobs/{body['job_id']}"
+
+    _wait_for(manager, body["job_id"])
+    resp = client.get(body["status_url"])
+    assert resp.status_code == 200
+    job = resp.get_json()
+    assert job["status"] == "succeeded"
+    assert job["result"]["courses_found"] == 0
+    assert job["result"]["config"]["term"] == "2025 Fall"
+    manager.shutdown()
+
+
+def test_syllabus_dedupe_key_fits_the_jobs_table():
+    """Test POST /api/syllabi/process?async=true - a long busy list still gives a short dedupe key."""
+    import json
+    import app.main as main
+
+    class RecordingManager:
+        keys = []
+
+        def submit(self, kind, fn, *args, dedupe_key=None):
+            self.keys.append(dedupe_key)
+            return {"job_id": "j1", "status": "queued", "deduplicated": False}
+
+    manager = RecordingManager()
+    client = main.create_app({"TESTING": True, "JOB_MANAGER": manager}).test_client()
+    busy = [{"start": f"2025-11-{d:02d}T09:00:00", "end": f"2025-11-{d:02d}T17:00:00"} for d in range(1, 29)]
+
+    for intervals in (busy, busy[:1]):
+        resp = client.post(
+            "/api/syllabi/process?async=true",
+            data={"file": (io.BytesIO(b"%PDF-1.4 test"), "syllabus.pdf"), "user_id": "u1", "course_id": "c1",
+                  "busy_intervals": json.dumps(intervals)},
+            content_type="multipart/form-data",
+        )
+        assert resp.status_code == 202
+
+    assert all(len(key) <= 200 for key in manager.keys)   # processing_jobs.dedupe_key VARCHAR(200)
+    assert manager.keys[0] != manager.keys[1]
+
+
+def test_get_job_not_found(client):
+    """Test GET /api/jobs/<id> - unknown job returns 404."""
+    resp = client.get("/api/jobs/does-not-exist")
+    assert resp.status_code == 404
+
+
+class FakeJobsRepo:
+    """processing_jobs in memory."""
+
+    def __init__(self):
+        self.rows = {}
+
+    def insert(self, job):
+        self.rows[job["job_id"]] = dict(job)
+        return True
+
+    def fetch_by_id(self, job_id):
+        row = self.rows.get(job_id)
+        return dict(row) if row else None
+
+    def fetch_live_by_dedupe_key(self, dedupe_key, now):
+        live = [r for r in self.rows.values()
+                if r["dedupe_key"] == dedupe_key and r["status"] != FAILED and r["expires_at"] > now]
+        return dict(max(live, key=lambda r: r["created_at"])) if live else None
+
+    def update(self, job_id, fields):
+        self.rows[job_id].update(fields)
+        return True
+
+    def delete_expired(self, now):
+        self.rows = {k: r for k, r in self.rows.items() if r["expires_at"] > now}
+
+
+def test_database_store_lets_another_worker_answer_polls():
+    repo = FakeJobsRepo()
+    accepting = JobManager(max_workers=1, store=DatabaseJobStore(repo))
+    polled = JobManager(max_workers=1, store=DatabaseJobStore(repo))   # a second app worker
+
+    job = accepting.submit("double", lambda report_progress, x: x * 2, 21, dedupe_key="k")
+    done = _wait_for(polled, job["job_id"])
+    assert done["result"] == 42
+    assert "dedupe_key" not in done and "expires_at" not in done
+
+    again = polled.submit("double", lambda report_progress, x: x * 2, 21, dedupe_key="k")
+    assert again["deduplicated"] is True
+    assert again["job_id"] == job["job_id"]
+    accepting.shutdown()
+    polled.shutdown()
+
+
+def test_database_store_hides_expired_jobs():
+    repo = FakeJobsRepo()
+    manager = JobManager(max_workers=1, store=DatabaseJobStore(repo, ttl_seconds=60))
+    job = manager.submit("quick", lambda report_progress: "ok")
+    _wait_for(manager, job["job_id"])
+
+    repo.rows[job["job_id"]]["expires_at"] = "2000-01-01T00:00:00+00:00"
+    assert manager.get(job["job_id"]) is None
+    manager.shutdown()
+
+
+def test_unknown_job_store_is_rejected():
+    import pytest
+    with pytest.raises(ValueError):
+        build_job_store("redis")
@@ -0,0 +1,112 @@
+"""Tests for the leaderboard service and GET /db/leaderboard."""
+from datetime import datetime, timezone
+
+import pytest
+
+from app.services.leaderboard import Leaderboard, rank_entries, week_start
+
+NOW = datetime(2025, 11, 12, 15, 0, tzinfo=timezone.utc)   # a Wednesday
+
+
+class FakeLeaderboardRepo:
+    """leaderboard_scores in memory, answering like leaderboard_page()."""
+
+    def __init__(self, boards):
+        self.boards = boards
+        self.calls = []
+
+    def page(self, scope, limit, user_id=None, radius=2):
+        self.calls.append(scope)
+        ordered = sorted(self.boards.get(scope, {}).items(), key=lambda item: (-item[1], item[0]))
+        top = [{"user_id": u, "points": p} for u, p in ordered[:limit]]
+        around = None
+        ids = [u for u, _ in ordered]
+        if user_id in ids:
+            i = ids.index(user_id)
+            around = [
+                {"user_id": u, "points": p, "rank": 1 + sum(1 for _, q in ordered if q > p)}
+                for u, p in ordered[max(0, i - radius):i + radius + 1]
+            ]
+        return {"top": top, "around": around}
+
+
+def _leaderboard(boards):
+    return Leaderboard(FakeLeaderboardRepo(boards), now=lambda: NOW)
+
+
+def test_rank_entries_competition_style():
+    entries = [{"user_id": u, "points": p} for u, p in [("b", 80), ("c", 80), ("a", 50), ("d", 10)]]
+    assert [e["rank"] for e in rank_entries(entries)] == [1, 1, 3, 4]
+
+
+def test_global_board_top_and_around_user():
+    board = _leaderboard({"global": {f"u{i}": i * 10 for i in range(20)}})
+
+    result = board.query("global", limit=3, around_user="u10", radius=1)
+
+    assert [e["user_id"] for e in result["top"]] == ["u19", "u18", "u17"]
+    around = result["around_user"]
+    assert (around["rank"], around["points"]) == (10, 100)
+    assert [e["rank"] for e in around["neighbors"]] == [9, 10, 11]
+
+
+def test_unknown_user_has_no_rank():
+    result = _leaderboard({"global": {"a": 5}}).query("global", around_user="nobody")
+    assert result["around_user"] == {"user_id": "nobody", "rank": None, "points": None, "neighbors": []}
+
+
+def test_weekly_and_course_scopes_map_to_board_rows():
+    board = _leaderboard({"weekly:2025-11-10": {"b": 200}, "course:MAT137": {"a": 250, "b": 120}})
+
+    weekly = board.query("weekly")
+    assert weekly["top"] == [{"rank": 1, "user_id": "b", "points": 200}]
+    assert weekly["week_start"] == week_start(NOW).isoformat()
+    assert [e["user_id"] for e in board.query("course:MAT137")["top"]] == ["a", "b"]
+    assert board.query("course:ECO101")["top"] == []
+    assert board.repo.calls == ["weekly:2025-11-10", "course:MAT137", "course:ECO101"]
+
+
+def test_rejects_unknown_scope():
+    for scope in ("monthly", "course:"):
+        with pytest.raises(ValueError):
+            _leaderboard({}).query(scope)
+
+
+def test_weekly_and_course_scopes_need_the_ledger():
+    board = Leaderboard(FakeLeaderboardRepo({"global": {"a": 30}}), now=lambda: NOW, ledger_enabled=False)
+    assert board.query("global")["top"] == [{"rank": 1, "user_id": "a", "points": 30}]
+    for scope in ("weekly", "course:MAT137"):
+        with pytest.raises(ValueError, match="POINTS_LEDGER_ENABLED"):
+            board.query(scope)
+
+
+def test_leaderboard_route_without_ledger_refuses_weekly_and_course():
+    from app.main import create_app
+    from app.resources import EXTENSION_KEY
+
+    app = create_app({"TESTING": True, "POINTS_LEDGER_ENABLED": False})
+    resources = app.extensions[EXTENSION_KEY]
+    resources.leaderboard.repo = FakeLeaderboardRepo({})
+    client = app.test_client()
+
+    assert client.get("/db/leaderboard").status_code == 200
+    assert client.get("/db/leaderboard?scope=weekly").status_code == 400
+    assert client.get("/db/leaderboard?scope=course:MAT137").status_code == 400
+    resources.close()
+
+
+def test_leaderboard_route():
+    from app.main import create_app
+
+    board = _leaderboard({"global": {"a": 30, "b": 20, "c": 10}})
+    client = create_app({"TESTING": True, "LEADERBOARD": board}).test_client()
+
+    resp = client.get("/db/leaderboard?limit=2&around_user=c")
+    assert resp.status_code == 200
+    data = resp.get_json()
+    assert [e["user_id"] for e in data["top"]] == ["a", "b"]
+    assert data["around_user"]["rank"] == 3
+
+    assert client.get("/db/leaderboard?scope=monthly").status_code == 400
+    assert client.get("/db/leaderboard?limit=0").status_code == 400
+    assert client.get("/db/leaderboard?limit=ten").status_code == 400
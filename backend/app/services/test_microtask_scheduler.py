@@ -0,0 +1,49 @@
+from datetime import datetime, timedelta
+
+from app.services import microtask_scheduler as ms
+
+
+def _dt(text):
+    return datetime.fromisoformat(text)
+
+
+def test_local_titles_end_with_submission():
+    assert ms.local_micro_task_titles("Essay", 1) == ["Submit Assignment"]
+    titles = ms.local_micro_task_titles("Essay", 4)
+    assert titles[0] == "Review requirements: Essay"
+    assert titles[1:3] == ["Work on Essay (part 1/2)", "Work on Essay (part 2/2)"]
+    assert titles[-1] == ms.SUBMISSION_TITLE
+
+
+def test_schedule_assignments_avoids_busy_and_each_other():
+    busy = ms.build_busy_times(
+        [{"start": "2025-11-12T09:00:00", "end": "2025-11-12T21:00:00"}],
+        [{"scheduled_start_at": "2025-11-10T09:00:00+00:00", "scheduled_end_at": "2025-11-10T10:00:00+00:00"}],
+    )
+    windows = [
+        ({"title": "A1", "due_date": "2025-11-14T23:59:00"}, "2025-11-10T00:00:00"),
+        ({"title": "A2", "due_date": "2025-11-14T23:59:00"}, "2025-11-10T00:00:00"),
+    ]
+    results = ms.schedule_assignments(windows, busy, 3, now=_dt("2025-11-01T00:00:00"))
+
+    placed = [(_dt(t["scheduled_start_at"]), _dt(t["scheduled_end_at"])) for r in results for t in r]
+    assert len(placed) == 6
+    for start, end in placed:
+        assert start.date() != datetime(2025, 11, 12).date()
+        assert ms.DEFAULT_DAY_START <= start.time() and end.time() <= ms.DEFAULT_DAY_END
+        assert end <= _dt("2025-11-14T23:59:00")
+        assert not (start < _dt("2025-11-10T10:00:00") and end > _dt("2025-11-10T09:00:00"))
+    ordered = sorted(placed)
+    for (_, prev_end), (next_start, _) in zip(ordered, ordered[1:]):
+        assert next_start >= prev_end
+    for tasks in results:
+        starts = [_dt(t["scheduled_start_at"]) for t in tasks]
+        assert starts == sorted(starts)
+        assert tasks[-1]["title"] == "Submit Assignment"
+
+
+def test_unplaceable_tasks_have_null_times():
+    busy = ms.build_busy_times([], [])
+    windows = [({"title": "Late", "due_date": "2025-11-10T09:30:00"}, "2025-11-10T09:00:00")]
+    results = ms.schedule_assignments(windows, busy, 2, now=_dt("2025-11-10T09:00:00"))
+    assert all(t["scheduled_start_at"] is None for t in results[0])
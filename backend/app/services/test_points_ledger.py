@@ -0,0 +1,228 @@
+"""Tests for the write-behind points ledger and the routes that award/spend points through it."""
+import threading
+import time
+
+import pytest
+
+from app.services.points_ledger import PointsLedgerWriter
+
+
+class FakeLedgerRepo:
+    """points_ledger + users.total_points in memory, with the SQL functions' semantics."""
+
+    def __init__(self, totals=None):
+        self.totals = dict(totals or {})
+        self.entries = []
+        self.batches = []
+        self.fail_next = 0
+        self.write_started = threading.Event()
+        self.release_write = None   # set to an Event to hold append_many until it is set
+
+    def append_many(self, entries):
+        self.write_started.set()
+        if self.release_write is not None:
+            self.release_write.wait(5)
+        if self.fail_next:
+            self.fail_next -= 1
+            raise ConnectionError("db unavailable")
+        keys = {(e["user_id"], e["reason"], e["source_id"]) for e in self.entries if e["source_id"]}
+        fresh = [dict(e, compacted=False) for e in entries if (e["user_id"], e["reason"], e["source_id"]) not in keys]
+        self.entries.extend(fresh)
+        self.batches.append(len(entries))
+        return len(entries)
+
+    def balance(self, user_id):
+        return self.totals.get(user_id, 0) + sum(
+            e["delta"] for e in self.entries if e["user_id"] == user_id and not e["compacted"]
+        )
+
+    def balances(self, user_ids):
+        return {u: self.balance(u) for u in user_ids}
+
+    def compact(self, limit=50000):
+        pending = [e for e in self.entries if not e["compacted"]][:limit]
+        for e in pending:
+            self.totals[e["user_id"]] = self.totals.get(e["user_id"], 0) + e["delta"]
+            e["compacted"] = True
+        return len(pending)
+
+
+@pytest.fixture
+def ledger():
+    writer = PointsLedgerWriter(FakeLedgerRepo({"u1": 100}), max_batch=1000, flush_interval=60, compact_interval=0)
+    yield writer
+    writer.close()
+
+
+def test_entries_are_buffered_and_written_in_one_batch(ledger):
+    ledger.record("u1", 10, "task_completed", "t1")
+    ledger.record("u1", 25, "assignment_completed", "a1", "c1")
+    ledger.record("u2", 5, "task_completed", "t2")
+
+    assert ledger.repo.batches == []
+    assert ledger.balance("u1") == 135               # buffered points already count
+    assert ledger.flush() == 3
+    assert ledger.repo.batches == [3]
+    assert ledger.pending() == 0
+    assert ledger.balance("u1") == 135
+
+
+def test_compaction_folds_entries_into_total(ledger):
+    ledger.record("u1", -40, "blind_box_purchase", "p1")
+    ledger.flush()
+
+    assert ledger.compact() == 1
+    assert ledger.repo.totals["u1"] == 60
+    assert ledger.balance("u1") == 60
+    assert ledger.compact() == 0
+
+
+def test_failed_flush_keeps_entries_for_retry(ledger):
+    ledger.record("u1", 10, "task_completed", "t1")
+    ledger.repo.fail_next = 1
+
+    with pytest.raises(ConnectionError):
+        ledger.flush()
+    ledger.record("u1", 5, "task_completed", "t2")
+    assert ledger.pending() == 2
+    assert ledger.flush() == 2
+    assert [e["source_id"] for e in ledger.repo.entries] == ["t1", "t2"]
+
+
+def _flush_in_background(ledger):
+    ledger.repo.release_write = threading.Event()
+    thread = threading.Thread(target=ledger.flush)
+    thread.start()
+    assert ledger.repo.write_started.wait(2)
+    return thread
+
+
+def test_balance_does_not_wait_for_other_users_writes(ledger):
+    ledger.record("u2", 5, "task_completed", "t2")
+    thread = _flush_in_background(ledger)
+
+    ledger.record("u1", 10, "task_completed", "t1")
+    assert ledger.balances(["u1", "u3"]) == {"u1": 110, "u3": 0}   # returns while u2's batch is still being written
+
+    ledger.repo.release_write.set()
+    thread.join()
+
+
+def test_balance_waits_for_own_entries_being_written(ledger):
+    ledger.record("u1", 10, "task_completed", "t1")
+    thread = _flush_in_background(ledger)
+    result = []
+    reader = threading.Thread(target=lambda: result.append(ledger.balance("u1")))
+    reader.start()
+
+    reader.join(0.1)
+    assert result == []       # neither 100 nor 120: the write may or may not have landed
+    ledger.repo.release_write.set()
+    thread.join()
+    reader.join()
+    assert result == [110]
+
+
+def test_full_buffer_is_flushed_in_background():
+    writer = PointsLedgerWriter(FakeLedgerRepo(), max_batch=2, flush_interval=60, compact_interval=0)
+    writer.record("u1", 1, "task_completed", "t1")
+    writer.record("u1", 1, "task_completed", "t2")
+
+    deadline = time.monotonic() + 2
+    while writer.repo.batches != [2] and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert writer.repo.batches == [2]
+    writer.close()
+
+
+def test_close_flushes_remaining_entries():
+    writer = PointsLedgerWriter(FakeLedgerRepo(), flush_interval=60)
+    writer.record("u1", 3, "task_completed", "t1")
+    writer.close()
+    assert len(writer.repo.entries) == 1
+
+
+@pytest.fixture
+def ledger_client(monkeypatch, ledger):
+    import app.main as main
+
+    class StubTasksRepo:
+        def fetch_by_id(self, task_id):
+            return {"task_id": task_id, "user_id": "u1", "assignment_id": "a1", "course_id": "c1",
+                    "description": "Submit Assignment", "reward_points": 10}
+
+        def complete_task(self, task_id):
+            return True
+
+        def fetch_uncompleted_by_assignment(self, assignment_id):
+            return []
+
+    class StubAssignmentsRepo:
+        def complete_assignment(self, assignment_id):
+            return True
+
+        def fetch_by_id(self, assignment_id):
+            return {"assignment_id": assignment_id, "course_id": "c1", "completion_points": 50}
+
+    class StubUsersRepo:
+        def fetch_by_id(self, user_id):
+            return {"user_id": user_id, "total_points": 100, "current_level": 0}
+
+        def fetch_all(self, fields=None):
+            return [self.fetch_by_id("u1"), self.fetch_by_id("u2")]
+
+        def fetch_by_email(self, email):
+            return {**self.fetch_by_id("u1"), "email": email, "password": "pw"}
+
+        def update_points(self, user_id, delta):
+            raise AssertionError("users.total_points must not be written with the ledger enabled")
+
+    class StubSeriesRepo:
+        def fetch_by_id(self, series_id):
+            return {"series_id": series_id, "name": "Series 1", "cost_points": 120}
+
+    class StubFiguresRepo:
+        def select_random_figure(self, series_id):
+            return {"figure_id": "f1", "name": "Figure 1", "rarity": "common"}
+
+    class StubUserBoxesRepo:
+        def create(self, **kwargs):
+            return True
+
+    monkeypatch.setattr(main, "TasksRepository", StubTasksRepo)
+    monkeypatch.setattr(main, "AssignmentsRepository", StubAssignmentsRepo)
+    monkeypatch.setattr(main, "UsersRepository", StubUsersRepo)
+    monkeypatch.setattr(main, "BlindBoxSeriesRepository", StubSeriesRepo)
+    monkeypatch.setattr(main, "BlindBoxFiguresRepository", StubFiguresRepo)
+    monkeypatch.setattr(main, "UserBlindBoxesRepository", StubUserBoxesRepo)
+    return main.create_app({"TESTING": True, "POINTS_LEDGER": ledger}).test_client()
+
+
+def test_completion_and_purchase_go_through_ledger(ledger_client, ledger):
+    resp = ledger_client.post("/db/tasks/t1/complete")
+    assert resp.status_code == 200
+    assert ledger.balance("u1") == 160
+
+    # 100 stored + 60 still buffered covers a 120-point box
+    resp = ledger_client.post("/db/blind-boxes/purchase", json={"user_id": "u1", "series_id": "s1"})
+    assert resp.status_code == 201
+    assert resp.get_json()["remaining_points"] == 40
+
+    ledger.flush()
+    entries = [(e["reason"], e["delta"], e["course_id"]) for e in ledger.repo.entries]
+    assert entries == [
+        ("task_completed", 10, "c1"),
+        ("assignment_completed", 50, "c1"),
+        ("blind_box_purchase", -120, None),
+    ]
+    assert ledger_client.get("/db/users/u1/progress").get_json()["total_points"] == 40
+
+
+def test_user_routes_show_buffered_points(ledger_client, ledger):
+    ledger.record("u1", 15, "task_completed", "t9")
+
+    users = ledger_client.get("/db/users").get_json()
+    assert [(u["user_id"], u["total_points"]) for u in users] == [("u1", 115), ("u2", 0)]
+    assert ledger_client.get("/db/users?user_id=u1").get_json()["total_points"] == 115
+    resp = ledger_client.post("/auth/login", json={"email": "a@b.c", "password": "pw"})
+    assert resp.get_json()["user"]["total_points"] == 115
@@ -185,6 +185,11 @@ def test_dashboard_success(client, monkeypatch):
     assert "level_progress" in data
 
 
+    resp = client.get("/db/dashboard?user_id=u1&fields=task_id")
+    assert resp.status_code == 200
+    assert resp.get_json()["tasks"]["today"] == [{"task_id": "t1"}]
+
+
 def test_preview_blind_boxes(client, monkeypatch):
     """Test GET /db/blind-boxes/preview."""
     class StubUsersRepo:
@@ -0,0 +1,338 @@
+import io
+import json
+import re
+import threading
+import time
+from datetime import datetime, timedelta
+
+import pytest
+from google.genai import errors as genai_errors
+
+from app.services import read_syllabi
+from app.utils.cache_utils import DiskLRUCache
+
+
+class FakeResponse:
+    def __init__(self, text):
+        self.text = text
+
+
+class FakeModels:
+    def __init__(self, handler):
+        self.handler = handler
+        self.calls = 0
+        self.lock = threading.Lock()
+
+    def generate_content(self, model, contents, config=None):
+        with self.lock:
+            self.calls += 1
+        return self.handler(contents)
+
+
+class FakeLLMClient:
+    """Stands in for genai.Client; handler(contents) returns a FakeResponse or raises."""
+
+    def __init__(self, handler):
+        self.models = FakeModels(handler)
+
+
+def _title_of(contents):
+    return re.search(r"- Title: (.+)", contents[0]).group(1)
+
+
+def _echo_handler(delay_for=None):
+    def handler(contents):
+        title = _title_of(contents)
+        if delay_for:
+            time.sleep(delay_for.get(title, 0))
+        return FakeResponse(json.dumps([
+            {"title": f"{title} step", "scheduled_start_at": "2025-11-10T10:00:00",
+             "scheduled_end_at": "2025-11-10T11:00:00", "completion_date_at": None, "weight": None}
+        ]))
+    return handler
+
+
+@pytest.fixture
+def assignments():
+    return [
+        {"title": f"A{i}", "due_date": f"2025-11-{10 + i}T23:59:00", "weight": 5, "course_id": "c1"}
+        for i in range(5)
+    ]
+
+
+def test_microtasks_keep_input_order(assignments):
+    # Earlier assignments finish last, so completion order is reversed
+    delays = {"A0": 0.08, "A1": 0.06, "A2": 0.04, "A3": 0.02, "A4": 0}
+    fake = FakeLLMClient(_echo_handler(delays))
+
+    result = read_syllabi.generate_assignment_microtasks_with_ids(
+        assignments, [], user_id="u1", llm_client=fake, max_concurrency=5
+    )
+
+    titles = [a["title"] for a in result["assignments"]]
+    assert titles == ["A0", "A1", "A2", "A3", "A4"]
+    for a in result["assignments"]:
+        micro = a["micro_tasks"][0]
+        assert micro["description"] == f"{a['title']} step"
+        assert micro["assignment_id"] == a["assignment_id"]
+        assert micro["user_id"] == "u1"
+        assert micro["course_id"] == "c1"
+
+
+def test_microtasks_respect_concurrency_limit(assignments):
+    active = [0]
+    peak = [0]
+    lock = threading.Lock()
+    echo = _echo_handler()
+
+    def handler(contents):
+        with lock:
+            active[0] += 1
+            peak[0] = max(peak[0], active[0])
+        time.sleep(0.02)
+        with lock:
+            active[0] -= 1
+        return echo(contents)
+
+    fake = FakeLLMClient(handler)
+    read_syllabi.generate_assignment_microtasks(assignments, [], llm_client=fake, max_concurrency=2)
+    assert fake.models.calls == 5
+    assert peak[0] <= 2
+
+
+def test_retry_on_rate_limit_then_succeed():
+    attempts = []
+
+    def handler(contents):
+        attempts.append(1)
+        if len(attempts) < 3:
+            raise genai_errors.ClientError(429, {"error": {"message": "rate limited"}})
+        return FakeResponse("[]")
+
+    sleeps = []
+    response = read_syllabi.generate_content_with_retry(
+        FakeLLMClient(handler), ["prompt"], None, sleep=sleeps.append
+    )
+    assert response.text == "[]"
+    assert len(attempts) == 3
+    assert len(sleeps) == 2
+    assert all(s >= 0 for s in sleeps)
+
+
+def test_no_retry_on_client_error():
+    def handler(contents):
+        raise genai_errors.ClientError(400, {"error": {"message": "bad request"}})
+
+    fake = FakeLLMClient(handler)
+    with pytest.raises(genai_errors.ClientError):
+        read_syllabi.generate_content_with_retry(fake, ["prompt"], None, sleep=lambda s: None)
+    assert fake.models.calls == 1
+
+
+def test_retry_gives_up_after_max_retries():
+    def handler(contents):
+        raise genai_errors.ServerError(503, {"error": {"message": "unavailable"}})
+
+    fake = FakeLLMClient(handler)
+    with pytest.raises(genai_errors.ServerError):
+        read_syllabi.generate_content_with_retry(
+            fake, ["prompt"], None, max_retries=2, sleep=lambda s: None
+        )
+    assert fake.models.calls == 3
+
+
+def _batched_handler(drop=(), calls=None):
+    """Answers batched prompts (leaving out titles in drop) and per-assignment prompts."""
+    echo = _echo_handler()
+
+    def handler(contents):
+        prompt = contents[0]
+        if "- Title: " in prompt:
+            if calls is not None:
+                calls.append(("single", _title_of(contents)))
+            return echo(contents)
+        entries = re.findall(r'- index (\d+): "([^"]+)"', prompt)
+        if calls is not None:
+            calls.append(("batch", [title for _, title in entries]))
+        results = [
+            {"index": int(index), "micro_tasks": [{"title": f"{title} batched",
+             "scheduled_start_at": "2025-11-10T10:00:00", "scheduled_end_at": "2025-11-10T11:00:00",
+             "completion_date_at": None, "weight": None}]}
+            for index, title in entries if title not in drop
+        ]
+        return FakeResponse(json.dumps({"results": results}))
+    return handler
+
+
+def test_batched_mode_uses_one_call(assignments):
+    calls = []
+    fake = FakeLLMClient(_batched_handler(calls=calls))
+
+    result = read_syllabi.generate_assignment_microtasks_with_ids(
+        assignments, [{"start": "2025-11-13T09:00:00", "end": "2025-11-13T14:00:00"}],
+        user_id="u1", llm_client=fake, mode="batched"
+    )
+
+    assert calls == [("batch", ["A0", "A1", "A2", "A3", "A4"])]
+    assert [a["micro_tasks"][0]["description"] for a in result["assignments"]] == [
+        f"A{i} batched" for i in range(5)
+    ]
+
+
+def test_batched_mode_falls_back_for_dropped_assignments(assignments):
+    calls = []
+    fake = FakeLLMClient(_batched_handler(drop={"A1", "A3"}, calls=calls))
+
+    result = read_syllabi.generate_assignment_microtasks(
+        assignments, [], llm_client=fake, mode="batched"
+    )
+
+    assert sorted(c for c in calls if c[0] == "single") == [("single", "A1"), ("single", "A3")]
+    titles = [a["micro_tasks"][0]["title"] for a in result["assignments"]]
+    assert titles == ["A0 batched", "A1 step", "A2 batched", "A3 step", "A4 batched"]
+
+
+def test_batched_mode_falls_back_for_non_object_response(assignments):
+    echo = _echo_handler()
+
+    def handler(contents):
+        if "- Title: " in contents[0]:
+            return echo(contents)
+        return FakeResponse(json.dumps([{"index": 0, "micro_tasks": []}]))
+
+    result = read_syllabi.generate_assignment_microtasks(
+        assignments, [], llm_client=FakeLLMClient(handler), mode="batched"
+    )
+
+    assert [a["micro_tasks"][0]["title"] for a in result["assignments"]] == [f"A{i} step" for i in range(5)]
+
+
+def test_batched_mode_does_not_fan_out_when_rate_limited(assignments, monkeypatch):
+    monkeypatch.setattr(read_syllabi.random, "uniform", lambda a, b: 0)
+    calls = []
+
+    def handler(contents):
+        calls.append("single" if "- Title: " in contents[0] else "batch")
+        raise genai_errors.ClientError(429, {"error": {"message": "quota", "status": "RESOURCE_EXHAUSTED"}})
+
+    with pytest.raises(genai_errors.ClientError):
+        read_syllabi.generate_assignment_microtasks(
+            assignments, [], llm_client=FakeLLMClient(handler), mode="batched"
+        )
+    assert "single" not in calls
+    assert len(calls) == read_syllabi.LLM_MAX_RETRIES + 1
+
+
+def test_batched_mode_chunks_by_token_budget(assignments):
+    calls = []
+    fake = FakeLLMClient(_batched_handler(calls=calls))
+
+    result = read_syllabi._generate_micro_task_lists(
+        assignments, [], 3, llm_client=fake, mode="batched", token_budget=650
+    )
+
+    batches = [c[1] for c in calls if c[0] == "batch"]
+    assert len(batches) > 1
+    assert [t for batch in batches for t in batch] == ["A0", "A1", "A2", "A3", "A4"]
+    assert [r[0]["title"] for r in result] == [f"A{i} batched" for i in range(5)]
+
+
+def test_invalid_mode_rejected(assignments):
+    with pytest.raises(ValueError):
+        read_syllabi.generate_assignment_microtasks(assignments, [], llm_client=FakeLLMClient(None), mode="nope")
+
+
+def test_syllabi_route_rejects_unknown_microtask_mode(client):
+    """Test POST /api/syllabi/process - invalid microtask_mode returns 400."""
+    resp = client.post(
+        "/api/syllabi/process",
+        data={"file": (io.BytesIO(b"%PDF-1.4 test"), "syllabus.pdf"), "microtask_mode": "nope"},
+        content_type="multipart/form-data",
+    )
+    assert resp.status_code == 400
+    assert "microtask_mode" in resp.get_json()["error"]
+
+
+def test_extraction_cache_skips_llm_on_repeat(tmp_path):
+    pdf = tmp_path / "syllabus.pdf"
+    pdf.write_bytes(b"%PDF-1.4 same syllabus")
+    extracted = {"tasks": [], "assignments": [{"title": "A1", "due_date": "2025-11-10T23:59:00", "weight": 5}]}
+    fake = FakeLLMClient(lambda contents: FakeResponse(json.dumps(extracted)))
+    cache = DiskLRUCache(str(tmp_path / "cache"), max_bytes=1_000_000)
+
+    first = read_syllabi.extract_tasks_assignments_from_pdf(str(pdf), cache=cache, llm_client=fake)
+    second = read_syllabi.extract_tasks_assignments_from_pdf(str(pdf), cache=cache, llm_client=fake)
+
+    assert first == second == extracted
+    assert fake.models.calls == 1
+    assert cache.stats()["hits"] == 1
+    assert cache.stats()["misses"] == 1
+
+
+def test_syllabus_cache_stats_route(client, monkeypatch, tmp_path):
+    """Test GET /api/syllabi/cache - reports hit/miss counts."""
+    cache = DiskLRUCache(str(tmp_path), max_bytes=1_000)
+    cache.get("missing")
+    monkeypatch.setattr(read_syllabi, "_extraction_cache", cache)
+
+    resp = client.get("/api/syllabi/cache")
+    assert resp.status_code == 200
+    body = resp.get_json()
+    assert body["enabled"] is True
+    assert body["misses"] == 1
+
+
+def test_local_scheduler_makes_no_llm_calls():
+    base = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0) + timedelta(days=2)
+    assignments = [
+        {"title": f"A{i}", "due_date": (base + timedelta(days=2 * i + 3)).strftime("%Y-%m-%dT23:59:00")}
+        for i in range(3)
+    ]
+    blocked_day = (base + timedelta(days=1)).strftime("%Y-%m-%d")
+    existing = [{"scheduled_start_at": f"{blocked_day}T00:00:00", "scheduled_end_at": f"{blocked_day}T23:59:00"}]
+    fake = FakeLLMClient(_echo_handler())
+
+    result = read_syllabi.generate_assignment_microtasks_with_ids(
+        assignments, [], user_id="u1", llm_client=fake, scheduler="local", existing_tasks=existing
+    )
+
+    assert fake.models.calls == 0
+    for a in result["assignments"]:
+        assert a["micro_tasks"][-1]["description"] == "Submit Assignment"
+        for t in a["micro_tasks"]:
+            assert t["scheduled_start_at"] is not None
+            assert not t["scheduled_start_at"].startswith(blocked_day)
+            assert t["scheduled_end_at"] <= a["due_date"]
+
+
+def test_hybrid_scheduler_uses_llm_titles_only(assignments):
+    def handler(contents):
+        entries = re.findall(r'- index (\d+): "([^"]+)"', contents[0])
+        results = [{"index": int(i), "titles": [f"{t} outline", f"{t} draft", f"{t} polish"]}
+                   for i, t in entries if t != "A2"]
+        return FakeResponse(json.dumps({"results": results}))
+
+    fake = FakeLLMClient(handler)
+    result = read_syllabi.generate_assignment_microtasks(
+        assignments, [], llm_client=fake, scheduler="hybrid"
+    )
+
+    assert fake.models.calls == 1
+    titles = [[t["title"] for t in a["micro_tasks"]] for a in result["assignments"]]
+    assert titles[0] == ["A0 outline", "A0 draft", "Submit Assignment"]
+    assert titles[2] == ["Review requirements: A2", "Work on A2", "Submit Assignment"]
+
+
+@pytest.mark.parametrize("body", [
+    "[]",
+    "42",
+    '{"results": {"index": 0}}',
+    '{"results": ["A0 outline", {"index": 1, "titles": "not a list"}]}',
+])
+def test_micro_task_titles_fall_back_on_malformed_payload(assignments, body):
+    fake = FakeLLMClient(lambda contents: FakeResponse(body))
+    titles = read_syllabi.generate_micro_task_titles(assignments, 3, llm_client=fake)
+    assert titles == [None] * len(assignments)
+
+    result = read_syllabi.generate_assignment_microtasks(assignments, [], llm_client=fake, scheduler="hybrid")
+    assert all(a["micro_tasks"][-1]["title"] == "Submit Assignment" for a in result["assignments"])
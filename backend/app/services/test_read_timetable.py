@@ -45,7 +45,7 @@ def test_extract_timetable_courses(monkeypatch):
         return True
     
     # Patch extract_tables_from_pdf to return a mock table
-    def mock_extract_tables_from_pdf(pdf_path):
+    def mock_extract_tables_from_pdf(pdf_path, pool=None):
         return [
             [
                 ["", "Monday", "Wednesday"],
@@ -62,3 +62,98 @@ def test_extract_timetable_courses(monkeypatch):
     assert isinstance(courses, list)
     assert courses[0]["course_code"] == "MATH101"
     assert any(session["day"] == "Monday" for session in courses[0]["meeting_sessions"])
+
+def test_repeat_upload_reuses_cached_grid(monkeypatch):
+    calls = []
+
+    def mock_extract_tables_from_pdf(pdf, pool=None):
+        calls.append(pdf)
+        return [
+            [
+                ["", "Monday", "Wednesday"],
+                ["MATH101", "MATH101\n09:00 - 10:00", "MATH101\n09:00 - 10:00"]
+            ]
+        ]
+
+    monkeypatch.setattr("app.services.read_timetable.extract_tables_from_pdf", mock_extract_tables_from_pdf)
+    cache = read_timetable.MemoryLRUCache(max_entries=4)
+
+    first = read_timetable.extract_timetable_courses(b"%PDF timetable", "user1", "2025 Fall", cache=cache)
+    second = read_timetable.extract_timetable_courses(b"%PDF timetable", "user2", "2025 Fall", cache=cache)
+
+    assert len(calls) == 1
+    assert cache.stats()["hits"] == 1
+    assert first[0]["meeting_sessions"] == second[0]["meeting_sessions"]
+    assert first[0]["course_id"] != second[0]["course_id"]
+    assert second[0]["user_id"] == "user2"
+
+    read_timetable.extract_timetable_courses(b"%PDF other timetable", "user1", "2025 Fall", cache=cache)
+    assert len(calls) == 2
+
+def test_get_term_schedule_matches_terms():
+    fall = read_timetable.get_term_schedule("2025 Fall")
+    assert fall["original_start_date"] == datetime(2025, 9, 2)
+    assert fall["end_date"] == datetime(2025, 12, 2)
+    assert fall["breaks"] == ((datetime(2025, 10, 27), datetime(2025, 10, 31)),)
+    assert fall["holidays"] == frozenset({datetime(2025, 10, 13)})
+
+    winter = read_timetable.get_term_schedule("Winter 2026")
+    assert winter["original_start_date"] == datetime(2026, 1, 6)
+    assert datetime(2026, 4, 3) in winter["holidays"]
+
+    # Season-only fallback and the catch-all default keep their old dates
+    assert read_timetable.get_term_schedule("fall")["term_id"] == "2025 Fall"
+    default = read_timetable.get_term_schedule("Summer 2027")
+    assert default["original_start_date"] == datetime(2026, 1, 5)
+    assert default["end_date"] == datetime(2026, 4, 6)
+
+def test_term_registry_is_memoized():
+    from app.services.term_registry import get_term_registry
+    registry = get_term_registry()
+    assert registry is get_term_registry()
+    first = registry.get_schedule("2025 Fall")
+    assert registry.get_schedule("  2025 FALL ") is first
+
+def test_get_terms_route(client):
+    resp = client.get("/api/terms")
+    assert resp.status_code == 200
+    terms = resp.get_json()["terms"]
+    assert [t["id"] for t in terms] == ["2025 Fall", "2026 Winter"]
+    assert terms[0]["breaks"][0]["start"] == "2025-10-27"
+
+def test_weekly_occurrences_skips_breaks_and_holidays():
+    from datetime import date
+    days = read_timetable.weekly_occurrences(
+        date(2025, 9, 2), date(2025, 11, 10), 0,
+        ((date(2025, 10, 27), date(2025, 10, 31)),),
+        frozenset({date(2025, 10, 13)}),
+    )
+    assert days[0] == date(2025, 9, 8)
+    assert all(d.weekday() == 0 for d in days)
+    assert date(2025, 10, 13) not in days
+    assert date(2025, 10, 27) not in days
+    assert days[-1] == date(2025, 11, 10)
+    assert len(days) == 8
+
+def test_break_index_merges_overlapping_breaks():
+    from datetime import date
+    index = read_timetable.BreakIndex([
+        (datetime(2025, 10, 1), datetime(2025, 10, 5)),
+        (datetime(2025, 10, 3), datetime(2025, 10, 10)),
+    ])
+    assert date(2025, 10, 8) in index
+    assert date(2025, 10, 11) not in index
+    assert date(2025, 9, 30) not in index
+
+def test_generate_tasks_for_term_excludes_reading_week(mock_courses):
+    schedule = read_timetable.get_term_schedule("2025 Fall")
+    tasks = read_timetable.generate_tasks_for_courses(
+        mock_courses, "user1", None,
+        schedule["original_start_date"], schedule["end_date"],
+        schedule["breaks"], schedule["holidays"],
+    )
+    starts = [t["scheduled_start_at"] for t in tasks]
+    assert "2025-10-27T09:00:00" not in starts  # reading week Monday
+    assert "2025-10-13T09:00:00" not in starts  # Thanksgiving
+    assert "2025-10-20T09:00:00" in starts
+    assert all(t["reward_points"] == 10 for t in tasks)
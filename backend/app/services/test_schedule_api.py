@@ -0,0 +1,61 @@
+"""Pytest tests for the /api/schedule endpoints."""
+import json
+
+
+class StubTasksRepo:
+    calls = []
+
+    def fetch_overlapping(self, **kwargs):
+        StubTasksRepo.calls.append(kwargs)
+        return [
+            {"task_id": "t1", "description": "Lecture",
+             "scheduled_start_at": "2025-11-10T10:00:00+00:00", "scheduled_end_at": "2025-11-10T12:00:00+00:00"},
+        ]
+
+
+def test_free_slots(client, monkeypatch):
+    """Test GET /api/schedule/free-slots - gaps around tasks and ad-hoc busy time."""
+    import app.main as main
+    monkeypatch.setattr(main, "TasksRepository", StubTasksRepo)
+    busy = json.dumps([{"start": "2025-11-10T14:00:00", "end": "2025-11-10T15:00:00"}])
+
+    resp = client.get(
+        "/api/schedule/free-slots?user_id=u1&start=2025-11-10T08:00:00&end=2025-11-10T18:00:00"
+        f"&duration=60&day_start=09:00&day_end=17:00&busy_intervals={busy}"
+    )
+    assert resp.status_code == 200
+    data = resp.get_json()
+    assert [(s["start"], s["end"]) for s in data["slots"]] == [
+        ("2025-11-10T09:00:00", "2025-11-10T10:00:00"),
+        ("2025-11-10T12:00:00", "2025-11-10T14:00:00"),
+        ("2025-11-10T15:00:00", "2025-11-10T17:00:00"),
+    ]
+    assert data["slots"][1]["minutes"] == 120
+    assert StubTasksRepo.calls[-1]["user_id"] == "u1"
+    assert StubTasksRepo.calls[-1]["is_completed"] is False
+    assert StubTasksRepo.calls[-1]["window_start"] == "2025-11-10T08:00:00"
+    assert StubTasksRepo.calls[-1]["window_end"] == "2025-11-10T18:00:00"
+
+
+def test_next_free_slot_with_limit(client, monkeypatch):
+    """Test GET /api/schedule/free-slots - next free 2h slot after a time."""
+    import app.main as main
+    monkeypatch.setattr(main, "TasksRepository", StubTasksRepo)
+
+    resp = client.get(
+        "/api/schedule/free-slots?user_id=u1&start=2025-11-10T09:30:00&end=2025-11-12T00:00:00"
+        "&duration=120&limit=1"
+    )
+    assert resp.status_code == 200
+    assert resp.get_json()["slots"] == [
+        {"start": "2025-11-10T12:00:00", "end": "2025-11-10T21:00:00", "minutes": 540}
+    ]
+
+
+def test_free_slots_validation(client):
+    """Test GET /api/schedule/free-slots - missing user_id and bad params return 400."""
+    assert client.get("/api/schedule/free-slots").status_code == 400
+    assert client.get("/api/schedule/free-slots?user_id=u1&duration=abc").status_code == 400
+    assert client.get(
+        "/api/schedule/free-slots?user_id=u1&start=2025-11-10T10:00:00&end=2025-11-10T09:00:00"
+    ).status_code == 400
@@ -0,0 +1,66 @@
+"""Startup-time guard: importing the app must not load heavy PDF/LLM/DB SDKs."""
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+BACKEND_DIR = Path(__file__).resolve().parents[2]
+
+# Modules that are only needed by specific routes and must load lazily
+LAZY_MODULES = ("pdfplumber", "google.genai", "supabase", "app.services.read_syllabi", "app.services.canvas")
+
+# Ceiling on cumulative import time of app.main (benchmark run only); it is
+# ~0.2s when lazy and >1s when the SDKs are imported eagerly
+MAX_IMPORT_SECONDS = float(os.getenv("MAX_APP_IMPORT_SECONDS", "0.8"))
+
+
+def _import_profile():
+    env = {k: v for k, v in os.environ.items() if k != "GEMINI_API_KEY"}
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import app.main"],
+        cwd=BACKEND_DIR, env=env, capture_output=True, text=True, timeout=120,
+    )
+    assert result.returncode == 0, result.stderr[-2000:]
+    modules = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line.split("|")
+        if cumulative.strip().isdigit():
+            modules[name.strip()] = int(cumulative.strip())
+    return modules
+
+
+def test_app_import_is_lazy():
+    modules = _import_profile()
+    loaded = [m for m in modules if any(m == lazy or m.startswith(lazy + ".") for lazy in LAZY_MODULES)]
+    assert loaded == [], f"eagerly imported: {loaded}"
+
+
+@pytest.mark.benchmark
+def test_app_import_is_fast():
+    seconds = _import_profile()["app.main"] / 1_000_000
+    assert seconds < MAX_IMPORT_SECONDS, f"import app.main took {seconds:.3f}s"
+
+
+def test_syllabi_service_loads_on_first_use():
+    from app.services.registry import ServiceRegistry
+
+    registry = ServiceRegistry()
+    registry.register_module("syllabi", "app.services.read_syllabi")
+    assert not registry.is_loaded("syllabi")
+    module = registry.get("syllabi")
+    assert registry.is_loaded("syllabi")
+    assert registry.get("syllabi") is module
+    assert callable(module.extract_tasks_assignments_from_pdf)
+
+
+def test_missing_api_key_fails_on_use_not_import(monkeypatch):
+    from app.services import read_syllabi
+
+    monkeypatch.setattr(read_syllabi, "API_KEY", None)
+    monkeypatch.setattr(read_syllabi, "_client", None)
+    with pytest.raises(ValueError):
+        read_syllabi.get_llm_client()
@@ -254,6 +254,60 @@ def test_create_task(client, monkeypatch):
     assert len(created_tasks) == 1
 
 
+def test_create_task_check_conflicts(client, monkeypatch):
+    """Test POST /db/tasks - check_conflicts rejects overlapping tasks with 409."""
+    created_tasks = []
+
+    class StubTasksRepo:
+        def fetch_overlapping(self, **kwargs):
+            return [
+                {"task_id": "lecture", "description": "MATH101 Lecture",
+                 "scheduled_start_at": "2025-11-10T09:00:00", "scheduled_end_at": "2025-11-10T10:30:00"},
+                {"task_id": "lab", "description": "CHEM Lab",
+                 "scheduled_start_at": "2025-11-10T13:00:00", "scheduled_end_at": "2025-11-10T15:00:00"},
+            ]
+
+        def create(self, **kwargs):
+            created_tasks.append(kwargs)
+            return True
+
+    import app.main as main
+    monkeypatch.setattr(main, "TasksRepository", StubTasksRepo)
+
+    payload = {
+        "task_id": "study", "user_id": "u1", "description": "Study", "type": "general",
+        "scheduled_start_at": "2025-11-10T10:00:00", "scheduled_end_at": "2025-11-10T11:00:00",
+        "check_conflicts": True
+    }
+    resp = client.post("/db/tasks", json=payload)
+    assert resp.status_code == 409
+    assert [c["task_id"] for c in resp.get_json()["conflicts"]] == ["lecture"]
+    assert created_tasks == []
+
+    payload.update(scheduled_start_at="2025-11-10T10:30:00", scheduled_end_at="2025-11-10T13:00:00")
+    resp = client.post("/db/tasks", json=payload)
+    assert resp.status_code == 201
+    assert len(created_tasks) == 1
+
+
+def test_create_task_check_conflicts_invalid_datetime(client, monkeypatch):
+    """Test POST /db/tasks - check_conflicts with an unparseable time returns 400."""
+    class StubTasksRepo:
+        def create(self, **kwargs):
+            raise AssertionError("task must not be created")
+
+    import app.main as main
+    monkeypatch.setattr(main, "TasksRepository", StubTasksRepo)
+
+    resp = client.post("/db/tasks", json={
+        "task_id": "study", "user_id": "u1", "description": "Study", "type": "general",
+        "scheduled_start_at": "next tuesday", "scheduled_end_at": "2025-11-10T11:00:00",
+        "check_conflicts": True
+    })
+    assert resp.status_code == 400
+    assert "scheduled_start_at" in resp.get_json()["error"]
+
+
 def test_create_task_missing_fields(client, monkeypatch):
     """Test POST /db/tasks - missing required fields."""
     class StubTasksRepo:
@@ -421,3 +475,147 @@ def test_delete_task_not_found(client, monkeypatch):
     resp = client.delete("/db/tasks/nonexistent")
     assert resp.status_code == 404
     assert "error" in resp.get_json()
+
+
+def test_get_tasks_normalized_format(client, monkeypatch):
+    """Test GET /db/tasks?format=normalized - course columns moved into a lookup map."""
+    tasks = [
+        {"task_id": "t1", "user_id": "u1", "course_id": "c1", "course_name": "Math", "course_color": "blue"},
+        {"task_id": "t2", "user_id": "u1", "course_id": "c1", "course_name": "Math", "course_color": "blue"},
+        {"task_id": "t3", "user_id": "u1", "course_id": None},
+    ]
+
+    class StubTasksRepo:
+        def fetch_by_user(self, **kwargs):
+            return [dict(t) for t in tasks]
+
+    import app.main as main
+    monkeypatch.setattr(main, "TasksRepository", StubTasksRepo)
+
+    resp = client.get("/db/tasks?user_id=u1&format=normalized")
+    assert resp.status_code == 200
+    data = resp.get_json()
+    assert data["courses"] == {"c1": {"course_name": "Math", "course_color": "blue"}}
+    assert len(data["tasks"]) == 3
+    assert all("course_name" not in t for t in data["tasks"])
+    assert data["tasks"][0]["course_id"] == "c1"
+
+
+def test_get_tasks_normalized_columnar(client, monkeypatch):
+    """Test GET /db/tasks?format=normalized&layout=columnar - parallel column arrays."""
+    tasks = [
+        {"task_id": "t1", "course_id": "c1", "course_name": "Math", "course_color": "blue", "is_completed": False},
+        {"task_id": "t2", "course_id": "c2", "course_name": "Art", "course_color": "red", "is_completed": True},
+    ]
+
+    class StubTasksRepo:
+        def fetch_by_user(self, **kwargs):
+            return [dict(t) for t in tasks]
+
+    import app.main as main
+    monkeypatch.setattr(main, "TasksRepository", StubTasksRepo)
+
+    resp = client.get("/db/tasks?user_id=u1&format=normalized&layout=columnar")
+    assert resp.status_code == 200
+    data = resp.get_json()
+    assert set(data["courses"]) == {"c1", "c2"}
+    assert data["tasks"]["count"] == 2
+    assert data["tasks"]["values"]["task_id"] == ["t1", "t2"]
+    assert data["tasks"]["values"]["is_completed"] == [False, True]
+    assert "course_name" not in data["tasks"]["columns"]
+
+
+def test_get_tasks_invalid_format(client):
+    """Test GET /db/tasks - unknown format value."""
+    resp = client.get("/db/tasks?user_id=u1&format=xml")
+    assert resp.status_code == 400
+    assert "format" in resp.get_json()["error"]
+
+
+def test_combined_tasks_normalized(client, monkeypatch):
+    """Test GET /db/tasks/combined?format=normalized - one course map shared by both lists."""
+    class StubTasksRepo:
+        def fetch_by_user(self, user_id, is_completed=None, **kwargs):
+            return [{
+                "task_id": f"t_{is_completed}",
+                "course_id": "c1",
+                "course_name": "Math",
+                "course_color": "blue",
+                "type": "study",
+                "is_completed": is_completed,
+            }]
+
+    import app.main as main
+    monkeypatch.setattr(main, "TasksRepository", StubTasksRepo)
+
+    resp = client.get("/db/tasks/combined?user_id=u1&format=normalized")
+    assert resp.status_code == 200
+    data = resp.get_json()
+    assert data["courses"] == {"c1": {"course_name": "Math", "course_color": "blue"}}
+    assert "course_name" not in data["incomplete_tasks"][0]
+    assert "course_name" not in data["completed_tasks"][0]
+    assert data["available_courses"] == [{"value": "c1", "label": "Math"}]
+
+
+class RecordingClient:
+    """Fake Supabase client that records the select() projection it receives."""
+
+    def __init__(self, rows):
+        self.rows = rows
+        self.selects = []
+
+    def table(self, name):
+        return self
+
+    def select(self, columns):
+        self.selects.append(columns)
+        return self
+
+    def eq(self, *args):
+        return self
+
+    def order(self, column):
+        return self
+
+    def execute(self):
+        return type("Res", (), {"data": [dict(r) for r in self.rows]})()
+
+
+def test_get_tasks_sparse_fields_pushed_into_select(client, monkeypatch):
+    """Test GET /db/tasks?fields= - projection reaches the query, including the courses join."""
+    from database import tasks_repository
+    fake = RecordingClient([{"task_id": "t1", "is_completed": False, "courses": {"color": "blue"}}])
+    monkeypatch.setattr(tasks_repository.DBClient, "connect", staticmethod(lambda: fake))
+
+    resp = client.get("/db/tasks?user_id=u1&fields=task_id,is_completed,course_color")
+    assert resp.status_code == 200
+    assert fake.selects == ["task_id,is_completed,courses(color)"]
+    assert resp.get_json() == [{"task_id": "t1", "is_completed": False, "course_color": "blue"}]
+
+
+def test_get_tasks_unknown_field(client, monkeypatch):
+    """Test GET /db/tasks?fields= - fields outside the whitelist are rejected."""
+    from database import tasks_repository
+    monkeypatch.setattr(tasks_repository.DBClient, "connect", staticmethod(lambda: RecordingClient([])))
+
+    resp = client.get("/db/tasks?user_id=u1&fields=task_id,secret")
+    assert resp.status_code == 400
+    assert "secret" in resp.get_json()["error"]
+
+
+def test_combined_tasks_sparse_fields(client, monkeypatch):
+    """Test GET /db/tasks/combined?fields= - projection reaches the query; rows keep only requested fields."""
+    from database import tasks_repository
+    fake = RecordingClient([{
+        "task_id": "t1", "course_id": "c1", "type": "study", "courses": {"course_name": "Math"},
+    }])
+    monkeypatch.setattr(tasks_repository.DBClient, "connect", staticmethod(lambda: fake))
+
+    resp = client.get("/db/tasks/combined?user_id=u1&fields=task_id")
+    assert resp.status_code == 200
+    assert fake.selects == ["task_id,course_id,type,courses(course_name)"] * 2
+    data = resp.get_json()
+    assert data["incomplete_tasks"] == [{"task_id": "t1"}]
+    assert data["available_courses"] == [{"value": "c1", "label": "Math"}]
+
+    assert client.get("/db/tasks/combined?user_id=u1&fields=secret").status_code == 400
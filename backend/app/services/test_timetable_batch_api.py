@@ -0,0 +1,189 @@
+"""Pytest tests for POST /api/timetable/process-batch."""
+import io
+import json
+import zipfile
+
+import pytest
+
+from app.services.timetable_batch import iter_batch_results
+
+
+@pytest.fixture
+def batch_client(monkeypatch):
+    import app.main as main
+
+    def fake_extract(pdf_bytes, user_id, term, pool=None):
+        if pdf_bytes == b"%PDF broken":
+            raise ValueError("no tables found")
+        return [{"course_id": f"c-{user_id}", "course_code": "MATH101", "course_name": "MATH101", "meeting_sessions": []}]
+
+    imports = []
+    rpc_calls = []
+
+    class StubCoursesRepo:
+        def import_timetables(self, term, batch):
+            rpc_calls.append([i["user_id"] for i in batch])
+            outcomes = []
+            for i in batch:
+                if i["user_id"] == "locked_user":
+                    outcomes.append({"user_id": i["user_id"], "error": "could not obtain lock"})
+                    continue
+                imports.append(i["user_id"])
+                outcomes.append({"user_id": i["user_id"], "summary": {
+                    "course_ids": {}, "courses_removed": 0, "tasks_imported": len(i["tasks"]), "task_ids": []
+                }})
+            return outcomes
+
+    monkeypatch.setattr(main, "extract_timetable_courses", fake_extract)
+    monkeypatch.setattr(main, "CoursesRepository", StubCoursesRepo)
+    client = main.create_app({
+        "TESTING": True, "PDF_POOL_WORKERS": 0, "TIMETABLE_BATCH_PERSIST_SIZE": 2
+    }).test_client()
+    client.imports = imports
+    client.rpc_calls = rpc_calls
+    return client
+
+
+def _lines(resp):
+    return [json.loads(line) for line in resp.get_data(as_text=True).splitlines()]
+
+
+def test_multipart_batch_streams_results_and_summary(batch_client):
+    resp = batch_client.post(
+        "/api/timetable/process-batch",
+        data={
+            "files": [(io.BytesIO(b"%PDF a"), "a.pdf"), (io.BytesIO(b"%PDF broken"), "b.pdf")],
+            "user_id": ["student_a", "student_b"],
+            "term": "2025 Fall",
+        },
+        content_type="multipart/form-data",
+    )
+    assert resp.status_code == 200
+    assert resp.mimetype == "application/x-ndjson"
+    *results, summary = _lines(resp)
+
+    by_user = {r["user_id"]: r for r in results}
+    assert by_user["student_a"]["status"] == "success"
+    assert by_user["student_a"]["persisted"] is True
+    assert by_user["student_b"]["status"] == "error"
+    assert "no tables found" in by_user["student_b"]["error"]
+    assert batch_client.imports == ["student_a"]
+    assert summary["summary"]["files"] == 2
+    assert summary["summary"]["succeeded"] == 1
+    assert summary["summary"]["failed"] == 1
+    assert summary["summary"]["pdfs_per_second_per_core"] > 0
+
+
+def test_batch_persists_in_groups(batch_client):
+    resp = batch_client.post(
+        "/api/timetable/process-batch",
+        data={
+            "files": [(io.BytesIO(b"%PDF " + name.encode()), f"{name}.pdf") for name in ("a", "b", "c", "locked_user")],
+            "term": "2025 Fall",
+        },
+        content_type="multipart/form-data",
+    )
+    *results, summary = _lines(resp)
+
+    assert sorted(len(call) for call in batch_client.rpc_calls) == [2, 2]
+    assert sorted(batch_client.imports) == ["a", "b", "c"]
+    by_user = {r["user_id"]: r for r in results}
+    assert by_user["a"]["persisted"] is True and "tasks" not in by_user["a"]
+    assert by_user["locked_user"]["status"] == "error"
+    assert "could not obtain lock" in by_user["locked_user"]["error"]
+    assert summary["summary"]["succeeded"] == 3
+
+
+def test_batch_empty_pdf_fails_only_that_file(batch_client):
+    resp = batch_client.post(
+        "/api/timetable/process-batch",
+        data={"files": [(io.BytesIO(b"%PDF a"), "a.pdf"), (io.BytesIO(b""), "b.pdf")], "persist": "false"},
+        content_type="multipart/form-data",
+    )
+    assert resp.status_code == 200
+    *results, summary = _lines(resp)
+    by_user = {r["user_id"]: r for r in results}
+    assert by_user["a"]["status"] == "success"
+    assert "empty" in by_user["b"]["error"]
+    assert summary["summary"]["failed"] == 1
+
+
+def test_zip_batch_uses_manifest_then_filename(batch_client):
+    archive = io.BytesIO()
+    with zipfile.ZipFile(archive, "w") as zf:
+        zf.writestr("cohort/alice.pdf", b"%PDF a")
+        zf.writestr("cohort/scan_017.pdf", b"%PDF b")
+        zf.writestr("__MACOSX/cohort/._alice.pdf", b"junk")
+        zf.writestr("cohort/notes.txt", b"ignored")
+    archive.seek(0)
+
+    resp = batch_client.post(
+        "/api/timetable/process-batch",
+        data={"files": (archive, "cohort.zip"), "user_ids": json.dumps({"scan_017.pdf": "bob"}), "persist": "false"},
+        content_type="multipart/form-data",
+    )
+    assert resp.status_code == 200
+    *results, summary = _lines(resp)
+    assert sorted(r["user_id"] for r in results) == ["alice", "bob"]
+    assert all("tasks" in r for r in results)      # persist=false returns the full payload
+    assert batch_client.imports == []
+    assert summary["summary"]["succeeded"] == 2
+
+
+def test_batch_rejects_non_pdf_and_empty_upload(batch_client):
+    resp = batch_client.post(
+        "/api/timetable/process-batch",
+        data={"files": (io.BytesIO(b"hello"), "notes.txt")},
+        content_type="multipart/form-data",
+    )
+    assert resp.status_code == 400
+
+    resp = batch_client.post("/api/timetable/process-batch", data={}, content_type="multipart/form-data")
+    assert resp.status_code == 400
+
+
+def test_iter_batch_results_summary_uses_cores():
+    ticks = iter([0.0, 2.0])
+    rows = list(iter_batch_results(
+        [("a.pdf", "a", b"1"), ("b.pdf", "b", b"2"), ("c.pdf", "c", b"3"), ("d.pdf", "d", b"4")],
+        lambda user_id, pdf: {"status": "success", "courses_found": 1, "tasks_generated": 3},
+        max_workers=2, cores=2, clock=lambda: next(ticks),
+    ))
+    summary = rows[-1]["summary"]
+    assert len(rows) == 5
+    assert summary["courses"] == 4
+    assert summary["tasks"] == 12
+    assert summary["pdfs_per_second"] == 2.0
+    assert summary["pdfs_per_second_per_core"] == 1.0
+
+
+def test_iter_batch_results_reads_pdfs_only_when_a_worker_is_free():
+    log = []
+
+    def reader(name):
+        def read():
+            log.append(f"read {name}")
+            return name.encode()
+        return read
+
+    def process(user_id, pdf):
+        log.append(f"process {user_id}")
+        return {"status": "success"}
+
+    rows = list(iter_batch_results(
+        [(f"{n}.pdf", n, reader(n)) for n in ("a", "b", "c")], process, max_workers=1, cores=1,
+    ))
+    assert len(rows) == 4
+    assert log == ["read a", "process a", "read b", "process b", "read c", "process c"]
+
+
+def test_iter_batch_results_persist_failure_fails_its_group():
+    def persist(rows):
+        raise RuntimeError("database unavailable")
+
+    rows = list(iter_batch_results(
+        [("a.pdf", "a", b"1"), ("b.pdf", "b", b"2")],
+        lambda user_id, pdf: {"status": "success"}, max_workers=2, cores=1, persist=persist,
+    ))
+    assert [r["status"] for r in rows[:-1]] == ["error", "error"]
+    assert rows[-1]["summary"]["failed"] == 2
@@ -0,0 +1,147 @@
+"""
+Throughput benchmark for timetable course extraction.
+
+Uses the bundled timetables in storage/uploads, plus an "institutional" grid
+made by repeating their rows as many sections of the same courses (one course
+with hundreds of sessions is what made the old list-based dedup quadratic).
+
+    python -m app.services.test_timetable_benchmark   # prints a full report
+    pytest -m benchmark app/services/test_timetable_benchmark.py
+
+The default test run checks only what extraction returns; the wall-clock
+checks are marked benchmark and run on request.
+"""
+import os
+import time
+from pathlib import Path
+
+import pytest
+
+from app.services import read_timetable
+
+UPLOADS_DIR = Path(__file__).resolve().parents[1] / "storage" / "uploads"
+BUNDLED_TIMETABLES = ("fallTimetable.pdf", "winterTimetable.pdf")
+
+# Per-cell cost may grow by at most this factor from 50 to 400 sections
+# (linear dedup stays ~1x; the old list-based dedup was ~4-5x)
+MAX_SCALING_FACTOR = float(os.getenv("MAX_TIMETABLE_SCALING_FACTOR", "3"))
+
+
+def _load_tables(name):
+    return read_timetable.extract_timetable_tables((UPLOADS_DIR / name).read_bytes())
+
+
+def _as_section(cell, section):
+    """The cell with its time label tagged as a different section, e.g. "9:00 - 12:00 (S007)"."""
+    if not cell:
+        return cell
+    lines = cell.split("\n")
+    for i, line in enumerate(lines):
+        if "-" in line and ":" in line:
+            lines[i] = f"{line} (S{section:03d})"
+            break
+    return "\n".join(lines)
+
+
+def _institutional(tables, sections):
+    """Repeat every body row once per section, each with a distinct time label."""
+    grids = []
+    for table in tables:
+        rows = [list(table[0])]
+        for section in range(sections):
+            for row in table[1:]:
+                rows.append([row[0]] + [_as_section(cell, section) for cell in row[1:]])
+        grids.append(rows)
+    return grids
+
+
+def _cells(tables):
+    return sum(1 for table in tables for row in table[1:] for cell in row[1:] if cell)
+
+
+def _seconds_per_run(tables, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        read_timetable.courses_from_tables(tables, "bench_user", "2025 Fall")
+    return (time.perf_counter() - start) / repeat
+
+
+@pytest.fixture(scope="module")
+def bundled_tables():
+    pytest.importorskip("pdfplumber")
+    return {name: _load_tables(name) for name in BUNDLED_TIMETABLES}
+
+
+def test_bundled_timetables_yield_courses(bundled_tables):
+    for name, tables in bundled_tables.items():
+        courses = read_timetable.courses_from_tables(tables, "bench_user", "2025 Fall")
+        assert courses, f"no courses found in {name}"
+
+
+def test_large_timetable_keeps_every_distinct_session(bundled_tables):
+    large = _institutional(bundled_tables["fallTimetable.pdf"], 400)
+    courses = read_timetable.courses_from_tables(large, "bench_user", "2025 Fall")
+    assert sum(len(c["meeting_sessions"]) for c in courses) == _cells(large) - _duplicate_cells(large)
+
+
+@pytest.mark.benchmark
+def test_large_timetable_scales_linearly(bundled_tables):
+    tables = bundled_tables["fallTimetable.pdf"]
+    small, large = _institutional(tables, 50), _institutional(tables, 400)
+
+    per_cell_small = _seconds_per_run(small, repeat=20) / _cells(small)
+    per_cell_large = _seconds_per_run(large, repeat=5) / _cells(large)
+    assert per_cell_large < per_cell_small * MAX_SCALING_FACTOR, (
+        f"per cell: {per_cell_small * 1e6:.2f}us at 50 sections, {per_cell_large * 1e6:.2f}us at 400"
+    )
+
+
+def _duplicate_cells(tables):
+    """Cells repeating a (course, day, time) already seen."""
+    seen, duplicates = set(), 0
+    for table in tables:
+        for row in table[1:]:
+            for i, cell in enumerate(row[1:], 1):
+                if not cell:
+                    continue
+                key = (read_timetable._parse_course_cell(cell), table[0][i])
+                duplicates += key in seen
+                seen.add(key)
+    return duplicates
+
+
+if __name__ == "__main__":
+    for name in BUNDLED_TIMETABLES:
+        pdf_bytes = (UPLOADS_DIR / name).read_bytes()
+        start = time.perf_counter()
+        tables = read_timetable.extract_tables_from_pdf(pdf_bytes)
+        parse = time.perf_counter() - start
+        grid = _seconds_per_run(tables, repeat=200)
+        print(f"{name}: pdf parse {parse * 1000:.1f}ms, courses {grid * 1e6:.0f}us "
+              f"-> {1 / (parse + grid):.1f} PDFs/s uncached, {1 / grid:,.0f}/s from cached grid")
+    tables = _load_tables("fallTimetable.pdf")
+    for sections in (50, 200, 400, 800):
+        grid = _institutional(tables, sections)
+        seconds = _seconds_per_run(grid, repeat=5)
+        print(f"{sections} sections: {_cells(grid)} cells in {seconds * 1000:.1f}ms "
+              f"({_cells(grid) / seconds:,.0f} cells/s)")
+
+    # Batch import throughput through the PDF process pool (no DB, grid cache bypassed)
+    from app.services.timetable_batch import TARGET_PDFS_PER_SECOND_PER_CORE, iter_batch_results
+    from app.utils.pdf_pool import PDFProcessPool
+
+    cores = min(4, os.cpu_count() or 1)
+    pool = PDFProcessPool(max_workers=cores)
+    pdfs = [(UPLOADS_DIR / name).read_bytes() for name in BUNDLED_TIMETABLES]
+    pool.extract_tables(pdfs[0])  # start the worker processes before timing
+    items = [(f"student_{i}.pdf", f"student_{i}", pdfs[i % len(pdfs)]) for i in range(cores * 20)]
+
+    def process(user_id, pdf_bytes):
+        courses = read_timetable.courses_from_tables(pool.extract_tables(pdf_bytes), user_id, "2025 Fall")
+        return {"status": "success", "courses_found": len(courses)}
+
+    summary = list(iter_batch_results(items, process, max_workers=2 * cores, cores=cores))[-1]["summary"]
+    pool.shutdown()
+    verdict = "meets" if summary["pdfs_per_second_per_core"] >= TARGET_PDFS_PER_SECOND_PER_CORE else "BELOW"
+    print(f"batch of {summary['files']} PDFs on {cores} cores: {summary['pdfs_per_second']} PDFs/s, "
+          f"{summary['pdfs_per_second_per_core']} PDFs/s/core ({verdict} target {TARGET_PDFS_PER_SECOND_PER_CORE})")
@@ -111,3 +111,36 @@ def test_delete_user_not_found(client):
     resp = client.delete(f"/db/users/{fake_id}")
     assert resp.status_code == 404
     assert "error" in resp.get_json()
+
+
+def test_user_reads_never_select_password(client, monkeypatch):
+    """Test GET /db/users - password is not part of the default or allowed projection."""
+    from database import users_repository
+    selects = []
+
+    class FakeClient:
+        def table(self, name):
+            return self
+
+        def select(self, columns):
+            selects.append(columns)
+            return self
+
+        def eq(self, *args):
+            return self
+
+        def order(self, column):
+            return self
+
+        def execute(self):
+            return type("Res", (), {"data": [{"user_id": "u1"}]})()
+
+    monkeypatch.setattr(users_repository.DBClient, "connect", staticmethod(lambda: FakeClient()))
+
+    assert client.get("/db/users").status_code == 200
+    assert client.get("/db/users?user_id=u1&fields=user_id,total_points").status_code == 200
+    assert selects[1] == "user_id,total_points"
+    assert all("password" not in s for s in selects)
+
+    resp = client.get("/db/users?fields=password")
+    assert resp.status_code == 400
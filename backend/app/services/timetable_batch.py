@@ -0,0 +1,134 @@
+"""
+Bulk timetable import: many (user_id, PDF) pairs in one request.
+
+Files are processed concurrently by a small thread pool. The CPU-heavy table
+extraction runs in the app's PDFProcessPool, so these threads mostly wait on it.
+Each PDF is read only when a worker is free to take it, so a batch holds about
+max_workers PDFs in memory rather than all of them. Successful results can be
+persisted in groups (one import RPC per group instead of one per file). One
+result is yielded per file as soon as it is finished (and persisted), in
+completion order, followed by a summary with the batch's throughput in PDFs
+per second per core (core = PDF pool worker process).
+"""
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Callable, Dict, Iterator, List, Optional, Sequence, Tuple, Union
+
+# Sustained rate a batch should reach per PDF worker process. A typical
+# one-page timetable parses in ~0.15s, so ~6/s/core; 4 leaves headroom.
+TARGET_PDFS_PER_SECOND_PER_CORE = 4.0
+
+DEFAULT_PERSIST_BATCH_SIZE = 25
+
+PDFData = Union[bytes, Callable[[], bytes]]
+
+
+def iter_batch_results(
+    items: Sequence[Tuple[str, str, PDFData]],
+    process: Callable[[str, bytes], Dict],
+    max_workers: int,
+    cores: int,
+    clock: Callable[[], float] = time.perf_counter,
+    persist: Optional[Callable[[List[Dict]], List[Union[Dict, Exception]]]] = None,
+    persist_batch_size: int = DEFAULT_PERSIST_BATCH_SIZE,
+) -> Iterator[Dict]:
+    """
+    Run process(user_id, pdf_bytes) for each (filename, user_id, pdf).
+
+    pdf is the bytes or a function returning them; it is called in this
+    (the consuming) thread just before the file is submitted, and at most
+    max_workers files are in flight. A read that raises fails that file.
+
+    With persist, successful results are handed to persist(rows) in groups of
+    up to persist_batch_size (rows carry "user_id" plus the process result).
+    It returns, per row in order, the result to report or the Exception that
+    failed that row; if it raises, every row of the group fails.
+
+    Yields {"index", "filename", "user_id", "status", ...result} per file (a
+    failure yields status "error" and does not stop the batch), then
+    {"summary": {...}}.
+    """
+    start = clock()
+    totals = {"succeeded": 0, "failed": 0, "courses": 0, "tasks": 0}
+
+    def finished(meta, result=None, error=None):
+        row = dict(meta)
+        if error is not None:
+            totals["failed"] += 1
+            row.update({"status": "error", "error": str(error)})
+        else:
+            totals["succeeded"] += 1
+            totals["courses"] += result.get("courses_found", 0)
+            totals["tasks"] += result.get("tasks_imported", result.get("tasks_generated", 0))
+            row.update(result)
+        return row
+
+    def persist_group(group):
+        try:
+            outcomes = persist([dict(result, user_id=meta["user_id"]) for meta, result in group])
+        except Exception as e:
+            outcomes = [e] * len(group)
+        for (meta, _), outcome in zip(group, outcomes):
+            if isinstance(outcome, Exception):
+                yield finished(meta, error=outcome)
+            else:
+                yield finished(meta, outcome)
+
+    workers = max(1, min(max_workers, len(items)))
+    executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="timetable-batch")
+    pending = iter(enumerate(items))
+    in_flight = {}
+    to_persist = []
+    exhausted = False
+    try:
+        while True:
+            while not exhausted and len(in_flight) < workers:
+                entry = next(pending, None)
+                if entry is None:
+                    exhausted = True
+                    break
+                index, (filename, user_id, pdf) = entry
+                meta = {"index": index, "filename": filename, "user_id": user_id}
+                try:
+                    pdf_bytes = pdf() if callable(pdf) else pdf
+                except Exception as e:
+                    yield finished(meta, error=e)
+                    continue
+                in_flight[executor.submit(process, user_id, pdf_bytes)] = meta
+            if not in_flight:
+                break
+            done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+            for future in done:
+                meta = in_flight.pop(future)
+                try:
+                    result = future.result()
+                except Exception as e:
+                    yield finished(meta, error=e)
+                    continue
+                if persist is None:
+                    yield finished(meta, result)
+                else:
+                    to_persist.append((meta, result))
+            if len(to_persist) >= persist_batch_size:
+                yield from persist_group(to_persist)
+                to_persist = []
+        if to_persist:
+            yield from persist_group(to_persist)
+    finally:
+        # Client went away mid-stream: drop files that have not started
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    elapsed = max(clock() - start, 1e-9)
+    pdfs_per_second = len(items) / elapsed
+    cores = max(1, cores)
+    yield {
+        "summary": {
+            "files": len(items),
+            **totals,
+            "elapsed_seconds": round(elapsed, 3),
+            "cores": cores,
+            "pdfs_per_second": round(pdfs_per_second, 2),
+            "pdfs_per_second_per_core": round(pdfs_per_second / cores, 2),
+            "target_pdfs_per_second_per_core": TARGET_PDFS_PER_SECOND_PER_CORE,
+        }
+    }
@@ -0,0 +1,169 @@
+"""Size-bounded, least-recently-used caches: JSON values on local disk, or objects in memory."""
+import hashlib
+import json
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+
+def content_key(data: bytes, version: str = "") -> str:
+    """SHA-256 of the content bytes, namespaced by a version string."""
+    digest = hashlib.sha256()
+    digest.update(version.encode("utf-8"))
+    digest.update(b"\0")
+    digest.update(data)
+    return digest.hexdigest()
+
+
+class DiskLRUCache:
+    """
+    One JSON file per key under directory, deleted least recently used first
+    once the directory holds more than max_bytes. The directory is the source
+    of truth, so processes sharing it (e.g. gunicorn workers) share entries
+    and the bound: a get() reads the file directly, recency is the file mtime
+    (bumped on a hit), and every set() re-scans the directory before evicting.
+    A set is rare next to the LLM call it saves, so the scan is cheap in
+    comparison. Files are written atomically, so a crash never leaves a
+    partial entry behind.
+    """
+
+    def __init__(self, directory: str, max_bytes: int):
+        self.directory = os.path.abspath(directory)
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[str, int]" = OrderedDict()
+        self._total_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        os.makedirs(self.directory, exist_ok=True)
+        with self._lock:
+            self._scan()
+            self._evict()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, f"{key}.json")
+
+    def _scan(self):
+        """Rebuild the index from the directory, oldest mtime first. Caller holds the lock.
+
+        File times can be coarser than the gap between two cache operations, so
+        ties keep this process's known order (entries it has not seen count as older).
+        """
+        known = {key: rank for rank, key in enumerate(self._entries)}
+        files = []
+        for name in os.listdir(self.directory):
+            if not name.endswith(".json"):
+                continue
+            try:
+                stat = os.stat(os.path.join(self.directory, name))
+            except OSError:  # evicted by another process meanwhile
+                continue
+            key = name[:-len(".json")]
+            files.append((stat.st_mtime_ns, known.get(key, -1), key, stat.st_size))
+        self._entries = OrderedDict((key, size) for _, _, key, size in sorted(files))
+        self._total_bytes = sum(self._entries.values())
+
+    def get(self, key: str) -> Optional[Any]:
+        """Return the cached value, or None on a miss."""
+        with self._lock:
+            try:
+                with open(self._path(key), "r", encoding="utf-8") as f:
+                    size = os.fstat(f.fileno()).st_size
+                    value = json.load(f)
+            except (OSError, ValueError):
+                # Missing (or evicted elsewhere) or corrupt: forget it and report a miss
+                self._total_bytes -= self._entries.pop(key, 0)
+                self.misses += 1
+                return None
+            self._total_bytes += size - self._entries.pop(key, 0)
+            self._entries[key] = size
+            try:
+                os.utime(self._path(key))
+            except OSError:
+                pass
+            self.hits += 1
+            return value
+
+    def set(self, key: str, value: Any):
+        payload = json.dumps(value).encode("utf-8")
+        with self._lock:
+            fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+            with os.fdopen(fd, "wb") as f:
+                f.write(payload)
+            os.replace(tmp_path, self._path(key))
+            # Other processes may have written since; count their files too
+            self._scan()
+            self._entries.move_to_end(key)
+            self._evict()
+
+    def _evict(self):
+        """Drop least recently used entries until under max_bytes. Caller holds the lock."""
+        while self._entries and self._total_bytes > self.max_bytes:
+            key, size = self._entries.popitem(last=False)
+            self._total_bytes -= size
+            self.evictions += 1
+            try:
+                os.remove(self._path(key))
+            except OSError:
+                pass
+
+    def stats(self) -> Dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "bytes": self._total_bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": round(self.hits / lookups, 3) if lookups else None,
+            }
+
+
+class MemoryLRUCache:
+    """
+    In-process LRU cache holding at most max_entries values. Values are shared
+    between callers, so store immutable data (e.g. tuples). Thread-safe.
+    """
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[str, Any]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: str) -> Optional[Any]:
+        """Return the cached value, or None on a miss."""
+        with self._lock:
+            if key not in self._entries:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return self._entries[key]
+
+    def set(self, key: str, value: Any):
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def stats(self) -> Dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": round(self.hits / lookups, 3) if lookups else None,
+            }
@@ -1,52 +1,183 @@
+import contextlib
+import io
+import json
 import os
-from flask import request, jsonify
+import zipfile
+from tempfile import SpooledTemporaryFile
+from flask import Request, current_app, jsonify
+from werkzeug.exceptions import RequestEntityTooLarge
 from werkzeug.utils import secure_filename
-import pdfplumber
 
 ALLOWED_EXTENSIONS = {"pdf"}
 
-UPLOAD_FOLDER = "backend/app/storage/uploads"
+# Uploads are buffered in memory up to this size, then spill to a temp file
+DEFAULT_UPLOAD_SPOOL_BYTES = 2 * 1024 * 1024
+# Largest accepted PDF; Flask's MAX_CONTENT_LENGTH enforces it while streaming
+DEFAULT_MAX_UPLOAD_BYTES = 20 * 1024 * 1024
+# Most PDFs accepted in one batch upload (multipart list or zip)
+DEFAULT_MAX_BATCH_FILES = 500
 
 def allowed_file(filename):
     return "." in filename and filename.rsplit(".", 1)[1].lower() in ALLOWED_EXTENSIONS
 
-def handle_file_upload(request, upload_folder=UPLOAD_FOLDER):
-    """Handle file upload with proper absolute path management"""
-    if "file" not in request.files:
+class SpooledUploadRequest(Request):
+    """
+    Request class whose multipart file parts stream into a SpooledTemporaryFile
+    sized by the app's UPLOAD_SPOOL_BYTES, so typical PDFs never touch disk.
+    """
+
+    _files_kept_open = False
+
+    def _get_file_stream(self, total_content_length, content_type, filename=None, content_length=None):
+        max_size = current_app.config.get("UPLOAD_SPOOL_BYTES", DEFAULT_UPLOAD_SPOOL_BYTES)
+        return SpooledTemporaryFile(max_size=max_size, mode="rb+")
+
+    def keep_files_open(self):
+        """
+        Leave the uploads open when the request ends, for a streamed response
+        that reads them after the view returns. Returns the function that
+        closes them; the response must call it when it is done.
+        """
+        self._files_kept_open = True
+        return super().close
+
+    def close(self):
+        if not self._files_kept_open:
+            super().close()
+
+
+def read_pdf_upload(request, max_bytes=None):
+    """
+    Read the uploaded PDF in the "file" field into memory.
+
+    Returns ((filename, data), None) or (None, error_response). Nothing is
+    written under storage/, so concurrent uploads with the same filename
+    cannot clobber each other and there is no file to clean up afterwards.
+    """
+    try:
+        files = request.files
+    except RequestEntityTooLarge:
+        # MAX_CONTENT_LENGTH stopped the multipart parser mid-stream
+        return None, (jsonify({"error": "Upload exceeds the size limit"}), 413)
+    if "file" not in files:
         return None, (jsonify({"error": "No file provided"}), 400)
-    file = request.files["file"]
+    file = files["file"]
     if file.filename == "":
         return None, (jsonify({"error": "No file selected"}), 400)
     if not file.filename.lower().endswith(".pdf"):
         return None, (jsonify({"error": "File must be a PDF"}), 400)
-    
-    # Ensure upload folder is absolute and exists
-    abs_upload_folder = os.path.abspath(upload_folder)
-    os.makedirs(abs_upload_folder, exist_ok=True)
-    
-    # Save file with secure filename
-    filename = secure_filename(file.filename)
-    if not filename:
-        filename = "uploaded_file.pdf"
-    
-    filepath = os.path.join(abs_upload_folder, filename)
-    
+
+    max_bytes = max_bytes or DEFAULT_MAX_UPLOAD_BYTES
+    data = file.stream.read(max_bytes + 1)
+    if len(data) > max_bytes:
+        return None, (jsonify({"error": f"File exceeds the {max_bytes // (1024 * 1024)} MB upload limit"}), 413)
+    if not data:
+        return None, (jsonify({"error": "Uploaded file is empty"}), 400)
+    return (secure_filename(file.filename) or "uploaded_file.pdf", data), None
+
+
+def _bounded_reader(name, open_stream, max_file_bytes):
+    """A zero-argument function reading one batch PDF; raises ValueError if it is empty or too large."""
+    def read():
+        with open_stream() as stream:
+            data = stream.read(max_file_bytes + 1)
+        if len(data) > max_file_bytes:
+            raise ValueError(f"{name}: file exceeds the {max_file_bytes // (1024 * 1024)} MB limit")
+        if not data:
+            raise ValueError(f"{name}: file is empty")
+        return data
+    return read
+
+
+def read_pdf_batch_upload(request, max_file_bytes=None, max_files=DEFAULT_MAX_BATCH_FILES):
+    """
+    List a batch of PDFs with their user ids, without reading the PDFs yet.
+
+    The batch is either several PDFs in the "files" field or one zip of PDFs
+    (in "files" or "file"). Each PDF's user id comes from the "user_ids" JSON
+    object ({filename: user_id}), else from "user_id" fields given in the same
+    order as the uploaded PDFs, else from the filename ("<user_id>.pdf").
+
+    Returns ([(filename, user_id, read), ...], None) or (None, error_response).
+    read() returns that PDF's bytes (ValueError if it is empty or too large).
+    Multipart parts are already spooled by SpooledUploadRequest and zip members
+    are decompressed on read, so only the PDFs being processed are in memory.
+    Zip readers share the archive: call them from one thread. Readers used
+    after the view returns need SpooledUploadRequest.keep_files_open().
+    """
+    max_file_bytes = max_file_bytes or DEFAULT_MAX_UPLOAD_BYTES
     try:
-        file.save(filepath)
-        print(f"File saved to: {filepath}")
-        print(f"File exists after save: {os.path.exists(filepath)}")
-        return filepath, None
-    except Exception as e:
-        print(f"Error saving file: {str(e)}")
-        return None, (jsonify({"error": f"Failed to save file: {str(e)}"}), 500)
+        uploads = request.files.getlist("files") or request.files.getlist("file")
+    except RequestEntityTooLarge:
+        return None, (jsonify({"error": "Batch exceeds the size limit"}), 413)
+    uploads = [u for u in uploads if u.filename]
+    if not uploads:
+        return None, (jsonify({"error": "No files provided"}), 400)
+    try:
+        manifest = json.loads(request.form.get("user_ids") or "{}")
+    except json.JSONDecodeError:
+        return None, (jsonify({"error": "user_ids must be a JSON object of filename -> user_id"}), 400)
+    if not isinstance(manifest, dict):
+        return None, (jsonify({"error": "user_ids must be a JSON object of filename -> user_id"}), 400)
+
+    too_many = (jsonify({"error": f"A batch may contain at most {max_files} PDFs"}), 400)
+    pdfs = []
+    if len(uploads) == 1 and uploads[0].filename.lower().endswith(".zip"):
+        try:
+            archive = zipfile.ZipFile(uploads[0].stream)
+        except zipfile.BadZipFile:
+            return None, (jsonify({"error": "Invalid zip file"}), 400)
+        for info in archive.infolist():
+            name = os.path.basename(info.filename)
+            if info.is_dir() or info.filename.startswith("__MACOSX/") or name.startswith(".") \
+                    or not name.lower().endswith(".pdf"):
+                continue
+            if info.file_size > max_file_bytes:
+                # Checked before decompressing; the bounded read also stops
+                # entries whose header understates their size
+                return None, (jsonify({"error": f"Each PDF must be at most {max_file_bytes // (1024 * 1024)} MB"}), 413)
+            if len(pdfs) >= max_files:
+                return None, too_many
+            pdfs.append((name, lambda info=info: archive.open(info)))
+    else:
+        if len(uploads) > max_files:
+            return None, too_many
+        for upload in uploads:
+            if not upload.filename.lower().endswith(".pdf"):
+                return None, (jsonify({"error": f"{upload.filename}: file must be a PDF"}), 400)
+            pdfs.append((upload.filename, lambda stream=upload.stream: contextlib.nullcontext(stream)))
+
+    if not pdfs:
+        return None, (jsonify({"error": "No PDF files found in the upload"}), 400)
+    ordered_ids = request.form.getlist("user_id")
+    items = []
+    for position, (name, open_stream) in enumerate(pdfs):
+        user_id = manifest.get(name)
+        if not user_id and len(ordered_ids) == len(pdfs):
+            user_id = ordered_ids[position]
+        user_id = user_id or os.path.splitext(secure_filename(name))[0]
+        if not user_id:
+            return None, (jsonify({"error": f"{name}: no user_id given"}), 400)
+        items.append((name, user_id, _bounded_reader(name, open_stream, max_file_bytes)))
+    return items, None
+
 
-def extract_tables_from_pdf(pdf_path):
+def extract_tables_from_pdf(pdf_path, pool=None):
     """
-    Extract all tables from all pages of a PDF.
+    Extract all tables from all pages of a PDF (a path or the raw bytes).
     Returns a list of tables.
+
+    Runs in pool, the app's PDFProcessPool (off the request thread, pages in
+    parallel, with a timeout), when one is given, otherwise inline.
     """
+    if pool is not None:
+        return pool.extract_tables(pdf_path)
+
     tables = []
-    with pdfplumber.open(pdf_path) as pdf:
+    import pdfplumber  # imported on first use; it is slow to load and only needed here
+
+    source = io.BytesIO(pdf_path) if isinstance(pdf_path, (bytes, bytearray)) else pdf_path
+    with pdfplumber.open(source) as pdf:
         for page in pdf.pages:
             tables.extend(page.extract_tables())
     return tables
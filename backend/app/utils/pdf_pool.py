@@ -0,0 +1,295 @@
+"""
+Process pool for pdfplumber table extraction.
+
+page.extract_tables() is CPU-bound pure Python and holds the GIL, so running it
+on a request thread stalls every other request on the worker. PDFProcessPool
+runs it in separate processes instead:
+
+- multi-page PDFs are split into page ranges extracted in parallel, one per
+  worker the job gets; PDF bytes are written once to a temp file and children
+  get its path, so the bytes are not pickled into every chunk
+- each extraction has one deadline covering the page count and the page
+  ranges; on timeout the caller gets PDFExtractionTimeout and every worker
+  still running one of its chunks is killed and replaced, so a pathological
+  PDF cannot keep a worker busy past its deadline. A chunk that raises gets
+  its still-running siblings killed the same way. Other requests' workers are
+  not touched.
+- each child gets an address-space cap (RLIMIT_AS) where the OS supports it
+- children are replaced after max_tasks_per_child jobs to bound pdfplumber's
+  memory growth
+- a child that dies (e.g. on the memory cap) fails its job with
+  BrokenProcessPool and is replaced
+
+Workers are plain processes owned by the pool (not a ProcessPoolExecutor, which
+cannot kill one busy worker without breaking every job on it). They are
+started with "spawn" and only when a PDF needs them, so creating a pool is cheap.
+"""
+import io
+import math
+import multiprocessing
+import os
+import tempfile
+import threading
+import time
+from concurrent.futures.process import BrokenProcessPool
+from multiprocessing import connection
+from typing import Callable, List, Optional, Sequence, Tuple, Union
+
+DEFAULT_MAX_WORKERS = min(2, os.cpu_count() or 1)
+DEFAULT_MAX_TASKS_PER_CHILD = 50
+DEFAULT_TIMEOUT_SECONDS = 60.0
+DEFAULT_MEMORY_LIMIT_MB = 1024
+
+PDFSource = Union[str, bytes]
+
+
+class PDFExtractionTimeout(Exception):
+    """Raised when table extraction does not finish within the pool's timeout."""
+
+
+def _limit_memory(memory_limit_mb: int):
+    """Child initializer: cap the child's address space so a hostile PDF cannot exhaust RAM."""
+    if not memory_limit_mb:
+        return
+    try:
+        import resource
+    except ImportError:  # not available on Windows
+        return
+    limit = memory_limit_mb * 1024 * 1024
+    _, hard = resource.getrlimit(resource.RLIMIT_AS)
+    if hard != resource.RLIM_INFINITY:
+        limit = min(limit, hard)
+    resource.setrlimit(resource.RLIMIT_AS, (limit, hard))
+
+
+def _open(source: PDFSource):
+    import pdfplumber
+    return pdfplumber.open(io.BytesIO(source) if isinstance(source, (bytes, bytearray)) else source)
+
+
+def _count_pages(source: PDFSource) -> int:
+    with _open(source) as pdf:
+        return len(pdf.pages)
+
+
+def _extract_page_range(source: PDFSource, start: int, stop: int) -> List:
+    tables = []
+    with _open(source) as pdf:
+        for page in pdf.pages[start:stop]:
+            tables.extend(page.extract_tables())
+    return tables
+
+
+def _worker_main(conn, memory_limit_mb: int):
+    """Child loop: run (fn, args) jobs from the pipe until told to stop."""
+    _limit_memory(memory_limit_mb)
+    while True:
+        try:
+            job = conn.recv()
+        except EOFError:
+            return
+        if job is None:
+            return
+        fn, args = job
+        try:
+            result = (True, fn(*args))
+        except Exception as e:
+            result = (False, e)
+        try:
+            conn.send(result)
+        except Exception as e:  # an unpicklable result or exception
+            conn.send((False, RuntimeError(f"{type(e).__name__}: {e}")))
+
+
+class _Worker:
+    """One child process and the parent's end of its pipe."""
+
+    def __init__(self, context, memory_limit_mb: int, generation: int):
+        self.conn, child_conn = context.Pipe()
+        self.process = context.Process(
+            target=_worker_main, args=(child_conn, memory_limit_mb), name="pdf-pool", daemon=True,
+        )
+        self.process.start()
+        child_conn.close()
+        self.jobs = 0
+        self.generation = generation
+
+    def kill(self):
+        self.process.kill()
+        self.process.join()
+        self.conn.close()
+
+    def stop(self, timeout: float = 5.0):
+        try:
+            self.conn.send(None)
+        except OSError:
+            pass
+        self.process.join(timeout)
+        if self.process.is_alive():
+            self.kill()
+        else:
+            self.conn.close()
+
+
+class PDFProcessPool:
+    def __init__(
+        self,
+        max_workers: int = DEFAULT_MAX_WORKERS,
+        max_tasks_per_child: int = DEFAULT_MAX_TASKS_PER_CHILD,
+        timeout_seconds: float = DEFAULT_TIMEOUT_SECONDS,
+        memory_limit_mb: int = DEFAULT_MEMORY_LIMIT_MB,
+    ):
+        self.max_workers = max(1, max_workers)
+        self.max_tasks_per_child = max_tasks_per_child
+        self.timeout_seconds = timeout_seconds
+        self.memory_limit_mb = memory_limit_mb
+        self._context = multiprocessing.get_context("spawn")
+        self._idle: List[_Worker] = []
+        self._live = 0           # idle + busy workers
+        self._generation = 0     # bumped by shutdown(); older workers are stopped when released
+        self._cond = threading.Condition()
+
+    def _acquire(self, deadline: float) -> _Worker:
+        """An idle worker, or a new one if below max_workers; waits until the deadline."""
+        with self._cond:
+            while True:
+                if self._idle:
+                    return self._idle.pop()
+                if self._live < self.max_workers:
+                    self._live += 1
+                    generation = self._generation
+                    break
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise PDFExtractionTimeout(f"No PDF worker free within {self.timeout_seconds}s")
+                self._cond.wait(remaining)
+        try:
+            return _Worker(self._context, self.memory_limit_mb, generation)
+        except BaseException:
+            self._forget(None)
+            raise
+
+    def _try_acquire(self, count: int) -> List[_Worker]:
+        """Up to `count` more workers without waiting (a job never waits while holding one)."""
+        workers = []
+        for _ in range(count):
+            with self._cond:
+                if self._idle:
+                    workers.append(self._idle.pop())
+                    continue
+                if self._live >= self.max_workers:
+                    break
+                self._live += 1
+                generation = self._generation
+            try:
+                workers.append(_Worker(self._context, self.memory_limit_mb, generation))
+            except Exception:
+                self._forget(None)
+                break
+        return workers
+
+    def _forget(self, worker: Optional[_Worker]):
+        with self._cond:
+            self._live -= 1
+            self._cond.notify()
+        if worker is not None:
+            worker.kill()
+
+    def _release(self, worker: _Worker):
+        """Return a worker that finished its job; recycle it once it has run max_tasks_per_child jobs."""
+        with self._cond:
+            spent = self.max_tasks_per_child and worker.jobs >= self.max_tasks_per_child
+            if not spent and worker.generation == self._generation:
+                self._idle.append(worker)
+                self._cond.notify()
+                return
+            self._live -= 1
+            self._cond.notify()
+        worker.stop()
+
+    def _run(self, workers: Sequence[_Worker], calls: Sequence[Tuple[Callable, tuple]], deadline: float) -> List:
+        """
+        Run calls[i] on workers[i] and return their results in order.
+
+        Every worker is handed back (released, or killed and replaced) before
+        this returns or raises, including ones still running at the deadline.
+        """
+        pending = {}
+        results = [None] * len(calls)
+        error: Optional[BaseException] = None
+        for index, (worker, call) in enumerate(zip(workers, calls)):
+            try:
+                worker.conn.send(call)
+            except OSError:  # the idle child died
+                self._forget(worker)
+                error = error or BrokenProcessPool("A PDF worker process died")
+                continue
+            worker.jobs += 1
+            pending[worker.conn] = (index, worker)
+        try:
+            while pending and error is None:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    error = PDFExtractionTimeout(f"PDF table extraction exceeded {self.timeout_seconds}s")
+                    break
+                for conn in connection.wait(list(pending), timeout=remaining):
+                    index, worker = pending.pop(conn)
+                    try:
+                        ok, value = conn.recv()
+                    except (EOFError, OSError):
+                        self._forget(worker)
+                        error = error or BrokenProcessPool("A PDF worker process died")
+                        continue
+                    self._release(worker)
+                    if ok:
+                        results[index] = value
+                    else:
+                        error = error or value
+        finally:
+            # Stuck or orphaned chunks: kill their workers so the CPU is freed now
+            for _, worker in pending.values():
+                self._forget(worker)
+        if error is not None:
+            raise error
+        return results
+
+    def extract_tables(self, source: PDFSource) -> List:
+        """All tables from all pages of a PDF (path or bytes), in page order."""
+        if not isinstance(source, (bytes, bytearray)):
+            return self._extract_tables(source)
+        with tempfile.NamedTemporaryFile(suffix=".pdf") as spool:
+            spool.write(source)
+            spool.flush()
+            return self._extract_tables(spool.name)
+
+    def _extract_tables(self, path: str) -> List:
+        deadline = time.monotonic() + self.timeout_seconds
+        page_count = self._run([self._acquire(deadline)], [(_count_pages, (path,))], deadline)[0]
+        if page_count == 0:
+            return []
+        workers = [self._acquire(deadline)]
+        workers += self._try_acquire(min(page_count, self.max_workers) - 1)
+        pages_per_chunk = math.ceil(page_count / len(workers))
+        calls = [
+            (_extract_page_range, (path, start, min(start + pages_per_chunk, page_count)))
+            for start in range(0, page_count, pages_per_chunk)
+        ]
+        for worker in workers[len(calls):]:
+            self._release(worker)
+        tables = []
+        for chunk in self._run(workers[:len(calls)], calls, deadline):
+            tables.extend(chunk)
+        return tables
+
+    def shutdown(self, wait: bool = True):
+        """Stop idle workers now; busy ones stop when their job finishes. A later job starts new ones."""
+        with self._cond:
+            self._generation += 1
+            idle, self._idle = self._idle, []
+            self._live -= len(idle)
+            self._cond.notify_all()
+        for worker in idle:
+            if wait:
+                worker.stop()
+            else:
+                worker.kill()
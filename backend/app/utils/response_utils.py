@@ -0,0 +1,91 @@
+import json
+from typing import Dict, Iterable, List, Optional
+
+from flask import Response, stream_with_context
+
+NDJSON_MIMETYPE = "application/x-ndjson"
+
+TASK_FORMATS = {"default", "normalized"}
+TASK_LAYOUTS = {"rows", "columnar"}
+
+# Per-row course columns that the normalized format moves into the lookup map
+COURSE_COLUMNS = ("course_name", "course_color")
+
+
+def parse_task_format(args) -> Dict:
+    """Read the format/layout query parameters used by task list routes.
+
+    Raises ValueError for unknown values so routes can answer with a 400.
+    """
+    fmt = (args.get("format") or "default").lower()
+    layout = (args.get("layout") or "rows").lower()
+    if fmt not in TASK_FORMATS:
+        raise ValueError(f"format must be one of: {', '.join(sorted(TASK_FORMATS))}")
+    if layout not in TASK_LAYOUTS:
+        raise ValueError(f"layout must be one of: {', '.join(sorted(TASK_LAYOUTS))}")
+    return {"normalized": fmt == "normalized", "columnar": layout == "columnar"}
+
+
+def normalize_task_rows(rows: List[Dict], courses: Dict[str, Dict], columnar: bool = False):
+    """Dictionary-encode flattened task rows.
+
+    Course columns are collected into `courses` (keyed by course_id) and dropped
+    from each row, so a course's name and color are sent once per response
+    instead of once per task. With columnar=True the rows are returned as
+    {"columns": [...], "values": {column: [...]}} instead of a list of dicts.
+    """
+    compact: List[Dict] = []
+    for row in rows:
+        course_id = row.get("course_id")
+        if course_id and course_id not in courses:
+            courses[course_id] = {key: row.get(key) for key in COURSE_COLUMNS}
+        compact.append({k: v for k, v in row.items() if k not in COURSE_COLUMNS})
+    if not columnar:
+        return compact
+    return to_columnar(compact)
+
+
+def to_columnar(rows: List[Dict], columns: Optional[List[str]] = None) -> Dict:
+    """Pivot a list of row dicts into parallel per-column arrays."""
+    if columns is None:
+        columns = []
+        seen = set()
+        for row in rows:
+            for key in row:
+                if key not in seen:
+                    seen.add(key)
+                    columns.append(key)
+    return {
+        "columns": columns,
+        "count": len(rows),
+        "values": {col: [row.get(col) for row in rows] for col in columns},
+    }
+
+
+def wants_ndjson(request) -> bool:
+    """True when the client prefers newline-delimited JSON over a JSON array."""
+    best = request.accept_mimetypes.best_match(["application/json", NDJSON_MIMETYPE])
+    return best == NDJSON_MIMETYPE
+
+
+def ndjson_response(rows: Iterable[Dict]) -> Response:
+    """Stream rows as one JSON document per line.
+
+    The first row is pulled before the response starts so connection/query
+    errors still surface as a normal error status. Errors after that point can
+    only be reported in-band, as a final {"error": ...} line.
+    """
+    iterator = iter(rows)
+    first = next(iterator, None)
+
+    def generate():
+        if first is None:
+            return
+        yield json.dumps(first, separators=(",", ":"), default=str) + "\n"
+        try:
+            for row in iterator:
+                yield json.dumps(row, separators=(",", ":"), default=str) + "\n"
+        except Exception as e:
+            yield json.dumps({"error": str(e)}) + "\n"
+
+    return Response(stream_with_context(generate()), mimetype=NDJSON_MIMETYPE)
@@ -0,0 +1,87 @@
+import os
+
+from app.utils.cache_utils import DiskLRUCache, MemoryLRUCache, content_key
+
+
+def test_content_key_depends_on_bytes_and_version():
+    assert content_key(b"pdf", "v1") == content_key(b"pdf", "v1")
+    assert content_key(b"pdf", "v1") != content_key(b"pdf", "v2")
+    assert content_key(b"pdf", "v1") != content_key(b"other", "v1")
+
+
+def test_get_set_and_stats(tmp_path):
+    cache = DiskLRUCache(str(tmp_path), max_bytes=10_000)
+    assert cache.get("a") is None
+    cache.set("a", {"tasks": [], "assignments": [{"title": "A1"}]})
+    assert cache.get("a") == {"tasks": [], "assignments": [{"title": "A1"}]}
+
+    stats = cache.stats()
+    assert stats["hits"] == 1
+    assert stats["misses"] == 1
+    assert stats["entries"] == 1
+    assert stats["hit_rate"] == 0.5
+
+
+def test_evicts_least_recently_used(tmp_path):
+    value = {"data": "x" * 100}
+    entry_size = len('{"data": "' + "x" * 100 + '"}')
+    cache = DiskLRUCache(str(tmp_path), max_bytes=entry_size * 2)
+    cache.set("a", value)
+    cache.set("b", value)
+    cache.get("a")          # a is now more recent than b
+    cache.set("c", value)   # over budget: b is evicted
+
+    assert cache.get("b") is None
+    assert cache.get("a") == value
+    assert cache.get("c") == value
+    assert cache.stats()["evictions"] == 1
+    assert not os.path.exists(os.path.join(str(tmp_path), "b.json"))
+
+
+def test_index_survives_restart(tmp_path):
+    DiskLRUCache(str(tmp_path), max_bytes=10_000).set("a", [1, 2, 3])
+    reopened = DiskLRUCache(str(tmp_path), max_bytes=10_000)
+    assert reopened.get("a") == [1, 2, 3]
+    assert reopened.stats()["entries"] == 1
+
+
+def test_corrupt_entry_is_a_miss(tmp_path):
+    cache = DiskLRUCache(str(tmp_path), max_bytes=10_000)
+    cache.set("a", {"ok": True})
+    with open(os.path.join(str(tmp_path), "a.json"), "w") as f:
+        f.write("{not json")
+    assert cache.get("a") is None
+    assert cache.stats()["entries"] == 0
+
+
+def test_processes_sharing_a_directory_share_the_bound(tmp_path):
+    value = {"data": "x" * 100}
+    entry_size = len('{"data": "' + "x" * 100 + '"}')
+    # Two caches on one directory, as in two gunicorn workers
+    first = DiskLRUCache(str(tmp_path), max_bytes=entry_size * 3)
+    second = DiskLRUCache(str(tmp_path), max_bytes=entry_size * 3)
+    for i in range(4):
+        first.set(f"a{i}", value)
+        second.set(f"b{i}", value)
+
+    on_disk = sum(os.path.getsize(os.path.join(str(tmp_path), n)) for n in os.listdir(str(tmp_path)))
+    assert on_disk <= entry_size * 3
+    # Entries written by one process are hits in the other
+    assert first.get("b3") == value
+    assert second.get("a3") == value
+
+
+def test_memory_cache_evicts_least_recently_used():
+    cache = MemoryLRUCache(max_entries=2)
+    cache.set("a", (1,))
+    cache.set("b", (2,))
+    assert cache.get("a") == (1,)   # a is now more recent than b
+    cache.set("c", (3,))            # over capacity: b is evicted
+
+    assert cache.get("b") is None
+    assert cache.get("c") == (3,)
+    stats = cache.stats()
+    assert stats["entries"] == 2
+    assert stats["evictions"] == 1
+    assert stats["hits"] == 2
+    assert stats["misses"] == 1
@@ -1,4 +1,3 @@
-import os
 import io
 import tempfile
 import pytest
@@ -15,27 +14,10 @@ def test_allowed_file_pdf():
     assert file_utils.allowed_file('test.PDF'.lower())
 
 
-def test_handle_file_upload_valid(monkeypatch, app):
-    test_filename = 'sample.pdf'
-    test_content = b'PDF content here'
-    data = {
-        'file': (io.BytesIO(test_content), test_filename)
-    }
-    
-    with app.test_request_context('/upload', method='POST', data=data, content_type='multipart/form-data'):
-        filepath, error = file_utils.handle_file_upload(request, upload_folder=app.config['UPLOAD_FOLDER'])
-        assert error is None
-        assert filepath is not None
-        assert os.path.exists(filepath)
-        with open(filepath, 'rb') as f:
-            assert f.read() == test_content
-        os.remove(filepath)
-
-
-def test_handle_file_upload_no_file(app):
+def test_read_pdf_upload_no_file(app):
     with app.test_request_context('/upload', method='POST', data={}, content_type='multipart/form-data'):
-        filepath, error = file_utils.handle_file_upload(request, upload_folder=app.config['UPLOAD_FOLDER'])
-        assert filepath is None
+        upload, error = file_utils.read_pdf_upload(request)
+        assert upload is None
         assert error is not None
         # Error is a tuple of (response, status_code)
         resp, code = error
@@ -43,15 +25,64 @@ def test_handle_file_upload_no_file(app):
         assert 'No file provided' in resp.get_json()['error']
 
 
-def test_handle_file_upload_invalid_extension(app):
+def test_read_pdf_upload_invalid_extension(app):
     data = {
         'file': (io.BytesIO(b'not a pdf'), 'badfile.txt')
     }
     with app.test_request_context('/upload', method='POST', data=data, content_type='multipart/form-data'):
-        filepath, error = file_utils.handle_file_upload(request, upload_folder=app.config['UPLOAD_FOLDER'])
-        assert filepath is None
+        upload, error = file_utils.read_pdf_upload(request)
+        assert upload is None
         assert error is not None
         # Error is a tuple of (response, status_code)
         resp, code = error
         assert code == 400
         assert 'File must be a PDF' in resp.get_json()['error']
+
+
+def test_read_pdf_upload_returns_bytes_without_writing(app, tmp_path):
+    data = {'file': (io.BytesIO(b'%PDF-1.4 content'), 'My Timetable.pdf')}
+    with app.test_request_context('/upload', method='POST', data=data, content_type='multipart/form-data'):
+        upload, error = file_utils.read_pdf_upload(request)
+        assert error is None
+        assert upload == ('My_Timetable.pdf', b'%PDF-1.4 content')
+
+
+def test_read_pdf_upload_rejects_oversized_file(app):
+    data = {'file': (io.BytesIO(b'x' * 2048), 'big.pdf')}
+    with app.test_request_context('/upload', method='POST', data=data, content_type='multipart/form-data'):
+        upload, error = file_utils.read_pdf_upload(request, max_bytes=1024)
+        assert upload is None
+        resp, code = error
+        assert code == 413
+
+
+def test_read_pdf_upload_rejects_empty_file(app):
+    data = {'file': (io.BytesIO(b''), 'empty.pdf')}
+    with app.test_request_context('/upload', method='POST', data=data, content_type='multipart/form-data'):
+        upload, error = file_utils.read_pdf_upload(request)
+        assert upload is None
+        assert error[1] == 400
+
+
+def test_uploads_spool_in_memory_below_threshold():
+    from app.main import create_app
+    small_app = create_app({"TESTING": True, "UPLOAD_SPOOL_BYTES": 1024, "PDF_POOL_WORKERS": 0})
+
+    with small_app.test_request_context('/upload', method='POST', data={'file': (io.BytesIO(b'a' * 100), 'a.pdf')},
+                                        content_type='multipart/form-data'):
+        stream = request.files['file'].stream
+        assert isinstance(stream, tempfile.SpooledTemporaryFile)
+        assert not stream._rolled
+
+    with small_app.test_request_context('/upload', method='POST', data={'file': (io.BytesIO(b'a' * 4096), 'a.pdf')},
+                                        content_type='multipart/form-data'):
+        assert request.files['file'].stream._rolled
+
+
+def test_upload_over_max_content_length_is_413():
+    from app.main import create_app
+    client = create_app({"TESTING": True, "MAX_CONTENT_LENGTH": 1024, "PDF_POOL_WORKERS": 0}).test_client()
+    resp = client.post('/api/timetable/process', data={'file': (io.BytesIO(b'a' * 4096), 'big.pdf')},
+                       content_type='multipart/form-data')
+    assert resp.status_code == 413
+    assert 'error' in resp.get_json()
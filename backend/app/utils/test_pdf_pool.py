@@ -0,0 +1,91 @@
+import os
+import time
+
+import pdfplumber
+import pytest
+
+from app.utils import file_utils, pdf_pool
+from app.utils.pdf_pool import PDFExtractionTimeout, PDFProcessPool
+
+UPLOADS = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "storage", "uploads")
+MULTI_PAGE_PDF = os.path.join(UPLOADS, "PHL277.pdf")
+
+
+def _inline_tables(path):
+    with pdfplumber.open(path) as pdf:
+        return [t for page in pdf.pages for t in page.extract_tables()]
+
+
+@pytest.fixture
+def pool():
+    pdf_pool = PDFProcessPool(max_workers=2, max_tasks_per_child=2, timeout_seconds=60)
+    yield pdf_pool
+    pdf_pool.shutdown()
+
+
+def test_pool_matches_inline_extraction(pool):
+    expected = _inline_tables(MULTI_PAGE_PDF)
+    assert pool.extract_tables(MULTI_PAGE_PDF) == expected
+    with open(MULTI_PAGE_PDF, "rb") as f:
+        assert pool.extract_tables(f.read()) == expected
+    # max_tasks_per_child=2 forces children to be recycled between these calls
+    assert pool.extract_tables(MULTI_PAGE_PDF) == expected
+
+
+def _never_finishes(path, start, stop):
+    while True:
+        pass
+
+
+def _first_chunk_fails(path, start, stop):
+    if start == 0:
+        raise ValueError("bad page")
+    _never_finishes(path, start, stop)
+
+
+def test_timeout_keeps_the_shared_pool(pool):
+    expected = _inline_tables(MULTI_PAGE_PDF)
+    assert pool.extract_tables(MULTI_PAGE_PDF) == expected
+
+    pool.timeout_seconds = 0.001
+    with pytest.raises(PDFExtractionTimeout):
+        pool.extract_tables(MULTI_PAGE_PDF)
+    pool.timeout_seconds = 60
+
+    assert pool.extract_tables(MULTI_PAGE_PDF) == expected
+    assert pool._live <= pool.max_workers
+
+
+def test_stuck_chunk_is_killed_at_the_deadline(monkeypatch):
+    pool = PDFProcessPool(max_workers=1, timeout_seconds=5)
+    try:
+        monkeypatch.setattr(pdf_pool, "_extract_page_range", _never_finishes)
+        with pytest.raises(PDFExtractionTimeout):
+            pool.extract_tables(MULTI_PAGE_PDF)
+        monkeypatch.undo()
+
+        # The only worker was stuck; it was replaced, so the next upload is served
+        assert pool.extract_tables(MULTI_PAGE_PDF) == _inline_tables(MULTI_PAGE_PDF)
+    finally:
+        pool.shutdown()
+
+
+def test_failing_chunk_does_not_wait_for_its_siblings(pool, monkeypatch):
+    pool.extract_tables(MULTI_PAGE_PDF)         # start both workers
+    monkeypatch.setattr(pdf_pool, "_extract_page_range", _first_chunk_fails)
+    start = time.monotonic()
+    with pytest.raises(ValueError):
+        pool.extract_tables(MULTI_PAGE_PDF)
+    assert time.monotonic() - start < pool.timeout_seconds
+    monkeypatch.undo()
+
+    assert pool.extract_tables(MULTI_PAGE_PDF) == _inline_tables(MULTI_PAGE_PDF)
+
+
+def test_extract_tables_from_pdf_delegates_to_pool():
+    class FakePool:
+        def extract_tables(self, source):
+            return [["from pool", source]]
+
+    assert file_utils.extract_tables_from_pdf("x.pdf", FakePool()) == [["from pool", "x.pdf"]]
+    assert file_utils.extract_tables_from_pdf(MULTI_PAGE_PDF) == _inline_tables(MULTI_PAGE_PDF)
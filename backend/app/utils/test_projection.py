@@ -0,0 +1,26 @@
+import pytest
+
+from database.projection import InvalidFieldsError, build_select
+
+ALLOWED = ("task_id", "is_completed", "course_id")
+EMBEDDED = {"course_name": ("courses", "course_name"), "course_color": ("courses", "color")}
+
+
+def test_build_select_defaults_when_no_fields():
+    assert build_select(None, ALLOWED, "default") == "default"
+    assert build_select(" , ", ALLOWED, "default") == "default"
+
+
+def test_build_select_plain_columns_deduplicated():
+    assert build_select("task_id, is_completed,task_id", ALLOWED, "x") == "task_id,is_completed"
+
+
+def test_build_select_groups_embedded_columns():
+    select = build_select("task_id,course_color,course_name", ALLOWED, "x", EMBEDDED)
+    assert select == "task_id,courses(color,course_name)"
+
+
+def test_build_select_rejects_unknown_fields():
+    with pytest.raises(InvalidFieldsError) as exc:
+        build_select("task_id,password", ALLOWED, "x")
+    assert "password" in str(exc.value)
@@ -0,0 +1,102 @@
+import json
+
+from database.pagination import iter_pages, with_key_column
+from app.utils import response_utils
+
+
+class FakeQuery:
+    """Minimal stand-in for a Supabase select builder over an in-memory table."""
+
+    def __init__(self, rows, calls):
+        self.rows = rows
+        self.calls = calls
+        self.after = None
+        self.count = None
+
+    def gt(self, column, value):
+        self.after = value
+        self.rows = [r for r in self.rows if r[column] > value]
+        return self
+
+    def order(self, column):
+        self.rows = sorted(self.rows, key=lambda r: r[column])
+        return self
+
+    def limit(self, count):
+        self.count = count
+        self.calls.append((self.after, count))
+        return self
+
+    def execute(self):
+        return type("Res", (), {"data": self.rows[:self.count]})()
+
+
+def test_iter_pages_walks_all_pages_by_key():
+    rows = [{"id": i} for i in range(7)]
+    calls = []
+    result = list(iter_pages(lambda: FakeQuery(rows, calls), order_by="id", page_size=3))
+    assert [r["id"] for r in result] == list(range(7))
+    assert calls == [(None, 3), (2, 3), (5, 3)]
+
+
+def test_iter_pages_does_not_skip_rows_when_earlier_rows_are_deleted():
+    rows = [{"id": i} for i in range(6)]
+    pages = iter_pages(lambda: FakeQuery(list(rows), []), order_by="id", page_size=2)
+    seen = [next(pages)["id"], next(pages)["id"]]
+    del rows[:2]      # an offset-based second page would now start at id 4
+    seen += [r["id"] for r in pages]
+    assert seen == list(range(6))
+
+
+def test_iter_pages_applies_transform_per_page():
+    rows = [{"id": i} for i in range(4)]
+    pages = []
+
+    def transform(page):
+        pages.append(len(page))
+        return [{**r, "seen": True} for r in page]
+
+    result = list(iter_pages(lambda: FakeQuery(rows, []), order_by="id", page_size=2, transform=transform))
+    assert all(r["seen"] for r in result)
+    # Exact multiple of page_size needs one extra (empty) request to detect the end
+    assert pages == [2, 2, 0]
+
+
+def test_iter_pages_drops_key_added_for_paging():
+    rows = [{"id": i, "name": str(i)} for i in range(3)]
+    result = list(iter_pages(lambda: FakeQuery(rows, []), order_by="id", page_size=2, drop_key=True))
+    assert result == [{"name": "0"}, {"name": "1"}, {"name": "2"}]
+
+
+def test_with_key_column():
+    assert with_key_column("task_id,description", "task_id") == ("task_id,description", False)
+    assert with_key_column("description,courses(task_id)", "task_id") == ("task_id,description,courses(task_id)", True)
+    assert with_key_column("*", "task_id") == ("*", False)
+
+
+def test_iter_pages_is_lazy():
+    calls = []
+    gen = iter_pages(lambda: FakeQuery([{"id": 1}], calls), order_by="id")
+    assert calls == []
+    next(gen)
+    assert len(calls) == 1
+
+
+def test_ndjson_response_reports_late_errors_in_band(app):
+    def rows():
+        yield {"id": 1}
+        raise RuntimeError("connection lost")
+
+    with app.test_request_context("/"):
+        resp = response_utils.ndjson_response(rows())
+        lines = [json.loads(line) for line in resp.get_data(as_text=True).splitlines()]
+    assert lines == [{"id": 1}, {"error": "connection lost"}]
+
+
+def test_wants_ndjson(app):
+    with app.test_request_context("/", headers={"Accept": "application/x-ndjson"}):
+        from flask import request
+        assert response_utils.wants_ndjson(request)
+    with app.test_request_context("/", headers={"Accept": "*/*"}):
+        from flask import request
+        assert not response_utils.wants_ndjson(request)
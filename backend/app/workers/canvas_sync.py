@@ -0,0 +1,315 @@
+"""
+Background Canvas sync for every user with Canvas credentials.
+
+    python -m app.workers.canvas_sync               # every shard, one process each, forever
+    python -m app.workers.canvas_sync --shard 2/8   # only shard 2 of 8 (e.g. one per host)
+    python -m app.workers.canvas_sync --once        # a single pass, then exit
+
+Users are split into shards by a stable hash of user_id; each shard runs in its
+own process and syncs its users with CanvasSyncEngine every interval.
+
+Canvas rate-limits per token, but a whole institution shares one domain, so
+each domain also gets limits across all of its users: at most
+CANVAS_SYNC_DOMAIN_CONCURRENCY users syncing at once and
+CANVAS_SYNC_DOMAIN_RATE requests per second. Both are split evenly between
+shards, so the fleet as a whole stays within them; running more shards than
+CANVAS_SYNC_DOMAIN_CONCURRENCY is refused, since every shard needs at least one
+sync slot. Each syncing user's CanvasClient fetches up to
+CANVAS_MAX_CONCURRENCY assignment lists at once, so a domain can see up to
+CANVAS_SYNC_DOMAIN_CONCURRENCY x CANVAS_MAX_CONCURRENCY requests in flight
+(8 x 4 = 32 by default); the request rate is bounded by the budget. A user whose sync fails is
+retried after an exponentially growing delay, so one revoked token does not
+cost a request every pass. Every attempt is recorded in canvas_sync_runs.
+"""
+import argparse
+import multiprocessing
+import os
+import threading
+import time
+import uuid
+import zlib
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime, timezone
+from typing import Callable, Dict, List, Optional
+
+from app.services.canvas import AdaptiveThrottle, CanvasClient
+from app.services.canvas_sync import CanvasSyncEngine
+from database.canvas_sync_runs_repository import CanvasSyncRunsRepository
+from database.users_repository import UsersRepository
+
+DEFAULT_PROCESSES = int(os.getenv("CANVAS_SYNC_PROCESSES", "2"))
+DEFAULT_INTERVAL_SECONDS = float(os.getenv("CANVAS_SYNC_INTERVAL_SECONDS", "900"))
+DEFAULT_DOMAIN_CONCURRENCY = int(os.getenv("CANVAS_SYNC_DOMAIN_CONCURRENCY", "8"))
+DEFAULT_DOMAIN_RATE = float(os.getenv("CANVAS_SYNC_DOMAIN_RATE", "20"))
+DEFAULT_BACKOFF_SECONDS = float(os.getenv("CANVAS_SYNC_BACKOFF_SECONDS", "300"))
+DEFAULT_MAX_BACKOFF_SECONDS = float(os.getenv("CANVAS_SYNC_MAX_BACKOFF_SECONDS", "21600"))
+
+
+def shard_of(user_id: str, shards: int) -> int:
+    """Stable shard of a user (the same in every process and across restarts)."""
+    return zlib.crc32(user_id.encode()) % max(1, shards)
+
+
+def check_shard_count(shards: int, domain_concurrency: int):
+    """Raise ValueError if `shards` cannot share `domain_concurrency` with at least one slot each."""
+    if shards > domain_concurrency:
+        raise ValueError(
+            f"{shards} shards exceed the domain concurrency of {domain_concurrency} "
+            "(CANVAS_SYNC_DOMAIN_CONCURRENCY); run at most that many shards"
+        )
+
+
+def backoff_delay(failures: int, base: float, maximum: float) -> float:
+    """Seconds to wait before retrying a user after `failures` consecutive failures."""
+    return min(maximum, base * 2 ** max(failures - 1, 0))
+
+
+class RateBudget:
+    """
+    Token bucket shared by every client of one domain: `rate` requests per
+    second on average, bursts of up to `burst`. rate <= 0 means unlimited.
+    """
+
+    def __init__(
+        self,
+        rate: float,
+        burst: Optional[float] = None,
+        clock: Callable[[], float] = time.monotonic,
+        sleep: Callable[[float], None] = time.sleep,
+    ):
+        self.rate = rate
+        self.burst = burst if burst is not None else max(rate, 1.0)
+        self.clock = clock
+        self.sleep = sleep
+        self.tokens = self.burst
+        self.updated = clock()
+        self.waited_seconds = 0.0
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        if self.rate <= 0:
+            return
+        with self._lock:
+            now = self.clock()
+            self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            # Take the token now, even if that goes negative; the caller sleeps off the debt
+            self.tokens -= 1
+            delay = -self.tokens / self.rate if self.tokens < 0 else 0.0
+            self.waited_seconds += delay
+        if delay > 0:
+            self.sleep(delay)
+
+
+class BudgetedThrottle(AdaptiveThrottle):
+    """A user's adaptive throttle that also draws every request from its domain's budget."""
+
+    def __init__(self, budget: RateBudget, **kwargs):
+        super().__init__(**kwargs)
+        self.budget = budget
+
+    def wait(self):
+        self.budget.acquire()
+        super().wait()
+
+
+class CanvasSyncScheduler:
+    """Syncs one shard's users, pass after pass."""
+
+    def __init__(
+        self,
+        shard: int = 0,
+        shards: int = 1,
+        domain_concurrency: int = DEFAULT_DOMAIN_CONCURRENCY,
+        domain_rate: float = DEFAULT_DOMAIN_RATE,
+        backoff_base: float = DEFAULT_BACKOFF_SECONDS,
+        backoff_max: float = DEFAULT_MAX_BACKOFF_SECONDS,
+        users: Optional[UsersRepository] = None,
+        runs: Optional[CanvasSyncRunsRepository] = None,
+        courses=None,
+        assignments=None,
+        cursors=None,
+        client_factory: Callable[..., CanvasClient] = CanvasClient,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.shard = shard
+        self.shards = max(1, shards)
+        check_shard_count(self.shards, domain_concurrency)
+        # This shard's share of each domain's limits (the remainder goes unused,
+        # so the shards together never exceed domain_concurrency)
+        self.domain_concurrency = domain_concurrency // self.shards
+        self.domain_rate = domain_rate / self.shards
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.users = users or UsersRepository()
+        self.runs = runs or CanvasSyncRunsRepository()
+        self.client_factory = client_factory
+        self.clock = clock
+        self.engine = CanvasSyncEngine(
+            users=self.users, courses=courses, assignments=assignments, cursors=cursors,
+            client_factory=self._client_for, clock=clock,
+        )
+        self.budgets: Dict[str, RateBudget] = {}
+        self.backoff: Dict[str, Dict] = {}   # user_id -> {"failures", "retry_at"}
+        self._lock = threading.Lock()
+
+    def _budget(self, domain: str) -> RateBudget:
+        key = domain.lower().rstrip("/")
+        with self._lock:
+            if key not in self.budgets:
+                self.budgets[key] = RateBudget(self.domain_rate)
+            return self.budgets[key]
+
+    def _client_for(self, domain: str, token: str) -> CanvasClient:
+        return self.client_factory(domain, token, throttle=BudgetedThrottle(self._budget(domain)))
+
+    def _due_users(self):
+        now = self.clock()
+        due, deferred = [], 0
+        for row in self.users.iter_canvas_users():
+            if shard_of(row["user_id"], self.shards) != self.shard:
+                continue
+            state = self.backoff.get(row["user_id"])
+            if state and state["retry_at"] > now:
+                deferred += 1
+                continue
+            due.append(row)
+        return due, deferred
+
+    def _sync_one(self, row: Dict) -> Dict:
+        user_id = row["user_id"]
+        started_at = datetime.now(timezone.utc).isoformat()
+        start = self.clock()
+        run = {
+            "run_id": str(uuid.uuid4()),
+            "user_id": user_id,
+            "canvas_domain": row.get("canvas_domain"),
+            "shard": self.shard,
+            "status": "success",
+            "error": None,
+            "started_at": started_at,
+            "requests": 0,
+            "not_modified": 0,
+            "rows_changed": 0,
+            "consecutive_failures": 0,
+        }
+        try:
+            stats = self.engine.sync_user(user_id)
+        except Exception as e:
+            failures = self.backoff.get(user_id, {}).get("failures", 0) + 1
+            self.backoff[user_id] = {
+                "failures": failures,
+                "retry_at": self.clock() + backoff_delay(failures, self.backoff_base, self.backoff_max),
+            }
+            run.update({"status": "error", "error": str(e)[:500], "consecutive_failures": failures})
+        else:
+            self.backoff.pop(user_id, None)
+            run.update({
+                "requests": stats["requests"],
+                "not_modified": stats["not_modified"],
+                "rows_changed": stats["courses_upserted"] + stats["assignments_upserted"],
+            })
+        run["duration_ms"] = int((self.clock() - start) * 1000)
+        return run
+
+    def run_once(self) -> Dict:
+        """Sync every due user of this shard once; returns a summary of the pass."""
+        start = self.clock()
+        due, deferred = self._due_users()
+        by_domain: Dict[str, List[Dict]] = {}
+        for row in due:
+            by_domain.setdefault(row["canvas_domain"].lower().rstrip("/"), []).append(row)
+
+        # One pool per domain: its size is the domain's concurrency limit, and a
+        # slow domain cannot hold up the others
+        executors = [
+            ThreadPoolExecutor(max_workers=min(self.domain_concurrency, len(rows)), thread_name_prefix="canvas-sync")
+            for rows in by_domain.values()
+        ]
+        runs = []
+        try:
+            futures = [
+                executor.submit(self._sync_one, row)
+                for executor, rows in zip(executors, by_domain.values())
+                for row in rows
+            ]
+            for future in as_completed(futures):
+                runs.append(future.result())
+        finally:
+            for executor in executors:
+                executor.shutdown(wait=True)
+        self.runs.record_many(runs)
+
+        return {
+            "shard": f"{self.shard}/{self.shards}",
+            "users": len(runs),
+            "succeeded": sum(1 for r in runs if r["status"] == "success"),
+            "failed": sum(1 for r in runs if r["status"] == "error"),
+            "deferred": deferred,
+            "domains": len(by_domain),
+            "requests": sum(r["requests"] for r in runs),
+            "rows_changed": sum(r["rows_changed"] for r in runs),
+            "duration_seconds": round(self.clock() - start, 3),
+        }
+
+    def run_forever(self, interval: float = DEFAULT_INTERVAL_SECONDS, stop: Optional[threading.Event] = None):
+        """Run a pass every `interval` seconds until `stop` is set."""
+        stop = stop or threading.Event()
+        while not stop.is_set():
+            start = self.clock()
+            try:
+                print(f"canvas sync: {self.run_once()}", flush=True)
+            except Exception as e:
+                # e.g. the DB is unreachable; try again next pass
+                print(f"canvas sync shard {self.shard}/{self.shards} failed: {e}", flush=True)
+            stop.wait(max(0.0, interval - (self.clock() - start)))
+
+
+def _run_shard(shard: int, shards: int, once: bool, interval: float):
+    scheduler = CanvasSyncScheduler(shard=shard, shards=shards)
+    if once:
+        print(f"canvas sync: {scheduler.run_once()}", flush=True)
+    else:
+        scheduler.run_forever(interval)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--shard", help="run only this shard, as INDEX/COUNT (e.g. 0/4)")
+    parser.add_argument("--processes", type=int, default=DEFAULT_PROCESSES, help="shards to run locally, one process each")
+    parser.add_argument("--interval", type=float, default=DEFAULT_INTERVAL_SECONDS, help="seconds between passes")
+    parser.add_argument("--once", action="store_true", help="run one pass and exit")
+    args = parser.parse_args(argv)
+
+    if args.shard:
+        index, count = (int(part) for part in args.shard.split("/"))
+        if not 0 <= index < count:
+            parser.error("--shard must be INDEX/COUNT with 0 <= INDEX < COUNT")
+        try:
+            check_shard_count(count, DEFAULT_DOMAIN_CONCURRENCY)
+        except ValueError as e:
+            parser.error(str(e))
+        _run_shard(index, count, args.once, args.interval)
+        return
+
+    shards = max(1, args.processes)
+    try:
+        check_shard_count(shards, DEFAULT_DOMAIN_CONCURRENCY)
+    except ValueError as e:
+        parser.error(str(e))
+    processes = [
+        multiprocessing.Process(target=_run_shard, args=(i, shards, args.once, args.interval), name=f"canvas-sync-{i}")
+        for i in range(shards)
+    ]
+    for process in processes:
+        process.start()
+    try:
+        for process in processes:
+            process.join()
+    except KeyboardInterrupt:
+        for process in processes:
+            process.terminate()
+
+
+if __name__ == "__main__":
+    main()
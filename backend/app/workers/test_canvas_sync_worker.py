@@ -0,0 +1,163 @@
+"""Tests for the background Canvas sync worker, against fake Canvas servers (see conftest.py)."""
+import pytest
+
+from app.services.canvas import CanvasClient
+from app.services.test_canvas_sync import FakeAssignments, FakeCourses, FakeCursors
+from app.workers.canvas_sync import CanvasSyncScheduler, RateBudget, backoff_delay, main, shard_of
+
+
+class FakeUsers:
+    def __init__(self):
+        self.users = {}
+
+    def add(self, user_id, domain, token):
+        self.users[user_id] = {"user_id": user_id, "canvas_domain": domain, "canvas_api_key": token}
+
+    def iter_canvas_users(self):
+        return ({"user_id": u["user_id"], "canvas_domain": u["canvas_domain"]} for u in self.users.values())
+
+    def fetch_canvas_credentials(self, user_id):
+        return self.users.get(user_id)
+
+
+class FakeRuns:
+    def __init__(self):
+        self.rows = []
+
+    def record_many(self, rows):
+        self.rows.extend(rows)
+        return len(rows)
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def _add_students(server, users, prefix, n):
+    for i in range(n):
+        token = f"{prefix}-tok-{i}"
+        server.add_account(token, [{"id": 1, "name": "Calculus", "course_code": "MAT137"}], {
+            1: [{"id": 10 + i, "name": "PS1", "due_at": "2025-10-01T23:59:00Z"}],
+        })
+        users.add(f"{prefix}-{i}", server.url, token)
+
+
+def _scheduler(users, **kwargs):
+    kwargs.setdefault("client_factory", lambda domain, token, throttle: CanvasClient(domain, token, max_concurrency=1, throttle=throttle))
+    return CanvasSyncScheduler(
+        users=users, runs=FakeRuns(), courses=FakeCourses(), assignments=FakeAssignments(), cursors=FakeCursors(),
+        **kwargs,
+    )
+
+
+def test_shards_partition_users():
+    user_ids = [f"user-{i}" for i in range(200)]
+    shards = [{u for u in user_ids if shard_of(u, 4) == s} for s in range(4)]
+    assert set().union(*shards) == set(user_ids)
+    assert sum(len(s) for s in shards) == len(user_ids)
+    assert all(shards)
+
+
+def test_pass_syncs_every_domain_within_its_concurrency(fake_canvas_factory):
+    busy, quiet = fake_canvas_factory(), fake_canvas_factory()
+    users = FakeUsers()
+    _add_students(busy, users, "busy", 6)
+    _add_students(quiet, users, "quiet", 2)
+    busy.latency = 0.05
+    scheduler = _scheduler(users, domain_concurrency=2, domain_rate=0)
+
+    summary = scheduler.run_once()
+
+    assert summary["users"] == 8
+    assert summary["succeeded"] == 8
+    assert summary["domains"] == 2
+    assert summary["rows_changed"] == 16             # one course + one assignment each
+    assert 1 < busy.max_in_flight <= 2
+    runs = scheduler.runs.rows
+    assert len(runs) == 8 and all(r["status"] == "success" and r["duration_ms"] >= 0 for r in runs)
+
+    # Nothing changed upstream: the second pass only revalidates
+    assert scheduler.run_once()["rows_changed"] == 0
+
+
+def test_failing_user_backs_off_without_blocking_others(fake_canvas):
+    users = FakeUsers()
+    _add_students(fake_canvas, users, "s", 2)
+    fake_canvas.server_errors["s-tok-0"] = 1
+    clock = Clock()
+    scheduler = _scheduler(users, domain_rate=0, backoff_base=60, backoff_max=3600, clock=clock)
+
+    first = scheduler.run_once()
+    assert (first["succeeded"], first["failed"]) == (1, 1)
+    failed = next(r for r in scheduler.runs.rows if r["status"] == "error")
+    assert failed["user_id"] == "s-0" and failed["consecutive_failures"] == 1
+
+    # Still backing off: skipped without a request
+    fake_canvas.requests.clear()
+    second = scheduler.run_once()
+    assert second["deferred"] == 1
+    assert not fake_canvas.request_paths("s-tok-0")
+
+    clock.now += 61
+    third = scheduler.run_once()
+    assert third["deferred"] == 0 and third["failed"] == 0
+    assert "s-0" not in scheduler.backoff
+
+
+def test_only_own_shard_is_synced(fake_canvas):
+    users = FakeUsers()
+    _add_students(fake_canvas, users, "s", 10)
+    synced = set()
+    for shard in range(3):
+        scheduler = _scheduler(users, shard=shard, shards=3, domain_rate=0)
+        scheduler.run_once()
+        mine = {r["user_id"] for r in scheduler.runs.rows}
+        assert all(shard_of(u, 3) == shard for u in mine)
+        synced |= mine
+    assert synced == set(users.users)
+
+
+def test_shards_split_domain_concurrency_without_exceeding_it():
+    users = FakeUsers()
+    shards = [_scheduler(users, shard=s, shards=3, domain_concurrency=8) for s in range(3)]
+    assert sum(s.domain_concurrency for s in shards) <= 8
+    assert all(s.domain_concurrency >= 1 for s in shards)
+
+    with pytest.raises(ValueError):
+        _scheduler(users, shard=0, shards=9, domain_concurrency=8)
+
+
+def test_worker_refuses_more_shards_than_domain_concurrency(monkeypatch):
+    import app.workers.canvas_sync as worker
+    monkeypatch.setattr(worker, "DEFAULT_DOMAIN_CONCURRENCY", 4)
+    monkeypatch.setattr(worker, "_run_shard", lambda *args: pytest.fail("shard started"))
+    with pytest.raises(SystemExit):
+        main(["--processes", "5", "--once"])
+    with pytest.raises(SystemExit):
+        main(["--shard", "0/5", "--once"])
+
+
+def test_rate_budget_spaces_requests():
+    sleeps = []
+    budget = RateBudget(rate=2.0, burst=1.0, clock=lambda: 0.0, sleep=sleeps.append)
+    for _ in range(3):
+        budget.acquire()
+    assert sleeps == [pytest.approx(0.5), pytest.approx(1.0)]
+
+
+def test_domain_budget_is_shared_by_the_domains_users(fake_canvas):
+    users = FakeUsers()
+    _add_students(fake_canvas, users, "s", 3)
+    scheduler = _scheduler(users, domain_rate=1000.0)
+
+    scheduler.run_once()
+
+    assert list(scheduler.budgets) == [fake_canvas.url.lower()]
+
+
+def test_backoff_delay_grows_and_caps():
+    assert [backoff_delay(n, 60, 300) for n in (1, 2, 3, 4)] == [60, 120, 240, 300]
@@ -34,3 +34,161 @@ def app():
 def client(app):
     """Provide Flask test client."""
     return app.test_client()
+
+
+class FakeCanvas:
+    """
+    In-process Canvas REST API for tests: real HTTP on 127.0.0.1, Link
+    pagination, X-Rate-Limit-Remaining headers, ETag/If-None-Match (304), and
+    injectable rate-limit (403) or server (500) failures.
+    """
+
+    def __init__(self):
+        import threading
+        self.accounts = {}              # token -> {"courses": [...], "assignments": {course_id: [...]}}
+        self.requests = []              # (token, path, query) per request served
+        self.rate_limit_remaining = 700.0
+        self.request_cost = 1.0
+        self.rate_limit_failures = 0    # answer the next N requests with 403 Rate Limit Exceeded
+        self.server_errors = {}         # token -> answer the next N requests with 500
+        self.latency = 0.0              # seconds spent on each request
+        self.default_per_page = 10
+        self.connections = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self._lock = threading.Lock()
+        self._server = None
+
+    def add_account(self, token, courses, assignments=None):
+        assignments = {str(course_id): items for course_id, items in (assignments or {}).items()}
+        self.accounts[token] = {"courses": courses, "assignments": assignments}
+
+    @property
+    def url(self):
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self):
+        import threading
+        from http.server import ThreadingHTTPServer
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), _fake_canvas_handler(self))
+        self._server.daemon_threads = True
+        threading.Thread(target=self._server.serve_forever, kwargs={"poll_interval": 0.05}, daemon=True).start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def request_paths(self, token=None):
+        return [path for t, path, _ in self.requests if token is None or t == token]
+
+
+def _fake_canvas_handler(canvas):
+    import hashlib
+    import json
+    import re
+    import time
+    from http.server import BaseHTTPRequestHandler
+    from urllib.parse import parse_qsl, urlencode, urlsplit
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"  # keep-alive, so connection reuse is observable
+
+        def setup(self):
+            super().setup()
+            with canvas._lock:
+                canvas.connections += 1
+
+        def log_message(self, *args):
+            pass
+
+        def _send(self, status, body=None, headers=None):
+            payload = json.dumps(body).encode() if body is not None else b""
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(payload)))
+            for name, value in (headers or {}).items():
+                self.send_header(name, value)
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def do_GET(self):
+            with canvas._lock:
+                canvas.in_flight += 1
+                canvas.max_in_flight = max(canvas.max_in_flight, canvas.in_flight)
+            try:
+                self._handle()
+            finally:
+                with canvas._lock:
+                    canvas.in_flight -= 1
+
+        def _handle(self):
+            if canvas.latency:
+                time.sleep(canvas.latency)
+            parts = urlsplit(self.path)
+            query = parse_qsl(parts.query)
+            token = self.headers.get("Authorization", "").removeprefix("Bearer ")
+            with canvas._lock:
+                canvas.requests.append((token, parts.path, query))
+                canvas.rate_limit_remaining = max(canvas.rate_limit_remaining - canvas.request_cost, 0.0)
+                rate_headers = {
+                    "X-Rate-Limit-Remaining": f"{canvas.rate_limit_remaining:.1f}",
+                    "X-Request-Cost": f"{canvas.request_cost:.1f}",
+                }
+                if canvas.rate_limit_failures:
+                    canvas.rate_limit_failures -= 1
+                    return self._send(403, "403 Forbidden (Rate Limit Exceeded)", rate_headers)
+                if canvas.server_errors.get(token):
+                    canvas.server_errors[token] -= 1
+                    return self._send(500, {"errors": [{"message": "Internal error"}]}, rate_headers)
+
+            account = canvas.accounts.get(token)
+            if account is None:
+                return self._send(401, {"errors": [{"message": "Invalid access token."}]}, rate_headers)
+            if parts.path == "/api/v1/courses":
+                items = account["courses"]
+            else:
+                match = re.fullmatch(r"/api/v1/courses/([^/]+)/assignments", parts.path)
+                if not match:
+                    return self._send(404, {"errors": [{"message": "Not found"}]}, rate_headers)
+                items = account["assignments"].get(match.group(1))
+                if items is None:
+                    return self._send(404, {"errors": [{"message": "The specified resource does not exist."}]}, rate_headers)
+
+            params = dict(query)
+            per_page = int(params.get("per_page", canvas.default_per_page))
+            page = int(params.get("page", 1))
+            body = items[(page - 1) * per_page: page * per_page]
+            headers = dict(rate_headers)
+            if page * per_page < len(items):
+                next_query = [(k, v) for k, v in query if k != "page"] + [("page", str(page + 1))]
+                headers["Link"] = f'<{canvas.url}{parts.path}?{urlencode(next_query)}>; rel="next"'
+            etag = '"' + hashlib.sha1(json.dumps(body, sort_keys=True).encode()).hexdigest() + '"'
+            headers["ETag"] = etag
+            if self.headers.get("If-None-Match") == etag:
+                return self._send(304, None, headers)
+            self._send(200, body, headers)
+
+    return Handler
+
+
+@pytest.fixture
+def fake_canvas_factory():
+    """Start any number of fake Canvas servers (e.g. one per domain); all stop after the test."""
+    servers = []
+
+    def make():
+        server = FakeCanvas().start()
+        servers.append(server)
+        return server
+
+    yield make
+    for server in servers:
+        server.stop()
+
+
+@pytest.fixture
+def fake_canvas(fake_canvas_factory):
+    """One fake Canvas server; add data with fake_canvas.add_account(token, courses, assignments)."""
+    return fake_canvas_factory()
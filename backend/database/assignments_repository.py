@@ -1,27 +1,37 @@
-from typing import List, Dict, Optional
+from typing import Iterator, List, Dict, Optional
 
 from .db_client import DBClient
+from .pagination import DEFAULT_PAGE_SIZE, iter_pages, with_key_column
+from .bulk import upsert_in_chunks
+from .projection import build_select
 
 
 class AssignmentsRepository:
     table = "assignments"
 
-    def fetch_all(self) -> List[Dict]:
+    columns = (
+        "assignment_id", "course_id", "title", "due_date", "completion_points",
+        "is_complete", "actual_completion_date",
+    )
+    base_select = ",".join(columns)
+
+    def fetch_all(self, fields: Optional[str] = None) -> List[Dict]:
         client = DBClient.connect()
         res = (
             client
             .table(self.table)
-            .select("assignment_id,course_id,title,due_date,completion_points,is_complete,actual_completion_date")
+            .select(build_select(fields, self.columns, self.base_select))
+            .order("assignment_id")   # same order as iter_with_filters
             .execute()
         )
         return res.data or []
 
-    def fetch_by_id(self, assignment_id: str) -> Optional[Dict]:
+    def fetch_by_id(self, assignment_id: str, fields: Optional[str] = None) -> Optional[Dict]:
         client = DBClient.connect()
         res = (
             client
             .table(self.table)
-            .select("assignment_id,course_id,title,due_date,completion_points,is_complete,actual_completion_date")
+            .select(build_select(fields, self.columns, self.base_select))
             .eq("assignment_id", assignment_id)
             .execute()
         )
@@ -33,20 +43,43 @@ class AssignmentsRepository:
         due_date: Optional[str] = None,
         title: Optional[str] = None,
         course_id: Optional[str] = None,
+        fields: Optional[str] = None,
     ) -> List[Dict]:
         client = DBClient.connect()
-        query = client.table(self.table).select(
-            "assignment_id,course_id,title,due_date,completion_points,is_complete,actual_completion_date"
-        )
+        query = client.table(self.table).select(build_select(fields, self.columns, self.base_select))
         if due_date:
             query = query.eq("due_date", due_date)
         if title:
             query = query.ilike("title", f"%{title}%")
         if course_id:
             query = query.eq("course_id", course_id)
-        res = query.execute()
+        res = query.order("assignment_id").execute()
         return res.data or []
 
+    def iter_with_filters(
+        self,
+        due_date: Optional[str] = None,
+        title: Optional[str] = None,
+        course_id: Optional[str] = None,
+        fields: Optional[str] = None,
+        page_size: int = DEFAULT_PAGE_SIZE,
+    ) -> Iterator[Dict]:
+        """Yield assignments matching the filters page by page (all when no filters)."""
+        client = DBClient.connect()
+        select, drop_key = with_key_column(build_select(fields, self.columns, self.base_select), "assignment_id")
+
+        def build_query():
+            query = client.table(self.table).select(select)
+            if due_date:
+                query = query.eq("due_date", due_date)
+            if title:
+                query = query.ilike("title", f"%{title}%")
+            if course_id:
+                query = query.eq("course_id", course_id)
+            return query
+
+        return iter_pages(build_query, order_by="assignment_id", page_size=page_size, drop_key=drop_key)
+
     def update(
         self,
         assignment_id: str,
@@ -109,3 +142,29 @@ class AssignmentsRepository:
         clean_payload = {k: v for k, v in payload.items() if v is not None}
         _ = client.table(self.table).insert(clean_payload).execute()
         return True
+
+    def fetch_canvas_assignments(self, course_ids: List[str]) -> List[Dict]:
+        """Assignments of the given courses that were imported from Canvas."""
+        if not course_ids:
+            return []
+        client = DBClient.connect()
+        res = (
+            client
+            .table(self.table)
+            .select("assignment_id,course_id,canvas_assignment_id,title,due_date")
+            .in_("course_id", course_ids)
+            .not_.is_("canvas_assignment_id", "null")
+            .execute()
+        )
+        return res.data or []
+
+    def upsert_many(self, rows: List[Dict]) -> int:
+        """Insert or update Canvas assignments by (course_id, canvas_assignment_id) in batched requests.
+
+        Conflicting on the Canvas id rather than assignment_id means an
+        assignment that a concurrent sync inserted first is updated, not
+        inserted a second time.
+        """
+        return upsert_in_chunks(
+            DBClient.connect(), self.table, rows, on_conflict="course_id,canvas_assignment_id",
+        )
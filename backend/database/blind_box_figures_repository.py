@@ -1,28 +1,70 @@
-from typing import List, Dict, Optional
+from typing import Iterator, List, Dict, Optional
 import random
 
 from .db_client import DBClient
+from .pagination import DEFAULT_PAGE_SIZE, iter_pages, with_key_column
+from .projection import build_select
 
 
 class BlindBoxFiguresRepository:
     table = "blind_box_figures"
 
-    def fetch_all(self) -> List[Dict]:
+    columns = ("figure_id", "series_id", "name", "rarity", "weight", "image")
+    base_select = ",".join(columns)
+
+    def fetch_all(self, fields: Optional[str] = None) -> List[Dict]:
         client = DBClient.connect()
-        res = client.table(self.table).select("figure_id,series_id,name,rarity,weight,image").execute()
+        res = (
+            client
+            .table(self.table)
+            .select(build_select(fields, self.columns, self.base_select))
+            .order("figure_id")   # same order as iter_all
+            .execute()
+        )
         return res.data or []
 
-    def fetch_by_series(self, series_id: str) -> List[Dict]:
+    def fetch_by_id(self, figure_id: str, fields: Optional[str] = None) -> Optional[Dict]:
+        client = DBClient.connect()
+        res = (
+            client
+            .table(self.table)
+            .select(build_select(fields, self.columns, self.base_select))
+            .eq("figure_id", figure_id)
+            .execute()
+        )
+        rows = res.data or []
+        return rows[0] if rows else None
+
+    def fetch_by_series(self, series_id: str, fields: Optional[str] = None) -> List[Dict]:
         client = DBClient.connect()
         res = (
             client
             .table(self.table)
-            .select("figure_id,series_id,name,rarity,weight,image")
+            .select(build_select(fields, self.columns, self.base_select))
             .eq("series_id", series_id)
+            .order("figure_id")
             .execute()
         )
         return res.data or []
 
+    def iter_all(
+        self,
+        series_id: Optional[str] = None,
+        fields: Optional[str] = None,
+        page_size: int = DEFAULT_PAGE_SIZE,
+    ) -> Iterator[Dict]:
+        """Yield figures (optionally for one series) page by page."""
+        client = DBClient.connect()
+        select, drop_key = with_key_column(build_select(fields, self.columns, self.base_select), "figure_id")
+
+        def build_query():
+            query = client.table(self.table).select(select)
+            if series_id:
+                query = query.eq("series_id", series_id)
+            return query
+
+        return iter_pages(build_query, order_by="figure_id", page_size=page_size, drop_key=drop_key)
+
     def select_random_figure(self, series_id: str) -> Optional[Dict]:
         """Select a random figure from a series based on weighted probability"""
         figures = self.fetch_by_series(series_id)
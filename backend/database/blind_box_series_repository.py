@@ -1,24 +1,28 @@
 from typing import List, Dict, Optional
 
 from .db_client import DBClient
+from .projection import build_select
 
 
 class BlindBoxSeriesRepository:
     table = "blind_box_series"
 
-    def fetch_all(self) -> List[Dict]:
+    columns = ("series_id", "name", "description", "cost_points", "release_date", "image")
+    base_select = ",".join(columns)
+
+    def fetch_all(self, fields: Optional[str] = None) -> List[Dict]:
         client = DBClient.connect()
-        res = client.table(self.table).select("series_id,name,description,cost_points,release_date,image").execute()
+        res = client.table(self.table).select(build_select(fields, self.columns, self.base_select)).execute()
         return res.data or []
 
     def fetch_affordable_series(self, user_points: int) -> List[Dict]:
         client = DBClient.connect()
-        res = client.table(self.table).select("series_id,name,description,cost_points,release_date,image").lte("cost_points", user_points).execute()
+        res = client.table(self.table).select(self.base_select).lte("cost_points", user_points).execute()
         return res.data or []
 
-    def fetch_by_id(self, series_id: str) -> Optional[Dict]:
+    def fetch_by_id(self, series_id: str, fields: Optional[str] = None) -> Optional[Dict]:
         client = DBClient.connect()
-        res = client.table(self.table).select("series_id,name,description,cost_points,release_date,image").eq("series_id", series_id).execute()
+        res = client.table(self.table).select(build_select(fields, self.columns, self.base_select)).eq("series_id", series_id).execute()
         rows = res.data or []
         return rows[0] if rows else None
 
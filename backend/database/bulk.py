@@ -0,0 +1,25 @@
+from typing import Dict, List, Optional
+
+from .pagination import DEFAULT_PAGE_SIZE
+
+
+def upsert_in_chunks(
+    client,
+    table: str,
+    rows: List[Dict],
+    on_conflict: Optional[str] = None,
+    chunk_size: int = DEFAULT_PAGE_SIZE,
+    ignore_duplicates: bool = False,
+) -> int:
+    """Upsert rows with one request per chunk_size rows; returns the number of rows sent.
+
+    Rows in one call must share the same keys (PostgREST bulk upsert). Without
+    on_conflict, conflicts are resolved on the table's primary key. With
+    ignore_duplicates, conflicting rows are skipped instead of updated.
+    """
+    kwargs = {"on_conflict": on_conflict} if on_conflict else {}
+    if ignore_duplicates:
+        kwargs["ignore_duplicates"] = True
+    for start in range(0, len(rows), chunk_size):
+        client.table(table).upsert(rows[start:start + chunk_size], **kwargs).execute()
+    return len(rows)
@@ -0,0 +1,19 @@
+from typing import Dict, List
+
+from .bulk import upsert_in_chunks
+from .db_client import DBClient
+
+
+class CanvasSyncCursorsRepository:
+    table = "canvas_sync_cursors"
+
+    columns = ("user_id", "resource", "etag", "page_count", "last_updated_at", "synced_at")
+
+    def fetch_by_user(self, user_id: str) -> Dict[str, Dict]:
+        """{resource: cursor row} for one user."""
+        client = DBClient.connect()
+        res = client.table(self.table).select(",".join(self.columns)).eq("user_id", user_id).execute()
+        return {row["resource"]: row for row in res.data or []}
+
+    def upsert_many(self, rows: List[Dict]) -> int:
+        return upsert_in_chunks(DBClient.connect(), self.table, rows, on_conflict="user_id,resource")
@@ -0,0 +1,26 @@
+from typing import Dict, List
+
+from .bulk import upsert_in_chunks
+from .db_client import DBClient
+
+
+class CanvasSyncRunsRepository:
+    table = "canvas_sync_runs"
+
+    def record_many(self, rows: List[Dict]) -> int:
+        """Write one pass's per-user run rows in batched requests."""
+        return upsert_in_chunks(DBClient.connect(), self.table, rows)
+
+    def fetch_recent(self, user_id: str, limit: int = 20) -> List[Dict]:
+        """A user's most recent sync runs, newest first."""
+        client = DBClient.connect()
+        res = (
+            client
+            .table(self.table)
+            .select("*")
+            .eq("user_id", user_id)
+            .order("started_at", desc=True)
+            .limit(limit)
+            .execute()
+        )
+        return res.data or []
@@ -1,12 +1,20 @@
 from typing import List, Dict, Optional
 
 from .db_client import DBClient
+from .bulk import upsert_in_chunks
+from .projection import build_select
 
 
 class CoursesRepository:
     table = "courses"
 
-    def fetch_all(self) -> List[Dict]:
+    columns = (
+        "course_id", "user_id", "course_name", "course_code", "canvas_course_id",
+        "date_imported_at", "term", "color",
+    )
+    base_select = ",".join(columns)
+
+    def fetch_all(self, fields: Optional[str] = None) -> List[Dict]:
         """Fetch all courses using Supabase client.
 
         Returns a list of dictionaries matching the selected columns.
@@ -15,14 +23,12 @@ class CoursesRepository:
         res = (
             client
             .table(self.table)
-            .select(
-                "course_id,user_id,course_name,course_code,canvas_course_id,date_imported_at,term,color"
-            )
+            .select(build_select(fields, self.columns, self.base_select))
             .execute()
         )
         return res.data or []
 
-    def fetch_by_id(self, course_id: str) -> Optional[Dict]:
+    def fetch_by_id(self, course_id: str, fields: Optional[str] = None) -> Optional[Dict]:
         """Fetch a single course by ID using Supabase client.
 
         Returns a dictionary if found, otherwise None.
@@ -31,9 +37,7 @@ class CoursesRepository:
         res = (
             client
             .table(self.table)
-            .select(
-                "course_id,user_id,course_name,course_code,canvas_course_id,date_imported_at,term,color"
-            )
+            .select(build_select(fields, self.columns, self.base_select))
             .eq("course_id", course_id)
             .execute()
         )
@@ -52,7 +56,9 @@ class CoursesRepository:
     ) -> bool:
         """Create a course using Supabase client.
 
-        date_imported_at is handled by DB default (CURRENT_TIMESTAMP).
+        date_imported_at is handled by DB default (CURRENT_TIMESTAMP). An empty
+        canvas_course_id is stored as NULL, so the course stays out of the
+        unique (user_id, canvas_course_id) index.
         """
         client = DBClient.connect()
         _ = (
@@ -64,7 +70,7 @@ class CoursesRepository:
                     "user_id": user_id,
                     "course_name": course_name,
                     "course_code": course_code,
-                    "canvas_course_id": canvas_course_id,
+                    "canvas_course_id": canvas_course_id or None,
                     "term": term,
                     "color": color,
                 }
@@ -72,3 +78,63 @@ class CoursesRepository:
             .execute()
         )
         return True
+
+    timetable_course_columns = ("course_id", "course_name", "course_code", "color")
+    timetable_task_columns = ("task_id", "course_id", "description", "type",
+                              "scheduled_start_at", "scheduled_end_at", "reward_points")
+
+    def _timetable_rows(self, courses: List[Dict], tasks: List[Dict]) -> Dict:
+        return {
+            "courses": [{k: c.get(k) for k in self.timetable_course_columns} for c in courses],
+            "tasks": [{k: t.get(k) for k in self.timetable_task_columns} for t in tasks],
+        }
+
+    def import_timetable(self, user_id: str, term: str, courses: List[Dict], tasks: List[Dict]) -> Dict:
+        """Persist a timetable import (courses + class tasks) in one transaction.
+
+        Calls the import_timetable SQL function (see supabase_schema.sql), which
+        replaces the previous import for (user_id, term). Returns its summary:
+        course_ids (incoming id -> stored id), courses_imported, courses_removed,
+        courses_kept (ids of courses missing from this import but kept because
+        they have assignments or tasks), tasks_imported and task_ids.
+        """
+        rows = self._timetable_rows(courses, tasks)
+        client = DBClient.connect()
+        res = client.rpc(
+            "import_timetable",
+            {"p_user_id": user_id, "p_term": term, "p_courses": rows["courses"], "p_tasks": rows["tasks"]},
+        ).execute()
+        return res.data or {}
+
+    def import_timetables(self, term: str, imports: List[Dict]) -> List[Dict]:
+        """import_timetable() for several users in one call.
+
+        imports are {"user_id", "courses", "tasks"}. Each user's import commits
+        or fails on its own. Returns, in order, {"user_id", "summary"} or
+        {"user_id", "error"}.
+        """
+        payload = [{"user_id": i["user_id"], **self._timetable_rows(i["courses"], i["tasks"])} for i in imports]
+        client = DBClient.connect()
+        res = client.rpc("import_timetables", {"p_term": term, "p_imports": payload}).execute()
+        return res.data or []
+
+    def fetch_canvas_courses(self, user_id: str) -> List[Dict]:
+        """The user's courses that were imported from Canvas (canvas_course_id set)."""
+        client = DBClient.connect()
+        res = (
+            client
+            .table(self.table)
+            .select("course_id,canvas_course_id,course_name,course_code,term")
+            .eq("user_id", user_id)
+            .not_.is_("canvas_course_id", "null")
+            .execute()
+        )
+        return res.data or []
+
+    def upsert_many(self, rows: List[Dict]) -> int:
+        """Insert or update Canvas courses by (user_id, canvas_course_id) in batched requests.
+
+        Conflicting on the Canvas id rather than course_id means a course that a
+        concurrent sync inserted first is updated, not inserted a second time.
+        """
+        return upsert_in_chunks(DBClient.connect(), self.table, rows, on_conflict="user_id,canvas_course_id")
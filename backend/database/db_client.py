@@ -1,20 +1,39 @@
 import os
-from supabase import create_client, Client
+import threading
+from typing import TYPE_CHECKING, Dict, Tuple
+
 from dotenv import load_dotenv
 
+if TYPE_CHECKING:
+    from supabase import Client
+
+ENV_PATH = os.path.join(os.path.dirname(__file__), "..", ".env")
+
 
 class DBClient:
-    """Centralized Supabase SQL client factory and context helpers."""
+    """Centralized Supabase SQL client factory and context helpers.
+
+    Clients are pooled per (url, key): every repository call in a worker shares
+    one Supabase client and therefore one HTTP connection pool, instead of
+    paying client construction and a fresh TLS handshake per query.
+    """
+
+    _clients: Dict[Tuple[str, str], "Client"] = {}
+    _lock = threading.Lock()
+    _env_loaded = False
 
     @staticmethod
     def connect():
-        """Create and return a Supabase SQL connection using env vars and optional .env file.
+        """Return the pooled Supabase SQL connection using env vars and optional .env file.
 
         Requires env vars:
         - SUPABASE_URL
         - SUPABASE_KEY
         """
-        load_dotenv(dotenv_path=os.path.join(os.path.dirname(__file__), "..", ".env"))
+        if not DBClient._env_loaded:
+            # Once per process: connect() runs on every repository call
+            load_dotenv(dotenv_path=ENV_PATH)
+            DBClient._env_loaded = True
 
         supabase_url = os.getenv("SUPABASE_URL")
         supabase_key = os.getenv("SUPABASE_KEY")
@@ -24,4 +43,32 @@ class DBClient:
                 "SUPABASE_URL and SUPABASE_KEY must be set"
             )
 
-        return create_client(supabase_url, supabase_key)
+        pool_key = (supabase_url, supabase_key)
+        client = DBClient._clients.get(pool_key)
+        if client is not None:
+            return client
+        with DBClient._lock:
+            client = DBClient._clients.get(pool_key)
+            if client is None:
+                # Imported here so processes that never touch the DB skip loading the SDK
+                from supabase import create_client
+                client = create_client(supabase_url, supabase_key)
+                # Build the REST client now so concurrent first use from
+                # several threads cannot race on its lazy initialisation.
+                _ = client.postgrest
+                DBClient._clients[pool_key] = client
+        return client
+
+    @staticmethod
+    def reset():
+        """Drop all pooled clients (closing their HTTP sessions where possible)."""
+        with DBClient._lock:
+            clients = list(DBClient._clients.values())
+            DBClient._clients.clear()
+        for client in clients:
+            session = getattr(client.postgrest, "session", None)
+            if session is not None:
+                try:
+                    session.close()
+                except Exception:
+                    pass
@@ -0,0 +1,57 @@
+from typing import Dict, Optional
+
+from .db_client import DBClient
+
+
+class JobsRepository:
+    """processing_jobs: background job state shared by every app worker."""
+
+    table = "processing_jobs"
+
+    columns = (
+        "job_id", "kind", "status", "progress", "result", "error",
+        "created_at", "started_at", "finished_at",
+    )
+
+    def insert(self, job: Dict) -> bool:
+        client = DBClient.connect()
+        res = client.table(self.table).insert(job).execute()
+        return bool(res.data)
+
+    def fetch_by_id(self, job_id: str) -> Optional[Dict]:
+        client = DBClient.connect()
+        res = (
+            client
+            .table(self.table)
+            .select(",".join(self.columns) + ",expires_at")
+            .eq("job_id", job_id)
+            .execute()
+        )
+        rows = res.data or []
+        return rows[0] if rows else None
+
+    def fetch_live_by_dedupe_key(self, dedupe_key: str, now: str) -> Optional[Dict]:
+        """The newest job with this key that has not failed or expired."""
+        client = DBClient.connect()
+        res = (
+            client
+            .table(self.table)
+            .select(",".join(self.columns))
+            .eq("dedupe_key", dedupe_key)
+            .neq("status", "failed")
+            .or_(f"expires_at.is.null,expires_at.gt.{now}")
+            .order("created_at", desc=True)
+            .limit(1)
+            .execute()
+        )
+        rows = res.data or []
+        return rows[0] if rows else None
+
+    def update(self, job_id: str, fields: Dict) -> bool:
+        client = DBClient.connect()
+        res = client.table(self.table).update(fields).eq("job_id", job_id).execute()
+        return bool(res.data)
+
+    def delete_expired(self, now: str) -> None:
+        client = DBClient.connect()
+        client.table(self.table).delete().lt("expires_at", now).execute()
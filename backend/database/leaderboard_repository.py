@@ -0,0 +1,18 @@
+from typing import Dict, Optional
+
+from .db_client import DBClient
+
+
+class LeaderboardRepository:
+    """Reads leaderboard_scores, which triggers keep current (see supabase_schema.sql)."""
+
+    def page(self, scope: str, limit: int, user_id: Optional[str] = None, radius: int = 2) -> Dict:
+        """{top: [{user_id, points}], around: [{user_id, points, rank}] or None} in one call."""
+        client = DBClient.connect()
+        res = client.rpc("leaderboard_page", {
+            "p_scope": scope,
+            "p_limit": limit,
+            "p_user_id": user_id,
+            "p_radius": radius,
+        }).execute()
+        return res.data or {"top": [], "around": None}
@@ -0,0 +1,54 @@
+import re
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+DEFAULT_PAGE_SIZE = 500
+
+
+def with_key_column(select: str, key: str) -> Tuple[str, bool]:
+    """Add the keyset column to a select() projection if it is missing.
+
+    Returns the projection and whether the column was added, i.e. whether
+    iter_pages should drop it from the rows it yields (drop_key).
+    """
+    top_level = re.sub(r"\([^()]*\)", "", select)
+    names = {name.strip() for name in top_level.split(",")}
+    if "*" in names or key in names:
+        return select, False
+    return f"{key},{select}", True
+
+
+def iter_pages(
+    build_query: Callable,
+    order_by: str,
+    page_size: int = DEFAULT_PAGE_SIZE,
+    transform: Optional[Callable[[List[Dict]], List[Dict]]] = None,
+    drop_key: bool = False,
+) -> Iterator[Dict]:
+    """Yield rows from a Supabase select one page at a time, in order_by order.
+
+    build_query must return a fresh filtered select builder on every call, and
+    order_by must be a unique column included in its projection (see
+    with_key_column). Pages are read by keyset: each one asks for the rows
+    after the last key seen (.gt(order_by, last).order(order_by).limit(n)), so
+    every page is an index range read however deep the scan is, and rows
+    written meanwhile are neither skipped nor repeated. At most page_size rows
+    are held in memory at once. transform is applied to each page (e.g. a
+    repository's _flatten) before its rows are yielded.
+    """
+    last = None
+    while True:
+        query = build_query()
+        if last is not None:
+            query = query.gt(order_by, last)
+        res = query.order(order_by).limit(page_size).execute()
+        rows = res.data or []
+        if rows:
+            last = rows[-1][order_by]
+        if drop_key:
+            rows = [{k: v for k, v in row.items() if k != order_by} for row in rows]
+        if transform is not None:
+            rows = transform(rows)
+        for row in rows:
+            yield row
+        if len(res.data or []) < page_size:
+            return
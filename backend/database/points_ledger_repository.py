@@ -0,0 +1,54 @@
+from typing import Dict, List
+
+from .bulk import upsert_in_chunks
+from .db_client import DBClient
+
+
+class PointsLedgerRepository:
+    table = "points_ledger"
+
+    columns = ("user_id", "delta", "reason", "source_id", "course_id", "created_at")
+
+    def append_many(self, entries: List[Dict]) -> int:
+        """Append ledger entries in batched requests.
+
+        An entry repeating (user_id, reason, source_id) is skipped, so a batch
+        that is retried after a partial failure is not counted twice.
+        """
+        rows = [{k: entry.get(k) for k in self.columns} for entry in entries]
+        return upsert_in_chunks(
+            DBClient.connect(), self.table, rows,
+            on_conflict="user_id,reason,source_id", ignore_duplicates=True,
+        )
+
+    def balance(self, user_id: str) -> int:
+        """Current points: users.total_points plus entries not yet compacted."""
+        client = DBClient.connect()
+        res = client.rpc("points_balance", {"p_user_id": user_id}).execute()
+        return int(res.data or 0)
+
+    def balances(self, user_ids: List[str]) -> Dict[str, int]:
+        """balance() for several users in one call; users that do not exist are left out."""
+        client = DBClient.connect()
+        res = client.rpc("points_balances", {"p_user_ids": list(user_ids)}).execute()
+        return {row["user_id"]: int(row["points"] or 0) for row in res.data or []}
+
+    def compact(self, limit: int = 50000) -> int:
+        """Fold up to `limit` entries into users.total_points; returns how many."""
+        client = DBClient.connect()
+        res = client.rpc("compact_points_ledger", {"p_limit": limit}).execute()
+        return int(res.data or 0)
+
+    def fetch_by_user(self, user_id: str, limit: int = 100) -> List[Dict]:
+        """A user's most recent entries, newest first."""
+        client = DBClient.connect()
+        res = (
+            client
+            .table(self.table)
+            .select("entry_id," + ",".join(self.columns))
+            .eq("user_id", user_id)
+            .order("created_at", desc=True)
+            .limit(limit)
+            .execute()
+        )
+        return res.data or []
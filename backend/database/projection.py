@@ -0,0 +1,46 @@
+from typing import Dict, List, Optional, Sequence, Tuple
+
+
+class InvalidFieldsError(ValueError):
+    """Raised when a requested field is not in a table's whitelist."""
+
+
+def build_select(
+    fields: Optional[str],
+    allowed: Sequence[str],
+    default: str,
+    embedded: Optional[Dict[str, Tuple[str, str]]] = None,
+) -> str:
+    """Turn a comma-separated `fields=` value into a Supabase select() projection.
+
+    allowed is the per-table whitelist of plain columns. embedded maps output
+    names that come from a joined table to (relation, column), e.g.
+    {"course_name": ("courses", "course_name")}; requested embedded fields are
+    grouped into one `relation(col,...)` clause. Returns default when no fields
+    were requested.
+    """
+    if not fields:
+        return default
+    embedded = embedded or {}
+    requested = [f.strip() for f in fields.split(",") if f.strip()]
+    if not requested:
+        return default
+
+    unknown = [f for f in requested if f not in allowed and f not in embedded]
+    if unknown:
+        valid = ", ".join(list(allowed) + list(embedded))
+        raise InvalidFieldsError(f"Unknown field(s): {', '.join(unknown)}. Allowed: {valid}")
+
+    columns: List[str] = []
+    relations: Dict[str, List[str]] = {}
+    for name in requested:
+        if name in embedded:
+            relation, column = embedded[name]
+            relation_columns = relations.setdefault(relation, [])
+            if column not in relation_columns:
+                relation_columns.append(column)
+        elif name not in columns:
+            columns.append(name)
+    for relation, relation_columns in relations.items():
+        columns.append(f"{relation}({','.join(relation_columns)})")
+    return ",".join(columns)
@@ -10,6 +10,11 @@ SET timezone = 'UTC';
 
 -- Drop tables in reverse order of dependencies (if you need to recreate)
 -- Uncomment these lines if you want to reset the database
+-- DROP TABLE IF EXISTS processing_jobs CASCADE;
+-- DROP TABLE IF EXISTS leaderboard_scores CASCADE;
+-- DROP TABLE IF EXISTS points_ledger CASCADE;
+-- DROP TABLE IF EXISTS canvas_sync_runs CASCADE;
+-- DROP TABLE IF EXISTS canvas_sync_cursors CASCADE;
 -- DROP TABLE IF EXISTS user_blind_boxes CASCADE;
 -- DROP TABLE IF EXISTS tasks CASCADE;
 -- DROP TABLE IF EXISTS blind_box_figures CASCADE;
@@ -139,3 +144,544 @@ CREATE TABLE IF NOT EXISTS user_blind_boxes (
   CONSTRAINT fk_ubb_figure FOREIGN KEY (awarded_figure_id)
     REFERENCES blind_box_figures(figure_id) ON DELETE SET NULL
 );
+
+-- 8) canvas_sync_cursors: per-user Canvas sync state, one row per synced list
+--    ("courses" or "course:<canvas_course_id>:assignments"). etag is the ETag of
+--    the list's first page, replayed as If-None-Match on the next sync.
+CREATE TABLE IF NOT EXISTS canvas_sync_cursors (
+  user_id VARCHAR(50) NOT NULL,
+  resource VARCHAR(150) NOT NULL,
+  etag TEXT,
+  page_count INTEGER NOT NULL DEFAULT 1,
+  last_updated_at TIMESTAMP WITH TIME ZONE,  -- newest updated_at seen in the list
+  synced_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT CURRENT_TIMESTAMP,
+  PRIMARY KEY (user_id, resource),
+  CONSTRAINT fk_cursors_user FOREIGN KEY (user_id)
+    REFERENCES users(user_id) ON DELETE CASCADE
+);
+
+-- 9) canvas_sync_runs: one row per user per background sync attempt
+--    (python -m app.workers.canvas_sync), for monitoring duration and churn
+CREATE TABLE IF NOT EXISTS canvas_sync_runs (
+  run_id VARCHAR(50) PRIMARY KEY,
+  user_id VARCHAR(50) NOT NULL,
+  canvas_domain VARCHAR(255),
+  shard INTEGER NOT NULL DEFAULT 0,
+  status VARCHAR(20) NOT NULL,               -- 'success' or 'error'
+  error TEXT,
+  started_at TIMESTAMP WITH TIME ZONE NOT NULL,
+  duration_ms INTEGER NOT NULL DEFAULT 0,
+  requests INTEGER NOT NULL DEFAULT 0,
+  not_modified INTEGER NOT NULL DEFAULT 0,
+  rows_changed INTEGER NOT NULL DEFAULT 0,
+  consecutive_failures INTEGER NOT NULL DEFAULT 0,
+  CONSTRAINT fk_sync_runs_user FOREIGN KEY (user_id)
+    REFERENCES users(user_id) ON DELETE CASCADE
+);
+CREATE INDEX IF NOT EXISTS idx_sync_runs_user_started ON canvas_sync_runs (user_id, started_at DESC);
+
+-- 10) points_ledger: append-only history of every points change. Entries are
+--     never edited; compact_points_ledger() folds them into users.total_points
+--     and flags them compacted, so a balance is total_points plus the
+--     (few) uncompacted entries. The unique key makes retried writes harmless.
+CREATE TABLE IF NOT EXISTS points_ledger (
+  entry_id BIGSERIAL PRIMARY KEY,
+  user_id VARCHAR(50) NOT NULL,
+  delta INTEGER NOT NULL,
+  reason VARCHAR(50) NOT NULL,      -- e.g. 'task_completed', 'assignment_completed', 'blind_box_purchase'
+  source_id VARCHAR(100),           -- task, assignment or purchase that caused it
+  course_id VARCHAR(50),
+  created_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT CURRENT_TIMESTAMP,
+  compacted BOOLEAN NOT NULL DEFAULT FALSE,
+  CONSTRAINT uq_points_ledger_source UNIQUE (user_id, reason, source_id),
+  CONSTRAINT fk_points_ledger_user FOREIGN KEY (user_id)
+    REFERENCES users(user_id) ON DELETE CASCADE
+);
+CREATE INDEX IF NOT EXISTS idx_points_ledger_pending ON points_ledger (user_id) WHERE NOT compacted;
+CREATE INDEX IF NOT EXISTS idx_points_ledger_user_created ON points_ledger (user_id, created_at DESC);
+CREATE INDEX IF NOT EXISTS idx_points_ledger_created ON points_ledger (created_at);
+
+-- 11) leaderboard_scores: one row per (board, user), kept current by the
+--     triggers below instead of being recomputed. scope is 'global',
+--     'weekly:<monday, YYYY-MM-DD>' or 'course:<course_code>' (courses are
+--     per-user rows, so course boards are keyed by the shared course_code).
+CREATE TABLE IF NOT EXISTS leaderboard_scores (
+  scope VARCHAR(120) NOT NULL,
+  user_id VARCHAR(50) NOT NULL,
+  points INTEGER NOT NULL DEFAULT 0,
+  PRIMARY KEY (scope, user_id),
+  CONSTRAINT fk_leaderboard_user FOREIGN KEY (user_id)
+    REFERENCES users(user_id) ON DELETE CASCADE
+);
+-- Top N is a range read of this index; a rank counts the entries above it
+CREATE INDEX IF NOT EXISTS idx_leaderboard_rank ON leaderboard_scores (scope, points DESC, user_id);
+
+-- 12) processing_jobs: background upload jobs (JOB_STORE=database), so any app
+--     worker can answer GET /api/jobs/<job_id>. expires_at is the TTL after
+--     creation, reset when the job finishes; expired rows are deleted by the
+--     next submit.
+CREATE TABLE IF NOT EXISTS processing_jobs (
+  job_id VARCHAR(50) PRIMARY KEY,
+  kind VARCHAR(50) NOT NULL,
+  status VARCHAR(20) NOT NULL,      -- 'queued', 'running', 'succeeded', 'failed'
+  progress REAL NOT NULL DEFAULT 0,
+  result JSONB,
+  error TEXT,
+  dedupe_key VARCHAR(200),
+  created_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT CURRENT_TIMESTAMP,
+  started_at TIMESTAMP WITH TIME ZONE,
+  finished_at TIMESTAMP WITH TIME ZONE,
+  expires_at TIMESTAMP WITH TIME ZONE
+);
+CREATE INDEX IF NOT EXISTS idx_processing_jobs_dedupe ON processing_jobs (dedupe_key, created_at DESC);
+CREATE INDEX IF NOT EXISTS idx_processing_jobs_expires ON processing_jobs (expires_at);
+
+-- Canvas ids of synced rows (courses.canvas_course_id already exists)
+ALTER TABLE assignments ADD COLUMN IF NOT EXISTS canvas_assignment_id VARCHAR(100);
+
+-- Canvas ids are unique per user / course, so the sync route and the sync
+-- worker can upsert on them concurrently without inserting a row twice.
+-- Courses not from Canvas (timetable imports) store NULL, which the unique
+-- index does not compare; older rows stored ''.
+UPDATE courses SET canvas_course_id = NULL WHERE canvas_course_id = '';
+UPDATE assignments SET canvas_assignment_id = NULL WHERE canvas_assignment_id = '';
+
+-- Merge rows duplicated by earlier concurrent syncs into the oldest copy
+CREATE TEMP TABLE canvas_course_dups AS
+SELECT course_id, keep_id
+FROM (
+  SELECT course_id,
+         first_value(course_id) OVER (PARTITION BY user_id, canvas_course_id ORDER BY created_at, course_id) AS keep_id
+  FROM courses
+  WHERE canvas_course_id IS NOT NULL
+) d
+WHERE course_id <> keep_id;
+UPDATE assignments a SET course_id = d.keep_id FROM canvas_course_dups d WHERE a.course_id = d.course_id;
+UPDATE tasks t SET course_id = d.keep_id FROM canvas_course_dups d WHERE t.course_id = d.course_id;
+DELETE FROM courses c USING canvas_course_dups d WHERE c.course_id = d.course_id;
+DROP TABLE canvas_course_dups;
+
+CREATE TEMP TABLE canvas_assignment_dups AS
+SELECT assignment_id, keep_id
+FROM (
+  SELECT assignment_id,
+         first_value(assignment_id) OVER (PARTITION BY course_id, canvas_assignment_id ORDER BY created_at, assignment_id) AS keep_id
+  FROM assignments
+  WHERE canvas_assignment_id IS NOT NULL
+) d
+WHERE assignment_id <> keep_id;
+UPDATE tasks t SET assignment_id = d.keep_id FROM canvas_assignment_dups d WHERE t.assignment_id = d.assignment_id;
+DELETE FROM assignments a USING canvas_assignment_dups d WHERE a.assignment_id = d.assignment_id;
+DROP TABLE canvas_assignment_dups;
+
+-- Replaces the earlier non-unique indexes of the same columns
+DROP INDEX IF EXISTS idx_assignments_canvas;
+DROP INDEX IF EXISTS idx_courses_canvas;
+CREATE UNIQUE INDEX IF NOT EXISTS uq_assignments_canvas ON assignments (course_id, canvas_assignment_id);
+CREATE UNIQUE INDEX IF NOT EXISTS uq_courses_canvas ON courses (user_id, canvas_course_id);
+
+-- ============================================================================
+-- FUNCTIONS
+-- ============================================================================
+
+CREATE INDEX IF NOT EXISTS idx_courses_user_term ON courses (user_id, term);
+
+-- import_timetable: persist one timetable import (courses + class tasks) in a
+-- single transaction. Idempotent per (user, term): courses imported earlier
+-- for the same term (no canvas_course_id) are matched by course_code and keep
+-- their course_id, so assignments attached to them survive a re-import. Their
+-- incomplete class tasks are replaced. Completed class sessions are kept and
+-- not re-created. A course missing from the new import is removed only if
+-- nothing else hangs off it; one with assignments or remaining tasks
+-- (completed sessions, micro-tasks) is kept and listed in courses_kept, since
+-- deleting it would cascade to the assignments.
+-- p_courses / p_tasks are the arrays returned by /api/timetable/process; task
+-- course_ids refer to p_courses ids and are remapped to the kept ids.
+CREATE OR REPLACE FUNCTION import_timetable(
+  p_user_id VARCHAR,
+  p_term VARCHAR,
+  p_courses JSONB,
+  p_tasks JSONB
+) RETURNS JSONB
+LANGUAGE plpgsql
+AS $$
+DECLARE
+  v_id_map JSONB;
+  v_tasks_imported INTEGER;
+  v_courses_removed INTEGER;
+  v_courses_kept JSONB;
+  v_task_ids JSONB;
+BEGIN
+  -- Serialize concurrent imports for the same user and term
+  PERFORM pg_advisory_xact_lock(hashtext(p_user_id || '/' || COALESCE(p_term, '')));
+
+  -- Incoming course_id -> course_id to store (an existing one with the same code wins)
+  SELECT COALESCE(jsonb_object_agg(m.incoming_id, m.course_id), '{}'::jsonb)
+  INTO v_id_map
+  FROM (
+    SELECT DISTINCT ON (i.course_id)
+      i.course_id AS incoming_id,
+      COALESCE(e.course_id, i.course_id) AS course_id
+    FROM jsonb_to_recordset(p_courses) AS i(course_id VARCHAR, course_code VARCHAR)
+    LEFT JOIN courses e
+      ON e.user_id = p_user_id
+     AND e.term IS NOT DISTINCT FROM p_term
+     AND e.course_code = i.course_code
+     AND COALESCE(e.canvas_course_id, '') = ''
+    ORDER BY i.course_id, e.created_at
+  ) m;
+
+  DELETE FROM tasks t
+  USING courses c
+  WHERE t.course_id = c.course_id
+    AND t.type = 'class'
+    AND NOT t.is_completed
+    AND c.user_id = p_user_id
+    AND c.term IS NOT DISTINCT FROM p_term
+    AND COALESCE(c.canvas_course_id, '') = '';
+
+  WITH dropped AS (
+    SELECT c.course_id,
+           EXISTS (SELECT 1 FROM assignments a WHERE a.course_id = c.course_id)
+             OR EXISTS (SELECT 1 FROM tasks t WHERE t.course_id = c.course_id) AS in_use
+    FROM courses c
+    WHERE c.user_id = p_user_id
+      AND c.term IS NOT DISTINCT FROM p_term
+      AND COALESCE(c.canvas_course_id, '') = ''
+      AND c.course_id NOT IN (SELECT value FROM jsonb_each_text(v_id_map))
+  ), removed AS (
+    DELETE FROM courses c
+    USING dropped d
+    WHERE c.course_id = d.course_id AND NOT d.in_use
+    RETURNING c.course_id
+  )
+  SELECT (SELECT count(*) FROM removed),
+         (SELECT COALESCE(jsonb_agg(course_id ORDER BY course_id), '[]'::jsonb) FROM dropped WHERE in_use)
+  INTO v_courses_removed, v_courses_kept;
+
+  INSERT INTO courses (course_id, user_id, course_name, course_code, canvas_course_id, date_imported_at, term, color)
+  SELECT v_id_map ->> i.course_id, p_user_id, i.course_name, i.course_code, NULL, CURRENT_TIMESTAMP, p_term, i.color
+  FROM jsonb_to_recordset(p_courses) AS i(course_id VARCHAR, course_name VARCHAR, course_code VARCHAR, color VARCHAR)
+  ON CONFLICT (course_id) DO UPDATE
+    SET course_name = EXCLUDED.course_name,
+        date_imported_at = EXCLUDED.date_imported_at,
+        updated_at = CURRENT_TIMESTAMP;
+
+  WITH inserted AS (
+    INSERT INTO tasks (task_id, user_id, course_id, description, type, scheduled_start_at, scheduled_end_at, is_completed, reward_points)
+    SELECT t.task_id, p_user_id, v_id_map ->> t.course_id, t.description, t.type,
+           t.scheduled_start_at, t.scheduled_end_at, FALSE, COALESCE(t.reward_points, 0)
+    FROM jsonb_to_recordset(p_tasks) AS t(
+      task_id VARCHAR, course_id VARCHAR, description TEXT, type VARCHAR,
+      scheduled_start_at TIMESTAMP WITH TIME ZONE, scheduled_end_at TIMESTAMP WITH TIME ZONE, reward_points INTEGER
+    )
+    WHERE NOT EXISTS (
+      SELECT 1 FROM tasks done
+      WHERE done.course_id = v_id_map ->> t.course_id
+        AND done.type = t.type
+        AND done.scheduled_start_at = t.scheduled_start_at
+    )
+    RETURNING task_id
+  )
+  SELECT count(*), COALESCE(jsonb_agg(task_id), '[]'::jsonb) INTO v_tasks_imported, v_task_ids FROM inserted;
+
+  RETURN jsonb_build_object(
+    'course_ids', v_id_map,
+    'courses_imported', jsonb_array_length(COALESCE(p_courses, '[]'::jsonb)),
+    'courses_removed', v_courses_removed,
+    'courses_kept', v_courses_kept,
+    'tasks_imported', v_tasks_imported,
+    'task_ids', v_task_ids
+  );
+END;
+$$;
+
+-- import_timetables: import_timetable() for many users in one call (bulk
+-- /api/timetable/process-batch). p_imports is a JSON array of
+-- {user_id, courses, tasks}. Each import runs in its own subtransaction, so a
+-- failing user does not roll back the others. Returns a JSON array in input
+-- order of {user_id, summary} or {user_id, error}.
+CREATE OR REPLACE FUNCTION import_timetables(
+  p_term VARCHAR,
+  p_imports JSONB
+) RETURNS JSONB
+LANGUAGE plpgsql
+AS $$
+DECLARE
+  v_import JSONB;
+  v_results JSONB := '[]'::jsonb;
+BEGIN
+  FOR i IN 0 .. COALESCE(jsonb_array_length(p_imports), 0) - 1
+  LOOP
+    v_import := p_imports -> i;
+    BEGIN
+      v_results := v_results || jsonb_build_array(jsonb_build_object(
+        'user_id', v_import ->> 'user_id',
+        'summary', import_timetable(
+          v_import ->> 'user_id', p_term,
+          COALESCE(v_import -> 'courses', '[]'::jsonb), COALESCE(v_import -> 'tasks', '[]'::jsonb)
+        )
+      ));
+    EXCEPTION WHEN OTHERS THEN
+      v_results := v_results || jsonb_build_array(jsonb_build_object(
+        'user_id', v_import ->> 'user_id', 'error', SQLERRM
+      ));
+    END;
+  END LOOP;
+  RETURN v_results;
+END;
+$$;
+
+-- Fold up to p_limit uncompacted ledger entries into users.total_points, in
+-- one transaction (a concurrent points_balance() sees all of it or none).
+-- Returns the number of entries compacted; 0 if another compaction is running.
+CREATE OR REPLACE FUNCTION compact_points_ledger(p_limit INTEGER DEFAULT 50000)
+RETURNS INTEGER
+LANGUAGE plpgsql
+AS $$
+DECLARE
+  v_entries INTEGER;
+BEGIN
+  IF NOT pg_try_advisory_xact_lock(hashtext('compact_points_ledger')) THEN
+    RETURN 0;
+  END IF;
+  -- Tells leaderboard_apply_total_points() these points are already on the boards
+  PERFORM set_config('achievo.compacting', 'on', TRUE);
+
+  WITH batch AS (
+    SELECT entry_id
+    FROM points_ledger
+    WHERE NOT compacted
+    ORDER BY entry_id
+    LIMIT p_limit
+    FOR UPDATE SKIP LOCKED
+  ), marked AS (
+    UPDATE points_ledger l
+    SET compacted = TRUE
+    FROM batch b
+    WHERE l.entry_id = b.entry_id
+    RETURNING l.user_id, l.delta
+  ), totals AS (
+    SELECT user_id, SUM(delta) AS delta FROM marked GROUP BY user_id
+  ), applied AS (
+    UPDATE users u
+    SET total_points = COALESCE(u.total_points, 0) + t.delta
+    FROM totals t
+    WHERE u.user_id = t.user_id
+    RETURNING u.user_id
+  )
+  SELECT COUNT(*) INTO v_entries FROM marked;
+  PERFORM set_config('achievo.compacting', 'off', TRUE);
+
+  -- Weekly boards older than last week are no longer served
+  DELETE FROM leaderboard_scores
+  WHERE scope >= 'weekly:' AND scope < leaderboard_week_scope(now() - INTERVAL '7 days');
+
+  RETURN v_entries;
+END;
+$$;
+
+-- Current points of a user: compacted total plus entries not yet compacted
+CREATE OR REPLACE FUNCTION points_balance(p_user_id VARCHAR)
+RETURNS INTEGER
+LANGUAGE sql
+STABLE
+AS $$
+  SELECT (
+    COALESCE((SELECT total_points FROM users WHERE user_id = p_user_id), 0)
+    + COALESCE((SELECT SUM(delta) FROM points_ledger WHERE user_id = p_user_id AND NOT compacted), 0)
+  )::INTEGER;
+$$;
+
+-- points_balance() for a list of users (e.g. one page of GET /db/users)
+CREATE OR REPLACE FUNCTION points_balances(p_user_ids VARCHAR[])
+RETURNS TABLE (user_id VARCHAR, points INTEGER)
+LANGUAGE sql
+STABLE
+AS $$
+  SELECT u.user_id, (COALESCE(u.total_points, 0) + COALESCE(p.delta, 0))::INTEGER
+  FROM users u
+  LEFT JOIN (
+    SELECT l.user_id, SUM(l.delta) AS delta
+    FROM points_ledger l
+    WHERE l.user_id = ANY(p_user_ids) AND NOT l.compacted
+    GROUP BY l.user_id
+  ) p ON p.user_id = u.user_id
+  WHERE u.user_id = ANY(p_user_ids);
+$$;
+
+-- ============================================================================
+-- LEADERBOARDS (app/services/leaderboard.py)
+-- ============================================================================
+DROP FUNCTION IF EXISTS leaderboard_balances();
+DROP FUNCTION IF EXISTS leaderboard_ledger_totals(TIMESTAMP WITH TIME ZONE);
+
+CREATE OR REPLACE FUNCTION leaderboard_week_scope(p_at TIMESTAMP WITH TIME ZONE)
+RETURNS VARCHAR
+LANGUAGE sql
+IMMUTABLE
+AS $$
+  SELECT 'weekly:' || to_char(date_trunc('week', p_at AT TIME ZONE 'UTC'), 'YYYY-MM-DD');
+$$;
+
+-- New ledger entries count toward the global, weekly and course boards.
+-- Statement-level, so one batched append is one upsert per (board, user).
+CREATE OR REPLACE FUNCTION leaderboard_apply_ledger()
+RETURNS TRIGGER
+LANGUAGE plpgsql
+AS $$
+BEGIN
+  INSERT INTO leaderboard_scores (scope, user_id, points)
+  SELECT b.scope, b.user_id, SUM(b.delta)
+  FROM (
+    SELECT 'global' AS scope, e.user_id, e.delta FROM new_entries e
+    UNION ALL
+    SELECT leaderboard_week_scope(e.created_at), e.user_id, e.delta FROM new_entries e
+    UNION ALL
+    SELECT 'course:' || COALESCE(c.course_code, e.course_id), e.user_id, e.delta
+    FROM new_entries e
+    LEFT JOIN courses c ON c.course_id = e.course_id
+    WHERE e.course_id IS NOT NULL
+  ) b
+  GROUP BY b.scope, b.user_id
+  ON CONFLICT (scope, user_id) DO UPDATE SET points = leaderboard_scores.points + EXCLUDED.points;
+  RETURN NULL;
+END;
+$$;
+
+DROP TRIGGER IF EXISTS trg_points_ledger_leaderboard ON points_ledger;
+CREATE TRIGGER trg_points_ledger_leaderboard
+  AFTER INSERT ON points_ledger
+  REFERENCING NEW TABLE AS new_entries
+  FOR EACH STATEMENT EXECUTE FUNCTION leaderboard_apply_ledger();
+
+-- Direct total_points changes (ledger disabled, or an admin edit) move only
+-- the global board; they carry no course or time for the other boards, which
+-- the API therefore refuses without the ledger. compact_points_ledger() only moves points the ledger trigger
+-- already counted, so it flags itself and is skipped.
+CREATE OR REPLACE FUNCTION leaderboard_apply_total_points()
+RETURNS TRIGGER
+LANGUAGE plpgsql
+AS $$
+DECLARE
+  v_delta INTEGER;
+BEGIN
+  IF current_setting('achievo.compacting', TRUE) = 'on' THEN
+    RETURN NULL;
+  END IF;
+  v_delta := COALESCE(NEW.total_points, 0);
+  IF TG_OP = 'UPDATE' THEN
+    v_delta := v_delta - COALESCE(OLD.total_points, 0);
+  END IF;
+  IF TG_OP = 'INSERT' OR v_delta <> 0 THEN
+    INSERT INTO leaderboard_scores (scope, user_id, points)
+    VALUES ('global', NEW.user_id, v_delta)
+    ON CONFLICT (scope, user_id) DO UPDATE SET points = leaderboard_scores.points + EXCLUDED.points;
+  END IF;
+  RETURN NULL;
+END;
+$$;
+
+DROP TRIGGER IF EXISTS trg_users_leaderboard ON users;
+CREATE TRIGGER trg_users_leaderboard
+  AFTER INSERT OR UPDATE OF total_points ON users
+  FOR EACH ROW EXECUTE FUNCTION leaderboard_apply_total_points();
+
+-- Top p_limit of a board and, with p_user_id, that user's neighbours
+-- (p_radius each side) with competition ranks (ties share a rank: 1, 2, 2, 4).
+-- A rank is a count over idx_leaderboard_rank of the entries above it.
+CREATE OR REPLACE FUNCTION leaderboard_page(
+  p_scope VARCHAR,
+  p_limit INTEGER,
+  p_user_id VARCHAR DEFAULT NULL,
+  p_radius INTEGER DEFAULT 2
+)
+RETURNS JSONB
+LANGUAGE plpgsql
+STABLE
+AS $$
+DECLARE
+  v_top JSONB;
+  v_points INTEGER;
+  v_around JSONB;
+BEGIN
+  SELECT COALESCE(jsonb_agg(jsonb_build_object('user_id', t.user_id, 'points', t.points) ORDER BY t.points DESC, t.user_id), '[]'::jsonb)
+  INTO v_top
+  FROM (
+    SELECT user_id, points FROM leaderboard_scores
+    WHERE scope = p_scope
+    ORDER BY points DESC, user_id
+    LIMIT p_limit
+  ) t;
+
+  IF p_user_id IS NOT NULL THEN
+    SELECT points INTO v_points FROM leaderboard_scores WHERE scope = p_scope AND user_id = p_user_id;
+    IF FOUND THEN
+      SELECT jsonb_agg(jsonb_build_object(
+               'user_id', n.user_id,
+               'points', n.points,
+               'rank', 1 + (SELECT COUNT(*) FROM leaderboard_scores s WHERE s.scope = p_scope AND s.points > n.points)
+             ) ORDER BY n.points DESC, n.user_id)
+      INTO v_around
+      FROM (
+        (SELECT user_id, points FROM leaderboard_scores
+         WHERE scope = p_scope AND (points > v_points OR (points = v_points AND user_id < p_user_id))
+         ORDER BY points, user_id DESC
+         LIMIT p_radius)
+        UNION ALL
+        (SELECT user_id, points FROM leaderboard_scores
+         WHERE scope = p_scope AND (points < v_points OR (points = v_points AND user_id >= p_user_id))
+         ORDER BY points DESC, user_id
+         LIMIT p_radius + 1)
+      ) n;
+    END IF;
+  END IF;
+
+  RETURN jsonb_build_object('top', v_top, 'around', v_around);
+END;
+$$;
+
+-- Recompute every board from users and points_ledger, e.g. to backfill or
+-- after editing ledger rows by hand. Blocks points writes while it runs.
+CREATE OR REPLACE FUNCTION rebuild_leaderboard_scores()
+RETURNS INTEGER
+LANGUAGE plpgsql
+AS $$
+DECLARE
+  v_rows INTEGER;
+BEGIN
+  LOCK TABLE users, points_ledger IN SHARE MODE;
+  DELETE FROM leaderboard_scores;
+  INSERT INTO leaderboard_scores (scope, user_id, points)
+  SELECT 'global', u.user_id, (COALESCE(u.total_points, 0) + COALESCE(p.delta, 0))::INTEGER
+  FROM users u
+  LEFT JOIN (
+    SELECT l.user_id, SUM(l.delta) AS delta
+    FROM points_ledger l
+    WHERE NOT l.compacted
+    GROUP BY l.user_id
+  ) p ON p.user_id = u.user_id
+  UNION ALL
+  SELECT leaderboard_week_scope(l.created_at), l.user_id, SUM(l.delta)::INTEGER
+  FROM points_ledger l
+  WHERE l.created_at >= date_trunc('week', now() AT TIME ZONE 'UTC') AT TIME ZONE 'UTC'
+  GROUP BY 1, l.user_id
+  UNION ALL
+  SELECT 'course:' || COALESCE(c.course_code, l.course_id), l.user_id, SUM(l.delta)::INTEGER
+  FROM points_ledger l
+  LEFT JOIN courses c ON c.course_id = l.course_id
+  WHERE l.course_id IS NOT NULL
+  GROUP BY 1, l.user_id;
+  GET DIAGNOSTICS v_rows = ROW_COUNT;
+  RETURN v_rows;
+END;
+$$;
+
+-- Backfill on first install; afterwards the triggers keep the boards current
+DO $$
+BEGIN
+  IF NOT EXISTS (SELECT 1 FROM leaderboard_scores) THEN
+    PERFORM rebuild_leaderboard_scores();
+  END IF;
+END;
+$$;
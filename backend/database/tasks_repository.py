@@ -1,7 +1,9 @@
-from typing import List, Dict, Optional
+from typing import Iterator, List, Dict, Optional
 from datetime import datetime
 
 from .db_client import DBClient
+from .pagination import DEFAULT_PAGE_SIZE, iter_pages, with_key_column
+from .projection import build_select
 
 
 class TasksRepository:
@@ -13,24 +15,44 @@ class TasksRepository:
         "courses(course_name,color)"
     )
 
+    columns = (
+        "task_id", "user_id", "assignment_id", "course_id", "description", "type",
+        "scheduled_start_at", "scheduled_end_at", "is_completed", "completion_date_at",
+        "is_last_task", "reward_points",
+    )
+
+    # Output fields served from the embedded courses(...) join
+    embedded_columns = {
+        "course_name": ("courses", "course_name"),
+        "course_color": ("courses", "color"),
+    }
+
+    def _select(self, fields: Optional[str]) -> str:
+        return build_select(fields, self.columns, self.base_select, self.embedded_columns)
+
     def _flatten(self, rows: List[Dict]) -> List[Dict]:
-        """Flatten nested course object (if present) into course_name/course_color keys."""
+        """Flatten nested course object (if present) into course_name/course_color keys.
+
+        Only keys present in the embedded object are copied, so a sparse
+        projection such as courses(color) yields course_color alone.
+        """
         flattened = []
         for r in rows:
             course_info = r.get("courses")
+            if isinstance(course_info, list):
+                course_info = course_info[0] if course_info else None
             if isinstance(course_info, dict):
-                r["course_name"] = course_info.get("course_name")
-                r["course_color"] = course_info.get("color")
-            elif isinstance(course_info, list) and course_info:
-                r["course_name"] = course_info[0].get("course_name")
-                r["course_color"] = course_info[0].get("color")
+                if "course_name" in course_info:
+                    r["course_name"] = course_info.get("course_name")
+                if "color" in course_info:
+                    r["course_color"] = course_info.get("color")
             r.pop("courses", None)
             flattened.append(r)
         return flattened
 
-    def fetch_all(self) -> List[Dict]:
+    def fetch_all(self, fields: Optional[str] = None) -> List[Dict]:
         client = DBClient.connect()
-        res = client.table(self.table).select(self.base_select).execute()
+        res = client.table(self.table).select(self._select(fields)).execute()
         return self._flatten(res.data or [])
 
     def fetch_by_user(
@@ -40,9 +62,10 @@ class TasksRepository:
         scheduled_end_at: Optional[str] = None,
         assignment_id: Optional[str] = None,
         is_completed: Optional[bool] = None,
+        fields: Optional[str] = None,
     ) -> List[Dict]:
         client = DBClient.connect()
-        query = client.table(self.table).select(self.base_select).eq("user_id", user_id)
+        query = client.table(self.table).select(self._select(fields)).eq("user_id", user_id)
         if scheduled_start_at:
             query = query.gte("scheduled_start_at", scheduled_start_at)
         if scheduled_end_at:
@@ -51,9 +74,59 @@ class TasksRepository:
             query = query.eq("assignment_id", assignment_id)
         if is_completed is not None:
             query = query.eq("is_completed", is_completed)
-        res = query.execute()
+        res = query.order("task_id").execute()   # same order as iter_by_user
+        return self._flatten(res.data or [])
+
+    def fetch_overlapping(
+        self,
+        user_id: str,
+        window_start: str,
+        window_end: str,
+        is_completed: Optional[bool] = None,
+        fields: Optional[str] = None,
+    ) -> List[Dict]:
+        """A user's tasks whose [scheduled_start_at, scheduled_end_at) overlaps the window."""
+        client = DBClient.connect()
+        query = (
+            client.table(self.table).select(self._select(fields)).eq("user_id", user_id)
+            .lt("scheduled_start_at", window_end)
+            .gt("scheduled_end_at", window_start)
+        )
+        if is_completed is not None:
+            query = query.eq("is_completed", is_completed)
+        res = query.order("scheduled_start_at").execute()
         return self._flatten(res.data or [])
 
+    def iter_by_user(
+        self,
+        user_id: str,
+        scheduled_start_at: Optional[str] = None,
+        scheduled_end_at: Optional[str] = None,
+        assignment_id: Optional[str] = None,
+        is_completed: Optional[bool] = None,
+        fields: Optional[str] = None,
+        page_size: int = DEFAULT_PAGE_SIZE,
+    ) -> Iterator[Dict]:
+        """Streaming counterpart of fetch_by_user: yields flattened rows page by page."""
+        client = DBClient.connect()
+        select, drop_key = with_key_column(self._select(fields), "task_id")
+
+        def build_query():
+            query = client.table(self.table).select(select).eq("user_id", user_id)
+            if scheduled_start_at:
+                query = query.gte("scheduled_start_at", scheduled_start_at)
+            if scheduled_end_at:
+                query = query.lte("scheduled_end_at", scheduled_end_at)
+            if assignment_id:
+                query = query.eq("assignment_id", assignment_id)
+            if is_completed is not None:
+                query = query.eq("is_completed", is_completed)
+            return query
+
+        return iter_pages(
+            build_query, order_by="task_id", page_size=page_size, transform=self._flatten, drop_key=drop_key,
+        )
+
     def fetch_uncompleted_by_assignment(self, assignment_id: str) -> List[Dict]:
         client = DBClient.connect()
         res = (
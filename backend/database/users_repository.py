@@ -1,24 +1,43 @@
-from typing import List, Dict, Optional
+from typing import Iterator, List, Dict, Optional
 
 from .db_client import DBClient
+from .pagination import DEFAULT_PAGE_SIZE, iter_pages, with_key_column
+from .projection import build_select
 
 
 class UsersRepository:
     table = "users"
 
-    def fetch_all(self) -> List[Dict]:
+    # Columns readable through the API; password and canvas_api_key are never exposed
+    public_columns = (
+        "user_id", "email", "canvas_username", "canvas_domain", "profile_picture",
+        "total_points", "current_level", "last_activity_at",
+    )
+    base_select = ",".join(public_columns)
+
+    def fetch_all(self, fields: Optional[str] = None) -> List[Dict]:
         """Fetch all users via Supabase."""
         client = DBClient.connect()
         res = (
             client
             .table(self.table)
-            .select(
-                "user_id,email,canvas_username,canvas_domain,profile_picture,total_points,current_level,last_activity_at,password"
-            )
+            .select(build_select(fields, self.public_columns, self.base_select))
+            .order("user_id")   # same order as iter_all
             .execute()
         )
         return res.data or []
 
+    def iter_all(self, fields: Optional[str] = None, page_size: int = DEFAULT_PAGE_SIZE) -> Iterator[Dict]:
+        """Yield all users page by page (for streaming/bulk export)."""
+        client = DBClient.connect()
+        select, drop_key = with_key_column(build_select(fields, self.public_columns, self.base_select), "user_id")
+        return iter_pages(
+            lambda: client.table(self.table).select(select),
+            order_by="user_id",
+            page_size=page_size,
+            drop_key=drop_key,
+        )
+
     def create(
         self,
         user_id: str,
@@ -52,15 +71,13 @@ class UsersRepository:
         )
         return True
 
-    def fetch_by_id(self, user_id: str) -> Optional[Dict]:
+    def fetch_by_id(self, user_id: str, fields: Optional[str] = None) -> Optional[Dict]:
         """Return a single user dict by user_id, or None if not found."""
         client = DBClient.connect()
         res = (
             client
             .table(self.table)
-            .select(
-                "user_id,email,canvas_username,canvas_domain,profile_picture,total_points,current_level,last_activity_at,password"
-            )
+            .select(build_select(fields, self.public_columns, self.base_select))
             .eq("user_id", user_id)
             .execute()
         )
@@ -68,7 +85,10 @@ class UsersRepository:
         return rows[0] if rows else None
 
     def fetch_by_email(self, email: str) -> Optional[Dict]:
-        """Return a single user dict by email, or None if not found."""
+        """Return a single user dict by email, or None if not found.
+
+        Includes the password column; only used for authentication.
+        """
         client = DBClient.connect()
         res = (
             client
@@ -82,6 +102,36 @@ class UsersRepository:
         rows = res.data or []
         return rows[0] if rows else None
 
+    def fetch_canvas_credentials(self, user_id: str) -> Optional[Dict]:
+        """Return {user_id, canvas_domain, canvas_api_key} for a user, or None if not found.
+
+        Includes the API key; only used server-side by the Canvas sync.
+        """
+        client = DBClient.connect()
+        res = (
+            client
+            .table(self.table)
+            .select("user_id,canvas_domain,canvas_api_key")
+            .eq("user_id", user_id)
+            .execute()
+        )
+        rows = res.data or []
+        return rows[0] if rows else None
+
+    def iter_canvas_users(self, page_size: int = DEFAULT_PAGE_SIZE) -> Iterator[Dict]:
+        """Yield {user_id, canvas_domain} for every user with Canvas credentials."""
+        client = DBClient.connect()
+        return iter_pages(
+            lambda: (
+                client.table(self.table)
+                .select("user_id,canvas_domain")
+                .not_.is_("canvas_domain", "null")
+                .not_.is_("canvas_api_key", "null")
+            ),
+            order_by="user_id",
+            page_size=page_size,
+        )
+
     def update_points(self, user_id: str, points_delta: int) -> bool:
         """Increment user's total_points by points_delta (can be negative)."""
         client = DBClient.connect()